@@ -0,0 +1,60 @@
+"""Add leaderboard_entries and leaderboard_builds tables
+
+Revision ID: bcd890efg123
+Revises: yza567bcd890
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'bcd890efg123'
+down_revision: Union[str, None] = 'yza567bcd890'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Create leaderboard_entries table
+    op.create_table(
+        'leaderboard_entries',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('scope', sa.String(length=255), nullable=False),
+        sa.Column('category_id', sa.Integer(), nullable=True),
+        sa.Column('school_id', sa.Integer(), nullable=False),
+        sa.Column('score', sa.Float(), nullable=False),
+        sa.Column('rating_count', sa.Integer(), nullable=False),
+        sa.Column('rating_sum', sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(['school_id'], ['schools.id'], ),
+        sa.ForeignKeyConstraint(['category_id'], ['rating_categories.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_leaderboard_entries_id'), 'leaderboard_entries', ['id'], unique=False)
+    op.create_index(op.f('ix_leaderboard_entries_school_id'), 'leaderboard_entries', ['school_id'], unique=False)
+    op.create_index('ix_leaderboard_entries_board_score', 'leaderboard_entries', ['scope', 'category_id', 'score'], unique=False)
+
+    # Create leaderboard_builds table
+    # Left empty: rankings use the rating rollup until POST /admin/ratings/rebuild-stats builds the leaderboards
+    op.create_table(
+        'leaderboard_builds',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('size', sa.Integer(), nullable=False),
+        sa.Column('min_reviews', sa.Integer(), nullable=False),
+        sa.Column('entries', sa.Integer(), nullable=False),
+        sa.Column('built_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_leaderboard_builds_id'), 'leaderboard_builds', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_leaderboard_builds_id'), table_name='leaderboard_builds')
+    op.drop_table('leaderboard_builds')
+    op.drop_index('ix_leaderboard_entries_board_score', table_name='leaderboard_entries')
+    op.drop_index(op.f('ix_leaderboard_entries_school_id'), table_name='leaderboard_entries')
+    op.drop_index(op.f('ix_leaderboard_entries_id'), table_name='leaderboard_entries')
+    op.drop_table('leaderboard_entries')
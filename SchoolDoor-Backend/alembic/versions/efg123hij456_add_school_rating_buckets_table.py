@@ -0,0 +1,64 @@
+"""Add school_rating_buckets trend rollup table
+
+Revision ID: efg123hij456
+Revises: bcd890efg123
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'efg123hij456'
+down_revision: Union[str, None] = 'bcd890efg123'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Create school_rating_buckets table
+    buckets_table = op.create_table(
+        'school_rating_buckets',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('school_id', sa.Integer(), nullable=False),
+        sa.Column('period', sa.String(length=10), nullable=False),
+        sa.Column('bucket_start', sa.Date(), nullable=False),
+        sa.Column('review_count', sa.Integer(), nullable=False),
+        sa.Column('rating_sum', sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(['school_id'], ['schools.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_school_rating_buckets_id'), 'school_rating_buckets', ['id'], unique=False)
+    op.create_index('ix_school_rating_buckets_school_period_start', 'school_rating_buckets', ['school_id', 'period', 'bucket_start'], unique=False)
+
+    # Backfill from approved reviews, bucketed in Python (date truncation differs between SQLite and PostgreSQL)
+    totals = defaultdict(lambda: [0, 0.0])
+    reviews = op.get_bind().execute(sa.text(
+        "SELECT school_id, created_at, overall_rating FROM reviews WHERE status = 'approved' AND created_at IS NOT NULL"
+    ))
+    for school_id, created_at, rating in reviews:
+        if isinstance(created_at, str):
+            created_at = datetime.fromisoformat(created_at)
+        if created_at.tzinfo is not None:
+            created_at = created_at.astimezone(timezone.utc)
+        day = created_at.date()
+        for period, start in (("month", day.replace(day=1)), ("week", day - timedelta(days=day.weekday()))):
+            bucket = totals[(school_id, period, start)]
+            bucket[0] += 1
+            bucket[1] += rating
+    if totals:
+        op.bulk_insert(buckets_table, [
+            {"school_id": school_id, "period": period, "bucket_start": start, "review_count": count, "rating_sum": total}
+            for (school_id, period, start), (count, total) in totals.items()
+        ])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_school_rating_buckets_school_period_start', table_name='school_rating_buckets')
+    op.drop_index(op.f('ix_school_rating_buckets_id'), table_name='school_rating_buckets')
+    op.drop_table('school_rating_buckets')
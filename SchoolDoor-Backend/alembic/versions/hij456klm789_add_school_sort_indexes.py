@@ -0,0 +1,28 @@
+"""Add indexes for sorting school search results
+
+Revision ID: hij456klm789
+Revises: efg123hij456
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'hij456klm789'
+down_revision: Union[str, None] = 'efg123hij456'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # name is already indexed; rating sorts use ix_school_rating_stats_category_score
+    op.create_index(op.f('ix_schools_enrollment'), 'schools', ['enrollment'], unique=False)
+    op.create_index(op.f('ix_schools_created_at'), 'schools', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_schools_created_at'), table_name='schools')
+    op.drop_index(op.f('ix_schools_enrollment'), table_name='schools')
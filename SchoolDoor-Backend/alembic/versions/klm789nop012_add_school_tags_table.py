@@ -0,0 +1,55 @@
+"""Add school_tags facility and program tag table
+
+Revision ID: klm789nop012
+Revises: hij456klm789
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+import json
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.services.school_tag_service import school_tags
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'klm789nop012'
+down_revision: Union[str, None] = 'hij456klm789'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Create school_tags table
+    tags_table = op.create_table(
+        'school_tags',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('school_id', sa.Integer(), nullable=False),
+        sa.Column('tag', sa.String(length=150), nullable=False),
+        sa.ForeignKeyConstraint(['school_id'], ['schools.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_school_tags_id'), 'school_tags', ['id'], unique=False)
+    op.create_index(op.f('ix_school_tags_school_id'), 'school_tags', ['school_id'], unique=False)
+    op.create_index('ix_school_tags_tag_school', 'school_tags', ['tag', 'school_id'], unique=False)
+
+    # Backfill from the facilities and programs JSON columns
+    rows = []
+    schools = op.get_bind().execute(sa.text("SELECT id, facilities, programs FROM schools"))
+    for school_id, facilities, programs in schools:
+        if isinstance(facilities, str):
+            facilities = json.loads(facilities)
+        if isinstance(programs, str):
+            programs = json.loads(programs)
+        rows.extend({"school_id": school_id, "tag": tag} for tag in sorted(school_tags(facilities, programs)))
+    if rows:
+        op.bulk_insert(tags_table, rows)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_school_tags_tag_school', table_name='school_tags')
+    op.drop_index(op.f('ix_school_tags_school_id'), table_name='school_tags')
+    op.drop_index(op.f('ix_school_tags_id'), table_name='school_tags')
+    op.drop_table('school_tags')
@@ -0,0 +1,44 @@
+"""Add llm_response_cache table
+
+Revision ID: mno345pqr678
+Revises: jkl012mno345
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'mno345pqr678'
+down_revision: Union[str, None] = 'jkl012mno345'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Create llm_response_cache table
+    op.create_table(
+        'llm_response_cache',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('cache_key', sa.String(length=64), nullable=False),
+        sa.Column('model', sa.String(length=100), nullable=False),
+        sa.Column('region', sa.String(length=255), nullable=True),
+        sa.Column('response_body', sa.Text(), nullable=False),
+        sa.Column('hit_count', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.Column('expires_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_llm_response_cache_id'), 'llm_response_cache', ['id'], unique=False)
+    op.create_index(op.f('ix_llm_response_cache_cache_key'), 'llm_response_cache', ['cache_key'], unique=True)
+    op.create_index(op.f('ix_llm_response_cache_region'), 'llm_response_cache', ['region'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_llm_response_cache_region'), table_name='llm_response_cache')
+    op.drop_index(op.f('ix_llm_response_cache_cache_key'), table_name='llm_response_cache')
+    op.drop_index(op.f('ix_llm_response_cache_id'), table_name='llm_response_cache')
+    op.drop_table('llm_response_cache')
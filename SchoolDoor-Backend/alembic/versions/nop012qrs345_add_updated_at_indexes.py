@@ -0,0 +1,27 @@
+"""Add updated_at indexes for catalog snapshot delta refresh
+
+Revision ID: nop012qrs345
+Revises: klm789nop012
+Create Date: 2026-10-19 21:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'nop012qrs345'
+down_revision: Union[str, None] = 'klm789nop012'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(op.f('ix_schools_updated_at'), 'schools', ['updated_at'], unique=False)
+    op.create_index('ix_school_rating_stats_category_updated', 'school_rating_stats', ['category_id', 'updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_school_rating_stats_category_updated', table_name='school_rating_stats')
+    op.drop_index(op.f('ix_schools_updated_at'), table_name='schools')
@@ -0,0 +1,47 @@
+"""Add website_pages table
+
+Revision ID: pqr678stu901
+Revises: mno345pqr678
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'pqr678stu901'
+down_revision: Union[str, None] = 'mno345pqr678'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Create website_pages table
+    op.create_table(
+        'website_pages',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('url', sa.String(length=1000), nullable=False),
+        sa.Column('school_id', sa.Integer(), nullable=True),
+        sa.Column('status_code', sa.Integer(), nullable=True),
+        sa.Column('etag', sa.String(length=255), nullable=True),
+        sa.Column('last_modified', sa.String(length=100), nullable=True),
+        sa.Column('markdown', sa.Text(), nullable=True),
+        sa.Column('extracted', sa.JSON(), nullable=True),
+        sa.Column('links', sa.JSON(), nullable=True),
+        sa.Column('fetched_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.ForeignKeyConstraint(['school_id'], ['schools.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_website_pages_id'), 'website_pages', ['id'], unique=False)
+    op.create_index(op.f('ix_website_pages_url'), 'website_pages', ['url'], unique=True)
+    op.create_index(op.f('ix_website_pages_school_id'), 'website_pages', ['school_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_website_pages_school_id'), table_name='website_pages')
+    op.drop_index(op.f('ix_website_pages_url'), table_name='website_pages')
+    op.drop_index(op.f('ix_website_pages_id'), table_name='website_pages')
+    op.drop_table('website_pages')
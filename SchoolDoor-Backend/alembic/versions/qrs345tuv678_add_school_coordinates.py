@@ -0,0 +1,31 @@
+"""Add school latitude, longitude and location source
+
+Revision ID: qrs345tuv678
+Revises: nop012qrs345
+Create Date: 2026-10-19 22:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'qrs345tuv678'
+down_revision: Union[str, None] = 'nop012qrs345'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Filled in from pincode centroids by POST /admin/schools/locate (distance search uses an in-memory grid, no index)
+    op.add_column('schools', sa.Column('latitude', sa.Float(), nullable=True))
+    op.add_column('schools', sa.Column('longitude', sa.Float(), nullable=True))
+    op.add_column('schools', sa.Column('location_source', sa.String(length=20), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('schools', 'location_source')
+    op.drop_column('schools', 'longitude')
+    op.drop_column('schools', 'latitude')
@@ -0,0 +1,57 @@
+"""Add scraping_calls table and scraping_jobs.schools_created
+
+Revision ID: stu901vwx234
+Revises: pqr678stu901
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'stu901vwx234'
+down_revision: Union[str, None] = 'pqr678stu901'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('scraping_jobs', sa.Column('schools_created', sa.Integer(), nullable=True, server_default='0'))
+
+    # Create scraping_calls table
+    op.create_table(
+        'scraping_calls',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('job_id', sa.Integer(), nullable=True),
+        sa.Column('region', sa.String(length=255), nullable=True),
+        sa.Column('area', sa.String(length=255), nullable=True),
+        sa.Column('purpose', sa.String(length=50), nullable=False),
+        sa.Column('model', sa.String(length=100), nullable=False),
+        sa.Column('attempt', sa.Integer(), nullable=True),
+        sa.Column('outcome', sa.String(length=50), nullable=False),
+        sa.Column('status_code', sa.Integer(), nullable=True),
+        sa.Column('prompt_tokens', sa.Integer(), nullable=True),
+        sa.Column('completion_tokens', sa.Integer(), nullable=True),
+        sa.Column('total_tokens', sa.Integer(), nullable=True),
+        sa.Column('latency_ms', sa.Integer(), nullable=True),
+        sa.Column('cost_usd', sa.Float(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.ForeignKeyConstraint(['job_id'], ['scraping_jobs.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_scraping_calls_id'), 'scraping_calls', ['id'], unique=False)
+    op.create_index(op.f('ix_scraping_calls_job_id'), 'scraping_calls', ['job_id'], unique=False)
+    op.create_index(op.f('ix_scraping_calls_region'), 'scraping_calls', ['region'], unique=False)
+    op.create_index(op.f('ix_scraping_calls_created_at'), 'scraping_calls', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_scraping_calls_created_at'), table_name='scraping_calls')
+    op.drop_index(op.f('ix_scraping_calls_region'), table_name='scraping_calls')
+    op.drop_index(op.f('ix_scraping_calls_job_id'), table_name='scraping_calls')
+    op.drop_index(op.f('ix_scraping_calls_id'), table_name='scraping_calls')
+    op.drop_table('scraping_calls')
+    op.drop_column('scraping_jobs', 'schools_created')
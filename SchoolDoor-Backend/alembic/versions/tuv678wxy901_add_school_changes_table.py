@@ -0,0 +1,39 @@
+"""Add school_changes table (change feed)
+
+Revision ID: tuv678wxy901
+Revises: qrs345tuv678
+Create Date: 2026-10-20 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'tuv678wxy901'
+down_revision: Union[str, None] = 'qrs345tuv678'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Create school_changes table; sequence is filled in when /schools/changes publishes committed rows
+    op.create_table(
+        'school_changes',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('school_id', sa.Integer(), nullable=False),
+        sa.Column('kind', sa.String(length=20), nullable=False),
+        sa.Column('sequence', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.ForeignKeyConstraint(['school_id'], ['schools.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('sequence')
+    )
+    op.create_index(op.f('ix_school_changes_id'), 'school_changes', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_school_changes_id'), table_name='school_changes')
+    op.drop_table('school_changes')
@@ -0,0 +1,50 @@
+"""Add scraping_region_leases table and scraping job region/idempotency keys
+
+Revision ID: vwx234yza567
+Revises: stu901vwx234
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'vwx234yza567'
+down_revision: Union[str, None] = 'stu901vwx234'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('scraping_jobs', sa.Column('region_key', sa.String(length=255), nullable=True))
+    op.add_column('scraping_jobs', sa.Column('idempotency_key', sa.String(length=255), nullable=True))
+    op.create_index(op.f('ix_scraping_jobs_region_key'), 'scraping_jobs', ['region_key'], unique=False)
+    op.create_index(op.f('ix_scraping_jobs_idempotency_key'), 'scraping_jobs', ['idempotency_key'], unique=True)
+    op.execute("UPDATE scraping_jobs SET region_key = lower(trim(region))")
+
+    # Create scraping_region_leases table
+    op.create_table(
+        'scraping_region_leases',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('region_key', sa.String(length=255), nullable=False),
+        sa.Column('job_id', sa.Integer(), nullable=True),
+        sa.Column('holder', sa.String(length=255), nullable=False),
+        sa.Column('acquired_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_scraping_region_leases_id'), 'scraping_region_leases', ['id'], unique=False)
+    op.create_index(op.f('ix_scraping_region_leases_region_key'), 'scraping_region_leases', ['region_key'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_scraping_region_leases_region_key'), table_name='scraping_region_leases')
+    op.drop_index(op.f('ix_scraping_region_leases_id'), table_name='scraping_region_leases')
+    op.drop_table('scraping_region_leases')
+    op.drop_index(op.f('ix_scraping_jobs_idempotency_key'), table_name='scraping_jobs')
+    op.drop_index(op.f('ix_scraping_jobs_region_key'), table_name='scraping_jobs')
+    op.drop_column('scraping_jobs', 'idempotency_key')
+    op.drop_column('scraping_jobs', 'region_key')
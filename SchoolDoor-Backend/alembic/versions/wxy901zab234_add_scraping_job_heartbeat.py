@@ -0,0 +1,26 @@
+"""Add scraping job heartbeat so abandoned jobs stop holding their region
+
+Revision ID: wxy901zab234
+Revises: tuv678wxy901
+Create Date: 2026-10-19 21:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'wxy901zab234'
+down_revision: Union[str, None] = 'tuv678wxy901'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('scraping_jobs', sa.Column('heartbeat_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('scraping_jobs', 'heartbeat_at')
@@ -0,0 +1,29 @@
+"""Add scraping job run numbers so retries get their own budget and costs
+
+Revision ID: xyz234abc567
+Revises: wxy901zab234
+Create Date: 2026-10-19 21:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'xyz234abc567'
+down_revision: Union[str, None] = 'wxy901zab234'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('scraping_jobs', sa.Column('run', sa.Integer(), server_default='1', nullable=False))
+    op.add_column('scraping_calls', sa.Column('run', sa.Integer(), nullable=True))
+    op.execute("UPDATE scraping_calls SET run = 1 WHERE job_id IS NOT NULL")
+
+
+def downgrade() -> None:
+    op.drop_column('scraping_calls', 'run')
+    op.drop_column('scraping_jobs', 'run')
@@ -0,0 +1,70 @@
+"""Add school_rating_stats rollup table
+
+Revision ID: yza567bcd890
+Revises: vwx234yza567
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'yza567bcd890'
+down_revision: Union[str, None] = 'vwx234yza567'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Create school_rating_stats table
+    op.create_table(
+        'school_rating_stats',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('school_id', sa.Integer(), nullable=False),
+        sa.Column('category_id', sa.Integer(), nullable=True),
+        sa.Column('rating_count', sa.Integer(), nullable=False),
+        sa.Column('rating_sum', sa.Float(), nullable=False),
+        sa.Column('score', sa.Float(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.ForeignKeyConstraint(['school_id'], ['schools.id'], ),
+        sa.ForeignKeyConstraint(['category_id'], ['rating_categories.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_school_rating_stats_id'), 'school_rating_stats', ['id'], unique=False)
+    op.create_index(op.f('ix_school_rating_stats_school_id'), 'school_rating_stats', ['school_id'], unique=False)
+    op.create_index('ix_school_rating_stats_category_school', 'school_rating_stats', ['category_id', 'school_id'], unique=False)
+    op.create_index('ix_school_rating_stats_category_score', 'school_rating_stats', ['category_id', 'score'], unique=False)
+
+    # Backfill from existing reviews and ratings
+    op.execute(
+        "INSERT INTO school_rating_stats (school_id, category_id, rating_count, rating_sum) "
+        "SELECT school_id, NULL, COUNT(id), SUM(overall_rating) FROM reviews "
+        "WHERE status = 'approved' GROUP BY school_id"
+    )
+    op.execute(
+        "INSERT INTO school_rating_stats (school_id, category_id, rating_count, rating_sum) "
+        "SELECT school_id, category_id, COUNT(id), SUM(rating_value) FROM ratings "
+        "GROUP BY school_id, category_id"
+    )
+    # Bayesian scores with the default prior weight of 5, pulled towards each category's mean
+    op.execute(
+        "UPDATE school_rating_stats SET score = (5 * (SELECT SUM(s.rating_sum) / SUM(s.rating_count) "
+        "FROM school_rating_stats s WHERE s.category_id IS NULL) + rating_sum) / (5 + rating_count) "
+        "WHERE category_id IS NULL"
+    )
+    op.execute(
+        "UPDATE school_rating_stats SET score = (5 * (SELECT SUM(s.rating_sum) / SUM(s.rating_count) "
+        "FROM school_rating_stats s WHERE s.category_id = school_rating_stats.category_id) + rating_sum) / (5 + rating_count) "
+        "WHERE category_id IS NOT NULL"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_school_rating_stats_category_score', table_name='school_rating_stats')
+    op.drop_index('ix_school_rating_stats_category_school', table_name='school_rating_stats')
+    op.drop_index(op.f('ix_school_rating_stats_school_id'), table_name='school_rating_stats')
+    op.drop_index(op.f('ix_school_rating_stats_id'), table_name='school_rating_stats')
+    op.drop_table('school_rating_stats')
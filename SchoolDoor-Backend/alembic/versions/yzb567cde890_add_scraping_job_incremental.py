@@ -0,0 +1,26 @@
+"""Add scraping job incremental flag so retry and replay keep the mode
+
+Revision ID: yzb567cde890
+Revises: xyz234abc567
+Create Date: 2026-10-19 22:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'yzb567cde890'
+down_revision: Union[str, None] = 'xyz234abc567'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('scraping_jobs', sa.Column('incremental', sa.Boolean(), server_default=sa.false(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('scraping_jobs', 'incremental')
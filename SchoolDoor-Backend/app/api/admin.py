@@ -1,8 +1,9 @@
 """
 API endpoints for administrative tasks, including user management, content moderation, and dashboard stats.
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Request
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, status, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session, undefer_group
 from typing import List, Optional
 from app.database import get_db
 from app.models_admin import AdminUser
@@ -11,14 +12,27 @@ from app.schemas_admin import (
     AdminLogin, AdminToken, AdminDashboardStats, AdminSchoolSummary,
     AdminReviewSummary, AdminScrapingJobSummary, AdminActivityLog,
     AdminNotification, AdminNotificationCreate, AdminSchoolSearch,
-    AdminReviewSearch, AdminActivitySearch, SystemLog
+    AdminReviewSearch, AdminActivitySearch, SystemLog,
+    DuplicateSchoolCandidate, DuplicateSchoolCluster, SchoolMergeRequest, SchoolMergeResult
 )
-from app.services.admin_auth_service import AdminAuthService, get_current_admin, require_superuser
+from app.services.admin_auth_service import AdminAuthService, get_current_admin, get_current_admin_for_stream, require_superuser
 from app.services.admin_dashboard_service import AdminDashboardService
 from app.services.rating_service import RatingService
 from app.services.migration_service import migration_service
 from app.services.api_key_service import APIKeyService
-from app.models import School, Review
+from app.services.school_dedupe_service import school_dedupe_service
+from app.services.rating_stats_service import rating_stats_service
+from app.services.leaderboard_service import leaderboard_service
+from app.services.school_tag_service import school_tag_service
+from app.services.geo_service import geo_service
+from app.services.school_change_service import school_change_service
+from app.services.catalog_dump_service import catalog_dump_service
+from app.services.event_bus_service import (
+    event_bus, local_event, stream_events, JOBS_TOPIC, NOTIFICATIONS_TOPIC, SSE_HEADERS
+)
+from app.services.region_lock_service import ACTIVE_JOB_STATUSES
+from app.models_admin import AdminNotification as AdminNotificationModel
+from app.models import School, Review, ScrapingJob, DETAIL_COLUMNS
 from app.models_school_request import SchoolRequest
 from app.schemas_school_request import (
     SchoolRequest as SchoolRequestSchema,
@@ -148,6 +162,60 @@ async def get_dashboard_activity(
 
 
 # School management endpoints
+@router.get("/schools/duplicates", response_model=List[DuplicateSchoolCluster])
+async def get_duplicate_schools(
+    threshold: float = 0.88,
+    limit: int = 100,
+    db: Session = Depends(get_db),
+    admin: AdminUser = Depends(get_current_admin)
+):
+    """Report clusters of active schools that are likely duplicates of each other"""
+    # Rebuild so the report reflects edits made outside this process
+    index = school_dedupe_service.build_index(db)
+    clusters = index.duplicate_clusters(threshold=threshold)
+    return [
+        DuplicateSchoolCluster(schools=[DuplicateSchoolCandidate(**school) for school in cluster])
+        for cluster in clusters[:limit]
+    ]
+
+
+@router.post("/schools/{school_id}/merge", response_model=SchoolMergeResult)
+async def merge_schools(
+    school_id: int,
+    merge_request: SchoolMergeRequest,
+    db: Session = Depends(get_db),
+    admin: AdminUser = Depends(get_current_admin)
+):
+    """Merge duplicate schools into this one, keeping its reviews and ratings"""
+    primary = db.query(School).options(undefer_group(DETAIL_COLUMNS)).filter(School.id == school_id).first()
+    if not primary:
+        raise HTTPException(status_code=404, detail="School not found")
+    
+    duplicate_ids = [duplicate_id for duplicate_id in set(merge_request.duplicate_ids) if duplicate_id != school_id]
+    if not duplicate_ids:
+        raise HTTPException(status_code=400, detail="No duplicate schools given")
+    
+    duplicates = db.query(School).options(undefer_group(DETAIL_COLUMNS)).filter(School.id.in_(duplicate_ids)).all()
+    missing = sorted(set(duplicate_ids) - {school.id for school in duplicates})
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Schools not found: {missing}")
+    
+    result = school_dedupe_service.merge_schools(db, primary, duplicates)
+    db.commit()
+    
+    # Log activity
+    auth_service = AdminAuthService(db)
+    auth_service.log_admin_activity(
+        admin_user_id=admin.id,
+        action="merge_schools",
+        resource_type="school",
+        resource_id=school_id,
+        description=f"Merged schools {result['merged_ids']} into {primary.name}"
+    )
+    
+    return SchoolMergeResult(**result)
+
+
 @router.get("/schools/{school_id}", response_model=AdminSchoolSummary)
 async def get_admin_school(
     school_id: int,
@@ -192,7 +260,12 @@ async def toggle_school_active(
         raise HTTPException(status_code=404, detail="School not found")
     
     school.is_active = not school.is_active
+    leaderboard_service.update_school(db, school.id)
+    school_tag_service.refresh_school(db, school)
+    geo_service.update_school(school)
+    school_change_service.record(db, [school.id])
     db.commit()
+    school_dedupe_service.register(school)
     
     # Log activity
     auth_service = AdminAuthService(db)
@@ -244,6 +317,7 @@ async def approve_review(
     
     review.status = "approved"
     review.is_verified = True
+    rating_stats_service.refresh_schools(db, [review.school_id], commit=False)
     db.commit()
     
     # Log activity
@@ -271,6 +345,7 @@ async def reject_review(
         raise HTTPException(status_code=404, detail="Review not found")
     
     review.status = "rejected"
+    rating_stats_service.refresh_schools(db, [review.school_id], commit=False)
     db.commit()
     
     # Log activity
@@ -326,6 +401,7 @@ async def delete_review(
     
     school_name = review.school.name
     db.delete(review)
+    rating_stats_service.refresh_schools(db, [review.school_id], commit=False)
     db.commit()
     
     # Log activity
@@ -379,6 +455,7 @@ async def get_school_request(
 async def approve_school_request(
     request_id: int,
     admin_notes: Optional[str] = None,
+    force: bool = False,
     db: Session = Depends(get_db),
     admin: AdminUser = Depends(get_current_admin)
 ):
@@ -412,6 +489,24 @@ async def approve_school_request(
             detail=f"School with name '{school_request.name}' in {school_request.city} already exists"
         )
     
+    # Near-duplicates (spelling variants, same phone/website) need an explicit override
+    if not force:
+        similar_schools = school_dedupe_service.get_index(db).find_matches({
+            "name": school_request.name,
+            "city": school_request.city,
+            "zip_code": school_request.zip_code,
+            "phone": school_request.phone,
+            "website": school_request.website
+        }, threshold=0.85)
+        if similar_schools:
+            raise HTTPException(
+                status_code=409,
+                detail={
+                    "message": f"School '{school_request.name}' looks like an existing school. Approve with force=true to create it anyway.",
+                    "similar_schools": similar_schools
+                }
+            )
+    
     # Create the school from the request
     from app.schemas import SchoolCreate
     school_data = SchoolCreate(
@@ -440,7 +535,12 @@ async def approve_school_request(
     
     new_school = School(**school_data.dict() if hasattr(school_data, 'dict') else school_data.model_dump())
     new_school.is_active = True
+    geo_service.locate(new_school)
     db.add(new_school)
+    db.flush()
+    school_tag_service.refresh_school(db, new_school)
+    geo_service.update_school(new_school)
+    school_change_service.record(db, [new_school.id])
     
     # Update request status
     school_request.status = "approved"
@@ -451,6 +551,7 @@ async def approve_school_request(
     db.commit()
     db.refresh(new_school)
     db.refresh(school_request)
+    school_dedupe_service.register(new_school)
     
     # Log activity
     auth_service = AdminAuthService(db)
@@ -542,6 +643,28 @@ async def mark_notification_read(
     return dashboard_service.mark_notification_read(notification_id)
 
 
+@router.get("/events")
+async def stream_admin_events(
+    request: Request,
+    db: Session = Depends(get_db),
+    admin: AdminUser = Depends(get_current_admin_for_stream)
+):
+    """Server-sent events with new notifications and scraping job progress, replacing polling.
+    EventSource clients can pass the bearer token as ?access_token=."""
+    subscription = event_bus.subscribe([NOTIFICATIONS_TOPIC, JOBS_TOPIC], replay_latest=False)
+    unread = db.query(func.count(AdminNotificationModel.id)).filter(AdminNotificationModel.is_read == False).scalar()
+    active_jobs = [
+        {"job_id": job.id, "region": job.region, "status": job.status}
+        for job in db.query(ScrapingJob).filter(ScrapingJob.status.in_(ACTIVE_JOB_STATUSES)).all()
+    ]
+    # The stream may stay open for a long time; don't hold a connection for it
+    db.close()
+    
+    snapshot = local_event("snapshot", {"unread_notifications": unread, "active_jobs": active_jobs})
+    events = stream_events(subscription, is_disconnected=request.is_disconnected, initial=[snapshot])
+    return StreamingResponse(events, media_type="text/event-stream", headers=SSE_HEADERS)
+
+
 # Admin user management (superuser only)
 @router.post("/users", response_model=AdminUserSchema)
 async def create_admin_user(
@@ -615,6 +738,51 @@ async def run_migrations(
         )
 
 
+@router.post("/ratings/rebuild-stats")
+async def rebuild_rating_stats(
+    db: Session = Depends(get_db),
+    admin: AdminUser = Depends(require_superuser)
+):
+    """Recompute the per-school rating rollup and the leaderboards used by rankings (superuser only)"""
+    rows = rating_stats_service.rebuild(db)
+    return {"message": "Rating stats rebuilt", "rows": rows}
+
+
+@router.post("/schools/rebuild-tags")
+async def rebuild_school_tags(
+    db: Session = Depends(get_db),
+    admin: AdminUser = Depends(require_superuser)
+):
+    """Re-derive the facility and program tags used by search filters (superuser only)"""
+    rows = school_tag_service.rebuild(db)
+    return {"message": "School tags rebuilt", "rows": rows}
+
+
+@router.post("/schools/dump")
+async def write_catalog_dump(
+    full: bool = Query(False, description="Rebuild from the database instead of merging changes into the previous dump"),
+    db: Session = Depends(get_db),
+    admin: AdminUser = Depends(require_superuser)
+):
+    """Write a new catalog dump version now and return its manifest (superuser only)"""
+    return catalog_dump_service.generate(db, full=full)
+
+
+@router.post("/schools/locate")
+async def locate_schools(
+    geocode_limit: int = Query(100, ge=0, le=5000),
+    db: Session = Depends(get_db),
+    admin: AdminUser = Depends(require_superuser)
+):
+    """
+    Fill in coordinates for active schools without them: pincode centroids
+    first, then the configured geocoder for up to geocode_limit schools
+    (superuser only)
+    """
+    counts = await geo_service.locate_missing(db, geocode_limit)
+    return {"message": "Schools located", **counts}
+
+
 # API Key Management
 @router.post("/api-keys/generate")
 async def generate_api_key(
@@ -10,6 +10,7 @@ from app.services.api_key_service import APIKeyService
 from app.services.admin_auth_service import get_current_admin
 from app.models_admin import AdminUser
 from app.models_admin import AdminUser
+from app.responses import FastJSONResponse
 from datetime import datetime
 from app.schemas import (
     APIKeyCreate, 
@@ -170,7 +171,8 @@ async def get_api_key_usage(
     """Get usage history for a specific API key"""
     api_key_service = APIKeyService(db)
     usage = api_key_service.get_api_key_usage(key_id, limit)
-    return usage
+    # Plain dicts of str/int/datetime: orjson writes them as they are, no jsonable_encoder pass
+    return FastJSONResponse(usage)
 
 @router.get("/stats/overview")
 async def get_overview_stats(
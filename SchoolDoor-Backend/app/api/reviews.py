@@ -14,6 +14,8 @@ from app.schemas import (
     BulkReviewResponse
 )
 from app.services.rating_service import RatingService
+from app.services.rating_stats_service import rating_stats_service
+from app.responses import model_response
 
 router = APIRouter(prefix="/reviews", tags=["reviews"])
 
@@ -95,11 +97,13 @@ async def update_review(
         raise HTTPException(status_code=404, detail="Review not found")
     
     # Update fields
+    previous_school_id = review.school_id
     update_data = review_update.dict(exclude_unset=True)
     for field, value in update_data.items():
         if value is not None:
             setattr(review, field, value)
     
+    rating_stats_service.refresh_schools(db, [previous_school_id, review.school_id], commit=False)
     db.commit()
     db.refresh(review)
     
@@ -114,6 +118,7 @@ async def delete_review(review_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Review not found")
     
     db.delete(review)
+    rating_stats_service.refresh_schools(db, [review.school_id], commit=False)
     db.commit()
     
     return {"message": "Review deleted successfully"}
@@ -151,53 +156,10 @@ async def get_reviews(
     if max_rating:
         query = query.filter(Review.overall_rating <= max_rating)
     
-    # Eager load member relationship
-    from sqlalchemy.orm import joinedload
-    from app.models_member import MemberUser
-    query = query.options(joinedload(Review.member))
-    
     # Apply pagination
     reviews = query.order_by(Review.created_at.desc()).offset(offset).limit(limit).all()
     
-    # Serialize reviews with member information
-    result = []
-    for review in reviews:
-        review_dict = {
-            "id": review.id,
-            "school_id": review.school_id,
-            "member_id": review.member_id,
-            "overall_rating": review.overall_rating,
-            "title": review.title,
-            "content": review.content,
-            "status": review.status,
-            "is_verified": review.is_verified,
-            "is_anonymous": review.is_anonymous,
-            "created_at": review.created_at.isoformat() if review.created_at else None,
-            "updated_at": review.updated_at.isoformat() if review.updated_at else None,
-            "parent_name": review.parent_name,  # Deprecated but kept for backward compatibility
-            "parent_email": review.parent_email,  # Deprecated but kept for backward compatibility
-        }
-        # Include member information if available
-        # Try lazy loading if eager loading didn't work
-        if review.member_id:
-            if review.member:
-                review_dict["member"] = {
-                    "id": review.member.id,
-                    "full_name": review.member.full_name,
-                    "email": review.member.email,
-                }
-            else:
-                # Fallback: manually load member if relationship didn't load
-                member = db.query(MemberUser).filter(MemberUser.id == review.member_id).first()
-                if member:
-                    review_dict["member"] = {
-                        "id": member.id,
-                        "full_name": member.full_name,
-                        "email": member.email,
-                    }
-        result.append(review_dict)
-    
-    return result
+    return model_response(List[ReviewSchema], [ReviewSchema.model_validate(review) for review in reviews])
 
 
 @router.get("/stats/overview")
@@ -266,6 +228,7 @@ async def bulk_update_reviews(
     updated_count = 0
     failed_count = 0
     errors = []
+    changed_school_ids = set()
     
     for review_id in bulk_update.review_ids:
         try:
@@ -283,12 +246,15 @@ async def bulk_update_reviews(
             review.updated_at = func.now()
             db.commit()
             updated_count += 1
+            changed_school_ids.add(review.school_id)
             
         except Exception as e:
             db.rollback()
             errors.append({"review_id": review_id, "error": str(e)})
             failed_count += 1
     
+    rating_stats_service.refresh_schools(db, changed_school_ids)
+    
     return BulkReviewResponse(
         updated_count=updated_count,
         failed_count=failed_count,
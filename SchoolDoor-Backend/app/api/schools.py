@@ -2,15 +2,16 @@
 API endpoints for managing and retrieving school data.
 """
 from fastapi import APIRouter, Depends, HTTPException, Query, Request
-from fastapi.responses import FileResponse
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi.responses import FileResponse, Response
+from sqlalchemy.orm import Session, undefer_group
+from typing import Any, Dict, List, Optional
 import csv
 import io
 import os
 from datetime import datetime, timedelta
+from app.config import settings
 from app.database import get_db
-from app.models import School, Review, Rating
+from app.models import School, Review, SchoolRatingStats, DETAIL_COLUMNS
 from app.schemas import (
     School as SchoolSchema, 
     SchoolWithRatings, 
@@ -21,17 +22,63 @@ from app.schemas import (
     BulkSchoolResponse,
     ExportRequest,
     ExportResponse,
-    SearchSuggestion
+    SearchSuggestion,
+    SchoolTrends,
+    SchoolComparison,
+    AdvancedSearch,
+    SchoolSearchResults,
+    FacilityTagCount,
+    SchoolSummary,
+    NearbySchool,
+    SimilarSchool,
+    SchoolBatchItem,
+    SchoolPage,
+    SchoolChangeFeed
 )
 from app.services.rating_service import RatingService
-from app.services.api_auth_service import optional_auth_with_usage_tracking
-from sqlalchemy import func, and_, or_
+from app.services.leaderboard_service import leaderboard_service
+from app.services.rating_trend_service import PERIODS as TREND_PERIODS
+from app.services.comparison_service import SchoolComparisonService, PEER_GROUPS
+from app.services.school_search_service import school_search_service
+from app.services.school_tag_service import school_tag_service
+from app.services.geo_service import geo_service, SOURCE_MANUAL
+from app.services.similar_school_service import similar_school_service
+from app.services.school_listing_service import school_listing_service
+from app.services.catalog_snapshot_service import catalog_snapshot_service, SORT_FIELDS as CATALOG_SORT_FIELDS
+from app.services.api_auth_service import optional_auth_with_usage_tracking, require_api_key_with_usage_tracking
+from app.services.school_page_service import school_page_service, SECTIONS as PAGE_SECTIONS
+from app.services.school_change_service import school_change_service, CursorExpiredError
+from app.services.catalog_dump_service import catalog_dump_service, MEDIA_TYPE as DUMP_MEDIA_TYPE
+from app.responses import model_response, with_etag, file_response
+from sqlalchemy import func, or_
 
 router = APIRouter(prefix="/schools", tags=["schools"])
 
+# School fields that decide which leaderboards a school appears on
+LEADERBOARD_FIELDS = {"city", "state", "board", "is_active"}
+# School fields the facility/program tag index is derived from
+TAG_FIELDS = {"facilities", "programs", "is_active"}
+# School fields that decide where a school sits in the geo index
+GEO_FIELDS = {"latitude", "longitude", "zip_code", "is_active"}
 
-@router.get("", response_model=List[SchoolWithRatings])
-@router.get("/", response_model=List[SchoolWithRatings])
+MAX_TREND_WINDOW = 104
+MAX_TREND_BATCH = 100
+MAX_SCHOOL_BATCH = 500
+MAX_CHANGES_PAGE = 5000
+
+
+def _relocate(school: School, update_data: Dict[str, Any]) -> None:
+    """Keep an edited school's coordinates and its place in the geo index current"""
+    if update_data.keys() & {"latitude", "longitude"}:
+        located = school.latitude is not None and school.longitude is not None
+        school.location_source = SOURCE_MANUAL if located else None
+    elif "zip_code" in update_data:
+        geo_service.locate(school)
+    geo_service.update_school(school)
+
+
+@router.get("", response_model=List[SchoolSummary])
+@router.get("/", response_model=List[SchoolSummary])
 async def get_schools(
     request: Request,
     search: SchoolSearch = Depends(),
@@ -39,7 +86,12 @@ async def get_schools(
     auth_user = Depends(optional_auth_with_usage_tracking)
 ):
     """Get schools with optional filtering and search"""
-    query = db.query(School).filter(School.is_active == True)
+    if search.sort_by is not None and search.sort_by not in CATALOG_SORT_FIELDS:
+        raise HTTPException(status_code=400, detail=f"sort_by must be one of: {', '.join(CATALOG_SORT_FIELDS)}")
+    if settings.catalog_snapshot_enabled:
+        return model_response(List[SchoolSummary], _schools_from_snapshot(db, search))
+    
+    query = school_listing_service.query(db).filter(School.is_active == True)
     
     # Apply filters
     if search.city:
@@ -66,64 +118,31 @@ async def get_schools(
             )
         )
     
-    # Apply pagination
-    schools = query.offset(search.offset).limit(search.limit).all()
-    
-    # Add rating information
-    rating_service = RatingService(db)
-    result = []
-    
-    for school in schools:
-        school_data = school.__dict__.copy()
-        
-        # Get average rating (only from approved reviews for public view)
-        avg_rating = db.query(func.avg(Review.overall_rating)).filter(
-            Review.school_id == school.id,
-            Review.status == "approved"
-        ).scalar()
-        
-        # Get total reviews (only approved for public view)
-        total_reviews = db.query(Review).filter(
-            Review.school_id == school.id,
-            Review.status == "approved"
-        ).count()
-        
-        # Get ratings by category (only from approved reviews)
-        ratings_by_category = {}
-        categories = rating_service.get_rating_categories()
-        for category in categories:
-            cat_rating = db.query(func.avg(Rating.rating_value)).filter(
-                and_(
-                    Rating.school_id == school.id,
-                    Rating.category_id == category.id,
-                    # Join with Review to filter by approved status
-                    Rating.school_id.in_(
-                        db.query(Review.school_id).filter(
-                            Review.school_id == school.id,
-                            Review.status == "approved"
-                        )
-                    )
-                )
-            ).scalar()
-            if cat_rating:
-                ratings_by_category[category.name] = round(float(cat_rating), 2)
-        
-        school_data.update({
-            "average_rating": round(float(avg_rating), 2) if avg_rating else None,
-            "total_reviews": total_reviews,
-            "ratings_by_category": ratings_by_category
-        })
-        
-        result.append(SchoolWithRatings(**school_data))
-    
-    # Apply rating filters
-    if search.min_rating:
-        result = [s for s in result if s.average_rating and s.average_rating >= search.min_rating]
-    
-    if search.max_rating:
-        result = [s for s in result if s.average_rating and s.average_rating <= search.max_rating]
+    # Rating filters and sorting read the overall rating rollup
+    average = SchoolRatingStats.rating_sum / SchoolRatingStats.rating_count
+    if search.min_rating is not None:
+        query = query.filter(average >= search.min_rating)
+    if search.max_rating is not None:
+        query = query.filter(average <= search.max_rating)
+    
+    if search.sort_by == "rating":
+        query = query.order_by(SchoolRatingStats.score.desc().nulls_last(), School.id)
+    elif search.sort_by == "enrollment":
+        query = query.order_by(School.enrollment.desc().nulls_last(), School.id)
+    elif search.sort_by == "name":
+        query = query.order_by(School.name, School.id)
+    else:
+        query = query.order_by(School.id)
     
-    return result
+    # Apply pagination
+    rows = query.offset(search.offset).limit(search.limit).all()
+    return model_response(List[SchoolSummary], school_listing_service.serialize(db, rows))
+
+
+def _schools_from_snapshot(db: Session, search: SchoolSearch) -> List[SchoolSummary]:
+    """get_schools served from the in-memory catalog snapshot: one page of ids, then two queries"""
+    rows, _ = catalog_snapshot_service.select(db, search)
+    return school_listing_service.load(db, [school_id for school_id, _, _ in rows])
 
 
 @router.get("/search-suggestions", response_model=List[SearchSuggestion])
@@ -133,6 +152,12 @@ async def get_search_suggestions(
     db: Session = Depends(get_db)
 ):
     """Get search suggestions for autocomplete"""
+    if settings.catalog_snapshot_enabled:
+        return [
+            SearchSuggestion(type=kind, value=value, count=count)
+            for kind, value, count in catalog_snapshot_service.suggestions(db, query, limit)
+        ][:limit]
+    
     suggestions = []
     
     # City suggestions
@@ -164,24 +189,205 @@ async def get_search_suggestions(
     return suggestions[:limit]
 
 
+@router.post("/search", response_model=SchoolSearchResults)
+async def search_schools(
+    request: Request,
+    search: AdvancedSearch,
+    db: Session = Depends(get_db),
+    auth_user = Depends(optional_auth_with_usage_tracking)
+):
+    """
+    Search schools with the advanced filters and get facet counts (board,
+    medium, school type, state, city, rating) for the filter sidebar in the
+    same response
+    """
+    try:
+        return model_response(SchoolSearchResults, school_search_service.search(db, search))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/nearby", response_model=List[NearbySchool])
+async def get_nearby_schools(
+    request: Request,
+    latitude: Optional[float] = Query(None, ge=-90, le=90),
+    longitude: Optional[float] = Query(None, ge=-180, le=180),
+    pincode: Optional[str] = Query(None, description="Searched from the pincode's centroid when no coordinates are given"),
+    radius_km: Optional[float] = Query(None, gt=0),
+    board: Optional[str] = None,
+    school_type: Optional[str] = None,
+    medium_of_instruction: Optional[str] = None,
+    min_rating: Optional[float] = Query(None, ge=0, le=5),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_db),
+    auth_user = Depends(optional_auth_with_usage_tracking)
+):
+    """Active schools within radius_km of a point or pincode, nearest first, with the usual list filters"""
+    if latitude is None or longitude is None:
+        if not pincode:
+            raise HTTPException(status_code=400, detail="Give latitude and longitude, or a pincode")
+        centroid = geo_service.pincode_centroid(pincode)
+        if centroid is None:
+            raise HTTPException(status_code=404, detail="Unknown pincode")
+        latitude, longitude = centroid
+    radius_km = radius_km or settings.nearby_default_radius_km
+    if radius_km > settings.nearby_max_radius_km:
+        raise HTTPException(status_code=400, detail=f"radius_km can be at most {settings.nearby_max_radius_km:g}")
+    
+    rows = geo_service.nearby(
+        db, latitude, longitude, radius_km,
+        filters={"board": board, "school_type": school_type, "medium_of_instruction": medium_of_instruction, "min_rating": min_rating},
+        limit=limit, offset=offset
+    )
+    schools = school_listing_service.load(
+        db, [school_id for school_id, _, _, _ in rows], NearbySchool,
+        extras={school_id: {"distance_km": distance_km} for school_id, distance_km, _, _ in rows}
+    )
+    return model_response(List[NearbySchool], schools)
+
+
+@router.get("/facilities", response_model=List[FacilityTagCount])
+async def get_facility_tags(
+    kind: Optional[str] = Query(None, description="facility or program"),
+    db: Session = Depends(get_db)
+):
+    """Facility and program tags usable as search filters, with how many active schools have each"""
+    if kind not in (None, "facility", "program"):
+        raise HTTPException(status_code=400, detail="kind must be facility or program")
+    tags = school_tag_service.vocabulary(db, prefix=f"{kind}:" if kind else None)
+    return [
+        FacilityTagCount(tag=tag, name=tag.partition(":")[2].replace("-", " ").title(), count=count)
+        for tag, count in tags
+    ]
+
+
+@router.get("/changes", response_model=SchoolChangeFeed)
+async def get_school_changes(
+    request: Request,
+    since: int = Query(0, ge=0, description="Cursor: next_cursor of the previous page, or 0 to start from the oldest change kept"),
+    limit: int = Query(1000, ge=1, le=MAX_CHANGES_PAGE, description="Most change log entries to read"),
+    db: Session = Depends(get_db),
+    auth_user = Depends(optional_auth_with_usage_tracking)
+):
+    """
+    Schools changed after a cursor, for keeping a copy of the catalog in sync:
+    upsert records carry the school, ratings records its rating summary, and
+    delete records mark schools deactivated since. Keep paging with
+    next_cursor while has_more. A cursor older than the retained log gets
+    410 with the current cursor: resync through /schools, then continue from it
+    (see /changes/cursor).
+    """
+    try:
+        feed = school_change_service.changes(db, since, limit)
+    except CursorExpiredError as e:
+        raise HTTPException(status_code=410, detail={"message": str(e), "cursor": e.head})
+    return model_response(SchoolChangeFeed, feed)
+
+
+@router.get("/changes/cursor")
+async def get_school_changes_cursor(
+    request: Request,
+    db: Session = Depends(get_db),
+    auth_user = Depends(optional_auth_with_usage_tracking)
+):
+    """The current change feed cursor: take it before a full download through /schools, then follow /changes from it"""
+    school_change_service.publish(db)
+    return {"cursor": school_change_service.head(db)}
+
+
+@router.get("/dump/manifest")
+async def get_catalog_dump_manifest(
+    request: Request,
+    api_key = Depends(require_api_key_with_usage_tracking)
+):
+    """
+    The latest catalog dump (API key required): its version, record count,
+    files with size and sha256, and change_cursor. Download the files, check
+    them against the manifest, then follow /changes?since=change_cursor.
+    """
+    manifest = catalog_dump_service.manifest()
+    if not manifest:
+        raise HTTPException(status_code=404, detail="No catalog dump has been written yet")
+    for file in manifest["files"]:
+        file["url"] = f"/api/v1/schools/dump/files/{file['name']}"
+    return manifest
+
+
+@router.get("/dump/files/{name}")
+async def download_catalog_dump(
+    name: str,
+    request: Request,
+    api_key = Depends(require_api_key_with_usage_tracking)
+):
+    """
+    A catalog dump file, gzip-compressed JSON lines of SchoolSummary in id
+    order (API key required). Supports Range requests to resume downloads;
+    the ETag is the file's sha256 from the manifest.
+    """
+    path = catalog_dump_service.file_path(name)
+    if not path:
+        raise HTTPException(status_code=404, detail="Dump file not found; it may have been replaced by a newer version")
+    manifest = catalog_dump_service.manifest() or {"files": []}
+    checksums = {file["name"]: file["sha256"] for file in manifest["files"]}
+    etag = f'"{checksums[name]}"' if name in checksums else None
+    return file_response(request, path, DUMP_MEDIA_TYPE, etag)
+
+
+def _schools_batch(db: Session, school_ids: List[int]) -> Response:
+    if len(school_ids) > MAX_SCHOOL_BATCH:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_SCHOOL_BATCH} schools per request")
+    
+    # Two queries (summaries, then ratings by category) however many ids are asked for
+    schools = {school.id: school for school in school_listing_service.load(db, dict.fromkeys(school_ids))}
+    items = [
+        SchoolBatchItem.model_construct(id=school_id, found=school_id in schools, school=schools.get(school_id))
+        for school_id in school_ids
+    ]
+    return model_response(List[SchoolBatchItem], items)
+
+
+@router.get("/batch", response_model=List[SchoolBatchItem])
+async def get_schools_batch(
+    request: Request,
+    ids: List[str] = Query(..., description="School ids, comma-separated (ids=1,2,3) or repeated (ids=1&ids=2)"),
+    db: Session = Depends(get_db),
+    auth_user = Depends(optional_auth_with_usage_tracking)
+):
+    """Several schools with their ratings in one call, in the order given; ids that don't exist come back with found=false"""
+    try:
+        school_ids = [int(part) for value in ids for part in value.split(",") if part.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be integers")
+    return _schools_batch(db, school_ids)
+
+
+@router.post("/batch", response_model=List[SchoolBatchItem])
+async def post_schools_batch(
+    request: Request,
+    school_ids: List[int],
+    db: Session = Depends(get_db),
+    auth_user = Depends(optional_auth_with_usage_tracking)
+):
+    """get_schools_batch with the ids in the body, for sets too long for a URL"""
+    return _schools_batch(db, school_ids)
+
+
 @router.get("/{school_id}", response_model=SchoolWithRatings)
 async def get_school(school_id: int, db: Session = Depends(get_db)):
     """Get a specific school by ID with ratings"""
-    school = db.query(School).filter(School.id == school_id).first()
+    school = db.query(School).options(undefer_group(DETAIL_COLUMNS)).filter(School.id == school_id).first()
     if not school:
         raise HTTPException(status_code=404, detail="School not found")
     
     rating_service = RatingService(db)
-    ratings = rating_service.calculate_school_ratings(school_id)
+    ratings = rating_service.calculate_school_ratings(school_id, school_name=school.name)
     
-    school_data = school.__dict__.copy()
-    school_data.update({
-        "average_rating": ratings["overall_rating"],
-        "total_reviews": ratings["total_reviews"],
-        "ratings_by_category": ratings["ratings_by_category"]
-    })
-    
-    return SchoolWithRatings(**school_data)
+    result = SchoolWithRatings.model_validate(school)
+    result.average_rating = ratings["overall_rating"]
+    result.total_reviews = ratings["total_reviews"]
+    result.ratings_by_category = ratings["ratings_by_category"]
+    return result
 
 
 @router.put("/{school_id}", response_model=SchoolSchema)
@@ -201,6 +407,13 @@ async def update_school(
         setattr(school, field, value)
     
     school.updated_at = func.now()
+    if update_data.keys() & LEADERBOARD_FIELDS:
+        leaderboard_service.update_school(db, school.id)
+    if update_data.keys() & TAG_FIELDS:
+        school_tag_service.refresh_school(db, school)
+    if update_data.keys() & GEO_FIELDS:
+        _relocate(school, update_data)
+    school_change_service.record(db, [school.id])
     db.commit()
     db.refresh(school)
     
@@ -256,15 +469,86 @@ async def get_school_ratings(school_id: int, db: Session = Depends(get_db)):
     return ratings
 
 
-@router.get("/{school_id}/trends")
-async def get_school_trends(school_id: int, db: Session = Depends(get_db)):
-    """Get rating trends for a specific school"""
-    school = db.query(School).filter(School.id == school_id).first()
-    if not school:
+@router.get("/{school_id}/page", response_model=SchoolPage)
+async def get_school_page(
+    request: Request,
+    school_id: int,
+    include: Optional[str] = Query(None, description=f"Comma-separated sections: {', '.join(PAGE_SECTIONS)} (default all)"),
+    review_limit: int = Query(20, ge=1, le=100),
+    review_offset: int = Query(0, ge=0),
+    period: str = Query("month", description="Trend bucket size: month or week"),
+    window: Optional[int] = Query(None, ge=1, le=MAX_TREND_WINDOW, description="Number of trend buckets, newest last"),
+    db: Session = Depends(get_db)
+):
+    """
+    Everything a school page renders in one call: the school with ratings, and
+    optionally the ratings breakdown, approved reviews and rating trends.
+    Carries an ETag; send it back in If-None-Match to get 304 when nothing changed.
+    """
+    sections = PAGE_SECTIONS if include is None else [part.strip() for part in include.split(",") if part.strip()]
+    unknown = set(sections) - set(PAGE_SECTIONS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"include can only list: {', '.join(PAGE_SECTIONS)}")
+    
+    page = school_page_service.build(
+        db, school_id, sections, review_limit, review_offset, _validate_trend_period(period), window
+    )
+    if page is None:
+        raise HTTPException(status_code=404, detail="School not found")
+    return with_etag(request, model_response(SchoolPage, page))
+
+
+@router.get("/{school_id}/similar", response_model=List[SimilarSchool])
+async def get_similar_schools(
+    school_id: int,
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_db)
+):
+    """Active schools most like this one (board, medium, grades, size, facilities, ratings, location), most similar first"""
+    rows = similar_school_service.similar(db, school_id, limit)
+    if rows is None:
         raise HTTPException(status_code=404, detail="School not found")
     
+    schools = school_listing_service.load(
+        db, [similar_id for similar_id, _ in rows], SimilarSchool,
+        extras={similar_id: {"similarity": similarity} for similar_id, similarity in rows}
+    )
+    return model_response(List[SimilarSchool], schools)
+
+
+def _validate_trend_period(period: str) -> str:
+    if period not in TREND_PERIODS:
+        raise HTTPException(status_code=400, detail=f"period must be one of: {', '.join(TREND_PERIODS)}")
+    return period
+
+
+@router.post("/trends/batch", response_model=List[SchoolTrends])
+async def get_schools_trends(
+    school_ids: List[int],
+    period: str = Query("month", description="Bucket size: month or week"),
+    window: Optional[int] = Query(None, ge=1, le=MAX_TREND_WINDOW, description="Number of buckets, newest last"),
+    db: Session = Depends(get_db)
+):
+    """Get rating trends for several schools in one call, in the order given"""
+    if len(school_ids) > MAX_TREND_BATCH:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_TREND_BATCH} schools per request")
+    
+    rating_service = RatingService(db)
+    return rating_service.get_rating_trends_batch(school_ids, _validate_trend_period(period), window)
+
+
+@router.get("/{school_id}/trends", response_model=SchoolTrends)
+async def get_school_trends(
+    school_id: int,
+    period: str = Query("month", description="Bucket size: month or week"),
+    window: Optional[int] = Query(None, ge=1, le=MAX_TREND_WINDOW, description="Number of buckets, newest last"),
+    db: Session = Depends(get_db)
+):
+    """Get monthly or weekly rating trends for a specific school"""
     rating_service = RatingService(db)
-    trends = rating_service.get_rating_trends(school_id)
+    trends = rating_service.get_rating_trends(school_id, _validate_trend_period(period), window)
+    if trends is None:
+        raise HTTPException(status_code=404, detail="School not found")
     
     return trends
 
@@ -272,7 +556,7 @@ async def get_school_trends(school_id: int, db: Session = Depends(get_db)):
 @router.get("/stats/overview", response_model=SchoolStats)
 async def get_school_stats(db: Session = Depends(get_db)):
     """Get overall statistics about schools in the database"""
-    total_schools = db.query(School).filter(School.is_active == True).count()
+    total_schools = db.query(func.count(School.id)).filter(School.is_active == True).scalar()
     
     # Average rating across all schools
     avg_rating = db.query(func.avg(Review.overall_rating)).scalar()
@@ -296,17 +580,13 @@ async def get_school_stats(db: Session = Depends(get_db)):
     # Top rated schools
     rating_service = RatingService(db)
     top_rated_rankings = rating_service.get_school_rankings(limit=10)
-    top_rated: List[SchoolWithRatings] = []
-
-    for ranking in top_rated_rankings:
-        school = db.query(School).filter(School.id == ranking.get('school_id')).first()
-        if not school:
-            continue
-
-        school_schema = SchoolWithRatings.from_orm(school)
-        school_schema.average_rating = ranking.get('average_rating')
-        school_schema.total_reviews = ranking.get('review_count', 0)
-        top_rated.append(school_schema)
+    top_rated = school_listing_service.load(
+        db, [ranking['school_id'] for ranking in top_rated_rankings],
+        extras={
+            ranking['school_id']: {"average_rating": ranking.get('average_rating'), "total_reviews": ranking.get('review_count', 0)}
+            for ranking in top_rated_rankings
+        }
+    )
     
     return SchoolStats(
         total_schools=total_schools,
@@ -320,39 +600,52 @@ async def get_school_stats(db: Session = Depends(get_db)):
 @router.get("/rankings/top")
 async def get_top_schools(
     limit: int = Query(10, ge=1, le=50),
+    offset: int = Query(0, ge=0),
     category: Optional[str] = Query(None),
+    city: Optional[str] = Query(None),
+    state: Optional[str] = Query(None),
+    board: Optional[str] = Query(None),
+    min_reviews: Optional[int] = Query(None, ge=1, description="Minimum reviews (or category ratings) to be ranked"),
     db: Session = Depends(get_db)
 ):
-    """Get top-rated schools, optionally filtered by category"""
+    """Get top-rated schools by Bayesian score, optionally within a category, city, state or board"""
     rating_service = RatingService(db)
-    rankings = rating_service.get_school_rankings(limit=limit, category=category)
+    rankings = rating_service.get_school_rankings(
+        limit=limit, category=category, city=city, state=state, board=board,
+        min_reviews=min_reviews, offset=offset
+    )
     
     return {
         "rankings": rankings,
         "category": category,
-        "limit": limit
+        "city": city,
+        "state": state,
+        "board": board,
+        "limit": limit,
+        "offset": offset
     }
 
 
-@router.post("/compare")
+@router.post("/compare", response_model=SchoolComparison)
 async def compare_schools(
     school_ids: List[int],
+    peer_group: str = Query("city", description="Peers for percentiles: city, state, board or city_board"),
     db: Session = Depends(get_db)
 ):
-    """Compare multiple schools side by side"""
+    """Compare multiple schools side by side, with percentiles and z-scores against their peers"""
     if len(school_ids) < 2 or len(school_ids) > 5:
         raise HTTPException(
             status_code=400, 
             detail="Must compare between 2 and 5 schools"
         )
+    if peer_group not in PEER_GROUPS:
+        raise HTTPException(status_code=400, detail=f"peer_group must be one of: {', '.join(PEER_GROUPS)}")
     
-    rating_service = RatingService(db)
-    comparison = rating_service.get_school_comparison(school_ids)
+    comparison = SchoolComparisonService(db).compare(school_ids, peer_group)
+    if comparison is None:
+        raise HTTPException(status_code=404, detail="Schools not found")
     
-    return {
-        "comparison": comparison,
-        "schools_compared": len(comparison)
-    }
+    return comparison
 
 
 @router.post("/bulk-update", response_model=BulkSchoolResponse)
@@ -379,6 +672,13 @@ async def bulk_update_schools(
                 setattr(school, field, value)
             
             school.updated_at = func.now()
+            if update_data.keys() & LEADERBOARD_FIELDS:
+                leaderboard_service.update_school(db, school.id)
+            if update_data.keys() & TAG_FIELDS:
+                school_tag_service.refresh_school(db, school)
+            if update_data.keys() & GEO_FIELDS:
+                _relocate(school, update_data)
+            school_change_service.record(db, [school.id])
             db.commit()
             updated_count += 1
             
@@ -1,29 +1,60 @@
 """
 API endpoints for managing and monitoring school scraping jobs.
 """
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Header, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, undefer_group
+from typing import List, Optional
+from datetime import datetime
 from app.database import get_db
-from app.models import ScrapingJob
-from app.schemas import ScrapingJob as ScrapingJobSchema, ScrapingJobCreate
+from app.models import ScrapingJob, School, DETAIL_COLUMNS
+from app.schemas import ScrapingJob as ScrapingJobSchema, ScrapingJobCreate, WebsiteEnrichmentRequest
 from app.services.scraping_service import scraping_service
-import asyncio
+from app.services.website_enrichment_service import WebsiteEnrichmentService
+from app.services.refresh_scheduler_service import RefreshSchedulerService
+from app.services.scraping_cost_service import scraping_cost_service
+from app.services.region_lock_service import find_active_job, region_key
+from app.services.event_bus_service import (
+    event_bus, job_topic, local_event, format_sse, stream_events, SSE_HEADERS, TERMINAL_JOB_STATUSES
+)
+import logging
 
 router = APIRouter(prefix="/scraping", tags=["scraping"])
+logger = logging.getLogger(__name__)
 
 
 @router.post("/start", response_model=ScrapingJobSchema)
 async def start_scraping_job(
     job_data: ScrapingJobCreate,
     background_tasks: BackgroundTasks,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
     db: Session = Depends(get_db)
 ):
-    """Start a new school scraping job for a region"""
+    """Start a new school scraping job for a region.
+    Returns the existing job instead if the idempotency key was seen before,
+    or if the same region already has a pending or running job."""
+    idempotency_key = idempotency_key or job_data.idempotency_key
+    if idempotency_key:
+        existing = db.query(ScrapingJob).filter(ScrapingJob.idempotency_key == idempotency_key).first()
+        if existing:
+            return existing
+    
+    active = find_active_job(db, job_data.region)
+    if active:
+        logger.info(f"Coalesced scraping request for '{job_data.region}' into job {active.id}")
+        return active
+    
     # Create scraping job record
-    job = ScrapingJob(region=job_data.region)
+    job = ScrapingJob(region=job_data.region, region_key=region_key(job_data.region), idempotency_key=idempotency_key,
+                      incremental=job_data.incremental, heartbeat_at=datetime.utcnow())
     db.add(job)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        # A concurrent request with the same idempotency key won the insert
+        db.rollback()
+        return db.query(ScrapingJob).filter(ScrapingJob.idempotency_key == idempotency_key).first()
     db.refresh(job)
     
     # Start background task
@@ -54,6 +85,49 @@ async def get_scraping_job(job_id: int, db: Session = Depends(get_db)):
     return job
 
 
+@router.get("/jobs/{job_id}/events")
+async def stream_scraping_job_events(job_id: int, request: Request, db: Session = Depends(get_db)):
+    """Live job progress as server-sent events, replacing polling of /jobs/{job_id}.
+    Starts with a snapshot of the job and ends once the job finishes."""
+    # Subscribe before reading the row so no event falls between the two
+    subscription = event_bus.subscribe([job_topic(job_id)], replay_latest=False)
+    job = db.query(ScrapingJob).filter(ScrapingJob.id == job_id).first()
+    if not job:
+        subscription.close()
+        raise HTTPException(status_code=404, detail="Scraping job not found")
+    
+    initial = [local_event("snapshot", ScrapingJobSchema.model_validate(job).model_dump(mode="json"))]
+    status = job.status
+    # The stream may stay open for a long time; don't hold a connection for it
+    db.close()
+    if status in TERMINAL_JOB_STATUSES:
+        subscription.close()
+        return StreamingResponse(iter([format_sse(initial[0])]), media_type="text/event-stream", headers=SSE_HEADERS)
+    
+    # The row only holds the last checkpoint; the bus has the latest progress of this run
+    latest = event_bus.latest(job_topic(job_id))
+    if status == "running" and latest:
+        initial.append(latest)
+    
+    events = stream_events(
+        subscription,
+        is_disconnected=request.is_disconnected,
+        initial=initial,
+        until=lambda event: event["type"] == "status" and event["data"]["status"] in TERMINAL_JOB_STATUSES
+    )
+    return StreamingResponse(events, media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+@router.get("/jobs/{job_id}/calls")
+async def get_scraping_job_calls(job_id: int, db: Session = Depends(get_db)):
+    """Get every API call made for a job with its tokens, latency, outcome and cost"""
+    job = db.query(ScrapingJob).filter(ScrapingJob.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Scraping job not found")
+    
+    return scraping_cost_service.get_job_calls(db, job_id)
+
+
 @router.delete("/jobs/{job_id}")
 async def delete_scraping_job(job_id: int, db: Session = Depends(get_db)):
     """Delete a scraping job"""
@@ -78,10 +152,17 @@ async def retry_scraping_job(
     if not job:
         raise HTTPException(status_code=404, detail="Scraping job not found")
     
-    if job.status not in ["failed", "completed"]:
+    if job.status not in ["failed", "completed", "skipped"]:
         raise HTTPException(
             status_code=400, 
-            detail="Can only retry failed or completed jobs"
+            detail="Can only retry failed, skipped or completed jobs"
+        )
+    
+    active = find_active_job(db, job.region, exclude_job_id=job.id)
+    if active:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Region '{job.region}' is already being scraped by job {active.id}"
         )
     
     # Reset job status
@@ -89,7 +170,10 @@ async def retry_scraping_job(
     job.error_message = None
     job.schools_found = 0
     job.schools_processed = 0
+    job.schools_created = 0
     job.completed_at = None
+    job.heartbeat_at = datetime.utcnow()
+    job.run = (job.run or 1) + 1
     db.commit()
     
     # Start background task
@@ -98,8 +182,49 @@ async def retry_scraping_job(
     return {"message": "Scraping job restarted"}
 
 
-async def run_scraping_job(job_id: int):
-    """Background task to run scraping job"""
+@router.post("/jobs/{job_id}/replay")
+async def replay_scraping_job(
+    job_id: int,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db)
+):
+    """Re-process a job's region from cached Perplexity responses without calling the API"""
+    job = db.query(ScrapingJob).filter(ScrapingJob.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Scraping job not found")
+    
+    if job.status not in ["failed", "completed", "skipped"]:
+        raise HTTPException(
+            status_code=400, 
+            detail="Can only replay failed, skipped or completed jobs"
+        )
+    
+    active = find_active_job(db, job.region, exclude_job_id=job.id)
+    if active:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Region '{job.region}' is already being scraped by job {active.id}"
+        )
+    
+    # Reset job status
+    job.status = "pending"
+    job.error_message = None
+    job.schools_found = 0
+    job.schools_processed = 0
+    job.schools_created = 0
+    job.completed_at = None
+    job.heartbeat_at = datetime.utcnow()
+    job.run = (job.run or 1) + 1
+    db.commit()
+    
+    # Start background task in cache-only mode
+    background_tasks.add_task(run_scraping_job, job.id, True)
+    
+    return {"message": "Scraping job replay started from cached responses"}
+
+
+async def run_scraping_job(job_id: int, cache_only: bool = False):
+    """Background task to run scraping job (incremental if the job was started that way)"""
     try:
         # Get the job to retrieve the region
         from app.database import SessionLocal
@@ -112,7 +237,9 @@ async def run_scraping_job(job_id: int):
             region = job.region
             result = await scraping_service.scrape_schools_in_region(
                 region=region,
-                job_id=job_id
+                job_id=job_id,
+                cache_only=cache_only,
+                incremental=bool(job.incremental)
             )
             return result
         finally:
@@ -122,6 +249,84 @@ async def run_scraping_job(job_id: int):
         pass
 
 
+@router.post("/enrich")
+async def enrich_school_websites(
+    enrichment: WebsiteEnrichmentRequest,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db)
+):
+    """Crawl school websites and fill in missing contact details, principal and facilities"""
+    query = db.query(School.id).filter(School.website.isnot(None), School.website != "", School.is_active == True)
+    if enrichment.school_ids:
+        query = query.filter(School.id.in_(enrichment.school_ids))
+    elif enrichment.city:
+        query = query.filter(School.city.ilike(enrichment.city))
+    school_ids = [row.id for row in query.order_by(School.last_scraped_at.asc()).limit(enrichment.limit).all()]
+    if not school_ids:
+        raise HTTPException(status_code=404, detail="No schools with a website found")
+    
+    background_tasks.add_task(run_website_enrichment, school_ids, enrichment.use_llm)
+    
+    return {"message": f"Website enrichment started for {len(school_ids)} schools", "school_ids": school_ids}
+
+
+async def run_website_enrichment(school_ids: List[int], use_llm: bool = False):
+    """Background task to enrich schools from their websites"""
+    from app.database import SessionLocal
+    db = SessionLocal()
+    try:
+        schools = db.query(School).options(undefer_group(DETAIL_COLUMNS)).filter(School.id.in_(school_ids)).all()
+        service = WebsiteEnrichmentService(
+            db,
+            llm_extractor=scraping_service.extract_details_from_markdown if use_llm else None
+        )
+        result = await service.enrich_schools(schools)
+        logger.info(f"Website enrichment finished: {len(result['enriched'])} of {result['schools']} schools updated, "
+                    f"{result['fetched']} pages fetched, {result['not_modified']} not modified, {result['llm_calls']} LLM calls")
+        return result
+    except Exception as e:
+        logger.error(f"Website enrichment failed: {e}")
+    finally:
+        db.close()
+
+
+@router.get("/schedule")
+async def get_refresh_schedule(
+    limit: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
+    """Dry run: what the refresh scheduler would re-scrape and re-crawl next, and why"""
+    return RefreshSchedulerService(db).plan(limit)
+
+
+@router.post("/schedule/run")
+async def run_refresh_batch(
+    background_tasks: BackgroundTasks,
+    limit: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
+    """Issue the next refresh batch now instead of waiting for the scheduler"""
+    plan = RefreshSchedulerService(db).plan(limit)
+    if not plan["next_batch"]:
+        return {"message": "Nothing is due for a refresh within the current API budget", "plan": plan}
+    
+    background_tasks.add_task(run_refresh_scheduler_batch, limit)
+    
+    return {"message": f"Refresh batch of {len(plan['next_batch'])} items started", "plan": plan}
+
+
+async def run_refresh_scheduler_batch(limit: Optional[int] = None):
+    """Background task to issue one refresh batch"""
+    from app.database import SessionLocal
+    db = SessionLocal()
+    try:
+        return await RefreshSchedulerService(db).run_batch(limit)
+    except Exception as e:
+        logger.error(f"Refresh batch failed: {e}")
+    finally:
+        db.close()
+
+
 @router.get("/status/overview")
 async def get_scraping_status(db: Session = Depends(get_db)):
     """Get overview of scraping jobs status"""
@@ -146,5 +351,6 @@ async def get_scraping_status(db: Session = Depends(get_db)):
         "jobs_by_status": status_counts,
         "total_schools_found": total_schools_found,
         "total_schools_processed": total_schools_processed,
-        "recent_jobs": recent_jobs
+        "recent_jobs": recent_jobs,
+        "costs": scraping_cost_service.get_cost_overview(db)
     }
@@ -15,7 +15,64 @@ class Settings(BaseSettings):
     
     # AI API Configuration
     perplexity_api_key: Optional[str] = None
+    perplexity_api_url: str = "https://api.perplexity.ai/chat/completions"
+    perplexity_streaming: bool = True  # Stream completions and ingest schools as they arrive
+    perplexity_cache_ttl_seconds: int = 86400  # Reuse identical completions for 24 hours
+    scraping_max_pages_per_area: int = 3  # Incremental discovery: pages per locality/pincode
+    scraping_max_api_calls_per_job: int = 30  # Incremental discovery: hard cap on API calls per job
+    scraping_max_cost_per_job_usd: float = 1.0  # Stop a job's API calls past this spend (0 disables)
+    scraping_max_cost_per_day_usd: float = 10.0  # Stop all scraping API calls past this spend in 24h (0 disables)
+    scraping_region_lease_seconds: int = 3600  # Region lease lifetime without renewal (SQLite lease table)
+    scraping_checkpoint_every_schools: int = 25  # Persist job progress after this many schools...
+    scraping_checkpoint_seconds: float = 10.0  # ...or after this long, whichever comes first
     
+    # Live Events (SSE)
+    events_keepalive_seconds: float = 15.0  # Comment line sent on idle streams so proxies keep them open
+    events_queue_size: int = 256  # Events buffered per subscriber; the oldest are dropped for slow clients
+    
+    # Website Enrichment Crawler
+    enrichment_concurrency: int = 8  # Pages fetched at once across all hosts
+    enrichment_per_host_delay_seconds: float = 1.0  # Minimum gap between requests to one host
+    enrichment_max_pages_per_site: int = 4  # Homepage plus contact/about/facilities pages
+    enrichment_user_agent: str = "SchoolDoorBot/1.0 (+https://schooldoor.in)"
+    
+    # Refresh Scheduler
+    refresh_scheduler_enabled: bool = False  # Run the staleness-driven refresh loop on startup
+    refresh_api_budget_per_hour: int = 20  # Perplexity calls the scheduler may spend per hour (shared with manual jobs)
+    refresh_stale_after_days: int = 30  # Data older than this is due for a refresh
+    refresh_batch_size: int = 5  # Regions (and, separately, school websites) issued per batch
+    refresh_interval_seconds: int = 900  # Time between batches
+
+    # Rankings
+    ranking_prior_weight: float = 5.0  # Bayesian prior: virtual ratings at the scope average added to every school
+    ranking_min_reviews: int = 1  # Default minimum reviews (or category ratings) to be ranked
+    leaderboard_size: int = 200  # Schools kept per precomputed (scope, category) leaderboard
+    trends_window_months: int = 12  # Default number of monthly buckets in a trend series
+    trends_window_weeks: int = 26  # Default number of weekly buckets in a trend series
+    trends_improving_threshold: float = 0.2  # Rating change between halves of the window that counts as a trend
+    comparison_min_peers: int = 5  # Peer schools needed before percentile strengths/weaknesses are reported
+    search_facet_cache_seconds: float = 60.0  # How long facet counts for one set of search filters are reused
+    tag_index_reload_seconds: float = 300.0  # How often the in-memory facility/program bitmaps are reloaded from school_tags
+    catalog_snapshot_enabled: bool = False  # Serve public school lists and suggestions from the in-memory columnar snapshot
+    catalog_snapshot_refresh_seconds: float = 30.0  # How often the snapshot pulls schools and ratings changed since its last refresh
+    catalog_snapshot_full_reload_seconds: float = 3600.0  # How often the snapshot is rebuilt from scratch
+    similar_index_refresh_seconds: float = 60.0  # How often the similar-schools matrix re-encodes schools changed since its last refresh
+    similar_index_full_reload_seconds: float = 3600.0  # How often the similar-schools encoding is refitted and every school re-encoded
+    change_feed_retention_days: int = 90  # How long /schools/changes keeps changes; older cursors must resync
+    catalog_dump_enabled: bool = False  # Write the compressed catalog dump on a schedule (enable on one worker only)
+    catalog_dump_dir: str = "dumps"  # Directory of the dump files and their manifest.json
+    catalog_dump_interval_seconds: int = 3600  # Time between dump versions
+    catalog_dump_full_rebuild_seconds: int = 86400  # How often a dump is rebuilt from the database instead of merged into the previous one
+    catalog_dump_keep_versions: int = 3  # Dump files kept for consumers still downloading an older version
+
+    # Location
+    pincode_centroids_path: Optional[str] = None  # CSV with pincode, latitude, longitude columns (e.g. the India Post pincode directory)
+    geocoding_url: Optional[str] = None  # Nominatim-compatible search URL for schools whose pincode is unknown; unset disables geocoding
+    geocoding_min_interval_seconds: float = 1.0  # Pause between geocoding requests (Nominatim allows one per second)
+    geo_index_reload_seconds: float = 300.0  # How often the in-memory grid of school locations is reloaded
+    nearby_default_radius_km: float = 10.0  # Search radius for /schools/nearby when none is given
+    nearby_max_radius_km: float = 50.0  # Largest radius /schools/nearby accepts
+
     # Application Configuration
     secret_key: str = "your-secret-key-change-in-production"
     algorithm: str = "HS256"
@@ -5,6 +5,7 @@ from app.database import engine, get_db
 from app.models import Base
 from app.api import schools, reviews, scraping, admin, api_keys, members
 from app.config import settings
+from app.responses import FastJSONResponse
 from app.services.migration_service import migration_service
 
 import logging
@@ -19,7 +20,8 @@ app = FastAPI(
     description="A comprehensive API for school data scraping, rating, and review management",
     version="1.0.0",
     docs_url="/docs" if settings.debug else None,
-    redoc_url="/redoc" if settings.debug else None
+    redoc_url="/redoc" if settings.debug else None,
+    default_response_class=FastJSONResponse
 )
 
 
@@ -122,12 +124,31 @@ async def startup_event():
         logger.error(f"Error initializing rating categories: {e}")
     finally:
         db.close()
+    
+    # Start the staleness-driven refresh loop
+    if settings.refresh_scheduler_enabled:
+        import asyncio
+        from app.services.refresh_scheduler_service import run_refresh_scheduler
+        app.state.refresh_scheduler = asyncio.create_task(run_refresh_scheduler())
+        logger.info("Refresh scheduler started")
+    
+    # Start the catalog dump writer
+    if settings.catalog_dump_enabled:
+        import asyncio
+        from app.services.catalog_dump_service import run_catalog_dump_scheduler
+        app.state.catalog_dump_scheduler = asyncio.create_task(run_catalog_dump_scheduler())
+        logger.info("Catalog dump scheduler started")
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Application shutdown event"""
     logger.info("SchoolDoor API is shutting down...")
+    
+    for name in ("refresh_scheduler", "catalog_dump_scheduler"):
+        scheduler = getattr(app.state, name, None)
+        if scheduler:
+            scheduler.cancel()
 
 
 if __name__ == "__main__":
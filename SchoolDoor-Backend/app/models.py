@@ -1,9 +1,13 @@
-from sqlalchemy import Column, Integer, String, Float, Text, DateTime, ForeignKey, Boolean, JSON
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Float, Text, DateTime, Date, ForeignKey, Boolean, JSON, Index
+from sqlalchemy.orm import relationship, deferred
 from sqlalchemy.sql import func
 from app.database import Base
 
 
+# Deferred group of School's heavy JSON columns
+DETAIL_COLUMNS = "details"
+
+
 class School(Base):
     """
     School model representing an educational institution.
@@ -18,6 +22,9 @@ class School(Base):
     state = Column(String(100), nullable=True, index=True)
     zip_code = Column(String(20), nullable=True)
     country = Column(String(100), nullable=True, default="India")
+    latitude = Column(Float, nullable=True)
+    longitude = Column(Float, nullable=True)
+    location_source = Column(String(20), nullable=True)  # pincode (centroid), geocoded, manual
     phone = Column(String(20), nullable=True)
     email = Column(String(255), nullable=True)
     website = Column(String(500), nullable=True)
@@ -26,25 +33,27 @@ class School(Base):
     school_type = Column(String(50), nullable=True)  # CBSE, ICSE, State Board, IB, IGCSE, etc.
     board = Column(String(50), nullable=True)  # CBSE, ICSE, State Board, IB, IGCSE
     grade_levels = Column(String(100), nullable=True)  # Pre-K to 12, Nursery to 10, etc.
-    enrollment = Column(Integer, nullable=True)
+    enrollment = Column(Integer, nullable=True, index=True)
     student_teacher_ratio = Column(Float, nullable=True)
     
     # Academic information (Indian context)
-    board_exam_results = Column(JSON, nullable=True)  # 10th/12th board exam results
-    competitive_exam_results = Column(JSON, nullable=True)  # JEE, NEET, etc.
-    programs = Column(JSON, nullable=True)  # Special programs offered
+    # The JSON columns are large and only the detail view needs them, so they load on first
+    # access; queries that read them for many schools use undefer_group(DETAIL_COLUMNS)
+    board_exam_results = deferred(Column(JSON, nullable=True), group=DETAIL_COLUMNS)  # 10th/12th board exam results
+    competitive_exam_results = deferred(Column(JSON, nullable=True), group=DETAIL_COLUMNS)  # JEE, NEET, etc.
+    programs = deferred(Column(JSON, nullable=True), group=DETAIL_COLUMNS)  # Special programs offered
     medium_of_instruction = Column(String(50), nullable=True)  # English, Hindi, Regional language
     
     # Facilities and amenities
-    facilities = Column(JSON, nullable=True)  # Sports, arts, technology, etc.
+    facilities = deferred(Column(JSON, nullable=True), group=DETAIL_COLUMNS)  # Sports, arts, technology, etc.
     
     # Contact and administrative info
     principal_name = Column(String(255), nullable=True)
     established_year = Column(Integer, nullable=True)
     
     # Metadata
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now(), index=True)
     last_scraped_at = Column(DateTime(timezone=True), nullable=True)
     is_active = Column(Boolean, default=True)
     
@@ -118,14 +127,133 @@ class Review(Base):
     member = relationship("MemberUser", lazy="select", foreign_keys=[member_id])
 
 
+class SchoolTag(Base):
+    """
+    One normalized facility or program tag of a school, e.g.
+    "facility:swimming" or "program:robotics-club", derived from the
+    facilities and programs JSON columns.
+    """
+    __tablename__ = "school_tags"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    school_id = Column(Integer, ForeignKey("schools.id"), nullable=False, index=True)
+    tag = Column(String(150), nullable=False)
+    
+    __table_args__ = (
+        Index("ix_school_tags_tag_school", "tag", "school_id"),
+    )
+
+
+class SchoolRatingStats(Base):
+    """
+    Rollup of rating totals per school: one row per rating category, plus one
+    row with category_id NULL for approved reviews' overall ratings.
+    Rankings walk the (category_id, score) index instead of aggregating
+    reviews and ratings per request.
+    """
+    __tablename__ = "school_rating_stats"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    school_id = Column(Integer, ForeignKey("schools.id"), nullable=False, index=True)
+    category_id = Column(Integer, ForeignKey("rating_categories.id"), nullable=True)  # NULL = overall (reviews)
+    rating_count = Column(Integer, nullable=False, default=0)
+    rating_sum = Column(Float, nullable=False, default=0.0)
+    score = Column(Float, nullable=True)  # Bayesian average, pulled towards the category's mean
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    __table_args__ = (
+        Index("ix_school_rating_stats_category_school", "category_id", "school_id"),
+        Index("ix_school_rating_stats_category_score", "category_id", "score"),
+        Index("ix_school_rating_stats_category_updated", "category_id", "updated_at"),
+    )
+
+
+class SchoolRatingBucket(Base):
+    """
+    Approved reviews per school per calendar month or ISO week (bucket_start
+    is the first day of the month, or the Monday of the week). Trend series
+    read these rows instead of the reviews themselves.
+    """
+    __tablename__ = "school_rating_buckets"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    school_id = Column(Integer, ForeignKey("schools.id"), nullable=False)
+    period = Column(String(10), nullable=False)  # month, week
+    bucket_start = Column(Date, nullable=False)
+    review_count = Column(Integer, nullable=False, default=0)
+    rating_sum = Column(Float, nullable=False, default=0.0)
+    
+    __table_args__ = (
+        Index("ix_school_rating_buckets_school_period_start", "school_id", "period", "bucket_start"),
+    )
+
+
+class SchoolChange(Base):
+    """
+    Change feed entry: a school's data or active flag ("school"), or its
+    rating summary ("ratings"), changed. Written in the same transaction as
+    the change; sequence, the partners' cursor, is assigned once the row is
+    committed, so a cursor never skips a change that commits late.
+    """
+    __tablename__ = "school_changes"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    school_id = Column(Integer, ForeignKey("schools.id"), nullable=False)
+    kind = Column(String(20), nullable=False)  # school, ratings
+    sequence = Column(Integer, nullable=True, unique=True)  # NULL until published
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class LeaderboardEntry(Base):
+    """
+    One school's place on a precomputed leaderboard. A leaderboard is a
+    (scope, category) pair, where scope is "all", "city:<name>",
+    "state:<name>" or "board:<name>"; only its top leaderboard_size schools
+    are stored, and they are kept current as ratings change.
+    """
+    __tablename__ = "leaderboard_entries"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    scope = Column(String(255), nullable=False)
+    category_id = Column(Integer, ForeignKey("rating_categories.id"), nullable=True)  # NULL = overall (reviews)
+    school_id = Column(Integer, ForeignKey("schools.id"), nullable=False, index=True)
+    score = Column(Float, nullable=False)
+    rating_count = Column(Integer, nullable=False)
+    rating_sum = Column(Float, nullable=False)
+    
+    __table_args__ = (
+        Index("ix_leaderboard_entries_board_score", "scope", "category_id", "score"),
+    )
+
+
+class LeaderboardBuild(Base):
+    """
+    Settings the stored leaderboards were built with. Leaderboards are only
+    served while these match the current configuration.
+    """
+    __tablename__ = "leaderboard_builds"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    size = Column(Integer, nullable=False)
+    min_reviews = Column(Integer, nullable=False)
+    entries = Column(Integer, nullable=False, default=0)
+    built_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
 class ScrapingJob(Base):
     __tablename__ = "scraping_jobs"
     
     id = Column(Integer, primary_key=True, index=True)
     region = Column(String(255), nullable=False)
-    status = Column(String(50), default="pending")  # pending, running, completed, failed
+    region_key = Column(String(255), nullable=True, index=True)  # Normalized region used to coalesce jobs
+    idempotency_key = Column(String(255), nullable=True, unique=True, index=True)  # Client-supplied key for safe retries of /start
+    status = Column(String(50), default="pending")  # pending, running, completed, failed, skipped
     schools_found = Column(Integer, default=0)
     schools_processed = Column(Integer, default=0)
+    schools_created = Column(Integer, default=0)
     error_message = Column(Text, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     completed_at = Column(DateTime(timezone=True), nullable=True)
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)  # Last sign of life from the worker (queued, started, checkpointed)
+    run = Column(Integer, nullable=False, default=1, server_default="1")  # Incremented by retry and replay; budgets and counts are per run
+    incremental = Column(Boolean, default=False)  # Page through localities/pincodes (kept for retry and replay)
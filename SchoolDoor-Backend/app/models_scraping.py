@@ -0,0 +1,80 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, JSON, ForeignKey, Float
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class LLMResponseCache(Base):
+    """
+    Raw LLM completion cached by a hash of the normalized request (model + prompt).
+    Kept past expiry so old responses can be replayed through newer parsers.
+    """
+    __tablename__ = "llm_response_cache"
+
+    id = Column(Integer, primary_key=True, index=True)
+    cache_key = Column(String(64), unique=True, nullable=False, index=True)  # sha256 of normalized request
+    model = Column(String(100), nullable=False)
+    region = Column(String(255), nullable=True, index=True)  # Normalized (lowercase) region the prompt was for
+    response_body = Column(Text, nullable=False)  # Full JSON completion as returned by the API
+    hit_count = Column(Integer, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=True)
+
+
+class WebsitePage(Base):
+    """
+    Last fetch of a school website page by the enrichment crawler.
+    Validators allow conditional re-fetches; extracted fields and condensed
+    markdown are reused when the server answers 304 Not Modified.
+    """
+    __tablename__ = "website_pages"
+
+    id = Column(Integer, primary_key=True, index=True)
+    url = Column(String(1000), unique=True, nullable=False, index=True)
+    school_id = Column(Integer, ForeignKey("schools.id"), nullable=True, index=True)
+    status_code = Column(Integer, nullable=True)
+    etag = Column(String(255), nullable=True)
+    last_modified = Column(String(100), nullable=True)  # Raw Last-Modified header value
+    markdown = Column(Text, nullable=True)  # Condensed page text
+    extracted = Column(JSON, nullable=True)  # Fields found on this page (phone, email, principal_name, facilities)
+    links = Column(JSON, nullable=True)  # Same-site links worth following (contact, about, facilities)
+    fetched_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class ScrapingCall(Base):
+    """
+    One LLM request made for scraping (every attempt, including retries and
+    cache hits), with token usage, latency and estimated cost.
+    """
+    __tablename__ = "scraping_calls"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(Integer, ForeignKey("scraping_jobs.id", ondelete="SET NULL"), nullable=True, index=True)
+    run = Column(Integer, nullable=True)  # The job's run (see ScrapingJob.run) the call was made in
+    region = Column(String(255), nullable=True, index=True)  # Normalized (lowercase)
+    area = Column(String(255), nullable=True)  # Locality or pincode for incremental discovery
+    purpose = Column(String(50), nullable=False, default="schools")  # schools, sub_areas, website_details
+    model = Column(String(100), nullable=False)
+    attempt = Column(Integer, default=1)
+    outcome = Column(String(50), nullable=False)  # success, cache_hit, timeout, connect_error, http_<status>, error
+    status_code = Column(Integer, nullable=True)
+    prompt_tokens = Column(Integer, default=0)
+    completion_tokens = Column(Integer, default=0)
+    total_tokens = Column(Integer, default=0)
+    latency_ms = Column(Integer, nullable=True)
+    cost_usd = Column(Float, default=0.0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
+
+class ScrapingRegionLease(Base):
+    """
+    Exclusive lease on a region while a job scrapes it. Used where the
+    database has no advisory locks (SQLite); expired leases can be taken over.
+    """
+    __tablename__ = "scraping_region_leases"
+
+    id = Column(Integer, primary_key=True, index=True)
+    region_key = Column(String(255), unique=True, nullable=False, index=True)
+    job_id = Column(Integer, nullable=True)
+    holder = Column(String(255), nullable=False)  # host:pid of the worker holding the lease
+    acquired_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False)
@@ -0,0 +1,115 @@
+import functools
+import hashlib
+import re
+from pathlib import Path
+from typing import Any, Iterator, Optional
+import orjson
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel, TypeAdapter
+from starlette.requests import Request
+from starlette.responses import FileResponse, JSONResponse, Response, StreamingResponse
+
+"""
+JSON responses rendered with orjson.
+FastJSONResponse is the app's default response class. It writes the same
+bytes as Starlette's JSONResponse (compact separators, UTF-8 without
+escaping, keys in insertion order, datetimes as isoformat()) with two
+exceptions: floats under 1e-4 or from 1e16 up use the shortest exponent
+form ("1e-5" rather than "1e-05"), and NaN becomes null instead of an error.
+model_response serializes response models with a cached pydantic
+TypeAdapter straight to bytes, skipping FastAPI's separate validation,
+to-python and dumps passes, for the high-volume list endpoints.
+file_response serves files with single byte-range requests (Starlette's
+FileResponse always sends the whole file), so large downloads resume.
+"""
+
+BYTE_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+# Non-string dict keys are written as strings, like json.dumps does
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _default(value: Any) -> Any:
+    """Types orjson does not know natively (pydantic models, Decimal, sets, ...)"""
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    return jsonable_encoder(value)
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=ORJSON_OPTIONS)
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+@functools.lru_cache(maxsize=None)
+def serializer(annotation: Any) -> TypeAdapter:
+    """Pre-built serializer for a response type such as List[SchoolSummary]"""
+    return TypeAdapter(annotation)
+
+
+def model_response(annotation: Any, content: Any, status_code: int = 200) -> Response:
+    """
+    Response with content serialized as annotation (the route's response_model).
+    Content is not validated again, so it must already be instances of it.
+    """
+    return Response(serializer(annotation).dump_json(content), status_code=status_code, media_type="application/json")
+
+
+def with_etag(request: Request, response: Response) -> Response:
+    """
+    Tag response with a strong ETag over its body, or answer 304 Not Modified
+    when the request's If-None-Match already has it.
+    """
+    etag = f'"{hashlib.blake2b(response.body, digest_size=16).hexdigest()}"'
+    if_none_match = request.headers.get("if-none-match", "")
+    if if_none_match.strip() == "*" or etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return response
+
+
+def _read_range(path: Path, start: int, end: int, block_size: int = 1 << 16) -> Iterator[bytes]:
+    with open(path, "rb") as file:
+        file.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            block = file.read(min(block_size, remaining))
+            if not block:
+                return
+            remaining -= len(block)
+            yield block
+
+
+def file_response(request: Request, path: Path, media_type: str, etag: Optional[str] = None) -> Response:
+    """
+    The file at path, or the part of it a single Range: bytes=... asks for
+    (206 Partial Content, or 416 when it lies past the end). Other range
+    forms, and ranges whose If-Range no longer matches etag, get the whole file.
+    """
+    size = path.stat().st_size
+    headers = {"Accept-Ranges": "bytes"}
+    if etag:
+        headers["ETag"] = etag
+    match = BYTE_RANGE.match(request.headers.get("range", "").strip())
+    if_range = request.headers.get("if-range")
+    if not match or not any(match.groups()) or (if_range is not None and if_range != etag):
+        return FileResponse(path, media_type=media_type, filename=path.name, headers=headers)
+
+    first, last = match.groups()
+    if first:
+        start, end = int(first), min(int(last), size - 1) if last else size - 1
+    else:
+        # Suffix range: the last N bytes
+        start, end = max(size - int(last), 0), size - 1
+    if start > end or start >= size:
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+    headers.update({
+        "Content-Range": f"bytes {start}-{end}/{size}",
+        "Content-Length": str(end - start + 1),
+        "Content-Disposition": f'attachment; filename="{path.name}"',
+    })
+    return StreamingResponse(_read_range(path, start, end), status_code=206, media_type=media_type, headers=headers)
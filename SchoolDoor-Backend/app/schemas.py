@@ -15,6 +15,8 @@ class SchoolBase(BaseModel):
     state: Optional[str] = None
     zip_code: Optional[str] = None
     country: Optional[str] = "India"
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
     phone: Optional[str] = None
     email: Optional[str] = None
     website: Optional[str] = None
@@ -43,6 +45,8 @@ class SchoolUpdate(BaseModel):
     state: Optional[str] = None
     zip_code: Optional[str] = None
     country: Optional[str] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
     phone: Optional[str] = None
     email: Optional[str] = None
     website: Optional[str] = None
@@ -162,7 +166,15 @@ class ScrapingJobBase(BaseModel):
 
 
 class ScrapingJobCreate(ScrapingJobBase):
-    pass
+    incremental: bool = False  # Page through localities/pincodes until no new schools appear
+    idempotency_key: Optional[str] = None  # Repeating a request with the same key returns the original job
+
+
+class WebsiteEnrichmentRequest(BaseModel):
+    school_ids: Optional[List[int]] = None  # Defaults to schools with a website in city (or everywhere)
+    city: Optional[str] = None
+    limit: int = 100
+    use_llm: bool = False  # Send condensed page text to the LLM for details HTML extraction missed
 
 
 class ScrapingJob(ScrapingJobBase):
@@ -170,6 +182,7 @@ class ScrapingJob(ScrapingJobBase):
     status: str
     schools_found: int
     schools_processed: int
+    schools_created: Optional[int] = 0
     error_message: Optional[str] = None
     created_at: datetime
     completed_at: Optional[datetime] = None
@@ -188,16 +201,86 @@ class SchoolSearch(BaseModel):
     medium_of_instruction: Optional[str] = None  # English, Hindi, Regional language
     min_rating: Optional[float] = None
     max_rating: Optional[float] = None
+    sort_by: Optional[str] = None  # rating, enrollment (highest first), name; default: catalog order
     limit: int = 20
     offset: int = 0
 
 
+class SchoolSummary(BaseModel):
+    """A school in a list: everything but the exam results, programs and facilities JSON"""
+    id: int
+    name: str
+    address: Optional[str] = None
+    city: Optional[str] = None
+    state: Optional[str] = None
+    zip_code: Optional[str] = None
+    country: Optional[str] = "India"
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    phone: Optional[str] = None
+    email: Optional[str] = None
+    website: Optional[str] = None
+    school_type: Optional[str] = None
+    board: Optional[str] = None
+    grade_levels: Optional[str] = None
+    enrollment: Optional[int] = None
+    student_teacher_ratio: Optional[float] = None
+    medium_of_instruction: Optional[str] = None
+    principal_name: Optional[str] = None
+    established_year: Optional[int] = None
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    is_active: bool
+    average_rating: Optional[float] = None
+    total_reviews: int = 0
+    ratings_by_category: Optional[Dict[str, float]] = None
+
+
+class NearbySchool(SchoolSummary):
+    distance_km: Optional[float] = None
+
+
+class SimilarSchool(SchoolSummary):
+    similarity: Optional[float] = None  # Cosine similarity of the two schools' feature vectors, 1 = identical
+
+
+class SchoolRatingSummary(BaseModel):
+    average_rating: Optional[float] = None
+    total_reviews: int = 0
+    ratings_by_category: Optional[Dict[str, float]] = None
+
+
+class SchoolChangeRecord(BaseModel):
+    """
+    A school's latest change in a feed page: upsert carries the school,
+    ratings only its rating summary, delete (deactivated or gone) neither
+    """
+    sequence: int
+    school_id: int
+    action: str  # upsert, ratings, delete
+    school: Optional[SchoolSummary] = None
+    ratings: Optional[SchoolRatingSummary] = None
+
+
+class SchoolChangeFeed(BaseModel):
+    changes: List[SchoolChangeRecord]
+    next_cursor: int  # Pass as since for the next page; unchanged when nothing new
+    has_more: bool
+
+
+class SchoolBatchItem(BaseModel):
+    """One id of a batch lookup, in request order; school is null when found is false"""
+    id: int
+    found: bool
+    school: Optional[SchoolSummary] = None
+
+
 class SchoolStats(BaseModel):
     total_schools: int
     average_rating: float
     schools_by_type: Dict[str, int]
     schools_by_state: Dict[str, int]
-    top_rated_schools: List[SchoolWithRatings]
+    top_rated_schools: List[SchoolSummary]
 
 
 # Bulk Operations Schemas
@@ -244,15 +327,31 @@ class ExportResponse(BaseModel):
 class SchoolTrends(BaseModel):
     school_id: int
     school_name: str
+    period: str = "month"  # month, week
+    trend: str = "insufficient_data"  # improving, declining, stable, insufficient_data
     rating_trend: List[Dict[str, Any]]  # {date, rating}
     review_count_trend: List[Dict[str, Any]]  # {date, count}
     enrollment_trend: List[Dict[str, Any]]  # {date, enrollment}
 
 
+class SchoolPageReviews(BaseModel):
+    total_count: int  # Approved reviews
+    reviews: List[Review]
+
+
+class SchoolPage(BaseModel):
+    """Everything a school page renders; sections that were not asked for are null"""
+    school: SchoolWithRatings
+    ratings: Optional[Dict[str, Any]] = None  # As GET /schools/{id}/ratings
+    reviews: Optional[SchoolPageReviews] = None  # Newest approved reviews first
+    trends: Optional[SchoolTrends] = None
+
+
 class SchoolComparison(BaseModel):
     schools: List[SchoolWithRatings]
-    comparison_metrics: Dict[str, Dict[str, Any]]
-    strengths_weaknesses: Dict[str, List[str]]
+    comparison_metrics: Dict[str, Dict[str, Any]]  # metric -> {label, higher_is_better, schools: {id: {value, percentile, z_score, ...}}, best_school_id}
+    strengths_weaknesses: Dict[str, List[str]]  # school id -> ["Top 10% in Pune for Facilities", ...]
+    peer_groups: Dict[str, Dict[str, Any]] = {}  # school id -> {kind, label}
 
 
 # Search and Filter Enhancement Schemas
@@ -273,7 +372,9 @@ class AdvancedSearch(BaseModel):
     max_rating: Optional[float] = None
     min_enrollment: Optional[int] = None
     max_enrollment: Optional[int] = None
-    has_facilities: Optional[List[str]] = None  # sports, library, lab, etc.
+    has_facilities: Optional[List[str]] = None  # all of: sports, library, lab, program:robotics-club, etc.
+    any_facilities: Optional[List[str]] = None  # at least one of
+    exclude_facilities: Optional[List[str]] = None  # none of
     established_after: Optional[int] = None
     established_before: Optional[int] = None
     sort_by: Optional[str] = "rating"  # rating, enrollment, name, created_at
@@ -282,6 +383,25 @@ class AdvancedSearch(BaseModel):
     offset: int = 0
 
 
+class FacetCount(BaseModel):
+    value: str
+    count: int
+
+
+class FacilityTagCount(BaseModel):
+    tag: str  # facility:swimming, program:robotics-club
+    name: str
+    count: int
+
+
+class SchoolSearchResults(BaseModel):
+    results: List[SchoolSummary]
+    total: int
+    limit: int
+    offset: int
+    facets: Dict[str, List[FacetCount]]  # board, medium_of_instruction, school_type, state, city, rating
+
+
 # API Key Schemas
 class APIKeyCreate(BaseModel):
     name: str
@@ -199,3 +199,26 @@ class AdminActivitySearch(BaseModel):
     date_to: Optional[datetime] = None
     limit: int = 50
     offset: int = 0
+
+
+# Duplicate Detection Schemas
+class DuplicateSchoolCandidate(BaseModel):
+    school_id: int
+    name: str
+    best_score: float
+
+
+class DuplicateSchoolCluster(BaseModel):
+    schools: List[DuplicateSchoolCandidate]
+
+
+class SchoolMergeRequest(BaseModel):
+    duplicate_ids: List[int]
+
+
+class SchoolMergeResult(BaseModel):
+    primary_id: int
+    merged_ids: List[int]
+    reviews_moved: int
+    ratings_moved: int
+    fields_filled: List[str]
@@ -3,7 +3,7 @@ from typing import Optional
 from jose import JWTError, jwt
 import bcrypt
 from sqlalchemy.orm import Session
-from fastapi import HTTPException, status, Depends
+from fastapi import HTTPException, status, Depends, Query
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from app.config import settings
 from app.database import get_db
@@ -28,6 +28,7 @@ ACCESS_TOKEN_EXPIRE_MINUTES = settings.access_token_expire_minutes
 
 # Security scheme
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 
 
 class AdminAuthService:
@@ -280,6 +281,25 @@ def get_current_admin(credentials: HTTPAuthorizationCredentials = Depends(securi
     return auth_service.get_current_admin(credentials)
 
 
+# Dependency for event streams: browsers' EventSource cannot send headers,
+# so the bearer token may also be passed as ?access_token=
+def get_current_admin_for_stream(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+    access_token: Optional[str] = Query(None),
+    db: Session = Depends(get_db)
+):
+    if credentials is None and access_token:
+        credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=access_token)
+    if credentials is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    auth_service = AdminAuthService(db)
+    return auth_service.get_current_admin(credentials)
+
+
 # Dependency to require superuser
 def require_superuser(admin: AdminUser = Depends(get_current_admin)):
     if not admin.is_superuser:
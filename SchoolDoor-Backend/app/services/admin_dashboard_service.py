@@ -7,8 +7,9 @@ from app.models_admin import AdminActivityLog, AdminNotification, SystemLog
 from app.schemas_admin import (
     AdminDashboardStats, AdminSchoolSummary, AdminReviewSummary,
     AdminScrapingJobSummary, AdminSchoolSearch, AdminReviewSearch,
-    AdminActivitySearch
+    AdminActivitySearch, AdminNotification as AdminNotificationSchema
 )
+from app.services.event_bus_service import event_bus, NOTIFICATIONS_TOPIC
 import logging
 
 logger = logging.getLogger(__name__)
@@ -208,7 +209,7 @@ class AdminDashboardService:
                 status=job.status,
                 schools_found=job.schools_found,
                 schools_processed=job.schools_processed,
-                schools_created=job.schools_created,
+                schools_created=job.schools_created or 0,
                 created_at=job.created_at,
                 completed_at=job.completed_at,
                 error_message=job.error_message
@@ -300,4 +301,10 @@ class AdminDashboardService:
         self.db.commit()
         self.db.refresh(notification)
         
+        # Push to admins connected to the live event stream
+        event_bus.publish(
+            NOTIFICATIONS_TOPIC, "notification",
+            AdminNotificationSchema.model_validate(notification).model_dump(mode="json")
+        )
+        
         return notification
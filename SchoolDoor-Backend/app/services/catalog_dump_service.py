@@ -0,0 +1,226 @@
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import re
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import SessionLocal
+from app.models import School
+from app.responses import serializer
+from app.schemas import SchoolSummary
+from app.services.school_change_service import school_change_service, CursorExpiredError
+from app.services.school_listing_service import school_listing_service
+import logging
+
+"""
+Compressed full-catalog dumps for bulk consumers.
+Writes every active school as one SchoolSummary JSON line, in id order, to
+a versioned gzip file next to a manifest.json with its size, checksum,
+record count and the change feed cursor it is consistent with, so a
+consumer downloads the dump once and follows /schools/changes from that
+cursor. A new version is merged from the previous file and the schools
+changed since its cursor, and only rebuilt from the database when there
+is no usable previous dump, its cursor expired, most schools changed or
+the last full build is older than catalog_dump_full_rebuild_seconds.
+"""
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+FILE_NAME = re.compile(r"^schools-\d{6}\.jsonl\.gz$")
+MEDIA_TYPE = "application/gzip"
+
+# Schools read from the database per query while dumping
+CHUNK_SIZE = 5000
+
+# Versions whose changed schools exceed this share of the catalog are rebuilt in full
+INCREMENTAL_MAX_CHANGED_SHARE = 0.5
+
+
+def _line(school: SchoolSummary) -> bytes:
+    return serializer(SchoolSummary).dump_json(school) + b"\n"
+
+
+def _line_id(line: bytes) -> int:
+    # Lines are SchoolSummary objects, which start with {"id":<id>,
+    return int(line[6:line.index(b",", 6)])
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class CatalogDumpService:
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    @property
+    def directory(self) -> Path:
+        return Path(settings.catalog_dump_dir)
+
+    def manifest(self) -> Optional[Dict[str, Any]]:
+        """The manifest of the latest dump (None before the first)"""
+        try:
+            with open(self.directory / MANIFEST_NAME, "rb") as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return None
+
+    def file_path(self, name: str) -> Optional[Path]:
+        """Path of a dump file still kept (None for unknown or malformed names)"""
+        if not FILE_NAME.match(name):
+            return None
+        path = self.directory / name
+        return path if path.is_file() else None
+
+    def generate(self, db: Session, full: bool = False) -> Dict[str, Any]:
+        """
+        Write the next dump version and its manifest and return the manifest;
+        returns the current manifest unchanged when no school changed since it.
+        """
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            previous = self.manifest()
+            school_change_service.publish(db)
+            cursor = school_change_service.head(db)
+
+            changed = None if full else self._changed(db, previous, cursor)
+            if changed is not None and not changed:
+                return previous
+
+            version = previous["version"] + 1 if previous else 1
+            name = f"schools-{version:06d}.jsonl.gz"
+            if changed is None:
+                lines = self._full_lines(db)
+            else:
+                lines = self._merged_lines(db, self.directory / previous["files"][0]["name"], changed)
+            records = self._write(self.directory / name, lines)
+
+            now = datetime.now(timezone.utc).isoformat()
+            manifest = {
+                "version": version,
+                "created_at": now,
+                "full_build_at": now if changed is None else previous["full_build_at"],
+                "incremental_from": None if changed is None else previous["version"],
+                "change_cursor": cursor,
+                "schools": records,
+                "format": "jsonl",
+                "compression": "gzip",
+                "record_schema": "SchoolSummary",
+                "files": [{
+                    "name": name,
+                    "bytes": (self.directory / name).stat().st_size,
+                    "sha256": _sha256(self.directory / name),
+                    "records": records,
+                }],
+            }
+            self._write_manifest(manifest)
+            self._prune(version)
+            build = "full build" if changed is None else f"{len(changed)} changed since version {previous['version']}"
+            logger.info(f"Catalog dump {version} written: {records} schools, {build}")
+            return manifest
+
+    def _changed(self, db: Session, previous: Optional[Dict[str, Any]], cursor: int) -> Optional[Set[int]]:
+        """Schools to replace in the previous dump, or None when it has to be rebuilt in full"""
+        if not previous or not self.file_path(previous["files"][0]["name"]):
+            return None
+        full_build_at = datetime.fromisoformat(previous["full_build_at"])
+        if (datetime.now(timezone.utc) - full_build_at).total_seconds() >= settings.catalog_dump_full_rebuild_seconds:
+            return None
+        try:
+            changed = school_change_service.changed_since(db, previous["change_cursor"], cursor)
+        except CursorExpiredError:
+            return None
+        if len(changed) > max(previous["schools"], 1) * INCREMENTAL_MAX_CHANGED_SHARE:
+            return None
+        return changed
+
+    @staticmethod
+    def _full_lines(db: Session) -> Iterator[bytes]:
+        # Keyset pages over the primary key, so each chunk is an index range scan
+        last_id = 0
+        while True:
+            rows = school_listing_service.query(db).filter(School.is_active == True, School.id > last_id)\
+                                                   .order_by(School.id).limit(CHUNK_SIZE).all()
+            if not rows:
+                return
+            for school in school_listing_service.serialize(db, rows):
+                yield _line(school)
+            last_id = rows[-1][0]
+
+    @staticmethod
+    def _merged_lines(db: Session, previous_path: Path, changed: Set[int]) -> Iterator[bytes]:
+        """The previous dump's lines with changed schools replaced, dropped or inserted, still in id order"""
+        ordered = sorted(changed)
+        updates: List[bytes] = []
+        update_ids: List[int] = []
+        for start in range(0, len(ordered), CHUNK_SIZE):
+            for school in school_listing_service.load(db, ordered[start:start + CHUNK_SIZE]):
+                if school.is_active:
+                    updates.append(_line(school))
+                    update_ids.append(school.id)
+
+        position = 0
+        with gzip.open(previous_path, "rb") as previous:
+            for line in previous:
+                school_id = _line_id(line)
+                while position < len(update_ids) and update_ids[position] <= school_id:
+                    yield updates[position]
+                    position += 1
+                if school_id not in changed:
+                    yield line
+        yield from updates[position:]
+
+    @staticmethod
+    def _write(path: Path, lines: Iterable[bytes]) -> int:
+        """Compress lines into path through a temporary file; returns the line count"""
+        temporary = path.with_name(path.name + ".tmp")
+        records = 0
+        with open(temporary, "wb") as raw:
+            # mtime=0 and no file name in the header: the same schools give the same bytes
+            with gzip.GzipFile(filename="", mode="wb", fileobj=raw, compresslevel=6, mtime=0) as compressed:
+                for line in lines:
+                    compressed.write(line)
+                    records += 1
+        os.replace(temporary, path)
+        return records
+
+    def _write_manifest(self, manifest: Dict[str, Any]) -> None:
+        temporary = self.directory / (MANIFEST_NAME + ".tmp")
+        with open(temporary, "w") as file:
+            json.dump(manifest, file, indent=2)
+        os.replace(temporary, self.directory / MANIFEST_NAME)
+
+    def _prune(self, version: int) -> None:
+        # Older versions stay a while for consumers still downloading them
+        for path in self.directory.iterdir():
+            if FILE_NAME.match(path.name) and int(path.name[8:14]) <= version - settings.catalog_dump_keep_versions:
+                path.unlink()
+
+
+async def run_catalog_dump_scheduler(interval_seconds: Optional[int] = None) -> None:
+    """Background loop: write a new dump version per interval"""
+    interval_seconds = interval_seconds or settings.catalog_dump_interval_seconds
+    while True:
+        db = SessionLocal()
+        try:
+            await asyncio.to_thread(catalog_dump_service.generate, db)
+        except Exception as e:
+            logger.error(f"Catalog dump failed: {e}")
+        finally:
+            db.close()
+        await asyncio.sleep(interval_seconds)
+
+
+# Service instance
+catalog_dump_service = CatalogDumpService()
@@ -0,0 +1,304 @@
+import re
+import threading
+import time
+from collections import Counter
+from datetime import timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models import School, SchoolRatingStats
+from app.schemas import SchoolSearch
+import logging
+
+"""
+In-memory columnar snapshot of the school catalog for public browsing.
+Holds every school as NumPy columns (id, active flag, interned city, state,
+type, board and medium codes, enrollment, overall rating totals and score)
+so list filters, sorting and pagination run as vectorized masks instead of
+SQL. The snapshot pulls schools and ratings changed since its last refresh
+by updated_at/created_at, and is rebuilt from scratch now and then.
+"""
+
+logger = logging.getLogger(__name__)
+
+TEXT_COLUMNS = ("city", "state", "school_type", "board", "medium_of_instruction")
+SORT_FIELDS = ("rating", "enrollment", "name")
+
+# Changes are re-read this far behind the last refresh, for transactions that committed late
+DELTA_OVERLAP = timedelta(seconds=5)
+
+SCHOOL_COLUMNS = (School.id, School.name, School.is_active, School.enrollment) + tuple(
+    getattr(School, name) for name in TEXT_COLUMNS
+)
+
+
+class _Interned:
+    """Distinct values of a text column; code 0 stands for NULL"""
+
+    def __init__(self):
+        self.values: List[Optional[str]] = [None]
+        self.lowered: List[str] = [""]
+        self.codes: Dict[str, int] = {}
+
+    def code(self, value: Optional[str]) -> int:
+        if value is None:
+            return 0
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+            self.lowered.append(value.lower())
+        return code
+
+    def matching(self, needle: str) -> np.ndarray:
+        """Codes of the values containing needle, case-insensitively (ILIKE '%needle%')"""
+        needle = needle.lower()
+        return np.array([code for code, value in enumerate(self.lowered) if code and needle in value], dtype=np.int32)
+
+
+class CatalogSnapshotService:
+    """Columnar snapshot of the catalog, refreshed by delta from the database"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._loaded_at: Optional[float] = None
+        self._refreshed_at: Optional[float] = None
+        self._changed: Set[int] = set()
+        self._clear()
+
+    def _clear(self) -> None:
+        self._ids = np.empty(0, dtype=np.int64)
+        self._active = np.empty(0, dtype=bool)
+        self._enrollment = np.empty(0, dtype=np.float64)
+        self._rating_count = np.empty(0, dtype=np.int64)
+        self._rating_sum = np.empty(0, dtype=np.float64)
+        self._score = np.empty(0, dtype=np.float64)
+        self._interned = {name: _Interned() for name in TEXT_COLUMNS}
+        self._codes = {name: np.empty(0, dtype=np.int32) for name in TEXT_COLUMNS}
+        self._names: List[str] = []
+        self._positions: Dict[int, int] = {}
+        self._marks: Tuple[Any, Any] = (None, None)
+        self._reset_derived()
+
+    def _reset_derived(self) -> None:
+        # Rebuilt lazily after schools are added or renamed
+        self._ids_sorted: Optional[bool] = None
+        self._name_blob: Optional[Tuple[str, np.ndarray]] = None
+        self._name_rank: Optional[np.ndarray] = None
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._loaded_at = None
+
+    def mark_changed(self, school_ids: Iterable[Optional[int]]) -> None:
+        """Re-read these schools' ratings on the next refresh (rollup rows can disappear without a timestamp)"""
+        with self._lock:
+            self._changed.update(school_id for school_id in school_ids if school_id)
+
+    @staticmethod
+    def _watermarks(db: Session) -> Tuple[Any, Any]:
+        # One aggregate per query so each is read off its index
+        school_marks = [
+            mark for mark in (db.query(func.max(School.updated_at)).scalar(), db.query(func.max(School.created_at)).scalar())
+            if mark is not None
+        ]
+        stats_mark = db.query(func.max(SchoolRatingStats.updated_at)).filter(SchoolRatingStats.category_id.is_(None)).scalar()
+        return max(school_marks) if school_marks else None, stats_mark
+
+    @staticmethod
+    def _stats_query(db: Session):
+        return db.query(
+            SchoolRatingStats.school_id, SchoolRatingStats.rating_count, SchoolRatingStats.rating_sum, SchoolRatingStats.score
+        ).filter(SchoolRatingStats.category_id.is_(None))
+
+    def load(self, db: Session) -> None:
+        """Build the snapshot from scratch"""
+        started = time.perf_counter()
+        marks = self._watermarks(db)
+        rows = db.query(*SCHOOL_COLUMNS).order_by(School.id).all()
+        stats = self._stats_query(db).all()
+        with self._lock:
+            self._clear()
+            self._append(rows)
+            self._apply_stats(stats)
+            self._marks = marks
+            self._changed.clear()
+            self._loaded_at = self._refreshed_at = time.monotonic()
+        logger.info(f"Loaded catalog snapshot: {len(rows)} schools in {time.perf_counter() - started:.2f}s")
+
+    def refresh(self, db: Session) -> int:
+        """Pull schools and overall ratings changed since the last refresh; returns the number of rows applied"""
+        marks = self._watermarks(db)
+        with self._lock:
+            school_since, stats_since = self._marks
+            changed = sorted(self._changed)
+            self._changed.clear()
+
+        # One query per timestamp rather than an OR, so each can use its index
+        if school_since is None:
+            schools = db.query(*SCHOOL_COLUMNS).all()
+        else:
+            since = school_since - DELTA_OVERLAP
+            schools = list({
+                row.id: row
+                for column in (School.created_at, School.updated_at)
+                for row in db.query(*SCHOOL_COLUMNS).filter(column >= since)
+            }.values())
+        if stats_since is None:
+            stats = self._stats_query(db).all()
+        else:
+            stats = self._stats_query(db).filter(SchoolRatingStats.updated_at >= stats_since - DELTA_OVERLAP).all()
+            if changed:
+                stats += self._stats_query(db).filter(SchoolRatingStats.school_id.in_(changed)).all()
+
+        with self._lock:
+            known = [row for row in schools if row.id in self._positions]
+            self._update(known)
+            self._append([row for row in schools if row.id not in self._positions])
+            # Schools whose ratings were recomputed may have lost their overall row
+            cleared = [self._positions[school_id] for school_id in changed if school_id in self._positions]
+            self._rating_count[cleared] = 0
+            self._rating_sum[cleared] = 0.0
+            self._score[cleared] = np.nan
+            self._apply_stats(stats)
+            self._marks = (marks[0] or school_since, marks[1] or stats_since)
+            self._refreshed_at = time.monotonic()
+        return len(schools) + len(stats)
+
+    def _ensure_fresh(self, db: Session) -> None:
+        now = time.monotonic()
+        if self._loaded_at is None or now - self._loaded_at > settings.catalog_snapshot_full_reload_seconds:
+            self.load(db)
+        elif now - self._refreshed_at > settings.catalog_snapshot_refresh_seconds or self._changed:
+            self.refresh(db)
+
+    def _append(self, rows: List[Any]) -> None:
+        if not rows:
+            return
+        start = self._ids.size
+        columns = list(zip(*rows))
+        self._ids = np.concatenate([self._ids, np.asarray(columns[0], dtype=np.int64)])
+        self._names.extend(columns[1])
+        self._active = np.concatenate([self._active, np.array([bool(value) for value in columns[2]])])
+        self._enrollment = np.concatenate([self._enrollment, np.array(columns[3], dtype=np.float64)])
+        for name, values in zip(TEXT_COLUMNS, columns[4:]):
+            codes = np.fromiter((self._interned[name].code(value) for value in values), dtype=np.int32, count=len(rows))
+            self._codes[name] = np.concatenate([self._codes[name], codes])
+        self._rating_count = np.concatenate([self._rating_count, np.zeros(len(rows), dtype=np.int64)])
+        self._rating_sum = np.concatenate([self._rating_sum, np.zeros(len(rows))])
+        self._score = np.concatenate([self._score, np.full(len(rows), np.nan)])
+        self._positions.update((school_id, start + offset) for offset, school_id in enumerate(columns[0]))
+        self._reset_derived()
+
+    def _update(self, rows: List[Any]) -> None:
+        for row in rows:
+            position = self._positions[row.id]
+            if self._names[position] != row.name:
+                self._names[position] = row.name
+                self._reset_derived()
+            self._active[position] = bool(row.is_active)
+            self._enrollment[position] = np.nan if row.enrollment is None else row.enrollment
+            for name in TEXT_COLUMNS:
+                self._codes[name][position] = self._interned[name].code(getattr(row, name))
+
+    def _apply_stats(self, rows: List[Any]) -> None:
+        rows = [row for row in rows if row.school_id in self._positions]
+        if not rows:
+            return
+        school_ids, counts, sums, scores = zip(*rows)
+        positions = np.fromiter((self._positions[school_id] for school_id in school_ids), dtype=np.int64, count=len(rows))
+        self._rating_count[positions] = counts
+        self._rating_sum[positions] = sums
+        self._score[positions] = np.array(scores, dtype=np.float64)
+
+    def _name_matches(self, needle: str) -> np.ndarray:
+        """Mask of schools whose name contains needle, case-insensitively"""
+        if self._name_blob is None:
+            lowered = [name.lower() for name in self._names]
+            starts = np.cumsum([0] + [len(name) + 1 for name in lowered[:-1]]) if lowered else np.empty(0, dtype=np.int64)
+            self._name_blob = ("\n".join(lowered), starts)
+        blob, starts = self._name_blob
+        mask = np.zeros(self._ids.size, dtype=bool)
+        hits = [match.start() for match in re.finditer(re.escape(needle.lower()), blob)] if "\n" not in needle else []
+        if hits:
+            mask[np.searchsorted(starts, hits, side="right") - 1] = True
+        return mask
+
+    def _sort_key(self, sort_by: str) -> np.ndarray:
+        """Ascending key per school; ties are broken by id"""
+        if sort_by == "rating":
+            return np.where(np.isnan(self._score), np.inf, -self._score)
+        if sort_by == "enrollment":
+            return np.where(np.isnan(self._enrollment), np.inf, -self._enrollment)
+        if self._name_rank is None:
+            order = sorted(range(len(self._names)), key=self._names.__getitem__)
+            self._name_rank = np.empty(len(order), dtype=np.int64)
+            self._name_rank[order] = np.arange(len(order))
+        return self._name_rank
+
+    def select(self, db: Session, search: SchoolSearch) -> Tuple[List[Tuple[int, int, float]], int]:
+        """
+        One page of (school_id, rating_count, rating_sum) for the public list
+        filters, and the number of schools matching them. Text filters match
+        substrings like the SQL path; rating filters apply before paging.
+        """
+        self._ensure_fresh(db)
+        with self._lock:
+            mask = self._active.copy()
+            for name in TEXT_COLUMNS:
+                needle = getattr(search, name)
+                if needle:
+                    mask &= np.isin(self._codes[name], self._interned[name].matching(needle))
+            if search.query:
+                mask &= (
+                    self._name_matches(search.query)
+                    | np.isin(self._codes["city"], self._interned["city"].matching(search.query))
+                    | np.isin(self._codes["state"], self._interned["state"].matching(search.query))
+                )
+            if search.min_rating is not None or search.max_rating is not None:
+                rated = self._rating_count > 0
+                average = np.divide(self._rating_sum, self._rating_count, out=np.zeros(self._ids.size), where=rated)
+                mask &= rated
+                if search.min_rating is not None:
+                    mask &= average >= search.min_rating
+                if search.max_rating is not None:
+                    mask &= average <= search.max_rating
+
+            selected = np.flatnonzero(mask)
+            total = int(selected.size)
+            end = search.offset + search.limit
+            if search.sort_by:
+                keys = self._sort_key(search.sort_by)[selected]
+                if end < keys.size:
+                    # Only schools up to the page's last key need ordering
+                    nearest = keys <= np.partition(keys, end - 1)[end - 1]
+                    selected, keys = selected[nearest], keys[nearest]
+                selected = selected[np.lexsort((self._ids[selected], keys))]
+            else:
+                if self._ids_sorted is None:
+                    self._ids_sorted = bool(np.all(self._ids[1:] >= self._ids[:-1]))
+                if not self._ids_sorted:
+                    selected = selected[np.argsort(self._ids[selected], kind="stable")]
+            page = selected[search.offset:end]
+            rows = list(zip(self._ids[page].tolist(), self._rating_count[page].tolist(), self._rating_sum[page].tolist()))
+        return rows, total
+
+    def suggestions(self, db: Session, query: str, limit: int) -> List[Tuple[str, str, int]]:
+        """(type, value, active schools) for cities and school names containing query"""
+        self._ensure_fresh(db)
+        with self._lock:
+            cities = self._interned["city"]
+            counts = np.bincount(self._codes["city"][self._active], minlength=len(cities.values))
+            city_rows = sorted(
+                ((cities.values[code], int(counts[code])) for code in cities.matching(query) if counts[code]),
+                key=lambda item: (-item[1], item[0])
+            )[:limit]
+            matched = np.flatnonzero(self._name_matches(query) & self._active)
+            name_rows = Counter(self._names[position] for position in matched.tolist()).most_common(limit)
+        return [("city", value, count) for value, count in city_rows] + [("school_name", value, count) for value, count in name_rows]
+
+
+# Service instance
+catalog_snapshot_service = CatalogSnapshotService()
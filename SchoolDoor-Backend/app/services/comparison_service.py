@@ -0,0 +1,222 @@
+import math
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session, undefer_group
+from app.config import settings
+from app.models import School, RatingCategory, SchoolRatingStats, DETAIL_COLUMNS
+from app.schemas import SchoolComparison, SchoolWithRatings
+import logging
+
+"""
+Side-by-side school comparison with peer context.
+Loads the rating rollup for the compared schools and for every active
+school in their peer groups (same city, board, state, or city and board)
+in bulk, then computes per-metric percentiles and z-scores with NumPy.
+"""
+
+logger = logging.getLogger(__name__)
+
+# Peer group kinds and the school columns that define them
+PEER_GROUPS = {
+    "city": ("city",),
+    "state": ("state",),
+    "board": ("board",),
+    "city_board": ("city", "board"),
+}
+
+OVERALL_METRIC = "overall"
+RATIO_METRIC = "student_teacher_ratio"
+
+# Percentile at or above which a metric is a strength (weakness: at or below 100 minus this)
+STRENGTH_PERCENTILE = 75.0
+
+
+def _normalize(value: Optional[str]) -> Optional[str]:
+    value = (value or "").strip().lower()
+    return value or None
+
+
+def _band(share: float) -> int:
+    """Round a top/bottom share up to the next 5%, e.g. 8.3 -> 10"""
+    return min(100, max(5, int(math.ceil(share / 5.0)) * 5))
+
+
+class SchoolComparisonService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def compare(self, school_ids: List[int], peer_group: str = "city") -> Optional[SchoolComparison]:
+        """Compare schools (in the order given) against each other and their peers; None if none exist"""
+        group_columns = [getattr(School, name) for name in PEER_GROUPS[peer_group]]
+        schools = {school.id: school for school in self.db.query(School).options(undefer_group(DETAIL_COLUMNS)).filter(School.id.in_(school_ids)).all()}
+        schools = [schools[school_id] for school_id in dict.fromkeys(school_ids) if school_id in schools]
+        if not schools:
+            return None
+
+        categories = dict(self.db.query(RatingCategory.id, RatingCategory.name).filter(RatingCategory.is_active == True).all())
+        metric_keys = {None: OVERALL_METRIC, **categories}
+        peer_keys = {
+            school.id: tuple(_normalize(getattr(school, column.key)) for column in group_columns)
+            for school in schools
+        }
+        own_stats = self._own_stats([school.id for school in schools], metric_keys)
+        groups = sorted({key for key in peer_keys.values() if None not in key})
+        group_index = {key: position for position, key in enumerate(groups)}
+        peers = self._peer_values(group_columns, group_index, metric_keys)
+
+        metrics: Dict[str, Dict[str, Any]] = {}
+        for metric, label, higher_is_better in (
+            [(OVERALL_METRIC, "Overall rating", True)]
+            + [(name, name.replace("_", " ").title(), True) for name in categories.values()]
+            + [(RATIO_METRIC, "Student-teacher ratio", False)]
+        ):
+            values = {
+                school.id: (school.student_teacher_ratio, None) if metric == RATIO_METRIC else own_stats.get((school.id, metric), (None, None))
+                for school in schools
+            }
+            if all(value is None for value, _ in values.values()):
+                continue
+            per_school = self._score_metric(metric, values, peer_keys, group_index, peers, higher_is_better)
+            ranked = [school_id for school_id, entry in per_school.items() if entry["value"] is not None]
+            metrics[metric] = {
+                "label": label,
+                "higher_is_better": higher_is_better,
+                "schools": {str(school_id): entry for school_id, entry in per_school.items()},
+                "best_school_id": (max if higher_is_better else min)(ranked, key=lambda school_id: per_school[school_id]["value"]) if ranked else None,
+            }
+
+        return SchoolComparison(
+            schools=[self._school_summary(school, own_stats, categories) for school in schools],
+            comparison_metrics=metrics,
+            strengths_weaknesses={
+                str(school.id): self._strengths_weaknesses(school, peer_group, metrics) for school in schools
+            },
+            peer_groups={
+                str(school.id): {"kind": peer_group, "label": self._peer_label(school, peer_group)}
+                for school in schools
+            }
+        )
+
+    def _own_stats(self, school_ids: List[int], metric_keys: Dict[Optional[int], str]) -> Dict[Tuple[int, str], Tuple[float, int]]:
+        """(school_id, metric) -> (average, count) for the compared schools"""
+        rows = self.db.query(
+            SchoolRatingStats.school_id, SchoolRatingStats.category_id,
+            SchoolRatingStats.rating_count, SchoolRatingStats.rating_sum
+        ).filter(SchoolRatingStats.school_id.in_(school_ids), SchoolRatingStats.rating_count > 0).all()
+        return {
+            (row.school_id, metric_keys[row.category_id]): (row.rating_sum / row.rating_count, row.rating_count)
+            for row in rows if row.category_id in metric_keys
+        }
+
+    def _peer_values(self, group_columns, group_index, metric_keys) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+        """
+        metric -> (group index per peer, value per peer) for every peer group
+        at once, in two queries.
+        """
+        result: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        if not group_index:
+            return result
+        groups = list(group_index)
+        normalized = [func.lower(func.trim(column)) for column in group_columns]
+        scope = [School.is_active == True] + [
+            expr.in_({key[position] for key in groups}) for position, expr in enumerate(normalized)
+        ]
+
+        rating_rows = self.db.query(
+            SchoolRatingStats.category_id, SchoolRatingStats.rating_count, SchoolRatingStats.rating_sum, *normalized
+        ).join(School, School.id == SchoolRatingStats.school_id).filter(
+            SchoolRatingStats.rating_count >= max(settings.ranking_min_reviews, 1), *scope
+        ).all()
+        ratio_rows = self.db.query(School.student_teacher_ratio, *normalized).filter(
+            School.student_teacher_ratio.isnot(None), School.student_teacher_ratio > 0, *scope
+        ).all()
+
+        collected: Dict[str, Tuple[List[int], List[float]]] = {}
+        for row in rating_rows:
+            group = group_index.get(tuple(row[3:]))
+            if group is None or row.category_id not in metric_keys:
+                continue
+            indexes, values = collected.setdefault(metric_keys[row.category_id], ([], []))
+            indexes.append(group)
+            values.append(row.rating_sum / row.rating_count)
+        for row in ratio_rows:
+            group = group_index.get(tuple(row[1:]))
+            if group is None:
+                continue
+            indexes, values = collected.setdefault(RATIO_METRIC, ([], []))
+            indexes.append(group)
+            values.append(row.student_teacher_ratio)
+
+        for metric, (indexes, values) in collected.items():
+            result[metric] = (np.asarray(indexes, dtype=np.int64), np.asarray(values, dtype=np.float64))
+        return result
+
+    @staticmethod
+    def _score_metric(metric, values, peer_keys, group_index, peers, higher_is_better) -> Dict[int, Dict[str, Any]]:
+        """Percentile and z-score of each compared school within its own peer group"""
+        per_school = {}
+        peer_groups, peer_values = peers.get(metric, (np.empty(0, dtype=np.int64), np.empty(0)))
+        for school_id, (value, count) in values.items():
+            entry = {"value": round(float(value), 2) if value is not None else None, "count": count,
+                     "percentile": None, "z_score": None, "peer_count": 0, "peer_mean": None, "peer_median": None}
+            per_school[school_id] = entry
+            group = group_index.get(peer_keys[school_id])
+            if group is None:
+                continue
+            group_values = np.sort(peer_values[peer_groups == group])
+            entry["peer_count"] = int(group_values.size)
+            if not group_values.size:
+                continue
+            entry["peer_mean"] = round(float(group_values.mean()), 2)
+            entry["peer_median"] = round(float(np.median(group_values)), 2)
+            if value is None:
+                continue
+            below = np.searchsorted(group_values, value, side="left")
+            ties = np.searchsorted(group_values, value, side="right") - below
+            percentile = 100.0 * (below + 0.5 * ties) / group_values.size
+            std = group_values.std()
+            z_score = (value - group_values.mean()) / std if std > 0 else 0.0
+            if not higher_is_better:
+                # Percentile and z-score always read "higher is better"
+                percentile, z_score = 100.0 - percentile, -z_score
+            entry["percentile"] = round(float(percentile), 1)
+            entry["z_score"] = round(float(z_score), 2)
+        return per_school
+
+    @staticmethod
+    def _peer_label(school: School, peer_group: str) -> Optional[str]:
+        city, state, board = (school.city or "").strip(), (school.state or "").strip(), (school.board or "").strip()
+        labels = {
+            "city": city,
+            "state": state,
+            "board": f"{board} schools" if board else "",
+            "city_board": f"{board} schools in {city}" if board and city else "",
+        }
+        return labels[peer_group] or None
+
+    def _strengths_weaknesses(self, school: School, peer_group: str, metrics: Dict[str, Dict[str, Any]]) -> List[str]:
+        """e.g. "Top 10% in Pune for Facilities", strongest first, then weaknesses"""
+        label = self._peer_label(school, peer_group)
+        strengths, weaknesses = [], []
+        for metric in metrics.values():
+            entry = metric["schools"][str(school.id)]
+            if entry["percentile"] is None or entry["peer_count"] < settings.comparison_min_peers:
+                continue
+            if entry["percentile"] >= STRENGTH_PERCENTILE:
+                strengths.append((entry["percentile"], f"Top {_band(100 - entry['percentile'])}% in {label} for {metric['label']}"))
+            elif entry["percentile"] <= 100 - STRENGTH_PERCENTILE:
+                weaknesses.append((entry["percentile"], f"Bottom {_band(entry['percentile'])}% in {label} for {metric['label']}"))
+        return [text for _, text in sorted(strengths, reverse=True)] + [text for _, text in sorted(weaknesses)]
+
+    @staticmethod
+    def _school_summary(school: School, own_stats, categories: Dict[int, str]) -> SchoolWithRatings:
+        summary = SchoolWithRatings.model_validate(school)
+        average, count = own_stats.get((school.id, OVERALL_METRIC), (None, 0))
+        summary.average_rating = round(average, 2) if average is not None else None
+        summary.total_reviews = count
+        summary.ratings_by_category = {
+            name: round(own_stats[(school.id, name)][0], 2)
+            for name in categories.values() if (school.id, name) in own_stats
+        }
+        return summary
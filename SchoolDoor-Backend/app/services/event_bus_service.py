@@ -0,0 +1,198 @@
+import asyncio
+import itertools
+import json
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Union
+from app.config import settings
+import logging
+
+"""
+In-process publish/subscribe for live admin updates.
+Scraping jobs and admin notifications publish events here; SSE endpoints
+subscribe and stream them to connected admins instead of being polled.
+"""
+
+logger = logging.getLogger(__name__)
+
+# Topics
+JOBS_TOPIC = "jobs"
+NOTIFICATIONS_TOPIC = "notifications"
+
+# Job statuses after which a job stream has nothing more to say
+TERMINAL_JOB_STATUSES = {"completed", "failed", "skipped"}
+
+# Response headers for text/event-stream; X-Accel-Buffering stops nginx holding events back
+SSE_HEADERS = {"Cache-Control": "no-cache", "Connection": "keep-alive", "X-Accel-Buffering": "no"}
+
+# Topics whose latest event is kept for subscribers that connect later
+MAX_RETAINED_TOPICS = 500
+
+
+def job_topic(job_id: int) -> str:
+    return f"job:{job_id}"
+
+
+class Subscription:
+    """
+    One subscriber's bounded queue.
+    When a slow client falls behind, the oldest events are dropped so the
+    publisher never blocks.
+    """
+
+    def __init__(self, bus: "EventBus", topics: List[str], maxsize: int):
+        self.bus = bus
+        self.topics = topics
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.loop = asyncio.get_running_loop()
+        self.dropped = 0
+
+    def deliver(self, event: Dict[str, Any]) -> None:
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Next event, or None if nothing arrived within timeout"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self) -> None:
+        self.bus.unsubscribe(self)
+
+
+class EventBus:
+    """Fan-out of events to every subscription on a topic"""
+
+    def __init__(self, queue_size: Optional[int] = None):
+        self.queue_size = queue_size or settings.events_queue_size
+        self._subscribers: Dict[str, List[Subscription]] = {}
+        self._latest: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def subscribe(self, topics: Iterable[str], replay_latest: bool = True) -> Subscription:
+        """
+        Must be called from the event loop that will consume the events.
+        With replay_latest, the last event of each topic is queued straight
+        away so late subscribers start from the current state.
+        """
+        topics = list(topics)
+        subscription = Subscription(self, topics, self.queue_size)
+        with self._lock:
+            for topic in topics:
+                self._subscribers.setdefault(topic, []).append(subscription)
+            latest = [self._latest[topic] for topic in topics if topic in self._latest] if replay_latest else []
+        for event in sorted(latest, key=lambda event: event["id"]):
+            subscription.deliver(event)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            for topic in subscription.topics:
+                subscribers = self._subscribers.get(topic, [])
+                if subscription in subscribers:
+                    subscribers.remove(subscription)
+                if not subscribers:
+                    self._subscribers.pop(topic, None)
+
+    def subscriber_count(self, topic: Optional[str] = None) -> int:
+        with self._lock:
+            if topic is not None:
+                return len(self._subscribers.get(topic, []))
+            return len({id(sub) for subs in self._subscribers.values() for sub in subs})
+
+    def publish(self, topics: Union[str, Iterable[str]], event_type: str, data: Dict[str, Any], retain: bool = False) -> Dict[str, Any]:
+        """
+        Send an event to every subscriber of the given topics (each subscriber
+        receives it once). Safe to call from any thread; never blocks.
+        """
+        topics = [topics] if isinstance(topics, str) else list(topics)
+        event = {
+            "id": next(self._ids),
+            "type": event_type,
+            "topics": topics,
+            "data": data,
+            "published_at": datetime.now(timezone.utc).isoformat(),
+        }
+        with self._lock:
+            if retain:
+                for topic in topics:
+                    self._latest[topic] = event
+                    self._latest.move_to_end(topic)
+                while len(self._latest) > MAX_RETAINED_TOPICS:
+                    self._latest.popitem(last=False)
+            recipients = {id(sub): sub for topic in topics for sub in self._subscribers.get(topic, [])}
+
+        for subscription in recipients.values():
+            try:
+                if self._in_loop(subscription.loop):
+                    subscription.deliver(event)
+                else:
+                    subscription.loop.call_soon_threadsafe(subscription.deliver, event)
+            except RuntimeError:
+                # Subscriber's loop has closed; it will be cleaned up when its stream ends
+                logger.debug(f"Dropped event {event['id']} for a closed subscriber")
+        return event
+
+    def latest(self, topic: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._latest.get(topic)
+
+    @staticmethod
+    def _in_loop(loop: asyncio.AbstractEventLoop) -> bool:
+        try:
+            return asyncio.get_running_loop() is loop
+        except RuntimeError:
+            return False
+
+
+def format_sse(event: Dict[str, Any]) -> str:
+    """One event in text/event-stream framing"""
+    payload = json.dumps({**event["data"], "published_at": event["published_at"]}, default=str)
+    event_id = f"id: {event['id']}\n" if event["id"] else ""
+    return f"{event_id}event: {event['type']}\ndata: {payload}\n\n"
+
+
+async def stream_events(
+    subscription: Subscription,
+    is_disconnected=None,
+    initial: Iterable[Dict[str, Any]] = (),
+    until=None,
+    keepalive_seconds: Optional[float] = None
+) -> AsyncIterator[str]:
+    """
+    SSE body for a subscription: initial events first, then live events, with a
+    keepalive comment whenever the stream is idle. Ends when the client goes
+    away or when until(event) returns True. Always unsubscribes.
+    """
+    keepalive_seconds = keepalive_seconds or settings.events_keepalive_seconds
+    try:
+        yield f"retry: {int(keepalive_seconds * 1000)}\n\n"
+        for event in initial:
+            yield format_sse(event)
+        while True:
+            if is_disconnected is not None and await is_disconnected():
+                break
+            event = await subscription.get(timeout=keepalive_seconds)
+            if event is None:
+                yield ": keepalive\n\n"
+                continue
+            yield format_sse(event)
+            if until is not None and until(event):
+                break
+    finally:
+        subscription.close()
+
+
+def local_event(event_type: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    """An event for one stream only (e.g. the snapshot sent on connect); not published"""
+    return {"id": 0, "type": event_type, "topics": [], "data": data, "published_at": datetime.now(timezone.utc).isoformat()}
+
+
+# Service instance
+event_bus = EventBus()
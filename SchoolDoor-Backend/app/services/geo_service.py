@@ -0,0 +1,292 @@
+import asyncio
+import csv
+import math
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+import httpx
+import numpy as np
+from sqlalchemy import and_
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models import School, SchoolRatingStats
+from app.services.school_change_service import school_change_service
+import logging
+
+"""
+School coordinates and "schools near me" search.
+Schools are located from an offline pincode centroid file (CSV with
+pincode, latitude and longitude columns, such as the India Post pincode
+directory; rows of one pincode are averaged) and, optionally, a
+Nominatim-compatible geocoder. Located active schools sit in an in-memory
+grid of GRID_DEGREES cells, so a radius query only measures the schools in
+the cells around the point; the usual filters then run in SQL over the
+nearest candidates first.
+"""
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = 111.32
+GRID_DEGREES = 0.05  # About 5.5 km of latitude per cell
+
+# How coordinates were obtained; pincode centroids are re-derived when the pincode changes
+SOURCE_PINCODE = "pincode"
+SOURCE_GEOCODED = "geocoded"
+SOURCE_MANUAL = "manual"
+
+# Nearest candidates checked against the SQL filters in the first round; later rounds
+# are sized from the share of candidates that matched
+FILTER_CHUNK = 256
+
+PINCODE_COLUMNS = ("pincode", "zip_code", "postal_code")
+LATITUDE_COLUMNS = ("latitude", "lat")
+LONGITUDE_COLUMNS = ("longitude", "lon", "lng")
+
+Cell = Tuple[int, int]
+
+
+def normalize_pincode(pincode: Any) -> Optional[str]:
+    digits = re.sub(r"\D", "", str(pincode or ""))
+    return digits if len(digits) == 6 else None
+
+
+def haversine_km(latitude: float, longitude: float, latitudes: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+    """Great-circle distance in km from one point to many"""
+    lat1, lon1 = math.radians(latitude), math.radians(longitude)
+    lat2, lon2 = np.radians(latitudes), np.radians(longitudes)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def _cell(latitude: float, longitude: float) -> Cell:
+    return int(math.floor(latitude / GRID_DEGREES)), int(math.floor(longitude / GRID_DEGREES))
+
+
+def _column(fieldnames: List[str], candidates: Tuple[str, ...]) -> Optional[str]:
+    by_name = {name.strip().lower(): name for name in fieldnames}
+    return next((by_name[name] for name in candidates if name in by_name), None)
+
+
+def load_pincode_centroids(path: str) -> Dict[str, Tuple[float, float]]:
+    """pincode -> (latitude, longitude), averaging every row of a pincode"""
+    totals: Dict[str, List[float]] = {}
+    with open(path, newline="", encoding="utf-8-sig") as handle:
+        reader = csv.DictReader(handle)
+        fieldnames = reader.fieldnames or []
+        columns = [_column(fieldnames, names) for names in (PINCODE_COLUMNS, LATITUDE_COLUMNS, LONGITUDE_COLUMNS)]
+        if None in columns:
+            raise ValueError(f"{path} needs pincode, latitude and longitude columns")
+        pincode_column, latitude_column, longitude_column = columns
+        for row in reader:
+            pincode = normalize_pincode(row.get(pincode_column))
+            try:
+                latitude, longitude = float(row[latitude_column]), float(row[longitude_column])
+            except (TypeError, ValueError):
+                continue
+            if not pincode or not (-90 <= latitude <= 90 and -180 <= longitude <= 180) or (latitude, longitude) == (0, 0):
+                continue
+            total = totals.setdefault(pincode, [0.0, 0.0, 0])
+            total[0] += latitude
+            total[1] += longitude
+            total[2] += 1
+    return {pincode: (lat / count, lon / count) for pincode, (lat, lon, count) in totals.items()}
+
+
+class GeoService:
+    """Pincode centroids, geocoding and the in-memory grid of located schools"""
+
+    def __init__(self):
+        self._centroids: Optional[Dict[str, Tuple[float, float]]] = None
+        self._centroids_path: Optional[str] = None
+        self._cells: Dict[Cell, Dict[int, Tuple[float, float]]] = {}
+        self._arrays: Dict[Cell, Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+        self._school_cells: Dict[int, Cell] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.RLock()
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._loaded_at = None
+            self._centroids = None
+
+    def pincode_centroid(self, pincode: Any) -> Optional[Tuple[float, float]]:
+        path = settings.pincode_centroids_path
+        if not path:
+            return None
+        with self._lock:
+            if self._centroids is None or self._centroids_path != path:
+                try:
+                    self._centroids = load_pincode_centroids(path)
+                except (OSError, ValueError) as e:
+                    logger.error(f"Could not load pincode centroids from {path}: {e}")
+                    self._centroids = {}
+                self._centroids_path = path
+                logger.info(f"Loaded {len(self._centroids)} pincode centroids")
+            return self._centroids.get(normalize_pincode(pincode))
+
+    def locate(self, school: School) -> bool:
+        """
+        Fill in coordinates from the school's pincode unless they were
+        geocoded or set by hand; returns whether they changed.
+        """
+        if school.location_source in (SOURCE_GEOCODED, SOURCE_MANUAL):
+            return False
+        centroid = self.pincode_centroid(school.zip_code)
+        if centroid is None or (school.latitude, school.longitude) == centroid:
+            return False
+        school.latitude, school.longitude = centroid
+        school.location_source = SOURCE_PINCODE
+        return True
+
+    async def geocode(self, client: httpx.AsyncClient, school: School) -> bool:
+        """Look the school's address up with the configured Nominatim-compatible geocoder"""
+        if not settings.geocoding_url:
+            return False
+        query = ", ".join(part for part in (school.name, school.address, school.city, school.state, school.zip_code) if part)
+        try:
+            response = await client.get(settings.geocoding_url, params={"q": query, "format": "json", "limit": 1, "countrycodes": "in"})
+            response.raise_for_status()
+            results = response.json()
+        except (httpx.HTTPError, ValueError) as e:
+            logger.warning(f"Geocoding failed for school {school.id}: {e}")
+            return False
+        if not results:
+            return False
+        school.latitude, school.longitude = float(results[0]["lat"]), float(results[0]["lon"])
+        school.location_source = SOURCE_GEOCODED
+        return True
+
+    async def locate_missing(self, db: Session, geocode_limit: int = 100) -> Dict[str, int]:
+        """Locate active schools without coordinates: pincode centroids for all, then geocoding for up to geocode_limit"""
+        missing = db.query(School).filter(School.is_active == True, School.latitude.is_(None)).all()
+        located = [school.id for school in missing if self.locate(school)]
+        school_change_service.record(db, located)
+        db.commit()
+
+        geocoded = 0
+        remaining = [school for school in missing if school.latitude is None][:geocode_limit]
+        if settings.geocoding_url and remaining:
+            async with httpx.AsyncClient(timeout=10.0, headers={"User-Agent": settings.enrichment_user_agent}) as client:
+                for school in remaining:
+                    if await self.geocode(client, school):
+                        geocoded += 1
+                        school_change_service.record(db, [school.id])
+                        db.commit()
+                    await asyncio.sleep(settings.geocoding_min_interval_seconds)
+        self.invalidate()
+        return {"missing": len(missing), "from_pincode": len(located), "geocoded": geocoded}
+
+    def load(self, db: Session) -> None:
+        """(Re)build the grid from every located active school"""
+        cells: Dict[Cell, Dict[int, Tuple[float, float]]] = {}
+        school_cells: Dict[int, Cell] = {}
+        rows = db.query(School.id, School.latitude, School.longitude).filter(
+            School.is_active == True, School.latitude.isnot(None), School.longitude.isnot(None)
+        )
+        for school_id, latitude, longitude in rows:
+            cell = _cell(latitude, longitude)
+            cells.setdefault(cell, {})[school_id] = (latitude, longitude)
+            school_cells[school_id] = cell
+        with self._lock:
+            self._cells, self._school_cells, self._arrays = cells, school_cells, {}
+            self._loaded_at = time.monotonic()
+        logger.info(f"Loaded geo index: {len(school_cells)} schools in {len(cells)} cells")
+
+    def _ensure_loaded(self, db: Session) -> None:
+        # Reloaded now and then so writes made by other workers show up
+        if self._loaded_at is None or time.monotonic() - self._loaded_at > settings.geo_index_reload_seconds:
+            self.load(db)
+
+    def update_school(self, school: School) -> None:
+        """Move one school in the grid after its coordinates or active flag changed"""
+        if self._loaded_at is None:
+            return
+        with self._lock:
+            previous = self._school_cells.pop(school.id, None)
+            if previous is not None:
+                self._cells[previous].pop(school.id, None)
+                self._arrays.pop(previous, None)
+            if school.is_active and school.latitude is not None and school.longitude is not None:
+                cell = _cell(school.latitude, school.longitude)
+                self._cells.setdefault(cell, {})[school.id] = (school.latitude, school.longitude)
+                self._arrays.pop(cell, None)
+                self._school_cells[school.id] = cell
+
+    def _cell_arrays(self, cell: Cell) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        arrays = self._arrays.get(cell)
+        if arrays is None:
+            schools = self._cells.get(cell)
+            if not schools:
+                return None
+            ids = np.fromiter(schools.keys(), dtype=np.int64, count=len(schools))
+            coordinates = np.array(list(schools.values()), dtype=np.float64)
+            arrays = self._arrays[cell] = (ids, coordinates[:, 0], coordinates[:, 1])
+        return arrays
+
+    def within(self, db: Session, latitude: float, longitude: float, radius_km: float) -> Tuple[np.ndarray, np.ndarray]:
+        """(school ids, distances in km) of located active schools within radius_km, nearest first"""
+        self._ensure_loaded(db)
+        lat_span = radius_km / KM_PER_DEGREE
+        lon_span = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(min(abs(latitude) + lat_span, 89.0))), 0.01))
+        low, high = _cell(latitude - lat_span, longitude - lon_span), _cell(latitude + lat_span, longitude + lon_span)
+        with self._lock:
+            parts = [
+                arrays for row in range(low[0], high[0] + 1) for column in range(low[1], high[1] + 1)
+                for arrays in [self._cell_arrays((row, column))] if arrays is not None
+            ]
+        if not parts:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        ids, latitudes, longitudes = (np.concatenate(column) for column in zip(*parts))
+        distances = haversine_km(latitude, longitude, latitudes, longitudes)
+        inside = distances <= radius_km
+        ids, distances = ids[inside], distances[inside]
+        order = np.lexsort((ids, distances))
+        return ids[order], distances[order]
+
+    def nearby(
+        self,
+        db: Session,
+        latitude: float,
+        longitude: float,
+        radius_km: float,
+        filters: Optional[Dict[str, Any]] = None,
+        limit: int = 20,
+        offset: int = 0
+    ) -> List[Tuple[int, float, int, float]]:
+        """
+        One page of (school_id, distance_km, rating_count, rating_sum), nearest
+        first, for schools within radius_km matching the list filters (board,
+        school_type, medium_of_instruction as substrings; min_rating).
+        """
+        ids, distances = self.within(db, latitude, longitude, radius_km)
+        filters = {name: value for name, value in (filters or {}).items() if value is not None}
+        wanted = offset + limit
+        query = db.query(School.id, SchoolRatingStats.rating_count, SchoolRatingStats.rating_sum).outerjoin(
+            SchoolRatingStats, and_(SchoolRatingStats.school_id == School.id, SchoolRatingStats.category_id.is_(None))
+        ).filter(School.is_active == True)
+        for name in ("board", "school_type", "medium_of_instruction"):
+            if filters.get(name):
+                query = query.filter(getattr(School, name).ilike(f"%{filters[name]}%"))
+        if filters.get("min_rating") is not None:
+            query = query.filter(SchoolRatingStats.rating_sum / SchoolRatingStats.rating_count >= filters["min_rating"])
+
+        matched: List[Tuple[int, float, int, float]] = []
+        start, chunk = 0, max(FILTER_CHUNK, 2 * wanted)
+        while start < ids.size and len(matched) < wanted:
+            candidates = ids[start:start + chunk].tolist()
+            found = {row.id: row for row in query.filter(School.id.in_(candidates))}
+            for school_id, distance in zip(candidates, distances[start:start + chunk].tolist()):
+                row = found.get(school_id)
+                if row is not None:
+                    matched.append((school_id, round(distance, 3), row.rating_count or 0, row.rating_sum or 0.0))
+            start += chunk
+            # Enough candidates for the rest of the page at the hit rate so far, with room to spare
+            hit_rate = len(matched) / start
+            chunk = max(chunk * 4, int(2 * (wanted - len(matched)) / hit_rate) if hit_rate else ids.size)
+        return matched[offset:wanted]
+
+
+# Service instance
+geo_service = GeoService()
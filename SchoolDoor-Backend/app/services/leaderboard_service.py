@@ -0,0 +1,252 @@
+import time
+from typing import Any, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import func, insert, literal, or_, select
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models import School, SchoolRatingStats, LeaderboardEntry, LeaderboardBuild
+import logging
+
+"""
+Precomputed school leaderboards per scope (all, city, state, board) and
+rating category. Each leaderboard keeps its top leaderboard_size schools in
+score order, so a page of ranks is a short index range read. Entries are
+maintained incrementally whenever a school's rating rollup or its
+city/state/board changes.
+"""
+
+logger = logging.getLogger(__name__)
+
+# Scope kinds and the school column each one partitions by
+SCOPE_COLUMNS = {"city": School.city, "state": School.state, "board": School.board}
+GLOBAL_SCOPE = "all"
+
+ENTRY_COLUMNS = ["scope", "category_id", "school_id", "score", "rating_count", "rating_sum"]
+
+# How often a worker re-reads which leaderboard build is current
+BUILD_CHECK_SECONDS = 60
+
+
+def scope_key(kind: str, value: Optional[str] = None) -> Optional[str]:
+    """Leaderboard scope for a filter, e.g. scope_key("city", " Pune") == "city:pune" """
+    if kind == GLOBAL_SCOPE:
+        return GLOBAL_SCOPE
+    value = (value or "").strip().lower()
+    return f"{kind}:{value}" if value else None
+
+
+def school_scopes(school: School) -> List[str]:
+    """Every leaderboard scope a school belongs to"""
+    scopes = [GLOBAL_SCOPE]
+    for kind, column in SCOPE_COLUMNS.items():
+        key = scope_key(kind, getattr(school, column.key))
+        if key:
+            scopes.append(key)
+    return scopes
+
+
+def _in_category(column, category_id: Optional[int]):
+    return column.is_(None) if category_id is None else column == category_id
+
+
+def _in_categories(column, category_ids: Set[Optional[int]]):
+    ids = [category_id for category_id in category_ids if category_id is not None]
+    clauses = [column.in_(ids)] if ids else []
+    if None in category_ids:
+        clauses.append(column.is_(None))
+    return or_(*clauses) if clauses else literal(False)
+
+
+class LeaderboardService:
+    """Builds, maintains and reads the leaderboard_entries table"""
+
+    def __init__(self):
+        self._build: Optional[Tuple[int, int]] = None
+        self._build_checked_at = 0.0
+
+    def invalidate(self) -> None:
+        self._build_checked_at = 0.0
+
+    def _current_build(self, db: Session) -> Optional[Tuple[int, int]]:
+        """(size, min_reviews) of the last build, re-read now and then so other workers' rebuilds are seen"""
+        if time.monotonic() - self._build_checked_at > BUILD_CHECK_SECONDS:
+            build = db.query(LeaderboardBuild).order_by(LeaderboardBuild.id.desc()).first()
+            self._build = (build.size, build.min_reviews) if build else None
+            self._build_checked_at = time.monotonic()
+        return self._build
+
+    def is_current(self, db: Session) -> bool:
+        """Whether stored leaderboards match the configured size and threshold"""
+        return self._current_build(db) == (settings.leaderboard_size, max(settings.ranking_min_reviews, 1))
+
+    def rebuild(self, db: Session) -> int:
+        """Recompute every leaderboard from the rating rollup; returns the number of entries"""
+        size = settings.leaderboard_size
+        min_reviews = max(settings.ranking_min_reviews, 1)
+        db.query(LeaderboardEntry).delete(synchronize_session=False)
+
+        scopes = [(literal(GLOBAL_SCOPE), [])] + [
+            (literal(f"{kind}:") + func.lower(func.trim(column)), [column.isnot(None), func.trim(column) != ""])
+            for kind, column in SCOPE_COLUMNS.items()
+        ]
+        for scope, scope_filters in scopes:
+            position = func.row_number().over(
+                partition_by=(SchoolRatingStats.category_id, scope),
+                order_by=(SchoolRatingStats.score.desc(), SchoolRatingStats.school_id)
+            )
+            ranked = select(
+                scope.label("scope"),
+                SchoolRatingStats.category_id,
+                SchoolRatingStats.school_id,
+                SchoolRatingStats.score,
+                SchoolRatingStats.rating_count,
+                SchoolRatingStats.rating_sum,
+                position.label("position")
+            ).join(School, School.id == SchoolRatingStats.school_id).where(
+                School.is_active == True,
+                SchoolRatingStats.rating_count >= min_reviews,
+                SchoolRatingStats.score.isnot(None),
+                *scope_filters
+            ).subquery()
+            db.execute(insert(LeaderboardEntry).from_select(
+                ENTRY_COLUMNS,
+                select(*[ranked.c[column] for column in ENTRY_COLUMNS]).where(ranked.c.position <= size)
+            ))
+
+        entries = db.query(func.count(LeaderboardEntry.id)).scalar()
+        db.add(LeaderboardBuild(size=size, min_reviews=min_reviews, entries=entries))
+        db.commit()
+        self._build = (size, min_reviews)
+        self._build_checked_at = time.monotonic()
+        logger.info(f"Rebuilt leaderboards: {entries} entries (top {size} per scope and category)")
+        return entries
+
+    def update_school(self, db: Session, school_id: int, category_ids: Optional[Iterable[Optional[int]]] = None) -> None:
+        """
+        Re-place one school on every leaderboard it belongs to, after its rating
+        rollup or its city/state/board/active flag changed. category_ids limits
+        the work to the categories whose rollup rows changed. Caller commits.
+        """
+        if not self.is_current(db):
+            return
+        # Backfill reads scores and scope columns in SQL; SessionLocal does not autoflush
+        db.flush()
+        stats_query = db.query(SchoolRatingStats).filter(SchoolRatingStats.school_id == school_id)
+        entries_query = db.query(LeaderboardEntry).filter(LeaderboardEntry.school_id == school_id)
+        if category_ids is not None:
+            category_ids = set(category_ids)
+            stats_query = stats_query.filter(_in_categories(SchoolRatingStats.category_id, category_ids))
+            entries_query = entries_query.filter(_in_categories(LeaderboardEntry.category_id, category_ids))
+
+        vacated: Set[Tuple[str, Optional[int]]] = {(entry.scope, entry.category_id) for entry in entries_query}
+        entries_query.delete(synchronize_session=False)
+
+        # Refill the boards the school was on from every qualifying school off them,
+        # the school itself included, so a lowered score competes with the rest
+        for scope, category_id in vacated:
+            self._backfill(db, scope, category_id)
+
+        school = db.get(School, school_id)
+        if school is not None and school.is_active:
+            scopes = school_scopes(school)
+            for row in stats_query.all():
+                if row.score is None or row.rating_count < self._build[1]:
+                    continue
+                for scope in scopes:
+                    if (scope, row.category_id) not in vacated:
+                        self._place(db, scope, row)
+
+    @staticmethod
+    def _board(db: Session, scope: str, category_id: Optional[int]):
+        return db.query(LeaderboardEntry).filter(
+            LeaderboardEntry.scope == scope, _in_category(LeaderboardEntry.category_id, category_id)
+        )
+
+    @staticmethod
+    def _entry(scope: str, category_id: Optional[int], row: SchoolRatingStats) -> dict:
+        return {
+            "scope": scope, "category_id": category_id, "school_id": row.school_id,
+            "score": row.score, "rating_count": row.rating_count, "rating_sum": row.rating_sum,
+        }
+
+    def _place(self, db: Session, scope: str, row: SchoolRatingStats) -> bool:
+        """Insert a school into one leaderboard if it makes the top K, evicting the lowest entry"""
+        # The K-th entry exists only when the board is full, and it is the one to evict
+        lowest = self._board(db, scope, row.category_id)\
+            .with_entities(LeaderboardEntry.id, LeaderboardEntry.score, LeaderboardEntry.school_id)\
+            .order_by(LeaderboardEntry.score.desc(), LeaderboardEntry.school_id)\
+            .offset(settings.leaderboard_size - 1).first()
+        if lowest is not None:
+            if (row.score, -row.school_id) <= (lowest.score, -lowest.school_id):
+                return False
+            db.query(LeaderboardEntry).filter(LeaderboardEntry.id == lowest.id).delete(synchronize_session=False)
+        db.execute(insert(LeaderboardEntry), [self._entry(scope, row.category_id, row)])
+        return True
+
+    def _backfill(self, db: Session, scope: str, category_id: Optional[int]) -> None:
+        """Fill a leaderboard back up to K from the best schools not already on it"""
+        board = self._board(db, scope, category_id)
+        missing = settings.leaderboard_size - board.count()
+        if missing <= 0:
+            return
+        on_board = select(LeaderboardEntry.school_id).where(
+            LeaderboardEntry.scope == scope, _in_category(LeaderboardEntry.category_id, category_id)
+        )
+        candidates = db.query(SchoolRatingStats).join(School, School.id == SchoolRatingStats.school_id).filter(
+            _in_category(SchoolRatingStats.category_id, category_id),
+            SchoolRatingStats.rating_count >= self._build[1],
+            SchoolRatingStats.score.isnot(None),
+            School.is_active == True,
+            SchoolRatingStats.school_id.notin_(on_board)
+        )
+        kind, _, value = scope.partition(":")
+        if kind in SCOPE_COLUMNS:
+            candidates = candidates.filter(func.lower(func.trim(SCOPE_COLUMNS[kind])) == value)
+        rows = candidates.order_by(SchoolRatingStats.score.desc(), SchoolRatingStats.school_id).limit(missing).all()
+        if rows:
+            db.execute(insert(LeaderboardEntry), [self._entry(scope, category_id, row) for row in rows])
+
+    def top(
+        self,
+        db: Session,
+        scope: Optional[str],
+        category_id: Optional[int],
+        limit: int,
+        offset: int = 0,
+        min_reviews: Optional[int] = None
+    ) -> Optional[List[Any]]:
+        """
+        One page of a leaderboard, or None when it cannot answer the request
+        (not built, combined filters, a lower threshold than it was built with,
+        or a page beyond the stored top K).
+        """
+        if scope is None or not self.is_current(db):
+            return None
+        built_min_reviews = self._build[1]
+        min_reviews = built_min_reviews if min_reviews is None else max(min_reviews, 1)
+        if min_reviews < built_min_reviews:
+            return None
+
+        query = db.query(
+            School.id,
+            School.name,
+            School.city,
+            School.state,
+            School.board,
+            LeaderboardEntry.rating_count,
+            LeaderboardEntry.rating_sum,
+            LeaderboardEntry.score
+        ).join(School, School.id == LeaderboardEntry.school_id).filter(
+            LeaderboardEntry.scope == scope, _in_category(LeaderboardEntry.category_id, category_id)
+        )
+        if min_reviews > built_min_reviews:
+            query = query.filter(LeaderboardEntry.rating_count >= min_reviews)
+        rows = query.order_by(LeaderboardEntry.score.desc(), LeaderboardEntry.school_id).offset(offset).limit(limit).all()
+
+        # A short page is the true end only if the leaderboard holds every qualifying school
+        if len(rows) < limit and self._board(db, scope, category_id).count() >= settings.leaderboard_size:
+            return None
+        return rows
+
+
+# Service instance
+leaderboard_service = LeaderboardService()
@@ -0,0 +1,158 @@
+import asyncio
+import hashlib
+import json
+import re
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional
+from sqlalchemy import or_
+from app.config import settings
+from app.database import SessionLocal
+from app.models_scraping import LLMResponseCache
+import logging
+
+"""
+Content-addressed cache for raw LLM completions.
+Coalesces identical in-flight requests and supports cache-only replay.
+"""
+
+logger = logging.getLogger(__name__)
+
+
+class CacheMissError(Exception):
+    """Raised in cache-only mode when no stored completion matches a request."""
+
+
+class LLMResponseCacheService:
+    """
+    Caches full completion responses keyed by model and normalized prompt.
+    Entries outlive their TTL so that replay mode can feed them to newer parsers.
+    """
+
+    def __init__(self, ttl_seconds: Optional[int] = None):
+        self.ttl_seconds = settings.perplexity_cache_ttl_seconds if ttl_seconds is None else ttl_seconds
+        self._in_flight: Dict[str, asyncio.Future] = {}
+
+    @staticmethod
+    def normalize_region(region: Optional[str]) -> Optional[str]:
+        """Lowercase and collapse whitespace so 'New  Delhi' and 'new delhi' share entries"""
+        if not region:
+            return None
+        return re.sub(r"\s+", " ", region).strip().lower()
+
+    @staticmethod
+    def make_key(payload: Dict[str, Any]) -> str:
+        """Hash the parts of a completion request that affect its output"""
+        normalized = {
+            "model": payload.get("model"),
+            "messages": [
+                {
+                    "role": message.get("role"),
+                    "content": re.sub(r"\s+", " ", message.get("content") or "").strip()
+                }
+                for message in payload.get("messages", [])
+            ],
+            "max_tokens": payload.get("max_tokens"),
+            "temperature": payload.get("temperature"),
+        }
+        encoded = json.dumps(normalized, sort_keys=True, ensure_ascii=False).encode("utf-8")
+        return hashlib.sha256(encoded).hexdigest()
+
+    def get(self, cache_key: str, allow_expired: bool = False) -> Optional[Dict[str, Any]]:
+        """Return a cached completion, or None if missing (or expired unless allowed)"""
+        db = SessionLocal()
+        try:
+            query = db.query(LLMResponseCache).filter(LLMResponseCache.cache_key == cache_key)
+            if not allow_expired:
+                query = query.filter(or_(
+                    LLMResponseCache.expires_at == None,
+                    LLMResponseCache.expires_at > datetime.utcnow()
+                ))
+            entry = query.first()
+            if not entry:
+                return None
+
+            entry.hit_count = (entry.hit_count or 0) + 1
+            db.commit()
+            return json.loads(entry.response_body)
+        finally:
+            db.close()
+
+    def get_latest_for_region(self, region: str) -> Optional[Dict[str, Any]]:
+        """Return the most recent completion stored for a region, ignoring expiry"""
+        db = SessionLocal()
+        try:
+            entry = db.query(LLMResponseCache).filter(
+                LLMResponseCache.region == self.normalize_region(region)
+            ).order_by(LLMResponseCache.created_at.desc(), LLMResponseCache.id.desc()).first()
+            return json.loads(entry.response_body) if entry else None
+        finally:
+            db.close()
+
+    def set(self, cache_key: str, model: str, response: Dict[str, Any], region: Optional[str] = None) -> None:
+        """Store or refresh a completion"""
+        db = SessionLocal()
+        try:
+            expires_at = datetime.utcnow() + timedelta(seconds=self.ttl_seconds) if self.ttl_seconds else None
+            entry = db.query(LLMResponseCache).filter(LLMResponseCache.cache_key == cache_key).first()
+            if not entry:
+                entry = LLMResponseCache(cache_key=cache_key, model=model, hit_count=0)
+                db.add(entry)
+            entry.region = self.normalize_region(region)
+            entry.response_body = json.dumps(response, ensure_ascii=False)
+            entry.created_at = datetime.utcnow()
+            entry.expires_at = expires_at
+            db.commit()
+        except Exception as e:
+            # A cache write failure must never fail the scrape itself
+            db.rollback()
+            logger.error(f"Failed to cache LLM response {cache_key[:12]}: {e}")
+        finally:
+            db.close()
+
+    async def fetch(
+        self,
+        payload: Dict[str, Any],
+        fetcher: Callable[[], Awaitable[Dict[str, Any]]],
+        region: Optional[str] = None,
+        cache_only: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Return the completion for payload from cache, from an identical in-flight
+        request, or by awaiting fetcher(). In cache_only mode the API is never called.
+        """
+        cache_key = self.make_key(payload)
+
+        cached = self.get(cache_key, allow_expired=cache_only)
+        if cached is not None:
+            logger.info(f"LLM cache hit {cache_key[:12]} for {region}")
+            return cached
+
+        if cache_only:
+            cached = self.get_latest_for_region(region) if region else None
+            if cached is None:
+                raise CacheMissError(f"No cached response available for {region}")
+            logger.info(f"LLM cache replay of latest response for {region}")
+            return cached
+
+        in_flight = self._in_flight.get(cache_key)
+        if in_flight is not None:
+            logger.info(f"LLM request {cache_key[:12]} already in flight, waiting for it")
+            return await asyncio.shield(in_flight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[cache_key] = future
+        try:
+            response = await fetcher()
+            self.set(cache_key, payload.get("model"), response, region)
+            future.set_result(response)
+            return response
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved in case nobody else was waiting
+            future.exception()
+            raise
+        except BaseException:
+            future.cancel()
+            raise
+        finally:
+            self._in_flight.pop(cache_key, None)
@@ -0,0 +1,134 @@
+import json
+import re
+from typing import Any, Dict, List
+
+"""
+Single-pass extraction of JSON objects from LLM output.
+Scans brackets with string/escape awareness so complete records can be
+salvaged from prose-wrapped, fenced or truncated responses in linear time.
+"""
+
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+_STRUCTURAL = re.compile(r'[{}\[\]"]')
+_STRING_BODY = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*', re.DOTALL)
+_WHITESPACE = re.compile(r"\s*")
+
+
+class JSONObjectStream:
+    """
+    Incremental scanner that yields record objects as soon as they close.
+
+    A record is an object directly inside the outermost array (or a bare
+    top-level object), so `[{...}, {...}]`, `{"schools": [{...}]}` and bare
+    `{...} {...}` all yield the school objects. Nested objects such as
+    `facilities`, and objects in arrays inside a record such as exam results,
+    stay inside their record and are not yielded separately.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._offset = 0  # Absolute position of _buffer[0] in the whole input
+        self._pos = 0  # Absolute position of the next character to scan
+        self._stack: List[List[Any]] = []  # [opener, absolute start, emitted_descendant, arrays above]
+        self._in_string = False
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """Scan a chunk of text and return the records completed by it"""
+        self._buffer += chunk
+        completed = []
+        buffer = self._buffer
+        offset = self._offset
+        stack = self._stack
+        in_string = self._in_string
+        index = self._pos - offset
+        length = len(buffer)
+
+        while index < length:
+            if in_string:
+                end = _STRING_BODY.match(buffer, index).end()
+                if end < length and buffer[end] == '"':
+                    in_string = False
+                    index = end + 1
+                    continue
+                # Unterminated (or ends on a backslash): wait for more input
+                index = end
+                break
+
+            match = _STRUCTURAL.search(buffer, index)
+            if not match:
+                index = length
+                break
+            position = match.start()
+            char = buffer[position]
+            index = position + 1
+
+            if char == '"':
+                # Quotes only delimit strings inside a container; prose apostrophes
+                # and quotes before the JSON starts are ignored
+                if stack:
+                    in_string = True
+            elif char == "{" or char == "[":
+                if char == "[" and not any(frame[0] == "{" for frame in stack):
+                    # Outside objects, only a bracket starting an array of objects or arrays
+                    # opens one; citations like "[1]" or "see note [1):" in prose are skipped
+                    start = _WHITESPACE.match(buffer, index).end()
+                    if start == length:
+                        index = position  # Wait for the next character
+                        break
+                    if buffer[start] not in "{[]":
+                        continue
+                arrays = stack[-1][3] + (stack[-1][0] == "[") if stack else 0
+                stack.append([char, position + offset, False, arrays])
+            else:
+                opener = "{" if char == "}" else "["
+                # Recover from mismatched closers by unwinding to the matching opener
+                depth = len(stack) - 1
+                while depth >= 0 and stack[depth][0] != opener:
+                    depth -= 1
+                if depth < 0:
+                    continue
+                frame = stack[depth]
+                del stack[depth:]
+
+                # Only the outermost array's objects are records; a top-level object is
+                # one unless it wraps records (e.g. {"schools": [...]})
+                is_record = not stack or (stack[-1][0] == "[" and frame[3] == 1)
+                if opener == "{" and is_record and not frame[2]:
+                    record = self._parse(buffer[frame[1] - offset:position + 1])
+                    if record is not None:
+                        completed.append(record)
+                        frame[2] = True
+                if frame[2] and stack:
+                    stack[-1][2] = True
+
+        self._pos = index + offset
+        self._in_string = in_string
+        self._compact()
+        return completed
+
+    def _compact(self) -> None:
+        """Drop scanned text that can no longer be part of a record"""
+        keep_from = self._pos
+        for opener, start, *_ in self._stack:
+            if opener == "{":
+                keep_from = start
+                break
+        if keep_from > self._offset:
+            self._buffer = self._buffer[keep_from - self._offset:]
+            self._offset = keep_from
+
+    @staticmethod
+    def _parse(text: str):
+        try:
+            value = json.loads(text)
+        except json.JSONDecodeError:
+            try:
+                value = json.loads(_TRAILING_COMMA.sub(r"\1", text))
+            except json.JSONDecodeError:
+                return None
+        return value if isinstance(value, dict) else None
+
+
+def extract_json_objects(content: str) -> List[Dict[str, Any]]:
+    """Return every complete record object found in content, in order"""
+    return JSONObjectStream().feed(content)
@@ -1,7 +1,11 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from sqlalchemy.orm import Session
 from sqlalchemy import func, and_
-from app.models import School, Rating, RatingCategory, Review
+from app.config import settings
+from app.models import School, Rating, RatingCategory, Review, SchoolRatingStats
+from app.services.rating_stats_service import rating_stats_service
+from app.services.leaderboard_service import leaderboard_service, scope_key, GLOBAL_SCOPE
+from app.services.rating_trend_service import rating_trend_service
 from app.schemas import ReviewCreate, RatingCreate
 import logging
 
@@ -18,25 +22,42 @@ class RatingService:
     def __init__(self, db: Session):
         self.db = db
     
-    def calculate_school_ratings(self, school_id: int) -> Dict[str, Any]:
-        """Calculate comprehensive ratings for a school"""
-        school = self.db.query(School).filter(School.id == school_id).first()
-        if not school:
-            return None
+    def get_review_counts(self, school_id: int) -> Dict[Tuple[str, float], int]:
+        """(status, overall_rating) -> number of the school's reviews, in rating order"""
+        rows = self.db.query(Review.status, Review.overall_rating, func.count(Review.id))\
+                      .filter(Review.school_id == school_id)\
+                      .group_by(Review.status, Review.overall_rating)\
+                      .order_by(Review.overall_rating).all()
+        return {(status, rating): count for status, rating, count in rows}
+    
+    def calculate_school_ratings(
+        self,
+        school_id: int,
+        school_name: Optional[str] = None,
+        review_counts: Optional[Dict[Tuple[str, float], int]] = None
+    ) -> Dict[str, Any]:
+        """
+        Calculate comprehensive ratings for a school (pass school_name if the
+        school is already loaded, and review_counts if get_review_counts ran)
+        """
+        if school_name is None:
+            school_name = self.db.query(School.name).filter(School.id == school_id).scalar()
+            if school_name is None:
+                return None
         
         # Get all rating categories
         categories = self.db.query(RatingCategory).filter(RatingCategory.is_active == True).all()
         
-        # Calculate average ratings by category
+        # Calculate average ratings by category, in one grouped query
+        averages = dict(
+            self.db.query(Rating.category_id, func.avg(Rating.rating_value))
+            .filter(Rating.school_id == school_id)
+            .group_by(Rating.category_id)
+            .all()
+        )
         ratings_by_category = {}
         for category in categories:
-            avg_rating = self.db.query(func.avg(Rating.rating_value)).filter(
-                and_(
-                    Rating.school_id == school_id,
-                    Rating.category_id == category.id
-                )
-            ).scalar()
-            
+            avg_rating = averages.get(category.id)
             if avg_rating:
                 ratings_by_category[category.name] = round(float(avg_rating), 2)
         
@@ -51,20 +72,17 @@ class RatingService:
         
         overall_rating = round(total_weighted_rating / total_weight, 2) if total_weight > 0 else 0
         
-        # Get review statistics
-        total_reviews = self.db.query(Review).filter(Review.school_id == school_id).count()
-        
-        # Get rating distribution
-        rating_distribution = self.db.query(
-            Review.overall_rating,
-            func.count(Review.id).label('count')
-        ).filter(Review.school_id == school_id).group_by(Review.overall_rating).all()
-        
-        distribution = {str(rating): count for rating, count in rating_distribution}
+        # Review count and rating distribution (reviews of any status)
+        if review_counts is None:
+            review_counts = self.get_review_counts(school_id)
+        distribution: Dict[str, int] = {}
+        for (_, rating), count in review_counts.items():
+            distribution[str(rating)] = distribution.get(str(rating), 0) + count
+        total_reviews = sum(distribution.values())
         
         return {
             "school_id": school_id,
-            "school_name": school.name,
+            "school_name": school_name,
             "overall_rating": overall_rating,
             "ratings_by_category": ratings_by_category,
             "total_reviews": total_reviews,
@@ -72,103 +90,131 @@ class RatingService:
             "categories_rated": len(ratings_by_category)
         }
     
-    def get_school_rankings(self, limit: int = 10, category: Optional[str] = None) -> List[Dict[str, Any]]:
-        """Get top-rated schools, optionally filtered by category"""
-        query = self.db.query(
-            School.id,
-            School.name,
-            School.city,
-            School.state,
-            func.avg(Review.overall_rating).label('avg_rating'),
-            func.count(Review.id).label('review_count')
-        ).join(Review, School.id == Review.school_id)
+    def get_school_rankings(
+        self,
+        limit: int = 10,
+        category: Optional[str] = None,
+        city: Optional[str] = None,
+        state: Optional[str] = None,
+        board: Optional[str] = None,
+        min_reviews: Optional[int] = None,
+        offset: int = 0
+    ) -> List[Dict[str, Any]]:
+        """
+        Top schools by Bayesian score within a scope (category, city, state, board).
+        Each school's average is pulled towards its category's mean by
+        ranking_prior_weight virtual ratings, so a single 5-star review does not
+        outrank a hundred 4.8s. Reads school_rating_stats in score order, so a
+        school is one row however many reviews or ratings it has.
+        """
+        min_reviews = settings.ranking_min_reviews if min_reviews is None else min_reviews
         
         if category:
-            # Filter by specific rating category
-            category_obj = self.db.query(RatingCategory).filter(
+            category_id = self.db.query(RatingCategory.id).filter(
                 and_(
                     RatingCategory.name == category,
                     RatingCategory.is_active == True
                 )
-            ).first()
-            
-            if category_obj:
-                query = query.join(Rating, School.id == Rating.school_id).filter(
-                    Rating.category_id == category_obj.id
-                )
+            ).scalar()
+            if category_id is None:
+                return []
+            in_category = SchoolRatingStats.category_id == category_id
+        else:
+            # Overall ranking uses approved reviews
+            category_id = None
+            in_category = SchoolRatingStats.category_id.is_(None)
         
-        results = query.group_by(School.id, School.name, School.city, School.state)\
-                      .having(func.count(Review.id) >= 1)\
-                      .order_by(func.avg(Review.overall_rating).desc())\
-                      .limit(limit).all()
+        # A single scope (or none) is served from its precomputed leaderboard
+        scope_filters = [(kind, value) for kind, value in (("city", city), ("state", state), ("board", board)) if value]
+        if not scope_filters:
+            scope = GLOBAL_SCOPE
+        elif len(scope_filters) == 1:
+            scope = scope_key(*scope_filters[0])
+        else:
+            scope = None
+        results = leaderboard_service.top(self.db, scope, category_id, limit, offset, min_reviews)
+        if results is not None:
+            return self._format_rankings(results, offset)
         
+        query = self.db.query(
+            School.id,
+            School.name,
+            School.city,
+            School.state,
+            School.board,
+            SchoolRatingStats.rating_count,
+            SchoolRatingStats.rating_sum,
+            SchoolRatingStats.score
+        ).join(School, School.id == SchoolRatingStats.school_id).filter(
+            in_category,
+            SchoolRatingStats.rating_count >= max(min_reviews, 1),
+            School.is_active == True
+        )
+        if city:
+            query = query.filter(School.city.ilike(city))
+        if state:
+            query = query.filter(School.state.ilike(state))
+        if board:
+            query = query.filter(School.board.ilike(board))
+        
+        results = query.order_by(SchoolRatingStats.score.desc(), SchoolRatingStats.school_id)\
+                       .offset(offset).limit(limit).all()
+        
+        return self._format_rankings(results, offset)
+    
+    @staticmethod
+    def _format_rankings(results: List[Any], offset: int) -> List[Dict[str, Any]]:
         return [
             {
+                "rank": offset + position,
                 "school_id": result.id,
                 "school_name": result.name,
                 "city": result.city,
                 "state": result.state,
-                "average_rating": round(float(result.avg_rating), 2),
-                "review_count": result.review_count
+                "board": result.board,
+                "average_rating": round(result.rating_sum / result.rating_count, 2),
+                "score": round(result.score, 3),
+                "review_count": result.rating_count
             }
-            for result in results
+            for position, result in enumerate(results, 1)
         ]
     
-    def get_school_comparison(self, school_ids: List[int]) -> Dict[str, Any]:
-        """Compare multiple schools side by side"""
-        schools = self.db.query(School).filter(School.id.in_(school_ids)).all()
-        if not schools:
-            return {}
-        
-        comparison_data = {}
-        
-        for school in schools:
-            ratings = self.calculate_school_ratings(school.id)
-            if ratings:
-                comparison_data[school.name] = {
-                    "school_id": school.id,
-                    "overall_rating": ratings["overall_rating"],
-                    "total_reviews": ratings["total_reviews"],
-                    "ratings_by_category": ratings["ratings_by_category"],
-                    "city": school.city,
-                    "state": school.state,
-                    "school_type": school.school_type,
-                    "enrollment": school.enrollment
-                }
-        
-        return comparison_data
+    def get_rating_trends(self, school_id: int, period: str = "month", window: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Monthly or weekly rating and review count series for a school (None if it does not exist)"""
+        trends = self.get_rating_trends_batch([school_id], period, window)
+        return trends[0] if trends else None
     
-    def get_rating_trends(self, school_id: int, months: int = 12) -> Dict[str, Any]:
-        """Get rating trends over time for a school"""
-        # This would require adding a date field to reviews
-        # For now, return basic trend data
-        recent_reviews = self.db.query(Review).filter(
-            Review.school_id == school_id
-        ).order_by(Review.created_at.desc()).limit(50).all()
-        
-        if not recent_reviews:
-            return {"trend": "stable", "recent_rating": 0, "review_count": 0}
-        
-        recent_rating = sum(review.overall_rating for review in recent_reviews) / len(recent_reviews)
-        
-        # Simple trend calculation
-        if len(recent_reviews) >= 10:
-            older_reviews = recent_reviews[10:]
-            older_rating = sum(review.overall_rating for review in older_reviews) / len(older_reviews)
-            
-            if recent_rating > older_rating + 0.2:
-                trend = "improving"
-            elif recent_rating < older_rating - 0.2:
-                trend = "declining"
-            else:
-                trend = "stable"
-        else:
-            trend = "insufficient_data"
+    def get_rating_trends_batch(self, school_ids: List[int], period: str = "month", window: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Trends for many schools from the school_rating_buckets rollup, in the
+        order requested; unknown ids are skipped. Two queries however many
+        schools or reviews are involved.
+        """
+        schools = {
+            school.id: school
+            for school in self.db.query(School.id, School.name, School.enrollment, School.updated_at, School.created_at)
+                                 .filter(School.id.in_(school_ids)).all()
+        } if school_ids else {}
+        ordered_ids = [school_id for school_id in dict.fromkeys(school_ids) if school_id in schools]
+        series = rating_trend_service.get_series(self.db, ordered_ids, period, window)
         
+        return [self.format_trends(schools[school_id], series[school_id], period) for school_id in ordered_ids]
+    
+    @staticmethod
+    def format_trends(school: Any, buckets: List[Dict[str, Any]], period: str) -> Dict[str, Any]:
+        """Trends of a school (anything with id, name, enrollment, updated_at, created_at) from its bucket series"""
+        # Enrollment is not versioned, so its trend is the current figure
+        as_of = school.updated_at or school.created_at
         return {
-            "trend": trend,
-            "recent_rating": round(recent_rating, 2),
-            "review_count": len(recent_reviews)
+            "school_id": school.id,
+            "school_name": school.name,
+            "period": period,
+            "trend": rating_trend_service.trend_direction(buckets),
+            "rating_trend": [{"date": bucket["date"], "rating": bucket["rating"]} for bucket in buckets],
+            "review_count_trend": [{"date": bucket["date"], "count": bucket["count"]} for bucket in buckets],
+            "enrollment_trend": [
+                {"date": as_of.date().isoformat() if as_of else None, "enrollment": school.enrollment}
+            ] if school.enrollment is not None else []
         }
     
     def create_review(self, review_data: ReviewCreate, member_id: Optional[int] = None) -> Review:
@@ -192,6 +238,7 @@ class RatingService:
         # Create review
         review = Review(**review_dict)
         self.db.add(review)
+        rating_stats_service.refresh_schools(self.db, [review.school_id], commit=False)
         self.db.commit()
         self.db.refresh(review)
         
@@ -211,6 +258,7 @@ class RatingService:
         # Create rating
         rating = Rating(**rating_data.dict())
         self.db.add(rating)
+        rating_stats_service.refresh_schools(self.db, [rating.school_id], commit=False)
         self.db.commit()
         self.db.refresh(rating)
         
@@ -0,0 +1,156 @@
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy import func, insert, null, select
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models import Rating, Review, SchoolRatingStats
+from app.services.leaderboard_service import leaderboard_service
+from app.services.rating_trend_service import rating_trend_service
+from app.services.catalog_snapshot_service import catalog_snapshot_service
+from app.services.similar_school_service import similar_school_service
+from app.services.school_change_service import school_change_service, KIND_RATINGS
+import logging
+
+"""
+Maintains the school_rating_stats rollup used for rankings, and through
+rating_trend_service the monthly/weekly buckets used for trends.
+Write paths that add, change or remove reviews and ratings refresh the
+affected schools; rebuild recomputes everything (e.g. after bulk SQL).
+"""
+
+logger = logging.getLogger(__name__)
+
+STATS_COLUMNS = ["school_id", "category_id", "rating_count", "rating_sum"]
+
+# Prior mean for a category nobody has rated yet (middle of the 1-5 scale)
+DEFAULT_PRIOR_MEAN = 3.0
+
+# How long category means are reused before being re-read from the rollup
+PRIOR_TTL_SECONDS = 3600
+
+
+def bayesian_score(rating_sum: float, rating_count: int, prior_mean: float, prior_weight: Optional[float] = None) -> float:
+    """Average after adding prior_weight virtual ratings at prior_mean"""
+    prior_weight = settings.ranking_prior_weight if prior_weight is None else prior_weight
+    return (prior_weight * prior_mean + rating_sum) / (prior_weight + rating_count)
+
+
+class RatingStatsService:
+    """Per-school rating counts, sums and Bayesian scores, one row per category plus overall"""
+
+    def __init__(self):
+        self._priors: Dict[Optional[int], float] = {}
+        self._priors_loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _review_totals(school_ids: Optional[List[int]] = None):
+        query = select(
+            Review.school_id,
+            null().label("category_id"),
+            func.count(Review.id).label("rating_count"),
+            func.sum(Review.overall_rating).label("rating_sum")
+        ).where(Review.status == "approved").group_by(Review.school_id)
+        if school_ids is not None:
+            query = query.where(Review.school_id.in_(school_ids))
+        return query
+
+    @staticmethod
+    def _category_totals(school_ids: Optional[List[int]] = None):
+        query = select(
+            Rating.school_id,
+            Rating.category_id,
+            func.count(Rating.id).label("rating_count"),
+            func.sum(Rating.rating_value).label("rating_sum")
+        ).group_by(Rating.school_id, Rating.category_id)
+        if school_ids is not None:
+            query = query.where(Rating.school_id.in_(school_ids))
+        return query
+
+    def prior_means(self, db: Session, reload: bool = False) -> Dict[Optional[int], float]:
+        """Mean rating of each category (None = overall) across all schools"""
+        if reload or time.monotonic() - self._priors_loaded_at > PRIOR_TTL_SECONDS:
+            with self._lock:
+                rows = db.query(
+                    SchoolRatingStats.category_id,
+                    func.sum(SchoolRatingStats.rating_sum),
+                    func.sum(SchoolRatingStats.rating_count)
+                ).group_by(SchoolRatingStats.category_id).all()
+                self._priors = {category_id: total / count for category_id, total, count in rows if count}
+                self._priors_loaded_at = time.monotonic()
+        return self._priors
+
+    def refresh_schools(self, db: Session, school_ids: Iterable[Optional[int]], commit: bool = True) -> None:
+        """Recompute the rollup rows of the given schools and re-place them on the leaderboards"""
+        school_ids = sorted({school_id for school_id in school_ids if school_id})
+        if not school_ids:
+            return
+        # Callers pass pending adds, status changes and deletes; SessionLocal does not autoflush
+        db.flush()
+        previous = {
+            (row.school_id, row.category_id): (row.rating_count, row.rating_sum)
+            for row in db.query(
+                SchoolRatingStats.school_id, SchoolRatingStats.category_id,
+                SchoolRatingStats.rating_count, SchoolRatingStats.rating_sum
+            ).filter(SchoolRatingStats.school_id.in_(school_ids))
+        }
+        priors = self.prior_means(db)
+        rows = [
+            {
+                "school_id": row.school_id,
+                "category_id": row.category_id,
+                "rating_count": row.rating_count,
+                "rating_sum": row.rating_sum,
+                "score": bayesian_score(row.rating_sum, row.rating_count, priors.get(row.category_id, DEFAULT_PRIOR_MEAN)),
+            }
+            for totals in (self._review_totals(school_ids), self._category_totals(school_ids))
+            for row in db.execute(totals)
+        ]
+        db.query(SchoolRatingStats).filter(SchoolRatingStats.school_id.in_(school_ids)).delete(synchronize_session=False)
+        if rows:
+            db.execute(insert(SchoolRatingStats), rows)
+
+        current = {(row["school_id"], row["category_id"]): (row["rating_count"], row["rating_sum"]) for row in rows}
+        changed = {}
+        for key in previous.keys() | current.keys():
+            if previous.get(key) != current.get(key):
+                changed.setdefault(key[0], set()).add(key[1])
+        for school_id, category_ids in changed.items():
+            leaderboard_service.update_school(db, school_id, category_ids)
+        school_change_service.record(db, changed, KIND_RATINGS)
+        rating_trend_service.refresh_schools(db, school_ids)
+        catalog_snapshot_service.mark_changed(school_ids)
+        similar_school_service.mark_changed(school_ids)
+        if commit:
+            db.commit()
+
+    def rebuild(self, db: Session) -> int:
+        """Recompute the whole rollup and every score; returns the number of rows written"""
+        db.query(SchoolRatingStats).delete(synchronize_session=False)
+        for totals in (self._review_totals(), self._category_totals()):
+            db.execute(insert(SchoolRatingStats).from_select(STATS_COLUMNS, totals))
+        self.rescore(db)
+        rating_trend_service.rebuild(db)
+        similar_school_service.invalidate()
+        school_change_service.record_all(db, KIND_RATINGS)
+        rows = db.query(func.count(SchoolRatingStats.id)).scalar()
+        logger.info(f"Rebuilt school rating stats: {rows} rows")
+        return rows
+
+    def rescore(self, db: Session) -> None:
+        """Re-read category means, recompute every score against them and rebuild the leaderboards"""
+        priors = self.prior_means(db, reload=True)
+        prior_weight = settings.ranking_prior_weight
+        for category_id, prior_mean in priors.items():
+            in_category = SchoolRatingStats.category_id.is_(None) if category_id is None else SchoolRatingStats.category_id == category_id
+            db.query(SchoolRatingStats).filter(in_category).update({
+                SchoolRatingStats.score: (prior_weight * prior_mean + SchoolRatingStats.rating_sum) / (prior_weight + SchoolRatingStats.rating_count)
+            }, synchronize_session=False)
+        db.commit()
+        # Every score moved, so every leaderboard has to be rebuilt
+        leaderboard_service.rebuild(db)
+
+
+# Service instance
+rating_stats_service = RatingStatsService()
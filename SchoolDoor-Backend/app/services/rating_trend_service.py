@@ -0,0 +1,163 @@
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models import Review, SchoolRatingBucket
+import logging
+
+"""
+Maintains the school_rating_buckets rollup behind rating trends: approved
+review counts and rating sums per school per month and per ISO week.
+Buckets are computed in Python so the same code runs on SQLite and
+PostgreSQL, whose date truncation functions differ.
+"""
+
+logger = logging.getLogger(__name__)
+
+PERIODS = ("month", "week")
+
+# Fewest reviews in a window before a trend direction is reported
+MIN_TREND_REVIEWS = 10
+
+REBUILD_BATCH_SIZE = 5000
+
+
+def bucket_start(value: Union[date, datetime], period: str) -> date:
+    """First day of the month, or Monday of the week, that value (UTC) falls in"""
+    day = value
+    if isinstance(value, datetime):
+        day = (value.astimezone(timezone.utc) if value.tzinfo is not None else value).date()
+    if period == "month":
+        return day.replace(day=1)
+    return day - timedelta(days=day.weekday())
+
+
+def window_starts(period: str, window: int, today: Optional[date] = None) -> List[date]:
+    """Start dates of the last window buckets, oldest first, ending with the current one"""
+    current = bucket_start(today or datetime.now(timezone.utc).date(), period)
+    if period == "week":
+        return [current - timedelta(weeks=back) for back in range(window - 1, -1, -1)]
+    starts = []
+    year, month = current.year, current.month
+    for _ in range(window):
+        starts.append(date(year, month, 1))
+        year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+    return starts[::-1]
+
+
+def default_window(period: str) -> int:
+    return settings.trends_window_weeks if period == "week" else settings.trends_window_months
+
+
+class RatingTrendService:
+    """Per-school monthly and weekly review buckets, and the trend series read from them"""
+
+    @staticmethod
+    def _bucket_rows(reviews: Iterable[Tuple[int, datetime, float]]) -> Dict[Tuple[int, str, date], List[float]]:
+        totals: Dict[Tuple[int, str, date], List[float]] = defaultdict(lambda: [0, 0.0])
+        for school_id, created_at, rating in reviews:
+            if created_at is None:
+                continue
+            for period in PERIODS:
+                bucket = totals[(school_id, period, bucket_start(created_at, period))]
+                bucket[0] += 1
+                bucket[1] += rating
+        return totals
+
+    @staticmethod
+    def _rows(totals: Dict[Tuple[int, str, date], List[float]]) -> List[Dict[str, Any]]:
+        return [
+            {"school_id": school_id, "period": period, "bucket_start": start, "review_count": count, "rating_sum": total}
+            for (school_id, period, start), (count, total) in totals.items()
+        ]
+
+    @staticmethod
+    def _approved_reviews(db: Session):
+        return db.query(Review.school_id, Review.created_at, Review.overall_rating).filter(Review.status == "approved")
+
+    def refresh_schools(self, db: Session, school_ids: List[int]) -> None:
+        """Recompute the buckets of the given schools. Caller commits."""
+        if not school_ids:
+            return
+        reviews = self._approved_reviews(db).filter(Review.school_id.in_(school_ids)).all()
+        rows = self._rows(self._bucket_rows(reviews))
+        db.query(SchoolRatingBucket).filter(SchoolRatingBucket.school_id.in_(school_ids)).delete(synchronize_session=False)
+        if rows:
+            db.execute(insert(SchoolRatingBucket), rows)
+
+    def rebuild(self, db: Session) -> int:
+        """Recompute every school's buckets; returns the number of rows written"""
+        db.query(SchoolRatingBucket).delete(synchronize_session=False)
+        totals = self._bucket_rows(self._approved_reviews(db).yield_per(REBUILD_BATCH_SIZE))
+        rows = self._rows(totals)
+        for start in range(0, len(rows), REBUILD_BATCH_SIZE):
+            db.execute(insert(SchoolRatingBucket), rows[start:start + REBUILD_BATCH_SIZE])
+        db.commit()
+        logger.info(f"Rebuilt school rating buckets: {len(rows)} rows")
+        return len(rows)
+
+    def get_series(
+        self,
+        db: Session,
+        school_ids: List[int],
+        period: str = "month",
+        window: Optional[int] = None,
+        today: Optional[date] = None
+    ) -> Dict[int, List[Dict[str, Any]]]:
+        """
+        Dense series of the last window buckets for each school, oldest first:
+        {date, rating, count}, with rating None for buckets without reviews.
+        One indexed range read for all schools.
+        """
+        starts = window_starts(period, window or default_window(period), today)
+        found = defaultdict(dict)
+        if school_ids:
+            rows = db.query(
+                SchoolRatingBucket.school_id,
+                SchoolRatingBucket.bucket_start,
+                SchoolRatingBucket.review_count,
+                SchoolRatingBucket.rating_sum
+            ).filter(
+                SchoolRatingBucket.school_id.in_(school_ids),
+                SchoolRatingBucket.period == period,
+                SchoolRatingBucket.bucket_start >= starts[0]
+            ).all()
+            for row in rows:
+                found[row.school_id][row.bucket_start] = (row.review_count, row.rating_sum)
+
+        series = {}
+        for school_id in school_ids:
+            buckets = found.get(school_id, {})
+            series[school_id] = [
+                {
+                    "date": start.isoformat(),
+                    "rating": round(buckets[start][1] / buckets[start][0], 2) if start in buckets else None,
+                    "count": buckets[start][0] if start in buckets else 0
+                }
+                for start in starts
+            ]
+        return series
+
+    @staticmethod
+    def trend_direction(series: List[Dict[str, Any]]) -> str:
+        """improving/declining/stable from the later half of the window against the earlier half"""
+        middle = len(series) // 2
+        halves = []
+        for buckets in (series[:middle], series[middle:]):
+            count = sum(bucket["count"] for bucket in buckets)
+            total = sum(bucket["rating"] * bucket["count"] for bucket in buckets if bucket["count"])
+            halves.append((count, total / count if count else None))
+        (earlier_count, earlier), (later_count, later) = halves
+        if earlier is None or later is None or earlier_count + later_count < MIN_TREND_REVIEWS:
+            return "insufficient_data"
+        if later > earlier + settings.trends_improving_threshold:
+            return "improving"
+        if later < earlier - settings.trends_improving_threshold:
+            return "declining"
+        return "stable"
+
+
+# Service instance
+rating_trend_service = RatingTrendService()
@@ -0,0 +1,247 @@
+import asyncio
+import heapq
+import math
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session, undefer_group
+from app.config import settings
+from app.database import SessionLocal
+from app.models import School, Review, ScrapingJob, DETAIL_COLUMNS
+from app.models_scraping import ScrapingCall, WebsitePage
+from app.services.region_lock_service import expire_abandoned_jobs, live_job_filter, region_key
+import logging
+
+"""
+Staleness-driven refresh scheduler.
+Ranks regions (Perplexity re-scrapes) and schools (website re-crawls) by how
+stale, how visited and how incomplete their data is, and issues the top of
+the queue in batches without exceeding the hourly API budget.
+"""
+
+logger = logging.getLogger(__name__)
+
+# Fields whose presence makes a school record useful to parents
+COMPLETENESS_FIELDS = [
+    School.address, School.zip_code, School.phone, School.email, School.website, School.board,
+    School.grade_levels, School.enrollment, School.principal_name, School.facilities,
+]
+
+# Window used to measure review traffic
+TRAFFIC_WINDOW_DAYS = 30
+
+# API calls budgeted per region re-scrape. A lower bound: one search, while
+# retried attempts (up to 3) and incremental sub-area discovery make more;
+# those are still counted once made, through api_calls_in_last_hour
+REGION_API_CALLS = 1
+
+# Schools pre-selected from SQL per batch slot before scoring in Python
+SCHOOL_CANDIDATES_PER_SLOT = 20
+
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def refresh_priority(age_days: float, recent_reviews: int, completeness: float) -> float:
+    """
+    Staleness relative to the refresh interval, boosted by review traffic and
+    missing data. Anything at or above 1.0 is due for a refresh.
+    """
+    staleness = age_days / max(settings.refresh_stale_after_days, 1)
+    return round(staleness * (1 + math.log1p(recent_reviews)) * (2 - completeness), 3)
+
+
+class RefreshSchedulerService:
+    """Builds the refresh queue and issues batches of it"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def api_calls_in_last_hour(self) -> int:
+        """API calls actually made (not served from cache) in the past hour"""
+        since = datetime.utcnow() - timedelta(hours=1)
+        return self.db.query(func.count(ScrapingCall.id)).filter(
+            ScrapingCall.created_at >= since,
+            ScrapingCall.outcome != "cache_hit"
+        ).scalar() or 0
+
+    def remaining_budget(self) -> int:
+        return max(settings.refresh_api_budget_per_hour - self.api_calls_in_last_hour(), 0)
+
+    def region_candidates(self, now: datetime) -> List[Dict[str, Any]]:
+        completeness = sum(case((column.isnot(None), 1), else_=0) for column in COMPLETENESS_FIELDS)
+        city_key = func.lower(School.city)
+        rows = self.db.query(
+            city_key.label("key"),
+            func.min(School.city).label("region"),
+            func.count(School.id).label("schools"),
+            func.max(func.coalesce(School.last_scraped_at, School.created_at)).label("last_refreshed"),
+            func.avg(completeness).label("completeness")
+        ).filter(School.is_active == True, School.city.isnot(None)).group_by(city_key).all()
+
+        traffic_since = now - timedelta(days=TRAFFIC_WINDOW_DAYS)
+        traffic = dict(
+            self.db.query(func.lower(School.city), func.count(Review.id))
+            .join(Review, Review.school_id == School.id)
+            .filter(Review.created_at >= traffic_since)
+            .group_by(func.lower(School.city)).all()
+        )
+        # Read-only: abandoned jobs are skipped here and only failed by run_batch
+        busy = {
+            key or region_key(region) for region, key in
+            self.db.query(ScrapingJob.region, ScrapingJob.region_key).filter(live_job_filter()).all()
+        }
+
+        candidates = []
+        for row in rows:
+            if row.key in busy:
+                continue
+            last_refreshed = _as_utc(row.last_refreshed)
+            age_days = (now - last_refreshed).total_seconds() / 86400 if last_refreshed else float(settings.refresh_stale_after_days * 4)
+            completeness_ratio = float(row.completeness or 0) / len(COMPLETENESS_FIELDS)
+            recent_reviews = traffic.get(row.key, 0)
+            candidates.append({
+                "kind": "region",
+                "target": row.region,
+                "priority": refresh_priority(age_days, recent_reviews, completeness_ratio),
+                "estimated_api_calls": REGION_API_CALLS,
+                "reasons": {
+                    "schools": row.schools,
+                    "age_days": round(age_days, 1),
+                    "recent_reviews": recent_reviews,
+                    "completeness": round(completeness_ratio, 2),
+                },
+            })
+        return candidates
+
+    def school_candidates(self, now: datetime, limit: int) -> List[Dict[str, Any]]:
+        """Schools with a website, least recently crawled first"""
+        last_crawled = self.db.query(
+            WebsitePage.school_id.label("school_id"),
+            func.max(WebsitePage.fetched_at).label("crawled_at")
+        ).group_by(WebsitePage.school_id).subquery()
+        completeness = sum(case((column.isnot(None), 1), else_=0) for column in COMPLETENESS_FIELDS)
+        rows = self.db.query(
+            School.id, School.name, School.created_at, last_crawled.c.crawled_at, completeness.label("completeness")
+        ).outerjoin(last_crawled, last_crawled.c.school_id == School.id).filter(
+            School.is_active == True, School.website.isnot(None), School.website != ""
+        ).order_by(
+            last_crawled.c.crawled_at.isnot(None), last_crawled.c.crawled_at.asc(), School.id
+        ).limit(limit).all()
+
+        traffic_since = now - timedelta(days=TRAFFIC_WINDOW_DAYS)
+        traffic = dict(
+            self.db.query(Review.school_id, func.count(Review.id))
+            .filter(Review.school_id.in_([row.id for row in rows]), Review.created_at >= traffic_since)
+            .group_by(Review.school_id).all()
+        ) if rows else {}
+
+        candidates = []
+        for row in rows:
+            crawled_at = _as_utc(row.crawled_at)
+            age_days = (now - crawled_at).total_seconds() / 86400 if crawled_at else float(settings.refresh_stale_after_days * 2)
+            completeness_ratio = float(row.completeness or 0) / len(COMPLETENESS_FIELDS)
+            recent_reviews = traffic.get(row.id, 0)
+            candidates.append({
+                "kind": "school",
+                "target": row.id,
+                "name": row.name,
+                "priority": refresh_priority(age_days, recent_reviews, completeness_ratio),
+                "estimated_api_calls": 0,
+                "reasons": {
+                    "age_days": round(age_days, 1),
+                    "recent_reviews": recent_reviews,
+                    "completeness": round(completeness_ratio, 2),
+                },
+            })
+        return candidates
+
+    def plan(self, limit: Optional[int] = None) -> Dict[str, Any]:
+        """
+        The refresh queue in priority order, marking which items the next batch
+        would issue given the remaining API budget. Nothing is changed (dry run).
+        """
+        limit = limit or settings.refresh_batch_size
+        now = datetime.now(timezone.utc)
+        queue = [
+            (-item["priority"], index, item)
+            for index, item in enumerate(
+                self.region_candidates(now) + self.school_candidates(now, limit * SCHOOL_CANDIDATES_PER_SLOT)
+            )
+            if item["priority"] >= 1.0
+        ]
+        heapq.heapify(queue)
+
+        budget = self.remaining_budget()
+        planned, deferred = [], []
+        regions_planned = schools_planned = 0
+        while queue and (regions_planned < limit or schools_planned < limit):
+            _, _, item = heapq.heappop(queue)
+            if item["kind"] == "region":
+                if regions_planned >= limit:
+                    continue
+                if item["estimated_api_calls"] > budget:
+                    deferred.append(item)
+                    continue
+                budget -= item["estimated_api_calls"]
+                regions_planned += 1
+            else:
+                if schools_planned >= limit:
+                    continue
+                schools_planned += 1
+            planned.append(item)
+
+        return {
+            "api_budget_per_hour": settings.refresh_api_budget_per_hour,
+            "api_budget_remaining": budget,
+            "next_batch": planned,
+            "deferred_for_budget": deferred[:limit],
+        }
+
+    async def run_batch(self, limit: Optional[int] = None) -> Dict[str, Any]:
+        """Issue the next batch: region jobs to the scraper, schools to the website crawler"""
+        from app.services.scraping_service import scraping_service
+        from app.services.website_enrichment_service import WebsiteEnrichmentService
+
+        expire_abandoned_jobs(self.db)
+        plan = self.plan(limit)
+        region_items = [item for item in plan["next_batch"] if item["kind"] == "region"]
+        school_ids = [item["target"] for item in plan["next_batch"] if item["kind"] == "school"]
+
+        jobs = []
+        for item in region_items:
+            job = ScrapingJob(region=item["target"], region_key=region_key(item["target"]))
+            self.db.add(job)
+            self.db.commit()
+            self.db.refresh(job)
+            jobs.append(job.id)
+            logger.info(f"Refresh scheduler: re-scraping {item['target']} as job {job.id} (priority {item['priority']})")
+            await scraping_service.scrape_schools_in_region(region=item["target"], job_id=job.id)
+
+        enrichment = None
+        if school_ids:
+            schools = self.db.query(School).options(undefer_group(DETAIL_COLUMNS)).filter(School.id.in_(school_ids)).all()
+            enrichment = await WebsiteEnrichmentService(self.db).enrich_schools(schools)
+
+        return {"job_ids": jobs, "schools_crawled": school_ids, "enrichment": enrichment, "plan": plan}
+
+
+async def run_refresh_scheduler(interval_seconds: Optional[int] = None) -> None:
+    """Background loop: issue one batch per interval"""
+    interval_seconds = interval_seconds or settings.refresh_interval_seconds
+    while True:
+        db = SessionLocal()
+        try:
+            result = await RefreshSchedulerService(db).run_batch()
+            logger.info(f"Refresh scheduler: issued {len(result['job_ids'])} region jobs and "
+                        f"{len(result['schools_crawled'])} website crawls")
+        except Exception as e:
+            logger.error(f"Refresh scheduler batch failed: {e}")
+        finally:
+            db.close()
+        await asyncio.sleep(interval_seconds)
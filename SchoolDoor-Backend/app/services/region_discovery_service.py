@@ -0,0 +1,207 @@
+import hashlib
+import json
+import re
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from app.config import settings
+from app.services.scraping_cost_service import ScrapingBudgetExceeded
+import logging
+
+"""
+Incremental discovery of schools in large regions.
+Splits a region into localities/pincodes and pages through each one until
+the API stops returning schools we have not seen before.
+"""
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_school_name(name: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace for name comparisons"""
+    name = re.sub(r"[^\w\s]", "", (name or "").lower())
+    return re.sub(r"\s+", " ", name).strip()
+
+
+class SeenSchoolNames:
+    """
+    Compact set of school names seen in one region.
+    Stores 64-bit hashes of normalized names instead of the strings themselves.
+    """
+
+    def __init__(self, names: Iterable[str] = ()):
+        self._hashes = set()
+        for name in names:
+            self.add(name)
+
+    @staticmethod
+    def _hash(name: str) -> int:
+        digest = hashlib.blake2b(normalize_school_name(name).encode("utf-8"), digest_size=8).digest()
+        return int.from_bytes(digest, "big")
+
+    def add(self, name: str) -> bool:
+        """Add a name, returning True if it had not been seen before"""
+        if not name or not normalize_school_name(name):
+            return False
+        key = self._hash(name)
+        if key in self._hashes:
+            return False
+        self._hashes.add(key)
+        return True
+
+    def __contains__(self, name: str) -> bool:
+        return self._hash(name) in self._hashes
+
+    def __len__(self) -> int:
+        return len(self._hashes)
+
+
+class RegionDiscoveryService:
+    """
+    Drives SchoolScrapingService through sub-areas and pages of a region.
+    Each call is counted so throughput can be reported as new schools per API call.
+    """
+
+    # Exclusion names sent per prompt; keeps each request well under the token cap
+    MAX_EXCLUDED_NAMES = 20
+
+    def __init__(self, scraper, max_pages_per_area: Optional[int] = None, max_api_calls: Optional[int] = None):
+        self.scraper = scraper
+        self.max_pages_per_area = settings.scraping_max_pages_per_area if max_pages_per_area is None else max_pages_per_area
+        self.max_api_calls = settings.scraping_max_api_calls_per_job if max_api_calls is None else max_api_calls
+
+    async def list_sub_areas(self, region: str, cache_only: bool = False, job_id: Optional[int] = None) -> List[str]:
+        """Ask the API for localities and pincodes that together cover the region"""
+        prompt = f"""
+            List the main localities, neighbourhoods and pincodes of {region}, India that together cover the whole area.
+            CRITICAL: Return ONLY a valid JSON array of strings, at most 30 entries, e.g. ["Kothrud", "411038", "Baner"].
+            """
+        data = {
+            "model": "sonar-pro",
+            "messages": [
+                {"role": "system", "content": "You are an expert on Indian geography. Always return valid JSON."},
+                {"role": "user", "content": prompt}
+            ],
+            "max_tokens": 800,
+            "temperature": 0.1
+        }
+        headers = self.scraper._request_headers()
+        result = await self.scraper._fetch_completion(
+            data,
+            lambda: self.scraper._post_completion(headers, data, region),
+            region=region,
+            cache_only=cache_only,
+            job_id=job_id,
+            purpose="sub_areas"
+        )
+        content = result['choices'][0]['message']['content'].strip()
+
+        try:
+            areas = json.loads(content)
+        except json.JSONDecodeError:
+            match = re.search(r"\[.*\]", content, re.DOTALL)
+            try:
+                areas = json.loads(match.group(0)) if match else []
+            except json.JSONDecodeError:
+                areas = []
+
+        return [str(area).strip() for area in areas if isinstance(area, (str, int)) and str(area).strip()]
+
+    async def discover(
+        self,
+        region: str,
+        existing_school_names: List[str],
+        known_pincodes: Iterable[str] = (),
+        cache_only: bool = False,
+        job_id: Optional[int] = None,
+        on_progress: Optional[Callable[[], None]] = None
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Collect schools not already in existing_school_names.
+        Returns the new school records and throughput statistics.
+        Stops early, keeping what was found, when the scraping budget runs out.
+        on_progress is called after every API call, so the caller can renew
+        its region lease and job heartbeat during a long discovery.
+        """
+        def progressed() -> None:
+            if on_progress is not None:
+                on_progress()
+
+        seen = SeenSchoolNames(existing_school_names)
+        discovered: List[Dict[str, Any]] = []
+        api_calls = 0
+        areas_searched = 0
+
+        # The region as a whole first, then each sub-area (known pincodes are free)
+        areas: List[Optional[str]] = [None]
+        area_keys = set()
+        candidate_areas = list(known_pincodes)
+        budget_exhausted = False
+        try:
+            if self.max_api_calls > 0:
+                candidate_areas += await self.list_sub_areas(region, cache_only=cache_only, job_id=job_id)
+                api_calls += 1
+        except ScrapingBudgetExceeded as e:
+            logger.warning(f"Discovery: {e}; stopping {region}")
+            budget_exhausted = True
+        except Exception as e:
+            logger.warning(f"Discovery: Could not list sub-areas for {region}: {e}")
+        progressed()
+        for area in candidate_areas:
+            key = normalize_school_name(area)
+            if key and key not in area_keys and key != normalize_school_name(region):
+                area_keys.add(key)
+                areas.append(area)
+
+        for area in areas:
+            if budget_exhausted:
+                break
+            if api_calls >= self.max_api_calls:
+                logger.info(f"Discovery: API call budget of {self.max_api_calls} reached for {region}")
+                break
+            areas_searched += 1
+            area_names: List[str] = []
+
+            for page in range(self.max_pages_per_area):
+                if api_calls >= self.max_api_calls:
+                    break
+
+                # Most recent finds in this area first, topped up with known names
+                excluded = list(reversed(area_names))[:self.MAX_EXCLUDED_NAMES]
+                if len(excluded) < self.MAX_EXCLUDED_NAMES and area is None:
+                    excluded += existing_school_names[:self.MAX_EXCLUDED_NAMES - len(excluded)]
+
+                try:
+                    schools = await self.scraper._scrape_with_perplexity(
+                        region, excluded, cache_only=cache_only, area=area, job_id=job_id
+                    )
+                except ScrapingBudgetExceeded as e:
+                    logger.warning(f"Discovery: {e}; stopping {region}")
+                    budget_exhausted = True
+                    break
+                except Exception as e:
+                    api_calls += 1
+                    logger.warning(f"Discovery: Page {page + 1} for {area or region} failed: {e}")
+                    progressed()
+                    break
+                api_calls += 1
+                progressed()
+
+                new_schools = [school for school in schools if seen.add(school.get('name'))]
+                discovered.extend(new_schools)
+                area_names.extend(school['name'] for school in new_schools)
+                logger.info(
+                    f"Discovery: {area or region} page {page + 1}: "
+                    f"{len(new_schools)} new of {len(schools)} returned"
+                )
+
+                if not new_schools:
+                    break
+
+        stats = {
+            "api_calls": api_calls,
+            "areas_searched": areas_searched,
+            "new_schools": len(discovered),
+            "new_schools_per_call": round(len(discovered) / api_calls, 2) if api_calls else 0.0,
+            "budget_exhausted": budget_exhausted,
+        }
+        logger.info(f"Discovery for {region}: {stats}")
+        return discovered, stats
@@ -0,0 +1,197 @@
+import hashlib
+import os
+import socket
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy import and_, func, or_, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import SessionLocal
+from app.models import ScrapingJob
+from app.models_scraping import ScrapingRegionLease
+from app.services.llm_cache_service import LLMResponseCacheService
+import logging
+
+"""
+Region-level mutual exclusion for scraping jobs.
+Uses a Postgres session advisory lock where available and a lease table
+otherwise, so only one worker scrapes a given region at a time.
+"""
+
+logger = logging.getLogger(__name__)
+
+# Job states that mean the region is (or is about to be) scraped
+ACTIVE_JOB_STATUSES = ["pending", "running"]
+
+
+def region_key(region: str) -> str:
+    """Normalized region used for leases and job coalescing"""
+    return LLMResponseCacheService.normalize_region(region) or ""
+
+
+def _last_seen_cutoff() -> datetime:
+    """Jobs that last checked in before this are abandoned"""
+    return datetime.utcnow() - timedelta(seconds=settings.scraping_region_lease_seconds)
+
+
+def live_job_filter():
+    """Filter for pending or running jobs whose worker checked in within a lease lifetime"""
+    return and_(
+        ScrapingJob.status.in_(ACTIVE_JOB_STATUSES),
+        func.coalesce(ScrapingJob.heartbeat_at, ScrapingJob.created_at) >= _last_seen_cutoff()
+    )
+
+
+def expire_abandoned_jobs(db: Session) -> int:
+    """
+    Fail pending or running jobs whose worker has not checked in for a lease
+    lifetime (e.g. lost in a crash or restart), so their region is free again;
+    returns how many.
+    """
+    expired = db.query(ScrapingJob).filter(
+        ScrapingJob.status.in_(ACTIVE_JOB_STATUSES),
+        func.coalesce(ScrapingJob.heartbeat_at, ScrapingJob.created_at) < _last_seen_cutoff()
+    ).update({
+        ScrapingJob.status: "failed",
+        ScrapingJob.error_message: f"Abandoned: no progress for {settings.scraping_region_lease_seconds} seconds",
+        ScrapingJob.completed_at: func.now()
+    }, synchronize_session=False)
+    if expired:
+        db.commit()
+        logger.warning(f"Marked {expired} abandoned scraping jobs as failed")
+    return expired
+
+
+def find_active_job(db: Session, region: str, exclude_job_id: Optional[int] = None) -> Optional[ScrapingJob]:
+    """Oldest live pending or running job for the same normalized region"""
+    expire_abandoned_jobs(db)
+    key = region_key(region)
+    query = db.query(ScrapingJob).filter(
+        or_(ScrapingJob.region_key == key, and_(ScrapingJob.region_key.is_(None), ScrapingJob.region.ilike(key))),
+        ScrapingJob.status.in_(ACTIVE_JOB_STATUSES)
+    )
+    if exclude_job_id is not None:
+        query = query.filter(ScrapingJob.id != exclude_job_id)
+    return query.order_by(ScrapingJob.id).first()
+
+
+class RegionLockedError(Exception):
+    """Raised when another worker holds the lease for a region."""
+
+
+class RegionLease:
+    """
+    Exclusive hold on one region for the duration of a scrape.
+    Use as a context manager; raises RegionLockedError if the region is taken.
+    """
+
+    def __init__(self, region: str, job_id: Optional[int] = None, ttl_seconds: Optional[int] = None):
+        self.key = region_key(region)
+        self.job_id = job_id
+        self.ttl_seconds = ttl_seconds or settings.scraping_region_lease_seconds
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{job_id}"
+        self._connection = None
+        self._renewed_at = 0.0
+
+    @property
+    def lock_id(self) -> int:
+        """Signed 64-bit advisory lock id for the region"""
+        digest = hashlib.blake2b(f"scraping-region:{self.key}".encode("utf-8"), digest_size=8).digest()
+        return int.from_bytes(digest, "big", signed=True)
+
+    @staticmethod
+    def _engine():
+        # The session factory's bind, so a rebound SessionLocal is used for the lock too
+        return SessionLocal.kw["bind"]
+
+    def __enter__(self) -> "RegionLease":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.release()
+
+    def acquire(self) -> None:
+        if self._engine().dialect.name == "postgresql":
+            self._acquire_advisory()
+        else:
+            self._acquire_lease_row()
+        self._renewed_at = time.monotonic()
+        logger.info(f"Region lease acquired for '{self.key}' by job {self.job_id} ({self.holder})")
+
+    def _acquire_advisory(self) -> None:
+        # Session-level advisory locks live as long as this dedicated connection
+        self._connection = self._engine().connect().execution_options(isolation_level="AUTOCOMMIT")
+        locked = self._connection.execute(text("SELECT pg_try_advisory_lock(:lock_id)"), {"lock_id": self.lock_id}).scalar()
+        if not locked:
+            self._connection.close()
+            self._connection = None
+            raise RegionLockedError(f"Region '{self.key}' is being scraped by another worker")
+
+    def _acquire_lease_row(self) -> None:
+        db = SessionLocal()
+        try:
+            now = datetime.utcnow()
+            expires_at = now + timedelta(seconds=self.ttl_seconds)
+            try:
+                db.add(ScrapingRegionLease(region_key=self.key, job_id=self.job_id, holder=self.holder, expires_at=expires_at))
+                db.commit()
+                return
+            except IntegrityError:
+                db.rollback()
+
+            # Take over only if the current lease has expired (holder crashed)
+            taken = db.query(ScrapingRegionLease).filter(
+                ScrapingRegionLease.region_key == self.key,
+                ScrapingRegionLease.expires_at < now
+            ).update({
+                ScrapingRegionLease.job_id: self.job_id,
+                ScrapingRegionLease.holder: self.holder,
+                ScrapingRegionLease.acquired_at: now,
+                ScrapingRegionLease.expires_at: expires_at
+            }, synchronize_session=False)
+            db.commit()
+            if not taken:
+                current = db.query(ScrapingRegionLease).filter(ScrapingRegionLease.region_key == self.key).first()
+                held_by = f"job {current.job_id}" if current and current.job_id else "another worker"
+                raise RegionLockedError(f"Region '{self.key}' is being scraped by {held_by}")
+        finally:
+            db.close()
+
+    def renew(self) -> None:
+        """Extend a lease-table hold; cheap to call often (writes at most every third of the TTL)"""
+        if self._connection is not None or time.monotonic() - self._renewed_at < self.ttl_seconds / 3:
+            return
+        db = SessionLocal()
+        try:
+            db.query(ScrapingRegionLease).filter(
+                ScrapingRegionLease.region_key == self.key,
+                ScrapingRegionLease.holder == self.holder
+            ).update({
+                ScrapingRegionLease.expires_at: datetime.utcnow() + timedelta(seconds=self.ttl_seconds)
+            }, synchronize_session=False)
+            db.commit()
+            self._renewed_at = time.monotonic()
+        finally:
+            db.close()
+
+    def release(self) -> None:
+        if self._connection is not None:
+            try:
+                self._connection.execute(text("SELECT pg_advisory_unlock(:lock_id)"), {"lock_id": self.lock_id})
+            finally:
+                self._connection.close()
+                self._connection = None
+            return
+        db = SessionLocal()
+        try:
+            db.query(ScrapingRegionLease).filter(
+                ScrapingRegionLease.region_key == self.key,
+                ScrapingRegionLease.holder == self.holder
+            ).delete(synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+        logger.info(f"Region lease released for '{self.key}' by job {self.job_id}")
@@ -0,0 +1,157 @@
+import hashlib
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import func, insert, literal, select, text, update
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models import School, SchoolChange
+from app.schemas import SchoolChangeFeed, SchoolChangeRecord, SchoolRatingSummary
+from app.services.school_listing_service import school_listing_service
+import logging
+
+"""
+Change feed of schools for partner synchronization.
+Every write path logs the schools it touched in school_changes, in the
+same transaction as the change. Rows get their sequence, the cursor
+partners page with, only once they are committed: the feed publishes
+pending rows in one locked step before reading, so sequences are
+contiguous and a transaction that commits late is published after the
+cursors already handed out instead of behind them.
+"""
+
+logger = logging.getLogger(__name__)
+
+KIND_SCHOOL = "school"  # Any school column or the active flag
+KIND_RATINGS = "ratings"  # Rating summary only
+
+ACTION_UPSERT = "upsert"
+ACTION_RATINGS = "ratings"
+ACTION_DELETE = "delete"
+
+# Published rows older than the retention window are pruned at most this often
+PRUNE_INTERVAL_SECONDS = 3600
+
+
+class CursorExpiredError(Exception):
+    """Raised when changes after a cursor have been pruned (or the cursor is ahead of the feed)."""
+
+    def __init__(self, head: int):
+        super().__init__(f"Cursor expired; resync and continue from {head}")
+        self.head = head
+
+
+class SchoolChangeService:
+    def __init__(self):
+        self._pruned_at: Optional[float] = None
+
+    @property
+    def lock_id(self) -> int:
+        """Signed 64-bit advisory lock id serializing publication"""
+        digest = hashlib.blake2b(b"school-changes:publish", digest_size=8).digest()
+        return int.from_bytes(digest, "big", signed=True)
+
+    @staticmethod
+    def record(db: Session, school_ids: Iterable[Optional[int]], kind: str = KIND_SCHOOL) -> None:
+        """Log that these schools changed; rides along with the caller's commit"""
+        db.add_all([
+            SchoolChange(school_id=school_id, kind=kind)
+            for school_id in dict.fromkeys(school_ids) if school_id is not None
+        ])
+
+    @staticmethod
+    def record_all(db: Session, kind: str) -> None:
+        """Log a change of every school (after a rebuild that may have touched any of them)"""
+        db.execute(insert(SchoolChange).from_select(["school_id", "kind"], select(School.id, literal(kind))))
+
+    @staticmethod
+    def head(db: Session) -> int:
+        """Latest published sequence (0 before the first)"""
+        return db.query(func.max(SchoolChange.sequence)).scalar() or 0
+
+    def publish(self, db: Session) -> int:
+        """Give committed, unpublished changes the next sequences in id order and commit; returns how many"""
+        if db.get_bind().dialect.name == "postgresql":
+            # Held to the end of this transaction; other publishers queue behind it
+            db.execute(text("SELECT pg_advisory_xact_lock(:lock_id)"), {"lock_id": self.lock_id})
+        pending = [change_id for change_id, in db.query(SchoolChange.id).filter(SchoolChange.sequence.is_(None)).order_by(SchoolChange.id)]
+        if pending:
+            last = self.head(db)
+            db.execute(update(SchoolChange), [
+                {"id": change_id, "sequence": last + offset} for offset, change_id in enumerate(pending, 1)
+            ])
+        self._prune(db)
+        db.commit()
+        return len(pending)
+
+    def _prune(self, db: Session) -> None:
+        if self._pruned_at is not None and time.monotonic() - self._pruned_at < PRUNE_INTERVAL_SECONDS:
+            return
+        self._pruned_at = time.monotonic()
+        # The latest row always stays, so sequences keep counting up from it
+        cutoff = datetime.utcnow() - timedelta(days=settings.change_feed_retention_days)
+        pruned = db.query(SchoolChange).filter(
+            SchoolChange.sequence < self.head(db), SchoolChange.created_at < cutoff
+        ).delete(synchronize_session=False)
+        if pruned:
+            logger.info(f"Pruned {pruned} school changes older than {settings.change_feed_retention_days} days")
+
+    def changed_since(self, db: Session, since: int, until: int) -> Set[int]:
+        """Ids of the schools changed in (since, until] of published changes; raises CursorExpiredError once pruned"""
+        if since >= until:
+            return set()
+        first = db.query(func.min(SchoolChange.sequence)).filter(SchoolChange.sequence > since).scalar()
+        if first is None or first > since + 1:
+            raise CursorExpiredError(self.head(db))
+        return {
+            school_id for school_id, in db.query(SchoolChange.school_id).filter(
+                SchoolChange.sequence > since, SchoolChange.sequence <= until
+            ).distinct()
+        }
+
+    def changes(self, db: Session, since: int, limit: int) -> SchoolChangeFeed:
+        """
+        Changes after the since cursor, at most limit log rows, collapsed to
+        each school's latest state: upsert with the school's summary, ratings
+        with just its rating summary, or delete once it is inactive or gone.
+        """
+        self.publish(db)
+        rows = db.query(SchoolChange.sequence, SchoolChange.school_id, SchoolChange.kind)\
+                 .filter(SchoolChange.sequence > since)\
+                 .order_by(SchoolChange.sequence).limit(limit + 1).all()
+        # Sequences are contiguous, so a gap after the cursor means it was pruned
+        if (rows and rows[0].sequence > since + 1) or (not rows and since > self.head(db)):
+            raise CursorExpiredError(self.head(db))
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        latest: Dict[int, Tuple[int, Set[str]]] = {}
+        for sequence, school_id, kind in rows:
+            kinds = latest[school_id][1] if school_id in latest else set()
+            kinds.add(kind)
+            latest[school_id] = (sequence, kinds)
+        schools = {school.id: school for school in school_listing_service.load(db, latest)}
+
+        records: List[SchoolChangeRecord] = []
+        for school_id, (sequence, kinds) in sorted(latest.items(), key=lambda item: item[1][0]):
+            school = schools.get(school_id)
+            if school is None or not school.is_active:
+                records.append(SchoolChangeRecord.model_construct(sequence=sequence, school_id=school_id, action=ACTION_DELETE,
+                                                                  school=None, ratings=None))
+            elif KIND_SCHOOL in kinds:
+                records.append(SchoolChangeRecord.model_construct(sequence=sequence, school_id=school_id, action=ACTION_UPSERT,
+                                                                  school=school, ratings=None))
+            else:
+                ratings = SchoolRatingSummary.model_construct(
+                    average_rating=school.average_rating, total_reviews=school.total_reviews,
+                    ratings_by_category=school.ratings_by_category
+                )
+                records.append(SchoolChangeRecord.model_construct(sequence=sequence, school_id=school_id, action=ACTION_RATINGS,
+                                                                  school=None, ratings=ratings))
+        return SchoolChangeFeed.model_construct(
+            changes=records, next_cursor=rows[-1].sequence if rows else since, has_more=has_more
+        )
+
+
+# Service instance
+school_change_service = SchoolChangeService()
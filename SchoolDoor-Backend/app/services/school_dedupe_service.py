@@ -0,0 +1,354 @@
+import re
+import threading
+from collections import defaultdict
+from difflib import SequenceMatcher
+from typing import Any, Dict, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+from sqlalchemy.orm import Session
+from app.models import School, Rating, Review
+from app.services.rating_stats_service import rating_stats_service
+from app.services.leaderboard_service import leaderboard_service
+from app.services.school_tag_service import school_tag_service
+from app.services.geo_service import geo_service
+from app.services.school_change_service import school_change_service
+import logging
+
+"""
+Fuzzy duplicate-school detection.
+Normalizes names, blocks candidates by phonetic token, pincode, phone and
+website, and scores only the schools that share a block with the candidate.
+"""
+
+logger = logging.getLogger(__name__)
+
+# Spelling variants collapsed before comparison
+ABBREVIATIONS = {
+    "st": "saint", "stt": "saint", "intl": "international", "int'l": "international",
+    "sr": "senior", "snr": "senior", "sec": "secondary", "secy": "secondary",
+    "hr": "higher", "hs": "high school", "hss": "higher secondary school",
+    "eng": "english", "med": "medium", "pub": "public", "conv": "convent",
+    "vid": "vidyalaya", "vidyalay": "vidyalaya", "vidhyalaya": "vidyalaya",
+    "kv": "kendriya vidyalaya", "dps": "delhi public school", "govt": "government",
+    "jr": "junior", "mem": "memorial", "acad": "academy", "no": "",
+}
+# Words too common in school names to identify one
+STOPWORDS = {"the", "of", "and", "school", "schools", "a", "at", "for", "in"}
+
+# Blocks larger than this are too unselective to be worth scoring
+MAX_BLOCK_SIZE = 2000
+
+# Columns copied from a duplicate when the surviving school has no value
+MERGEABLE_FIELDS = [
+    "address", "state", "zip_code", "phone", "email", "website", "school_type", "board",
+    "grade_levels", "enrollment", "student_teacher_ratio", "board_exam_results",
+    "competitive_exam_results", "programs", "medium_of_instruction", "facilities",
+    "principal_name", "established_year", "latitude", "longitude", "location_source",
+]
+
+SOUNDEX_CODES = {
+    **dict.fromkeys("bfpv", "1"), **dict.fromkeys("cgjkqsxz", "2"),
+    **dict.fromkeys("dt", "3"), "l": "4", **dict.fromkeys("mn", "5"), "r": "6",
+}
+
+
+def soundex(word: str) -> str:
+    """Classic four-character Soundex code"""
+    word = re.sub(r"[^a-z]", "", word.lower())
+    if not word:
+        return ""
+    encoded = word[0].upper()
+    previous = SOUNDEX_CODES.get(word[0], "")
+    for char in word[1:]:
+        code = SOUNDEX_CODES.get(char, "")
+        if code and code != previous:
+            encoded += code
+        if char not in "hw":
+            previous = code
+    return (encoded + "000")[:4]
+
+
+def normalize_city(city: Optional[str]) -> str:
+    return re.sub(r"\s+", " ", re.sub(r"[^\w\s]", " ", (city or "").lower())).strip()
+
+
+def name_tokens(name: Optional[str], city: Optional[str] = None) -> List[str]:
+    """Significant, expanded tokens of a school name, without the city name"""
+    text = (name or "").lower().replace("'s ", "s ").replace("'", "")
+    text = re.sub(r"[^\w\s]", " ", text)
+    tokens: List[str] = []
+    for token in text.split():
+        tokens.extend(ABBREVIATIONS.get(token, token).split())
+    city_tokens = set(normalize_city(city).split())
+    return [token for token in tokens if token not in STOPWORDS and token not in city_tokens]
+
+
+def normalize_phone(phone: Optional[str]) -> Optional[str]:
+    digits = re.sub(r"\D", "", phone or "")
+    return digits[-10:] if len(digits) >= 8 else None
+
+
+def normalize_website(website: Optional[str]) -> Optional[str]:
+    if not website:
+        return None
+    parsed = urlparse(website if "://" in website else f"http://{website}")
+    host = (parsed.netloc or "").lower().split(":")[0]
+    if host.startswith("www."):
+        host = host[4:]
+    return host or None
+
+
+def normalize_pincode(pincode: Optional[str]) -> Optional[str]:
+    digits = re.sub(r"\D", "", pincode or "")
+    return digits if len(digits) == 6 else None
+
+
+class SchoolRecord:
+    """Normalized fields of one school, as held by the index"""
+    __slots__ = ("school_id", "name", "tokens", "joined", "city", "pincode", "phone", "website")
+
+    def __init__(self, school_id: Optional[int], fields: Dict[str, Any]):
+        self.school_id = school_id
+        self.name = fields.get("name")
+        self.city = normalize_city(fields.get("city"))
+        self.tokens = name_tokens(fields.get("name"), fields.get("city"))
+        self.joined = " ".join(sorted(self.tokens))
+        self.pincode = normalize_pincode(fields.get("zip_code") or fields.get("pincode"))
+        self.phone = normalize_phone(fields.get("phone"))
+        self.website = normalize_website(fields.get("website"))
+
+    def block_keys(self) -> Set[Tuple[str, ...]]:
+        keys = {("sx", self.city, soundex(token)) for token in self.tokens if len(token) > 2}
+        if self.pincode:
+            keys.add(("pin", self.pincode))
+        if self.phone:
+            keys.add(("phone", self.phone))
+        if self.website:
+            keys.add(("web", self.website))
+        return keys
+
+
+def score_pair(a: SchoolRecord, b: SchoolRecord, threshold: float = 0.0) -> Tuple[float, List[str]]:
+    """
+    Similarity in [0, 1] plus the signals that contributed to it.
+    Pairs that cannot reach threshold skip the (comparatively slow) edit ratio.
+    """
+    reasons = []
+    if a.tokens and b.tokens:
+        set_a, set_b = set(a.tokens), set(b.tokens)
+        jaccard = len(set_a & set_b) / len(set_a | set_b)
+        contact_match = (a.phone and a.phone == b.phone) or (a.website and a.website == b.website)
+        if not contact_match and 0.5 * jaccard + 0.55 < threshold:
+            return 0.0, reasons
+        ratio = SequenceMatcher(None, a.joined, b.joined).ratio()
+        score = 0.5 * jaccard + 0.5 * ratio
+    else:
+        score = 0.0
+
+    if a.city and b.city and a.city != b.city:
+        score *= 0.7
+        reasons.append("different_city")
+    if a.pincode and a.pincode == b.pincode:
+        score = min(1.0, score + 0.05)
+        reasons.append("same_pincode")
+    if a.phone and a.phone == b.phone:
+        score = max(score, 0.95)
+        reasons.append("same_phone")
+    if a.website and a.website == b.website:
+        score = max(score, 0.95)
+        reasons.append("same_website")
+    return round(score, 3), reasons
+
+
+class SchoolDedupeIndex:
+    """In-memory blocking index over all schools"""
+
+    def __init__(self):
+        self.records: Dict[int, SchoolRecord] = {}
+        self.blocks: Dict[Tuple[str, ...], Set[int]] = defaultdict(set)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def add(self, school_id: int, fields: Dict[str, Any]) -> None:
+        self.remove(school_id)
+        record = SchoolRecord(school_id, fields)
+        self.records[school_id] = record
+        for key in record.block_keys():
+            self.blocks[key].add(school_id)
+
+    def remove(self, school_id: int) -> None:
+        record = self.records.pop(school_id, None)
+        if record:
+            for key in record.block_keys():
+                self.blocks[key].discard(school_id)
+
+    def find_matches(
+        self,
+        fields: Dict[str, Any],
+        threshold: float = 0.85,
+        limit: int = 5,
+        exclude_id: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Schools similar to fields, best first"""
+        candidate = SchoolRecord(None, fields)
+        candidate_ids: Set[int] = set()
+        for key in candidate.block_keys():
+            block = self.blocks.get(key)
+            if block and len(block) <= MAX_BLOCK_SIZE:
+                candidate_ids |= block
+        candidate_ids.discard(exclude_id)
+
+        matches = []
+        for school_id in candidate_ids:
+            score, reasons = score_pair(candidate, self.records[school_id], threshold)
+            if score >= threshold:
+                matches.append({
+                    "school_id": school_id,
+                    "name": self.records[school_id].name,
+                    "score": score,
+                    "reasons": reasons
+                })
+        matches.sort(key=lambda match: (-match["score"], match["school_id"]))
+        return matches[:limit]
+
+    def duplicate_clusters(self, threshold: float = 0.88) -> List[List[Dict[str, Any]]]:
+        """Group every indexed school with its likely duplicates (union-find over matches)"""
+        parent: Dict[int, int] = {}
+
+        def find(school_id: int) -> int:
+            while parent.get(school_id, school_id) != school_id:
+                parent[school_id] = parent.get(parent[school_id], parent[school_id])
+                school_id = parent[school_id]
+            return school_id
+
+        pair_scores: Dict[int, float] = {}
+        for school_id, record in self.records.items():
+            fields = {"name": record.name, "city": record.city, "zip_code": record.pincode,
+                      "phone": record.phone, "website": record.website}
+            for match in self.find_matches(fields, threshold, limit=20, exclude_id=school_id):
+                root_a, root_b = find(school_id), find(match["school_id"])
+                if root_a != root_b:
+                    parent[max(root_a, root_b)] = min(root_a, root_b)
+                pair_scores[school_id] = max(pair_scores.get(school_id, 0), match["score"])
+
+        clusters: Dict[int, List[int]] = defaultdict(list)
+        for school_id in pair_scores:
+            clusters[find(school_id)].append(school_id)
+
+        return [
+            [
+                {"school_id": school_id, "name": self.records[school_id].name,
+                 "best_score": pair_scores.get(school_id, 0.0)}
+                for school_id in sorted(set(members) | {root})
+            ]
+            for root, members in sorted(clusters.items())
+        ]
+
+
+class SchoolDedupeService:
+    """
+    Process-wide dedupe index, loaded lazily from the database and kept
+    current by the write paths that create or rename schools.
+    """
+
+    def __init__(self):
+        self._index: Optional[SchoolDedupeIndex] = None
+        self._lock = threading.Lock()
+
+    def get_index(self, db: Session) -> SchoolDedupeIndex:
+        if self._index is None:
+            with self._lock:
+                if self._index is None:
+                    self._index = self.build_index(db)
+        return self._index
+
+    @staticmethod
+    def build_index(db: Session) -> SchoolDedupeIndex:
+        index = SchoolDedupeIndex()
+        rows = db.query(
+            School.id, School.name, School.city, School.zip_code, School.phone, School.website
+        ).filter(School.is_active == True).yield_per(5000)
+        for row in rows:
+            index.add(row.id, {"name": row.name, "city": row.city, "zip_code": row.zip_code,
+                               "phone": row.phone, "website": row.website})
+        logger.info(f"Built school dedupe index with {len(index)} schools")
+        return index
+
+    def invalidate(self) -> None:
+        self._index = None
+
+    def register(self, school: School) -> None:
+        """Add or refresh a school in the index after it has been written"""
+        if self._index is None or school.id is None:
+            return
+        if school.is_active is False:
+            self._index.remove(school.id)
+        else:
+            self._index.add(school.id, {"name": school.name, "city": school.city, "zip_code": school.zip_code,
+                                        "phone": school.phone, "website": school.website})
+
+    def unregister(self, school_id: int) -> None:
+        if self._index is not None:
+            self._index.remove(school_id)
+
+    def find_duplicate(self, db: Session, fields: Dict[str, Any], threshold: float = 0.9) -> Optional[School]:
+        """Best existing school matching fields: exact name+city first, then fuzzy"""
+        existing = db.query(School).filter(
+            School.name == fields.get("name"),
+            School.city == fields.get("city")
+        ).first()
+        if existing:
+            return existing
+
+        matches = self.get_index(db).find_matches(fields, threshold=threshold, limit=1)
+        if not matches:
+            return None
+        logger.info(f"Fuzzy duplicate for '{fields.get('name')}': {matches[0]}")
+        return db.query(School).filter(School.id == matches[0]["school_id"]).first()
+
+    def merge_schools(self, db: Session, primary: School, duplicates: List[School]) -> Dict[str, Any]:
+        """
+        Fold duplicates into primary: move their reviews and ratings, fill
+        primary's empty fields from them, and deactivate them. Caller commits.
+        """
+        duplicate_ids = [school.id for school in duplicates]
+        reviews_moved = db.query(Review).filter(Review.school_id.in_(duplicate_ids)).update(
+            {Review.school_id: primary.id}, synchronize_session=False
+        )
+        ratings_moved = db.query(Rating).filter(Rating.school_id.in_(duplicate_ids)).update(
+            {Rating.school_id: primary.id}, synchronize_session=False
+        )
+        rating_stats_service.refresh_schools(db, [primary.id] + duplicate_ids, commit=False)
+
+        fields_filled = []
+        for column in MERGEABLE_FIELDS:
+            if getattr(primary, column) in (None, "", {}, []):
+                for duplicate in duplicates:
+                    value = getattr(duplicate, column)
+                    if value not in (None, "", {}, []):
+                        setattr(primary, column, value)
+                        fields_filled.append(column)
+                        break
+
+        for duplicate in duplicates:
+            duplicate.is_active = False
+            self.unregister(duplicate.id)
+        self.register(primary)
+        # Filled-in city/state/board may move the primary onto other leaderboards
+        leaderboard_service.update_school(db, primary.id)
+        for school in [primary] + duplicates:
+            school_tag_service.refresh_school(db, school)
+            geo_service.update_school(school)
+        school_change_service.record(db, [primary.id] + duplicate_ids)
+
+        return {
+            "primary_id": primary.id,
+            "merged_ids": duplicate_ids,
+            "reviews_moved": reviews_moved,
+            "ratings_moved": ratings_moved,
+            "fields_filled": fields_filled
+        }
+
+
+# Service instance
+school_dedupe_service = SchoolDedupeService()
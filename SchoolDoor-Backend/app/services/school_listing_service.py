@@ -0,0 +1,89 @@
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Type
+from sqlalchemy import and_
+from sqlalchemy.orm import Query, Session
+from app.models import School, RatingCategory, SchoolRatingStats
+from app.schemas import SchoolSummary
+import logging
+
+"""
+Lean listing views of schools.
+List endpoints select only the columns a SchoolSummary shows plus the
+overall rating rollup, never the heavy JSON columns, and build response
+models straight from the row tuples: the values come from typed columns,
+so they are constructed without a second validation pass.
+"""
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_FIELDS = [
+    name for name in SchoolSummary.model_fields
+    if name not in ("average_rating", "total_reviews", "ratings_by_category")
+]
+SUMMARY_COLUMNS = tuple(getattr(School, name) for name in SUMMARY_FIELDS)
+
+
+class SchoolListingService:
+    @staticmethod
+    def query(db: Session) -> Query:
+        """Summary columns plus rating_count and rating_sum of the overall rollup row; add filters and ordering"""
+        return db.query(*SUMMARY_COLUMNS, SchoolRatingStats.rating_count, SchoolRatingStats.rating_sum).outerjoin(
+            SchoolRatingStats, and_(SchoolRatingStats.school_id == School.id, SchoolRatingStats.category_id.is_(None))
+        )
+
+    def serialize(
+        self,
+        db: Session,
+        rows: List[Any],
+        model: Type[SchoolSummary] = SchoolSummary,
+        extras: Optional[Dict[int, Dict[str, Any]]] = None
+    ) -> List[SchoolSummary]:
+        """
+        Response models for rows of query(), in order, with ratings by category
+        (one more query) and any per-school extra fields (e.g. distance_km).
+        """
+        width = len(SUMMARY_FIELDS)
+        category_ratings = self.category_ratings(db, [row[0] for row in rows])
+        result = []
+        for row in rows:
+            values = dict(zip(SUMMARY_FIELDS, row[:width]))
+            rating_count, rating_sum = row[width], row[width + 1]
+            values["average_rating"] = round(rating_sum / rating_count, 2) if rating_count else None
+            values["total_reviews"] = rating_count or 0
+            values["ratings_by_category"] = category_ratings.get(values["id"], {})
+            if extras:
+                values.update(extras.get(values["id"], {}))
+            result.append(model.model_construct(**values))
+        return result
+
+    def load(
+        self,
+        db: Session,
+        school_ids: Iterable[int],
+        model: Type[SchoolSummary] = SchoolSummary,
+        extras: Optional[Dict[int, Dict[str, Any]]] = None
+    ) -> List[SchoolSummary]:
+        """Summaries of these schools in the order given; unknown ids are skipped"""
+        school_ids = list(school_ids)
+        if not school_ids:
+            return []
+        rows = {row[0]: row for row in self.query(db).filter(School.id.in_(school_ids))}
+        return self.serialize(db, [rows[school_id] for school_id in school_ids if school_id in rows], model, extras)
+
+    @staticmethod
+    def category_ratings(db: Session, school_ids: List[int]) -> Dict[int, Dict[str, float]]:
+        """school_id -> {category name: average} from the rating rollup"""
+        if not school_ids:
+            return {}
+        rows = db.query(SchoolRatingStats.school_id, RatingCategory.name, SchoolRatingStats.rating_count, SchoolRatingStats.rating_sum)\
+                 .join(RatingCategory, RatingCategory.id == SchoolRatingStats.category_id)\
+                 .filter(SchoolRatingStats.school_id.in_(school_ids), RatingCategory.is_active == True).all()
+        ratings: Dict[int, Dict[str, float]] = defaultdict(dict)
+        for row in rows:
+            if row.rating_count:
+                ratings[row.school_id][row.name] = round(row.rating_sum / row.rating_count, 2)
+        return ratings
+
+
+# Service instance
+school_listing_service = SchoolListingService()
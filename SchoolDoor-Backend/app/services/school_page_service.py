@@ -0,0 +1,65 @@
+from typing import Iterable, Optional
+from sqlalchemy.orm import Session, undefer_group
+from app.models import School, DETAIL_COLUMNS
+from app.schemas import SchoolWithRatings, SchoolPage, SchoolPageReviews, SchoolTrends, Review as ReviewSchema
+from app.services.rating_service import RatingService
+from app.services.rating_trend_service import rating_trend_service
+import logging
+
+"""
+The school page bundle: the school with its ratings, the ratings
+breakdown, a page of reviews and the rating trends, read in one session.
+The school is loaded once and stands in for each section's existence
+check and name lookup, and one grouped count of the school's reviews by
+status and rating feeds the rating totals, the distribution and the
+approved review count alike.
+"""
+
+logger = logging.getLogger(__name__)
+
+SECTIONS = ("ratings", "reviews", "trends")
+
+
+class SchoolPageService:
+    def build(
+        self,
+        db: Session,
+        school_id: int,
+        sections: Iterable[str] = SECTIONS,
+        review_limit: int = 20,
+        review_offset: int = 0,
+        period: str = "month",
+        window: Optional[int] = None
+    ) -> Optional[SchoolPage]:
+        """The page of a school with the sections asked for (None if it does not exist)"""
+        school = db.query(School).options(undefer_group(DETAIL_COLUMNS)).filter(School.id == school_id).first()
+        if not school:
+            return None
+        sections = set(sections)
+
+        rating_service = RatingService(db)
+        review_counts = rating_service.get_review_counts(school_id)
+        ratings = rating_service.calculate_school_ratings(school_id, school_name=school.name, review_counts=review_counts)
+
+        detail = SchoolWithRatings.model_validate(school)
+        detail.average_rating = ratings["overall_rating"]
+        detail.total_reviews = ratings["total_reviews"]
+        detail.ratings_by_category = ratings["ratings_by_category"]
+        page = SchoolPage(school=detail)
+
+        if "ratings" in sections:
+            page.ratings = ratings
+        if "reviews" in sections:
+            reviews = rating_service.get_school_reviews(school_id, review_limit, review_offset, status="approved")
+            page.reviews = SchoolPageReviews(
+                total_count=sum(count for (status, _), count in review_counts.items() if status == "approved"),
+                reviews=[ReviewSchema.model_validate(review) for review in reviews]
+            )
+        if "trends" in sections:
+            buckets = rating_trend_service.get_series(db, [school_id], period, window)[school_id]
+            page.trends = SchoolTrends(**rating_service.format_trends(school, buckets, period))
+        return page
+
+
+# Service instance
+school_page_service = SchoolPageService()
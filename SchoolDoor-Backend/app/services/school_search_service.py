@@ -0,0 +1,207 @@
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import and_, case, func, or_
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models import School, SchoolRatingStats
+from app.schemas import AdvancedSearch, FacetCount, SchoolSearchResults
+from app.services.school_listing_service import school_listing_service
+from app.services.school_tag_service import bitmap_count, bitmap_ids, school_tag_service
+import logging
+
+"""
+Advanced school search with facet counts for the filter sidebar.
+Facets come from one GROUP BY over the schools matching the non-facet
+filters (text, enrollment, founding year, facilities, rating range); each
+facet is then counted with every other facet filter applied but not its
+own, so the sidebar keeps offering alternatives. Grouped rows are cached
+briefly per non-facet filter combination.
+"""
+
+logger = logging.getLogger(__name__)
+
+# Facets over school columns; filters on them match the whole value, case-insensitively
+FACET_COLUMNS = {
+    "board": School.board,
+    "medium_of_instruction": School.medium_of_instruction,
+    "school_type": School.school_type,
+    "state": School.state,
+    "city": School.city,
+}
+RATING_FACET = "rating"
+RATING_BUCKETS = ["4-5", "3-4", "2-3", "1-2", "unrated"]
+
+SORT_FIELDS = ("rating", "enrollment", "name", "created_at")
+SORT_ORDERS = ("asc", "desc")
+MAX_LIMIT = 100
+
+# Values listed per facet, most common first
+FACET_LIMIT = 50
+MAX_CACHED_FACETS = 256
+
+# Facility matches up to this size are passed to SQL as an id list,
+# larger ones as EXISTS filters on school_tags
+MAX_ID_FILTER = 2000
+
+
+def _normalize(value: Optional[str]) -> Optional[str]:
+    value = (value or "").strip().lower()
+    return value or None
+
+
+class SchoolSearchService:
+    """Runs AdvancedSearch queries and their facet counts"""
+
+    def __init__(self):
+        self._facets: "OrderedDict[Tuple, Tuple[float, List[Tuple]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._facets.clear()
+
+    @staticmethod
+    def validate(search: AdvancedSearch) -> None:
+        """Raise ValueError for parameters the search cannot honour"""
+        if (search.sort_by or "rating") not in SORT_FIELDS:
+            raise ValueError(f"sort_by must be one of: {', '.join(SORT_FIELDS)}")
+        if (search.sort_order or "desc") not in SORT_ORDERS:
+            raise ValueError(f"sort_order must be one of: {', '.join(SORT_ORDERS)}")
+        if not 1 <= search.limit <= MAX_LIMIT or search.offset < 0:
+            raise ValueError(f"limit must be between 1 and {MAX_LIMIT} and offset non-negative")
+
+    @staticmethod
+    def _facility_filters(db: Session, search: AdvancedSearch) -> List[Any]:
+        all_of, any_of, none_of = search.has_facilities or [], search.any_facilities or [], search.exclude_facilities or []
+        if not (all_of or any_of or none_of):
+            return []
+        # Terms match a facility group ("sports"), a facility ("library") or a program
+        matched = school_tag_service.match(db, all_of, any_of, none_of)
+        if bitmap_count(matched) <= MAX_ID_FILTER:
+            return [School.id.in_(bitmap_ids(matched))]
+        return school_tag_service.sql_filters(all_of, any_of, none_of)
+
+    def _base_filters(self, db: Session, search: AdvancedSearch) -> List[Any]:
+        """Every filter except the faceted columns"""
+        average = SchoolRatingStats.rating_sum / SchoolRatingStats.rating_count
+        filters = [School.is_active == True]
+        if search.query:
+            filters.append(or_(
+                School.name.ilike(f"%{search.query}%"),
+                School.city.ilike(f"%{search.query}%"),
+                School.state.ilike(f"%{search.query}%")
+            ))
+        if search.min_enrollment is not None:
+            filters.append(School.enrollment >= search.min_enrollment)
+        if search.max_enrollment is not None:
+            filters.append(School.enrollment <= search.max_enrollment)
+        if search.established_after is not None:
+            filters.append(School.established_year >= search.established_after)
+        if search.established_before is not None:
+            filters.append(School.established_year <= search.established_before)
+        filters.extend(self._facility_filters(db, search))
+        if search.min_rating is not None:
+            filters.append(average >= search.min_rating)
+        if search.max_rating is not None:
+            filters.append(average <= search.max_rating)
+        return filters
+
+    @staticmethod
+    def _facet_filters(search: AdvancedSearch) -> Dict[str, str]:
+        selected = {field: _normalize(getattr(search, field)) for field in FACET_COLUMNS}
+        return {field: value for field, value in selected.items() if value}
+
+    @staticmethod
+    def _overall_stats_join():
+        return and_(SchoolRatingStats.school_id == School.id, SchoolRatingStats.category_id.is_(None))
+
+    def _grouped(self, db: Session, search: AdvancedSearch) -> List[Tuple]:
+        """(board, medium, school_type, state, city, rating bucket, count) rows for the non-facet filters"""
+        key = tuple(
+            tuple(value) if isinstance(value, list) else value
+            for field, value in search.model_dump().items()
+            if field not in FACET_COLUMNS and field not in ("sort_by", "sort_order", "limit", "offset")
+        )
+        now = time.monotonic()
+        with self._lock:
+            cached = self._facets.get(key)
+            if cached and now - cached[0] < settings.search_facet_cache_seconds:
+                self._facets.move_to_end(key)
+                return cached[1]
+
+        average = SchoolRatingStats.rating_sum / SchoolRatingStats.rating_count
+        bucket = case(
+            (SchoolRatingStats.rating_count.is_(None), "unrated"),
+            (average >= 4, "4-5"),
+            (average >= 3, "3-4"),
+            (average >= 2, "2-3"),
+            else_="1-2"
+        )
+        columns = [func.trim(column) for column in FACET_COLUMNS.values()] + [bucket]
+        rows = [
+            tuple(row) for row in db.query(*columns, func.count(School.id))
+            .outerjoin(SchoolRatingStats, self._overall_stats_join())
+            .filter(*self._base_filters(db, search))
+            .group_by(*columns)
+        ]
+        with self._lock:
+            self._facets[key] = (now, rows)
+            while len(self._facets) > MAX_CACHED_FACETS:
+                self._facets.popitem(last=False)
+        return rows
+
+    def facet_counts(self, db: Session, search: AdvancedSearch) -> Tuple[int, Dict[str, List[FacetCount]]]:
+        """Total matching schools, and counts per facet value with that facet's own filter left out"""
+        selected = self._facet_filters(search)
+        fields = list(FACET_COLUMNS)
+        counts: Dict[str, Dict[str, Dict[str, int]]] = {field: defaultdict(lambda: defaultdict(int)) for field in fields}
+        ratings: Dict[str, int] = defaultdict(int)
+        total = 0
+
+        for row in self._grouped(db, search):
+            values, rating_bucket, count = row[:len(fields)], row[len(fields)], row[-1]
+            normalized = [_normalize(value) for value in values]
+            misses = [field for field, value in zip(fields, normalized) if field in selected and selected[field] != value]
+            if not misses:
+                total += count
+                ratings[rating_bucket] += count
+            if len(misses) > 1:
+                continue
+            for field, value, display in zip(fields, normalized, values):
+                if value and (not misses or misses == [field]):
+                    counts[field][value][display.strip()] += count
+
+        facets = {}
+        for field in fields:
+            merged = [
+                # Spelling variants of one value are merged under the most common spelling
+                FacetCount(value=max(displays, key=displays.get), count=sum(displays.values()))
+                for displays in counts[field].values()
+            ]
+            merged.sort(key=lambda facet: (-facet.count, facet.value))
+            facets[field] = merged[:FACET_LIMIT]
+        facets[RATING_FACET] = [FacetCount(value=label, count=ratings[label]) for label in RATING_BUCKETS if ratings.get(label)]
+        return total, facets
+
+    def search(self, db: Session, search: AdvancedSearch) -> SchoolSearchResults:
+        """One page of results in the requested order, with facet counts"""
+        self.validate(search)
+        query = school_listing_service.query(db).filter(*self._base_filters(db, search))
+        for field, value in self._facet_filters(search).items():
+            query = query.filter(func.lower(func.trim(FACET_COLUMNS[field])) == value)
+
+        sort_column = SchoolRatingStats.score if search.sort_by in (None, "rating") else getattr(School, search.sort_by)
+        descending = (search.sort_order or "desc") == "desc"
+        ordering = sort_column.desc() if descending else sort_column.asc()
+        rows = query.order_by(ordering.nulls_last(), School.id).offset(search.offset).limit(search.limit).all()
+
+        results = school_listing_service.serialize(db, rows)
+
+        total, facets = self.facet_counts(db, search)
+        return SchoolSearchResults(results=results, total=total, limit=search.limit, offset=search.offset, facets=facets)
+
+
+# Service instance
+school_search_service = SchoolSearchService()
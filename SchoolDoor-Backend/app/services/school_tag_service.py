@@ -0,0 +1,252 @@
+import re
+import threading
+import time
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+import numpy as np
+from sqlalchemy import and_, exists, insert, not_, select
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models import School, SchoolTag
+import logging
+
+"""
+Facility and program tags for filtering.
+School.facilities and School.programs are normalized into tags such as
+"facility:swimming", "facility:sports" (the facility group) or
+"program:robotics-club". Tags are stored in school_tags for SQL filters,
+and kept in memory as one bitmap per tag (a Python int with bit n set for
+school n), so AND/OR/NOT filters over the whole catalog are a few big-int
+operations.
+"""
+
+logger = logging.getLogger(__name__)
+
+FACILITY_PREFIX = "facility:"
+PROGRAM_PREFIX = "program:"
+
+REBUILD_BATCH_SIZE = 2000
+
+# Facility vocabulary, grouped like the scraper prompt's facilities field.
+# Items mentioning a keyword are tagged with its label ("Swimming Pool" -> swimming).
+FACILITY_KEYWORDS = {
+    "sports": {
+        "cricket": "Cricket", "football": "Football", "basketball": "Basketball", "swimming": "Swimming",
+        "tennis": "Tennis", "badminton": "Badminton", "athletic": "Athletics", "skating": "Skating",
+        "hockey": "Hockey", "volleyball": "Volleyball", "yoga": "Yoga", "chess": "Chess",
+    },
+    "labs": {
+        "physics lab": "Physics", "chemistry lab": "Chemistry", "biology lab": "Biology",
+        "computer lab": "Computer", "science lab": "Science", "robotics": "Robotics",
+        "language lab": "Language", "tinkering": "Atal Tinkering", "math lab": "Mathematics",
+    },
+    "arts": {"music": "Music", "dance": "Dance", "art room": "Art", "drama": "Drama", "theatre": "Theatre"},
+    "infrastructure": {
+        "library": "Library", "auditorium": "Auditorium", "smart class": "Smart Classrooms",
+        "transport": "Transport", "cafeteria": "Cafeteria", "infirmary": "Infirmary",
+        "playground": "Playground", "hostel": "Hostel", "cctv": "CCTV",
+    },
+}
+
+
+def slugify(text: Any) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", str(text).lower()).strip("-")
+
+
+def facility_tag(text: Any) -> Optional[str]:
+    """Canonical tag for a facility item, e.g. "Swimming Pool" -> "facility:swimming" """
+    lowered = str(text).lower()
+    for keywords in FACILITY_KEYWORDS.values():
+        for keyword, label in keywords.items():
+            if keyword in lowered:
+                return FACILITY_PREFIX + slugify(label)
+    slug = slugify(text)
+    return FACILITY_PREFIX + slug if slug else None
+
+
+def school_tags(facilities: Any, programs: Any) -> Set[str]:
+    """Tags for a school's facilities JSON ({group: [items]}) and programs list"""
+    tags: Set[Optional[str]] = set()
+    if isinstance(facilities, dict):
+        for group, items in facilities.items():
+            if items:
+                tags.add(FACILITY_PREFIX + slugify(group) if slugify(group) else None)
+            for item in items if isinstance(items, list) else [items]:
+                if item:
+                    tags.add(facility_tag(item))
+    elif isinstance(facilities, list):
+        tags.update(facility_tag(item) for item in facilities if item)
+    if isinstance(programs, list):
+        tags.update(PROGRAM_PREFIX + slugify(program) for program in programs if program and slugify(program))
+    tags.discard(None)
+    return tags
+
+
+def resolve_term(term: str) -> List[str]:
+    """Tags a filter term can mean: "facility:library" as given, "robotics" as a facility or a program"""
+    term = term.strip()
+    if term.startswith((FACILITY_PREFIX, PROGRAM_PREFIX)):
+        prefix, _, value = term.partition(":")
+        return [f"{prefix}:{slugify(value)}"]
+    tags = [facility_tag(term), PROGRAM_PREFIX + slugify(term)]
+    return [tag for tag in tags if tag and not tag.endswith(":")]
+
+
+def _bitmap(school_ids: Iterable[int]) -> int:
+    ids = np.fromiter(school_ids, dtype=np.int64)
+    if not ids.size:
+        return 0
+    flags = np.zeros(int(ids.max()) + 1, dtype=bool)
+    flags[ids] = True
+    return int.from_bytes(np.packbits(flags, bitorder="little").tobytes(), "little")
+
+
+def bitmap_ids(bits: int) -> List[int]:
+    """School ids set in a bitmap, ascending"""
+    if not bits:
+        return []
+    raw = np.frombuffer(bits.to_bytes((bits.bit_length() + 7) // 8, "little"), dtype=np.uint8)
+    return np.flatnonzero(np.unpackbits(raw, bitorder="little")).tolist()
+
+
+def bitmap_count(bits: int) -> int:
+    return bin(bits).count("1")
+
+
+class SchoolTagService:
+    """school_tags rows plus the in-memory tag bitmaps built from them"""
+
+    def __init__(self):
+        self._bitmaps: Dict[str, int] = {}
+        self._school_tags: Dict[int, FrozenSet[str]] = {}
+        self._active = 0
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.RLock()
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._loaded_at = None
+
+    def load(self, db: Session) -> None:
+        """(Re)build the bitmaps from school_tags and the schools' active flags"""
+        by_tag: Dict[str, List[int]] = {}
+        by_school: Dict[int, Set[str]] = {}
+        for school_id, tag in db.query(SchoolTag.school_id, SchoolTag.tag):
+            by_tag.setdefault(tag, []).append(school_id)
+            by_school.setdefault(school_id, set()).add(tag)
+        active = _bitmap(school_id for (school_id,) in db.query(School.id).filter(School.is_active == True))
+        with self._lock:
+            self._bitmaps = {tag: _bitmap(ids) for tag, ids in by_tag.items()}
+            self._school_tags = {school_id: frozenset(tags) for school_id, tags in by_school.items()}
+            self._active = active
+            self._loaded_at = time.monotonic()
+        logger.info(f"Loaded tag index: {len(by_tag)} tags over {len(by_school)} schools")
+
+    def _ensure_loaded(self, db: Session) -> None:
+        # Reloaded now and then so writes made by other workers show up
+        if self._loaded_at is None or time.monotonic() - self._loaded_at > settings.tag_index_reload_seconds:
+            self.load(db)
+
+    def refresh_school(self, db: Session, school: School) -> None:
+        """
+        Re-derive one school's tags after its facilities, programs or active
+        flag changed: rewrites its school_tags rows and flips its bits.
+        The school must have an id (flush first). Caller commits.
+        """
+        tags = school_tags(school.facilities, school.programs)
+        db.query(SchoolTag).filter(SchoolTag.school_id == school.id).delete(synchronize_session=False)
+        if tags:
+            db.execute(insert(SchoolTag), [{"school_id": school.id, "tag": tag} for tag in sorted(tags)])
+
+        if self._loaded_at is None:
+            return
+        bit = 1 << school.id
+        with self._lock:
+            previous = self._school_tags.get(school.id, frozenset())
+            for tag in previous - tags:
+                self._bitmaps[tag] = self._bitmaps.get(tag, 0) & ~bit
+            for tag in tags - previous:
+                self._bitmaps[tag] = self._bitmaps.get(tag, 0) | bit
+            self._school_tags[school.id] = frozenset(tags)
+            self._active = self._active | bit if school.is_active else self._active & ~bit
+
+    def rebuild(self, db: Session) -> int:
+        """Re-derive every school's tags from its JSON columns; returns the number of rows written"""
+        db.query(SchoolTag).delete(synchronize_session=False)
+        rows: List[Dict[str, Any]] = []
+        written = 0
+        query = db.query(School.id, School.facilities, School.programs)
+        for school_id, facilities, programs in query.yield_per(REBUILD_BATCH_SIZE):
+            rows.extend({"school_id": school_id, "tag": tag} for tag in sorted(school_tags(facilities, programs)))
+            if len(rows) >= REBUILD_BATCH_SIZE:
+                db.execute(insert(SchoolTag), rows)
+                written += len(rows)
+                rows = []
+        if rows:
+            db.execute(insert(SchoolTag), rows)
+            written += len(rows)
+        db.commit()
+        self.load(db)
+        return written
+
+    def _term_bits(self, term: str) -> int:
+        bits = 0
+        for tag in resolve_term(term):
+            bits |= self._bitmaps.get(tag, 0)
+        return bits
+
+    def match(
+        self,
+        db: Session,
+        all_of: Iterable[str] = (),
+        any_of: Iterable[str] = (),
+        none_of: Iterable[str] = ()
+    ) -> int:
+        """Bitmap of active schools having every all_of term, at least one any_of term and no none_of term"""
+        self._ensure_loaded(db)
+        with self._lock:
+            bits = self._active
+            for term in all_of:
+                bits &= self._term_bits(term)
+            any_of = list(any_of)
+            if any_of:
+                either = 0
+                for term in any_of:
+                    either |= self._term_bits(term)
+                bits &= either
+            for term in none_of:
+                bits &= ~self._term_bits(term)
+        return bits
+
+    def tags_by_school(self, db: Session) -> Dict[int, FrozenSet[str]]:
+        """school_id -> its tags, for every school with any (do not modify)"""
+        self._ensure_loaded(db)
+        with self._lock:
+            return self._school_tags
+
+    def vocabulary(self, db: Session, prefix: Optional[str] = None) -> List[Tuple[str, int]]:
+        """(tag, active schools having it), most common first"""
+        self._ensure_loaded(db)
+        with self._lock:
+            counts = [
+                (tag, bitmap_count(bits & self._active))
+                for tag, bits in self._bitmaps.items()
+                if prefix is None or tag.startswith(prefix)
+            ]
+        return sorted([item for item in counts if item[1]], key=lambda item: (-item[1], item[0]))
+
+    @staticmethod
+    def sql_filters(all_of: Iterable[str] = (), any_of: Iterable[str] = (), none_of: Iterable[str] = ()) -> List[Any]:
+        """The same filter as match() as SQL conditions on School, for queries the bitmaps cannot feed"""
+        def has_any(tags: List[str]):
+            return exists(select(SchoolTag.id).where(and_(SchoolTag.school_id == School.id, SchoolTag.tag.in_(tags))))
+
+        filters = [has_any(resolve_term(term)) for term in all_of]
+        any_tags = [tag for term in any_of for tag in resolve_term(term)]
+        if any_tags:
+            filters.append(has_any(any_tags))
+        filters.extend(not_(has_any(resolve_term(term))) for term in none_of)
+        return filters
+
+
+# Service instance
+school_tag_service = SchoolTagService()
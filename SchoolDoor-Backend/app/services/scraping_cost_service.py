@@ -0,0 +1,220 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import SessionLocal
+from app.models import ScrapingJob
+from app.models_scraping import ScrapingCall
+import logging
+
+"""
+Token and cost accounting for LLM scraping calls.
+Every attempt is recorded against its job so spend can be reported per job,
+per region and per new school, and scraping can stop when a budget runs out.
+Calls are tagged with the job's run, so a retried or replayed job gets a
+fresh budget and is costed against the schools its latest run created.
+"""
+
+logger = logging.getLogger(__name__)
+
+# USD list prices: (per million input tokens, per million output tokens, per request)
+MODEL_PRICING = {
+    "sonar": (1.0, 1.0, 0.005),
+    "sonar-pro": (3.0, 15.0, 0.006),
+}
+DEFAULT_PRICING = MODEL_PRICING["sonar-pro"]
+
+# Calls outside any job or in their job's latest run (with ScrapingJob outer-joined):
+# schools_created restarts with each run, so only this spend is divided by it
+LATEST_RUN = or_(ScrapingCall.job_id.is_(None), ScrapingCall.run == ScrapingJob.run)
+
+
+class ScrapingBudgetExceeded(Exception):
+    """Raised before an API call when the job or daily scraping budget is used up."""
+
+
+def estimate_cost(model: str, usage: Optional[Dict[str, Any]]) -> float:
+    """Cost of one completion, preferring the provider's own figure when reported"""
+    usage = usage or {}
+    reported = usage.get("cost")
+    if isinstance(reported, dict) and reported.get("total_cost") is not None:
+        return float(reported["total_cost"])
+    input_price, output_price, request_price = MODEL_PRICING.get(model, DEFAULT_PRICING)
+    return round(
+        (usage.get("prompt_tokens") or 0) * input_price / 1_000_000
+        + (usage.get("completion_tokens") or 0) * output_price / 1_000_000
+        + request_price,
+        6
+    )
+
+
+class ScrapingCostService:
+    """Records scraping calls and enforces the per-job and per-day budgets"""
+
+    @staticmethod
+    def record_call(
+        model: str,
+        outcome: str,
+        job_id: Optional[int] = None,
+        region: Optional[str] = None,
+        area: Optional[str] = None,
+        purpose: str = "schools",
+        attempt: int = 1,
+        status_code: Optional[int] = None,
+        usage: Optional[Dict[str, Any]] = None,
+        latency_ms: Optional[int] = None
+    ) -> float:
+        """Store one call and return its cost (zero for cache hits and failed attempts)"""
+        usage = usage or {}
+        cost = estimate_cost(model, usage) if outcome == "success" else 0.0
+        db = SessionLocal()
+        try:
+            run = db.query(ScrapingJob.run).filter(ScrapingJob.id == job_id).scalar() if job_id is not None else None
+            db.add(ScrapingCall(
+                job_id=job_id,
+                run=run,
+                region=region.strip().lower() if region else None,
+                area=area,
+                purpose=purpose,
+                model=model,
+                attempt=attempt,
+                outcome=outcome,
+                status_code=status_code,
+                prompt_tokens=usage.get("prompt_tokens") or 0,
+                completion_tokens=usage.get("completion_tokens") or 0,
+                total_tokens=usage.get("total_tokens") or 0,
+                latency_ms=latency_ms,
+                cost_usd=cost
+            ))
+            db.commit()
+        except Exception as e:
+            # Accounting must never fail the scrape itself
+            db.rollback()
+            logger.error(f"Failed to record scraping call for job {job_id}: {e}")
+        finally:
+            db.close()
+        return cost
+
+    @staticmethod
+    def check_budget(job_id: Optional[int] = None) -> None:
+        """Raise ScrapingBudgetExceeded if another paid call would exceed a budget"""
+        if not settings.scraping_max_cost_per_job_usd and not settings.scraping_max_cost_per_day_usd:
+            return
+        db = SessionLocal()
+        try:
+            if job_id is not None and settings.scraping_max_cost_per_job_usd:
+                job_cost = db.query(func.coalesce(func.sum(ScrapingCall.cost_usd), 0.0)).join(
+                    ScrapingJob, and_(ScrapingJob.id == ScrapingCall.job_id, ScrapingJob.run == ScrapingCall.run)
+                ).filter(ScrapingCall.job_id == job_id).scalar()
+                if job_cost >= settings.scraping_max_cost_per_job_usd:
+                    raise ScrapingBudgetExceeded(
+                        f"Job budget of ${settings.scraping_max_cost_per_job_usd:.2f} used (${job_cost:.4f})"
+                    )
+            if settings.scraping_max_cost_per_day_usd:
+                since = datetime.utcnow() - timedelta(days=1)
+                day_cost = db.query(func.coalesce(func.sum(ScrapingCall.cost_usd), 0.0)).filter(
+                    ScrapingCall.created_at >= since
+                ).scalar()
+                if day_cost >= settings.scraping_max_cost_per_day_usd:
+                    raise ScrapingBudgetExceeded(
+                        f"Daily budget of ${settings.scraping_max_cost_per_day_usd:.2f} used (${day_cost:.4f})"
+                    )
+        finally:
+            db.close()
+
+    @staticmethod
+    def get_cost_overview(db: Session, region_limit: int = 20) -> Dict[str, Any]:
+        """Totals, today's spend, and cost per new school overall and per region"""
+        totals = db.query(
+            func.count(ScrapingCall.id),
+            func.coalesce(func.sum(ScrapingCall.cost_usd), 0.0),
+            func.coalesce(func.sum(ScrapingCall.total_tokens), 0)
+        ).one()
+        outcomes = dict(
+            db.query(ScrapingCall.outcome, func.count(ScrapingCall.id)).group_by(ScrapingCall.outcome).all()
+        )
+        since = datetime.utcnow() - timedelta(days=1)
+        day_cost = db.query(func.coalesce(func.sum(ScrapingCall.cost_usd), 0.0)).filter(
+            ScrapingCall.created_at >= since
+        ).scalar()
+        new_schools = db.query(func.coalesce(func.sum(ScrapingJob.schools_created), 0)).scalar()
+        latest_run_cost = db.query(func.coalesce(func.sum(ScrapingCall.cost_usd), 0.0)).outerjoin(
+            ScrapingJob, ScrapingJob.id == ScrapingCall.job_id
+        ).filter(LATEST_RUN).scalar()
+
+        region_costs = db.query(
+            ScrapingCall.region,
+            func.count(ScrapingCall.id).label("calls"),
+            func.sum(ScrapingCall.cost_usd).label("cost"),
+            func.sum(ScrapingCall.total_tokens).label("tokens")
+        ).filter(ScrapingCall.region.isnot(None)).group_by(ScrapingCall.region).order_by(
+            func.sum(ScrapingCall.cost_usd).desc()
+        ).limit(region_limit).all()
+        region_schools = dict(
+            db.query(func.lower(ScrapingJob.region), func.sum(ScrapingJob.schools_created)).filter(
+                func.lower(ScrapingJob.region).in_([row.region for row in region_costs])
+            ).group_by(func.lower(ScrapingJob.region)).all()
+        ) if region_costs else {}
+        region_run_costs = dict(
+            db.query(ScrapingCall.region, func.sum(ScrapingCall.cost_usd)).outerjoin(
+                ScrapingJob, ScrapingJob.id == ScrapingCall.job_id
+            ).filter(LATEST_RUN, ScrapingCall.region.in_([row.region for row in region_costs]))
+            .group_by(ScrapingCall.region).all()
+        ) if region_costs else {}
+
+        by_region: List[Dict[str, Any]] = []
+        for row in region_costs:
+            created = region_schools.get(row.region) or 0
+            by_region.append({
+                "region": row.region,
+                "api_calls": row.calls,
+                "total_tokens": row.tokens or 0,
+                "cost_usd": round(row.cost or 0.0, 4),
+                "new_schools": created,
+                "cost_per_new_school_usd": round((region_run_costs.get(row.region) or 0.0) / created, 4) if created else None,
+            })
+
+        return {
+            "api_calls": totals[0],
+            "calls_by_outcome": outcomes,
+            "total_tokens": totals[2],
+            "total_cost_usd": round(totals[1], 4),
+            "cost_last_24h_usd": round(day_cost, 4),
+            "daily_budget_usd": settings.scraping_max_cost_per_day_usd,
+            "new_schools": new_schools,
+            "cost_per_new_school_usd": round(latest_run_cost / new_schools, 4) if new_schools else None,
+            "by_region": by_region,
+        }
+
+    @staticmethod
+    def get_job_calls(db: Session, job_id: int) -> Dict[str, Any]:
+        calls = db.query(ScrapingCall).filter(ScrapingCall.job_id == job_id).order_by(ScrapingCall.id).all()
+        return {
+            "job_id": job_id,
+            "api_calls": len(calls),
+            "total_tokens": sum(call.total_tokens or 0 for call in calls),
+            "cost_usd": round(sum(call.cost_usd or 0.0 for call in calls), 4),
+            "calls": [
+                {
+                    "id": call.id,
+                    "run": call.run,
+                    "purpose": call.purpose,
+                    "area": call.area,
+                    "model": call.model,
+                    "attempt": call.attempt,
+                    "outcome": call.outcome,
+                    "status_code": call.status_code,
+                    "prompt_tokens": call.prompt_tokens,
+                    "completion_tokens": call.completion_tokens,
+                    "latency_ms": call.latency_ms,
+                    "cost_usd": call.cost_usd,
+                    "created_at": call.created_at,
+                }
+                for call in calls
+            ],
+        }
+
+
+# Service instance
+scraping_cost_service = ScrapingCostService()
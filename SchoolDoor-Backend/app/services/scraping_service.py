@@ -1,10 +1,23 @@
 import httpx
 import json
 import asyncio
-from typing import List, Dict, Any
+import time
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Callable, Awaitable
 from app.config import settings
 from app.models import ScrapingJob, School
 from app.database import SessionLocal
+from app.services.llm_cache_service import LLMResponseCacheService, CacheMissError
+from app.services.region_discovery_service import RegionDiscoveryService
+from app.services.llm_json_parser import extract_json_objects, JSONObjectStream
+from app.services.school_dedupe_service import school_dedupe_service
+from app.services.scraping_cost_service import scraping_cost_service, ScrapingBudgetExceeded
+from app.services.region_lock_service import RegionLease, RegionLockedError
+from app.services.event_bus_service import event_bus, job_topic, JOBS_TOPIC
+from app.services.leaderboard_service import leaderboard_service, school_scopes
+from app.services.school_tag_service import school_tag_service, school_tags
+from app.services.geo_service import geo_service
+from app.services.school_change_service import school_change_service
 from sqlalchemy import func
 import logging
 
@@ -16,6 +29,14 @@ Manages scraping jobs, data extraction, and database updates.
 logger = logging.getLogger(__name__)
 
 
+class PerplexityAPIError(Exception):
+    """Non-200 response from the Perplexity API."""
+
+    def __init__(self, message: str, status_code: int):
+        super().__init__(message)
+        self.status_code = status_code
+
+
 class SchoolScrapingService:
     """
     School scraping service using Perplexity API for web search and data extraction.
@@ -24,22 +45,49 @@ class SchoolScrapingService:
     
     def __init__(self):
         self.http_client = httpx.AsyncClient(timeout=60.0)
+        self.response_cache = LLMResponseCacheService()
         
         if not settings.perplexity_api_key:
             raise ValueError("PERPLEXITY_API_KEY is required for school scraping")
     
-    async def scrape_schools_in_region(self, region: str, job_id: int) -> Dict[str, Any]:
-        """Main method to scrape schools in a given region using modern approaches"""
+    async def scrape_schools_in_region(
+        self,
+        region: str,
+        job_id: int,
+        cache_only: bool = False,
+        incremental: bool = False
+    ) -> Dict[str, Any]:
+        """Main method to scrape schools in a given region using modern approaches.
+        With cache_only, previously cached API responses are re-processed at no API cost.
+        With incremental, the region is paged through by locality until no new schools appear."""
         db = SessionLocal()
+        lease = None
+        progress = self._new_progress(job_id, region)
         try:
             # Update job status
             job = db.query(ScrapingJob).filter(ScrapingJob.id == job_id).first()
             if not job:
                 raise ValueError(f"Scraping job {job_id} not found")
             
+            # Only one worker may scrape a region at a time
+            try:
+                lease = RegionLease(region, job_id)
+                lease.acquire()
+            except RegionLockedError as e:
+                lease = None
+                job.status = "skipped"
+                job.error_message = f"Skipped: {e}"
+                job.completed_at = func.now()
+                db.commit()
+                self._publish_status(progress, "skipped", job.error_message)
+                logger.warning(f"Job {job_id}: {e}")
+                return {"status": "skipped", "error": str(e)}
+            
             job.status = "running"
+            job.heartbeat_at = datetime.utcnow()
             job.error_message = "Starting scraping process..."
             db.commit()
+            self._publish_status(progress, "running", "Starting scraping process...")
             logger.info(f"Starting scraping job {job_id} for region: {region}")
             
             # Step 1: Get existing schools in the region to avoid duplicates
@@ -53,62 +101,66 @@ class SchoolScrapingService:
             # Step 2: Search for schools using Perplexity API
             job.error_message = f"Searching for schools in {region} using Perplexity API..."
             db.commit()
+            self._publish_status(progress, "running", job.error_message)
             logger.info(f"Job {job_id}: Contacting Perplexity API for region: {region}")
             
-            schools_data = await self._scrape_with_perplexity(region, existing_school_names)
+            streamed_keys = set()
+            
+            async def ingest_streamed_school(school_data: Dict[str, Any]) -> None:
+                # Upsert each school as soon as its object completes in the stream
+                lease.renew()
+                streamed_keys.add(self._school_key(school_data))
+                progress["found"] = len(streamed_keys)
+                self._process_school(db, job, school_data, progress, f"{len(streamed_keys)} (streamed)")
+            
+            def discovery_heartbeat() -> None:
+                # Discovery can run for many API calls before any school is processed
+                lease.renew()
+                job.heartbeat_at = datetime.utcnow()
+                db.commit()
+            
+            discovery_stats = None
+            if incremental:
+                known_pincodes = sorted({school.zip_code for school in existing_schools if school.zip_code})
+                schools_data, discovery_stats = await RegionDiscoveryService(self).discover(
+                    region, existing_school_names, known_pincodes, cache_only=cache_only, job_id=job_id,
+                    on_progress=discovery_heartbeat
+                )
+            else:
+                schools_data = await self._scrape_with_perplexity(
+                    region,
+                    existing_school_names,
+                    cache_only=cache_only,
+                    on_school=ingest_streamed_school if settings.perplexity_streaming else None,
+                    job_id=job_id
+                )
             
             if not schools_data:
                 job.status = "failed"
                 job.error_message = f"No schools found in {region}. Please try a different region or check the spelling."
                 db.commit()
+                self._publish_status(progress, "failed", job.error_message)
                 logger.warning(f"Job {job_id}: No schools found for region: {region}")
                 return {"status": "failed", "error": "No schools found"}
             
+            progress["found"] = len(schools_data)
             job.schools_found = len(schools_data)
             job.error_message = f"Found {len(schools_data)} schools. Processing data..."
             db.commit()
+            self._publish_status(progress, "running", job.error_message)
             logger.info(f"Job {job_id}: Found {len(schools_data)} schools from Perplexity API")
             
-            schools_processed = 0
-            schools_created = 0
-            schools_updated = 0
-            errors = []
+            # Anything not already ingested while streaming (e.g. served from cache)
+            pending = [school for school in schools_data if self._school_key(school) not in streamed_keys]
+            for i, school_data in enumerate(pending, 1):
+                lease.renew()
+                self._process_school(db, job, school_data, progress, f"{i}/{len(pending)}")
+            self._write_checkpoint(job, progress)
             
-            for i, school_data in enumerate(schools_data, 1):
-                try:
-                    school_name = school_data.get('name', 'Unknown')
-                    # Update progress
-                    job.error_message = f"Processing school {i}/{len(schools_data)}: {school_name}"
-                    db.commit()
-                    logger.info(f"Job {job_id}: Processing school {i}/{len(schools_data)}: {school_name}")
-                    
-                    # Check if school already exists
-                    existing_school = db.query(School).filter(
-                        School.name == school_data.get('name'),
-                        School.city == school_data.get('city')
-                    ).first()
-                    
-                    if not existing_school:
-                        # Create new school
-                        school = School(**school_data)
-                        db.add(school)
-                        schools_created += 1
-                        logger.info(f"Job {job_id}: Created new school: {school_name}")
-                    else:
-                        # Update existing school with new data
-                        self._update_school_data(existing_school, school_data)
-                        schools_updated += 1
-                        logger.info(f"Job {job_id}: Updated existing school: {school_name}")
-                    
-                    schools_processed += 1
-                    job.schools_processed = schools_processed
-                    db.commit()
-                    
-                except Exception as e:
-                    error_msg = f"Error processing school {school_data.get('name', 'Unknown')}: {str(e)}"
-                    logger.error(f"Job {job_id}: {error_msg}")
-                    errors.append(error_msg)
-                    continue
+            schools_processed = progress["processed"]
+            schools_created = progress["created"]
+            schools_updated = progress["updated"]
+            errors = progress["errors"]
             
             # Final status update
             if errors:
@@ -118,9 +170,17 @@ class SchoolScrapingService:
                 job.error_message = f"Successfully completed! Created: {schools_created}, Updated: {schools_updated}"
                 logger.info(f"Job {job_id}: Successfully completed without errors")
             
+            if discovery_stats:
+                job.error_message += (
+                    f" ({discovery_stats['api_calls']} API calls, "
+                    f"{discovery_stats['new_schools_per_call']} new schools per call"
+                    f"{', stopped at budget' if discovery_stats['budget_exhausted'] else ''})"
+                )
+            
             job.status = "completed"
             job.completed_at = func.now()
             db.commit()
+            self._publish_status(progress, "completed", job.error_message)
             
             logger.info(f"Job {job_id} FINAL RESULTS: {schools_created} created, {schools_updated} updated, {len(errors)} errors")
             
@@ -131,23 +191,162 @@ class SchoolScrapingService:
                 "schools_created": schools_created,
                 "schools_updated": schools_updated,
                 "errors": len(errors),
-                "error_details": errors[:5] if errors else []  # Show first 5 errors
+                "error_details": errors[:5] if errors else [],  # Show first 5 errors
+                "discovery": discovery_stats
             }
             
         except Exception as e:
             logger.error(f"Job {job_id}: CRITICAL ERROR: {str(e)}")
+            db.rollback()
+            self._write_checkpoint(job, progress)
             job.status = "failed"
             job.error_message = f"Scraping failed: {str(e)}"
             db.commit()
+            self._publish_status(progress, "failed", job.error_message)
             return {"status": "failed", "error": str(e)}
         finally:
+            if lease:
+                lease.release()
             db.close()
     
-    async def _scrape_with_perplexity(self, region: str, existing_school_names: List[str] = None, max_retries: int = 3) -> List[Dict[str, Any]]:
-        """Use Perplexity API to find and extract school data with retry logic"""
+    @staticmethod
+    def _school_key(school_data: Dict[str, Any]) -> tuple:
+        """Identity used to avoid ingesting the same scraped school twice in one job"""
+        return (school_data.get('name'), school_data.get('city'))
+    
+    def _process_school(
+        self,
+        db,
+        job: ScrapingJob,
+        school_data: Dict[str, Any],
+        progress: Dict[str, Any],
+        position: str
+    ) -> None:
+        """Create or update one scraped school and record the outcome in progress.
+        Progress goes to live subscribers for every school but is only written
+        to the job row at checkpoints."""
+        job_id = progress["job_id"]
+        try:
+            school_name = school_data.get('name', 'Unknown')
+            logger.info(f"Job {job_id}: Processing school {position}: {school_name}")
+            
+            # Check if school already exists (exact name/city, then fuzzy match)
+            existing_school = school_dedupe_service.find_duplicate(db, school_data)
+            
+            if not existing_school:
+                # Create new school
+                school = School(**school_data)
+                school.last_scraped_at = func.now()
+                geo_service.locate(school)
+                db.add(school)
+                db.flush()
+                school_tag_service.refresh_school(db, school)
+                geo_service.update_school(school)
+                school_change_service.record(db, [school.id])
+                progress["created"] += 1
+                logger.info(f"Job {job_id}: Created new school: {school_name}")
+            else:
+                # Update existing school with new data
+                school = existing_school
+                scopes = school_scopes(existing_school)
+                tags = school_tags(existing_school.facilities, existing_school.programs)
+                updated_fields = self._update_school_data(existing_school, school_data)
+                if school_scopes(existing_school) != scopes:
+                    leaderboard_service.update_school(db, existing_school.id)
+                if school_tags(existing_school.facilities, existing_school.programs) != tags:
+                    school_tag_service.refresh_school(db, existing_school)
+                if existing_school.latitude is None and geo_service.locate(existing_school):
+                    geo_service.update_school(existing_school)
+                    updated_fields.append("location")
+                if updated_fields:
+                    school_change_service.record(db, [existing_school.id])
+                progress["updated"] += 1
+                logger.info(f"Job {job_id}: Updated existing school: {school_name} (matched '{existing_school.name}')")
+            
+            progress["processed"] += 1
+            if self._checkpoint_due(progress):
+                # Rides along with this school's commit
+                self._write_checkpoint(job, progress)
+            db.commit()
+            school_dedupe_service.register(school)
+            
+        except Exception as e:
+            db.rollback()
+            error_msg = f"Error processing school {school_data.get('name', 'Unknown')}: {str(e)}"
+            logger.error(f"Job {job_id}: {error_msg}")
+            progress["errors"].append(error_msg)
+        
+        self._publish_progress(progress, f"Processing school {position}: {school_data.get('name', 'Unknown')}")
+    
+    @staticmethod
+    def _new_progress(job_id: int, region: str) -> Dict[str, Any]:
+        return {
+            "job_id": job_id, "region": region, "status": "pending", "found": 0,
+            "processed": 0, "created": 0, "updated": 0, "errors": [],
+            "checkpoint_processed": 0, "checkpoint_at": time.monotonic(),
+        }
+    
+    @staticmethod
+    def _checkpoint_due(progress: Dict[str, Any]) -> bool:
+        return (
+            progress["processed"] - progress["checkpoint_processed"] >= settings.scraping_checkpoint_every_schools
+            or time.monotonic() - progress["checkpoint_at"] >= settings.scraping_checkpoint_seconds
+        )
+    
+    @staticmethod
+    def _write_checkpoint(job: ScrapingJob, progress: Dict[str, Any]) -> None:
+        """Copy progress onto the job row; the caller commits"""
+        if progress["found"]:
+            job.schools_found = progress["found"]
+        job.schools_processed = progress["processed"]
+        job.schools_created = progress["created"]
+        job.error_message = f"Processed {progress['processed']} of {progress['found']} schools..."
+        job.heartbeat_at = datetime.utcnow()
+        progress["checkpoint_processed"] = progress["processed"]
+        progress["checkpoint_at"] = time.monotonic()
+    
+    @staticmethod
+    def _progress_event(progress: Dict[str, Any], message: str) -> Dict[str, Any]:
+        return {
+            "job_id": progress["job_id"],
+            "region": progress["region"],
+            "status": progress["status"],
+            "schools_found": progress["found"],
+            "schools_processed": progress["processed"],
+            "schools_created": progress["created"],
+            "schools_updated": progress["updated"],
+            "errors": len(progress["errors"]),
+            "message": message,
+        }
+    
+    def _publish_progress(self, progress: Dict[str, Any], message: str) -> None:
+        event_bus.publish([job_topic(progress["job_id"]), JOBS_TOPIC], "progress", self._progress_event(progress, message), retain=True)
+    
+    def _publish_status(self, progress: Dict[str, Any], status: str, message: str) -> None:
+        progress["status"] = status
+        event_bus.publish([job_topic(progress["job_id"]), JOBS_TOPIC], "status", self._progress_event(progress, message), retain=True)
+    
+    async def _scrape_with_perplexity(
+        self,
+        region: str,
+        existing_school_names: List[str] = None,
+        max_retries: int = 3,
+        cache_only: bool = False,
+        area: Optional[str] = None,
+        on_school: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None,
+        job_id: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Use Perplexity API to find and extract school data with retry logic.
+        Identical requests are served from the response cache; with cache_only
+        the API is never called and stored responses are re-parsed instead.
+        If area is given, the search is narrowed to that locality or pincode of the region.
+        If on_school is given, the completion is streamed and each cleaned school is
+        passed to it as soon as its JSON object is complete.
+        Every attempt is recorded against job_id for cost accounting."""
+        location = f"{area}, {region}" if area else region
         for attempt in range(max_retries):
             try:
-                logger.info(f"Perplexity API: Starting search for schools in {region} (attempt {attempt + 1}/{max_retries})")
+                logger.info(f"Perplexity API: Starting search for schools in {location} (attempt {attempt + 1}/{max_retries})")
                 # Perplexity is excellent for this - it can search and extract data in one call
                 # Build the prompt with existing schools exclusion
                 existing_schools_text = ""
@@ -159,7 +358,7 @@ class SchoolScrapingService:
             """
                 
                 prompt = f"""
-            Find schools specifically located in {region}, India. IMPORTANT: Only include schools that are actually located in {region} city/area, not other cities.
+            Find schools specifically located in {location}, India. IMPORTANT: Only include schools that are actually located in {location}, not other cities or areas.
             {existing_schools_text}
             
             For each school, provide:
@@ -208,10 +407,7 @@ class SchoolScrapingService:
             ]
             """
                 
-                headers = {
-                    "Authorization": f"Bearer {settings.perplexity_api_key}",
-                    "Content-Type": "application/json"
-                }
+                headers = self._request_headers()
                 
                 data = {
                     "model": "sonar-pro",
@@ -230,51 +426,41 @@ class SchoolScrapingService:
                 }
                 
                 logger.info(f"Perplexity API: Sending request for {region}")
-                response = await self.http_client.post(
-                    "https://api.perplexity.ai/chat/completions",
-                    headers=headers,
-                    json=data
+                if on_school:
+                    fetcher = lambda: self._stream_completion(headers, data, region, on_school)
+                else:
+                    fetcher = lambda: self._post_completion(headers, data, region)
+                result = await self._fetch_completion(
+                    data,
+                    fetcher,
+                    region=region,
+                    cache_only=cache_only,
+                    job_id=job_id,
+                    area=area,
+                    attempt=attempt + 1
                 )
+                content = result['choices'][0]['message']['content'].strip()
                 
-                logger.info(f"Perplexity API: Received response with status {response.status_code}")
+                # Log the first 200 characters for debugging
+                logger.info(f"Perplexity API response preview for {region}: {content[:200]}...")
                 
-                if response.status_code == 200:
-                    result = response.json()
-                    content = result['choices'][0]['message']['content'].strip()
-                    
-                    # Log the first 200 characters for debugging
-                    logger.info(f"Perplexity API response preview for {region}: {content[:200]}...")
-                    
-                    # Try direct JSON parsing first
-                    try:
-                        schools_data = json.loads(content)
-                        if isinstance(schools_data, list) and len(schools_data) > 0:
-                            logger.info(f"Perplexity API: Successfully parsed {len(schools_data)} schools directly for {region}")
-                            return self._clean_schools_data(schools_data, region)
-                    except json.JSONDecodeError:
-                        pass
-                    
-                    # If direct parsing fails, try the robust extraction
-                    schools_data = self._extract_json_from_content(content, region)
-                    if schools_data:
-                        logger.info(f"Perplexity API: Successfully extracted {len(schools_data)} schools for {region}")
+                # Try direct JSON parsing first
+                try:
+                    schools_data = json.loads(content)
+                    if isinstance(schools_data, list) and len(schools_data) > 0:
+                        logger.info(f"Perplexity API: Successfully parsed {len(schools_data)} schools directly for {region}")
                         return self._clean_schools_data(schools_data, region)
-                    else:
-                        logger.warning(f"Perplexity API: Could not extract valid JSON from response for {region}")
-                        return []
-                elif response.status_code == 401:
-                    logger.error(f"Perplexity API: Invalid API key for {region}")
-                    raise Exception("Invalid Perplexity API key. Please check your API key in the environment configuration.")
-                elif response.status_code == 429:
-                    logger.error(f"Perplexity API: Rate limit exceeded for {region}")
-                    raise Exception("Perplexity API rate limit exceeded. Please try again later.")
-                elif response.status_code == 400:
-                    error_detail = response.json().get('error', {}).get('message', 'Bad request')
-                    logger.error(f"Perplexity API: Bad request for {region}: {error_detail}")
-                    raise Exception(f"Perplexity API error: {error_detail}")
+                except json.JSONDecodeError:
+                    pass
+                
+                # If direct parsing fails, try the robust extraction
+                schools_data = self._extract_json_from_content(content, region)
+                if schools_data:
+                    logger.info(f"Perplexity API: Successfully extracted {len(schools_data)} schools for {region}")
+                    return self._clean_schools_data(schools_data, region)
                 else:
-                    logger.error(f"Perplexity API: HTTP {response.status_code} for {region}")
-                    raise Exception(f"Perplexity API error: HTTP {response.status_code}")
+                    logger.warning(f"Perplexity API: Could not extract valid JSON from response for {region}")
+                    return []
                     
             except httpx.TimeoutException:
                 logger.warning(f"Perplexity API: Request timed out for {region} (attempt {attempt + 1}/{max_retries})")
@@ -288,6 +474,12 @@ class SchoolScrapingService:
                     raise Exception("Could not connect to Perplexity API. Please check your internet connection.")
                 await asyncio.sleep(2 ** attempt)  # Exponential backoff
                 continue
+            except CacheMissError:
+                logger.warning(f"Perplexity API: No cached response to replay for {region}")
+                raise
+            except ScrapingBudgetExceeded as e:
+                logger.warning(f"Perplexity API: Not calling for {location}: {e}")
+                raise
             except json.JSONDecodeError as e:
                 logger.error(f"Perplexity API: JSON decode error for {region}: {str(e)}")
                 raise Exception(f"Failed to parse Perplexity API response: {str(e)}")
@@ -298,73 +490,208 @@ class SchoolScrapingService:
         # If we get here, all retries failed
         raise Exception("Perplexity API failed after all retry attempts")
     
+    async def extract_details_from_markdown(self, school: School, markdown: str) -> Dict[str, Any]:
+        """Ask the LLM for details missing from a school's condensed website text"""
+        prompt = f"""
+            The text below is taken from the website of {school.name}, {school.city or ''}.
+            Using ONLY this text, return a JSON object with these keys (null if not stated):
+            "principal_name", "phone", "email", "facilities" (object of lists: sports, labs, arts, infrastructure).
+            
+            {markdown}
+            """
+        data = {
+            "model": "sonar",
+            "messages": [
+                {
+                    "role": "system",
+                    "content": "You extract school information from website text. Always return valid JSON."
+                },
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ],
+            "max_tokens": 800,
+            "temperature": 0.1
+        }
+        headers = self._request_headers()
+        result = await self._fetch_completion(
+            data,
+            lambda: self._post_completion(headers, data, school.city or school.name),
+            region=school.city,
+            purpose="website_details"
+        )
+        objects = extract_json_objects(result['choices'][0]['message']['content'])
+        return objects[0] if objects else {}
+    
+    async def _fetch_completion(
+        self,
+        data: Dict[str, Any],
+        fetcher: Callable[[], Awaitable[Dict[str, Any]]],
+        region: Optional[str] = None,
+        cache_only: bool = False,
+        job_id: Optional[int] = None,
+        area: Optional[str] = None,
+        purpose: str = "schools",
+        attempt: int = 1
+    ) -> Dict[str, Any]:
+        """Fetch a completion through the response cache, recording the call against
+        its job. Raises ScrapingBudgetExceeded instead of calling the API once the
+        job or daily budget is used up."""
+        api_called = False
+        call = {"model": data["model"], "job_id": job_id, "region": region, "area": area,
+                "purpose": purpose, "attempt": attempt}
+        
+        async def metered_fetch() -> Dict[str, Any]:
+            nonlocal api_called
+            scraping_cost_service.check_budget(job_id)
+            api_called = True
+            started = time.perf_counter()
+            try:
+                result = await fetcher()
+            except Exception as e:
+                if isinstance(e, httpx.TimeoutException):
+                    outcome = "timeout"
+                elif isinstance(e, httpx.ConnectError):
+                    outcome = "connect_error"
+                elif isinstance(e, PerplexityAPIError):
+                    outcome = f"http_{e.status_code}"
+                else:
+                    outcome = "error"
+                scraping_cost_service.record_call(
+                    outcome=outcome,
+                    status_code=getattr(e, "status_code", None),
+                    latency_ms=int((time.perf_counter() - started) * 1000),
+                    **call
+                )
+                raise
+            cost = scraping_cost_service.record_call(
+                outcome="success",
+                status_code=200,
+                usage=result.get("usage"),
+                latency_ms=int((time.perf_counter() - started) * 1000),
+                **call
+            )
+            logger.info(f"Perplexity API: {purpose} call for {area or region} used "
+                        f"{(result.get('usage') or {}).get('total_tokens', 0)} tokens (${cost:.4f})")
+            return result
+        
+        # Only school listings are tagged with their region, so region replay never picks up other prompts
+        result = await self.response_cache.fetch(
+            data,
+            metered_fetch,
+            region=region if purpose == "schools" else None,
+            cache_only=cache_only
+        )
+        if not api_called:
+            scraping_cost_service.record_call(outcome="cache_hit", **call)
+        return result
+    
+    def _request_headers(self) -> Dict[str, str]:
+        """Headers for Perplexity API requests"""
+        return {
+            "Authorization": f"Bearer {settings.perplexity_api_key}",
+            "Content-Type": "application/json"
+        }
+    
+    async def _post_completion(self, headers: Dict[str, str], data: Dict[str, Any], region: str) -> Dict[str, Any]:
+        """Send one chat completion request and return the decoded response body"""
+        response = await self.http_client.post(
+            settings.perplexity_api_url,
+            headers=headers,
+            json=data
+        )
+        
+        logger.info(f"Perplexity API: Received response with status {response.status_code}")
+        self._raise_for_status(response, region)
+        return response.json()
+    
+    async def _stream_completion(
+        self,
+        headers: Dict[str, str],
+        data: Dict[str, Any],
+        region: str,
+        on_school: Callable[[Dict[str, Any]], Awaitable[None]]
+    ) -> Dict[str, Any]:
+        """Stream one chat completion over SSE, handing each cleaned school to on_school
+        as soon as it is complete. Returns the assembled completion for caching."""
+        parser = JSONObjectStream()
+        content_parts = []
+        last_chunk: Dict[str, Any] = {}
+        usage = None
+        finish_reason = None
+        
+        async with self.http_client.stream(
+            "POST",
+            settings.perplexity_api_url,
+            headers=headers,
+            json={**data, "stream": True}
+        ) as response:
+            logger.info(f"Perplexity API: Streaming response with status {response.status_code}")
+            if response.status_code != 200:
+                await response.aread()
+                self._raise_for_status(response, region)
+            
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                payload = line[len("data:"):].strip()
+                if payload == "[DONE]":
+                    break
+                if not payload:
+                    continue
+                
+                chunk = json.loads(payload)
+                last_chunk = chunk
+                usage = chunk.get("usage") or usage
+                choice = (chunk.get("choices") or [{}])[0]
+                finish_reason = choice.get("finish_reason") or finish_reason
+                delta = (choice.get("delta") or {}).get("content")
+                if not delta:
+                    continue
+                
+                content_parts.append(delta)
+                for school_object in parser.feed(delta):
+                    for school in self._clean_schools_data([school_object], region):
+                        await on_school(school)
+        
+        return {
+            "id": last_chunk.get("id"),
+            "model": last_chunk.get("model", data.get("model")),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": "".join(content_parts)},
+                "finish_reason": finish_reason
+            }],
+            "usage": usage
+        }
+    
+    def _raise_for_status(self, response: httpx.Response, region: str) -> None:
+        """Raise a descriptive error for any non-200 Perplexity response"""
+        if response.status_code == 200:
+            return
+        elif response.status_code == 401:
+            logger.error(f"Perplexity API: Invalid API key for {region}")
+            raise PerplexityAPIError("Invalid Perplexity API key. Please check your API key in the environment configuration.", 401)
+        elif response.status_code == 429:
+            logger.error(f"Perplexity API: Rate limit exceeded for {region}")
+            raise PerplexityAPIError("Perplexity API rate limit exceeded. Please try again later.", 429)
+        elif response.status_code == 400:
+            error_detail = response.json().get('error', {}).get('message', 'Bad request')
+            logger.error(f"Perplexity API: Bad request for {region}: {error_detail}")
+            raise PerplexityAPIError(f"Perplexity API error: {error_detail}", 400)
+        else:
+            logger.error(f"Perplexity API: HTTP {response.status_code} for {region}")
+            raise PerplexityAPIError(f"Perplexity API error: HTTP {response.status_code}", response.status_code)
+    
     def _extract_json_from_content(self, content: str, region: str) -> List[Dict[str, Any]]:
-        """Extract JSON array from Perplexity response content with robust parsing"""
+        """Extract school objects from Perplexity response content in a single linear pass.
+        Complete objects are salvaged from prose, code fences and truncated output."""
         try:
-            # Clean the content first
-            content = content.strip()
-            
-            # Method 1: Try to find JSON array boundaries
-            json_start = content.find('[')
-            json_end = content.rfind(']') + 1
-            
-            if json_start != -1 and json_end != -1:
-                json_str = content[json_start:json_end]
-                try:
-                    schools_data = json.loads(json_str)
-                    if isinstance(schools_data, list) and len(schools_data) > 0:
-                        logger.info(f"Method 1: Found {len(schools_data)} schools using array boundaries")
-                        return schools_data
-                except json.JSONDecodeError:
-                    pass
-            
-            # Method 2: Try to find the largest valid JSON array
-            import re
-            # Look for JSON arrays that start with [ and end with ]
-            json_pattern = r'\[(?:[^\[\]]*|\[[^\[\]]*\])*\]'
-            matches = re.findall(json_pattern, content, re.DOTALL)
-            
-            for match in matches:
-                try:
-                    schools_data = json.loads(match)
-                    if isinstance(schools_data, list) and len(schools_data) > 0:
-                        logger.info(f"Method 2: Found {len(schools_data)} schools using regex pattern")
-                        return schools_data
-                except json.JSONDecodeError:
-                    continue
-            
-            # Method 3: Try to extract individual JSON objects and build array
-            json_objects = re.findall(r'\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}', content, re.DOTALL)
-            if json_objects:
-                schools_data = []
-                for obj_str in json_objects:
-                    try:
-                        obj = json.loads(obj_str)
-                        if isinstance(obj, dict) and obj.get('name'):
-                            schools_data.append(obj)
-                    except json.JSONDecodeError:
-                        continue
-                if schools_data:
-                    logger.info(f"Method 3: Found {len(schools_data)} schools using individual objects")
-                    return schools_data
-            
-            # Method 4: Try to find JSON after common prefixes
-            prefixes = ['Here are the schools:', 'Schools in', 'The schools are:', 'JSON:', '```json', '```']
-            for prefix in prefixes:
-                if prefix.lower() in content.lower():
-                    start_idx = content.lower().find(prefix.lower()) + len(prefix)
-                    remaining = content[start_idx:].strip()
-                    if remaining.startswith('['):
-                        json_end = remaining.find(']') + 1
-                        if json_end > 0:
-                            json_str = remaining[:json_end]
-                            try:
-                                schools_data = json.loads(json_str)
-                                if isinstance(schools_data, list) and len(schools_data) > 0:
-                                    logger.info(f"Method 4: Found {len(schools_data)} schools after prefix '{prefix}'")
-                                    return schools_data
-                            except json.JSONDecodeError:
-                                continue
+            schools_data = [obj for obj in extract_json_objects(content) if obj.get('name')]
+            if schools_data:
+                logger.info(f"Extracted {len(schools_data)} schools from response for {region}")
+                return schools_data
             
             logger.warning(f"Could not extract valid JSON from Perplexity response for {region}")
             logger.info(f"Content length: {len(content)} characters")
@@ -403,6 +730,9 @@ class SchoolScrapingService:
             
             for field in string_fields:
                 value = school.get(field)
+                if field == 'zip_code' and not value:
+                    # The prompt asks for "pincode"
+                    value = school.get('pincode')
                 if value and isinstance(value, str):
                     cleaned[field] = value.strip()
                 else:
@@ -455,8 +785,8 @@ class SchoolScrapingService:
         
         return cleaned_schools
     
-    def _update_school_data(self, existing_school: School, new_data: Dict[str, Any]) -> None:
-        """Smart update of existing school data - only updates non-null values"""
+    def _update_school_data(self, existing_school: School, new_data: Dict[str, Any]) -> List[str]:
+        """Smart update of existing school data - only updates non-null values; returns the fields changed"""
         updated_fields = []
         
         # Update basic information
@@ -486,8 +816,9 @@ class SchoolScrapingService:
                 if isinstance(new_value, dict) and isinstance(existing_value, dict):
                     # Merge dictionaries
                     merged = {**existing_value, **new_value}
-                    setattr(existing_school, field, merged)
-                    updated_fields.append(field)
+                    if merged != existing_value:
+                        setattr(existing_school, field, merged)
+                        updated_fields.append(field)
                 elif new_value != existing_value:
                     # Replace completely
                     setattr(existing_school, field, new_value)
@@ -508,6 +839,7 @@ class SchoolScrapingService:
             logger.info(f"Updated school {existing_school.name}: {', '.join(updated_fields)}")
         else:
             logger.info(f"No updates needed for school {existing_school.name}")
+        return updated_fields
 
 
 # Service instance
@@ -0,0 +1,306 @@
+import functools
+import math
+import re
+import threading
+import time
+from collections import Counter
+from datetime import timedelta
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models import School, SchoolRatingStats
+from app.services.school_tag_service import school_tag_service
+import logging
+
+"""
+"Schools like this one" recommendations.
+Every school is encoded as a feature vector (board, type and medium
+one-hots, grades offered, enrollment and student-teacher ratio, facility
+and program tags, rating averages per category, location) in one NumPy
+matrix with unit-length rows, so the most similar schools are the largest
+entries of a single matrix-vector product. Tags are read from the in-memory
+tag index. The encoding (vocabularies and scales) is fitted on a full
+build; schools changed since then are re-encoded in place by
+updated_at/created_at, and rating changes through mark_changed.
+"""
+
+logger = logging.getLogger(__name__)
+
+ONE_HOT_COLUMNS = ("board", "school_type", "medium_of_instruction")
+MAX_CATEGORIES = 16  # Most common values per one-hot column; rarer ones encode as zeros
+MAX_TAGS = 64  # Most common facility/program tags
+
+# Grades as numbers: nursery/pre-K -2, LKG -1, UKG/KG 0, then classes 1-12
+LOWEST_GRADE, HIGHEST_GRADE = -2, 12
+GRADE_WORDS = {"nursery": -2, "prek": -2, "preprimary": -2, "playgroup": -2, "lkg": -1, "ukg": 0, "kg": 0, "k": 0}
+
+# Relative weight of each feature block in the similarity
+WEIGHTS = {
+    "board": 1.0,
+    "school_type": 0.5,
+    "medium_of_instruction": 0.8,
+    "grades": 0.8,
+    "size": 0.6,
+    "tags": 1.0,
+    "ratings": 0.8,
+    "location": 1.0,
+}
+
+# Location is encoded as closeness to the most common one-degree cells, so nearby schools share a profile
+MAX_ANCHORS = 32
+LOCATION_SIGMA_DEGREES = 0.5  # About 55 km
+
+# Standardized numbers are clipped so one outlier cannot dominate a vector
+Z_CLIP = 3.0
+
+# Changes are re-read this far behind the last refresh, for transactions that committed late
+DELTA_OVERLAP = timedelta(seconds=5)
+
+SCHOOL_COLUMNS = (
+    School.id, School.is_active, School.board, School.school_type, School.medium_of_instruction, School.grade_levels,
+    School.enrollment, School.student_teacher_ratio, School.latitude, School.longitude
+)
+
+
+def _normalize(value: Optional[str]) -> Optional[str]:
+    value = (value or "").strip().lower()
+    return value or None
+
+
+@functools.lru_cache(maxsize=4096)
+def grade_range(grade_levels: Optional[str]) -> Optional[Tuple[int, int]]:
+    """Lowest and highest grade in text like "Nursery to 10" or "LKG - 12th"; None if unreadable"""
+    grades = []
+    for token in re.findall(r"[a-z]+|\d+", re.sub(r"pre[\s-]*(k|primary)", r"pre\1", (grade_levels or "").lower())):
+        if token.isdigit():
+            if 1 <= int(token) <= HIGHEST_GRADE:
+                grades.append(int(token))
+        elif token in GRADE_WORDS:
+            grades.append(GRADE_WORDS[token])
+    return (min(grades), max(grades)) if grades else None
+
+
+def _standardize(values: np.ndarray) -> Tuple[float, float]:
+    present = values[~np.isnan(values)]
+    if present.size < 2:
+        return 0.0, 1.0
+    return float(present.mean()), float(present.std()) or 1.0
+
+
+class _Encoder:
+    """Maps schools to feature vectors; fitted once per full build"""
+
+    def __init__(self, rows: List[Any], tags: Dict[int, FrozenSet[str]], category_ids: List[int]):
+        self.vocabularies = {}
+        for position, name in enumerate(ONE_HOT_COLUMNS, start=2):
+            counts = Counter(_normalize(row[position]) for row in rows)
+            counts.pop(None, None)
+            self.vocabularies[name] = {value: index for index, (value, _) in enumerate(counts.most_common(MAX_CATEGORIES))}
+        tag_counts = Counter(tag for school_tags in tags.values() for tag in school_tags)
+        self.tags = {tag: index for index, (tag, _) in enumerate(tag_counts.most_common(MAX_TAGS))}
+        self.category_ids = [None] + sorted(category_ids)
+        self.enrollment_scale = _standardize(np.array([math.log1p(row.enrollment) if row.enrollment and row.enrollment > 0 else np.nan for row in rows]))
+        self.ratio_scale = _standardize(np.array([row.student_teacher_ratio or np.nan for row in rows], dtype=np.float64))
+        cells = Counter((round(row.latitude), round(row.longitude)) for row in rows if row.latitude is not None and row.longitude is not None)
+        self.anchors = np.array([cell for cell, _ in cells.most_common(MAX_ANCHORS)], dtype=np.float64).reshape(-1, 2)
+
+        self.offsets: Dict[str, int] = {}
+        width = 0
+        for name, size in (
+            [(name, len(self.vocabularies[name])) for name in ONE_HOT_COLUMNS]
+            + [("grades", HIGHEST_GRADE - LOWEST_GRADE + 1), ("size", 2), ("tags", len(self.tags)),
+               ("ratings", len(self.category_ids)), ("location", len(self.anchors))]
+        ):
+            self.offsets[name] = width
+            width += size
+        self.width = width
+
+    @staticmethod
+    def _z(value: Optional[float], scale: Tuple[float, float]) -> float:
+        if value is None:
+            return 0.0
+        mean, std = scale
+        return max(-Z_CLIP, min(Z_CLIP, (value - mean) / std))
+
+    def encode(self, row: Any, tags: FrozenSet[str], averages: Dict[Optional[int], float], out: np.ndarray) -> None:
+        """Write one school's unit-length vector into out (zeros if it has no features at all)"""
+        out[:] = 0.0
+        for position, name in enumerate(ONE_HOT_COLUMNS, start=2):
+            index = self.vocabularies[name].get(_normalize(row[position]))
+            if index is not None:
+                out[self.offsets[name] + index] = WEIGHTS[name]
+
+        grades = grade_range(row.grade_levels)
+        if grades:
+            low, high = grades[0] - LOWEST_GRADE, grades[1] - LOWEST_GRADE
+            out[self.offsets["grades"] + low:self.offsets["grades"] + high + 1] = WEIGHTS["grades"] / math.sqrt(high - low + 1)
+
+        size = self.offsets["size"]
+        if row.enrollment and row.enrollment > 0:
+            out[size] = WEIGHTS["size"] * self._z(math.log1p(row.enrollment), self.enrollment_scale) / Z_CLIP
+        if row.student_teacher_ratio:
+            out[size + 1] = WEIGHTS["size"] * self._z(row.student_teacher_ratio, self.ratio_scale) / Z_CLIP
+
+        indexes = [self.tags[tag] for tag in tags if tag in self.tags]
+        if indexes:
+            out[[self.offsets["tags"] + index for index in indexes]] = WEIGHTS["tags"] / math.sqrt(len(indexes))
+
+        # Averages centred on the middle of the 1-5 scale, so unrated is neutral
+        ratings = self.offsets["ratings"]
+        scale = WEIGHTS["ratings"] / (2 * math.sqrt(len(self.category_ids)))
+        for index, category_id in enumerate(self.category_ids):
+            if category_id in averages:
+                out[ratings + index] = scale * (averages[category_id] - 3.0)
+
+        if row.latitude is not None and row.longitude is not None and len(self.anchors):
+            lat_offsets = self.anchors[:, 0] - row.latitude
+            lon_offsets = (self.anchors[:, 1] - row.longitude) * math.cos(math.radians(row.latitude))
+            closeness = np.exp(-(lat_offsets ** 2 + lon_offsets ** 2) / (2 * LOCATION_SIGMA_DEGREES ** 2))
+            norm = float(np.linalg.norm(closeness))
+            if norm > 1e-6:
+                location = self.offsets["location"]
+                out[location:location + len(self.anchors)] = WEIGHTS["location"] * closeness / norm
+
+        norm = float(np.linalg.norm(out))
+        if norm > 0:
+            out /= norm
+
+
+class SimilarSchoolService:
+    """Feature matrix of every school and top-k cosine queries over it"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._loaded_at: Optional[float] = None
+        self._refreshed_at: Optional[float] = None
+        self._changed: Set[int] = set()
+        self._encoder: Optional[_Encoder] = None
+        self._ids = np.empty(0, dtype=np.int64)
+        self._active = np.empty(0, dtype=bool)
+        self._matrix = np.empty((0, 0), dtype=np.float32)
+        self._positions: Dict[int, int] = {}
+        self._mark: Any = None
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._loaded_at = None
+
+    def mark_changed(self, school_ids: Iterable[Optional[int]]) -> None:
+        """Re-encode these schools on the next query (their ratings changed)"""
+        with self._lock:
+            self._changed.update(school_id for school_id in school_ids if school_id)
+
+    @staticmethod
+    def _watermark(db: Session) -> Any:
+        # One aggregate per query so each is read off its index
+        marks = [mark for mark in (db.query(func.max(School.updated_at)).scalar(), db.query(func.max(School.created_at)).scalar()) if mark is not None]
+        return max(marks) if marks else None
+
+    @staticmethod
+    def _averages(db: Session, school_ids: Optional[List[int]] = None) -> Dict[int, Dict[Optional[int], float]]:
+        """school_id -> {category_id (None for overall): average rating}"""
+        query = db.query(
+            SchoolRatingStats.school_id, SchoolRatingStats.category_id, SchoolRatingStats.rating_count, SchoolRatingStats.rating_sum
+        ).filter(SchoolRatingStats.rating_count > 0)
+        if school_ids is not None:
+            query = query.filter(SchoolRatingStats.school_id.in_(school_ids))
+        averages: Dict[int, Dict[Optional[int], float]] = {}
+        for school_id, category_id, count, total in query:
+            averages.setdefault(school_id, {})[category_id] = total / count
+        return averages
+
+    def load(self, db: Session) -> None:
+        """Fit the encoding and encode every school"""
+        started = time.perf_counter()
+        mark = self._watermark(db)
+        rows = db.query(*SCHOOL_COLUMNS).order_by(School.id).all()
+        tags = school_tag_service.tags_by_school(db)
+        averages = self._averages(db)
+        category_ids = sorted({category_id for by_category in averages.values() for category_id in by_category if category_id is not None})
+        encoder = _Encoder(rows, tags, category_ids)
+        matrix = np.zeros((len(rows), encoder.width), dtype=np.float32)
+        vector = np.zeros(encoder.width)
+        for position, row in enumerate(rows):
+            encoder.encode(row, tags.get(row.id, frozenset()), averages.get(row.id, {}), vector)
+            matrix[position] = vector
+        with self._lock:
+            self._encoder = encoder
+            self._ids = np.array([row.id for row in rows], dtype=np.int64)
+            self._active = np.array([bool(row.is_active) for row in rows], dtype=bool)
+            self._matrix = matrix
+            self._positions = {row.id: position for position, row in enumerate(rows)}
+            self._mark = mark
+            self._changed.clear()
+            self._loaded_at = self._refreshed_at = time.monotonic()
+        logger.info(f"Loaded similar-schools index: {len(rows)} schools x {encoder.width} features in {time.perf_counter() - started:.2f}s")
+
+    def refresh(self, db: Session) -> int:
+        """Re-encode schools changed since the last refresh; returns how many"""
+        mark = self._watermark(db)
+        with self._lock:
+            since, changed = self._mark, set(self._changed)
+            self._changed.clear()
+        if since is None:
+            changed.update(school_id for (school_id,) in db.query(School.id))
+        else:
+            for column in (School.created_at, School.updated_at):
+                changed.update(school_id for (school_id,) in db.query(School.id).filter(column >= since - DELTA_OVERLAP))
+        if not changed:
+            with self._lock:
+                self._mark, self._refreshed_at = mark or since, time.monotonic()
+            return 0
+
+        rows = db.query(*SCHOOL_COLUMNS).filter(School.id.in_(changed)).all()
+        tags = school_tag_service.tags_by_school(db)
+        averages = self._averages(db, [row.id for row in rows])
+        with self._lock:
+            encoder = self._encoder
+            new_rows = [row for row in rows if row.id not in self._positions]
+            if new_rows:
+                start = self._ids.size
+                self._ids = np.concatenate([self._ids, np.array([row.id for row in new_rows], dtype=np.int64)])
+                self._active = np.concatenate([self._active, np.zeros(len(new_rows), dtype=bool)])
+                self._matrix = np.concatenate([self._matrix, np.zeros((len(new_rows), encoder.width), dtype=np.float32)])
+                self._positions.update((row.id, start + offset) for offset, row in enumerate(new_rows))
+            vector = np.zeros(encoder.width)
+            for row in rows:
+                position = self._positions[row.id]
+                encoder.encode(row, tags.get(row.id, frozenset()), averages.get(row.id, {}), vector)
+                self._matrix[position] = vector
+                self._active[position] = bool(row.is_active)
+            self._mark, self._refreshed_at = mark or since, time.monotonic()
+        return len(rows)
+
+    def _ensure_fresh(self, db: Session) -> None:
+        now = time.monotonic()
+        if self._loaded_at is None or now - self._loaded_at > settings.similar_index_full_reload_seconds:
+            self.load(db)
+        elif now - self._refreshed_at > settings.similar_index_refresh_seconds or self._changed:
+            self.refresh(db)
+
+    def similar(self, db: Session, school_id: int, limit: int = 10) -> Optional[List[Tuple[int, float]]]:
+        """
+        (school_id, cosine similarity) of the limit active schools most like
+        school_id, most similar first; None if the school is not indexed.
+        """
+        self._ensure_fresh(db)
+        with self._lock:
+            position = self._positions.get(school_id)
+            if position is None:
+                return None
+            scores = self._matrix @ self._matrix[position]
+            scores[~self._active] = -np.inf
+            scores[position] = -np.inf
+            ids = self._ids
+        limit = min(limit, int(np.isfinite(scores).sum()))
+        if limit <= 0:
+            return []
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        top = top[np.lexsort((ids[top], -scores[top]))]
+        return [(int(ids[index]), round(float(scores[index]), 4)) for index in top]
+
+
+# Service instance
+similar_school_service = SimilarSchoolService()
@@ -0,0 +1,301 @@
+import asyncio
+import re
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from urllib.parse import urljoin, urlparse, urldefrag
+import httpx
+from bs4 import BeautifulSoup
+from markdownify import markdownify
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models import School
+from app.models_scraping import WebsitePage
+from app.services.school_tag_service import FACILITY_KEYWORDS, school_tag_service
+from app.services.school_change_service import school_change_service
+import logging
+
+"""
+Website enrichment crawler.
+Fetches school websites politely (one request at a time per host, shared
+connection pool, conditional requests) and extracts contact details,
+principal and facilities into School. Condensed markdown is kept so the
+LLM, when still needed, sees a few hundred words instead of whole pages.
+"""
+
+logger = logging.getLogger(__name__)
+
+# Link text/paths worth following from a homepage
+FOLLOW_KEYWORDS = ("contact", "about", "facilit", "infrastructure", "principal", "campus", "reach")
+
+# Markup that never carries school details
+NOISE_TAGS = ["script", "style", "noscript", "svg", "iframe", "form", "nav", "header", "footer"]
+
+PHONE_PATTERN = re.compile(r"(?:\+91[\s-]?)?(?:0\d{2,4}[\s-]?\d{3,4}[\s-]?\d{3,4}|[6-9]\d{4}[\s-]?\d{5})")
+EMAIL_PATTERN = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+PRINCIPAL_PATTERNS = [
+    re.compile(r"Principal\s*[:\-–—]\s*((?:Dr|Mr|Mrs|Ms|Fr|Sr|Rev)\.?\s+[A-Z][\w.]*(?:\s+[A-Z][\w.]*){0,3})"),
+    re.compile(r"((?:Dr|Mr|Mrs|Ms|Fr|Sr|Rev)\.?\s+[A-Z][\w.]*(?:\s+[A-Z][\w.]*){0,3})\s*,?\s*\(?Principal\b"),
+]
+
+# Cap on condensed markdown handed to the LLM for one school
+MAX_MARKDOWN_CHARS = 6000
+
+
+def condense_html(soup: BeautifulSoup) -> str:
+    """Page body as short markdown: no chrome, links, images or blank runs"""
+    for tag in soup(NOISE_TAGS):
+        tag.decompose()
+    body = soup.body or soup
+    markdown = markdownify(str(body), strip=["a", "img"], heading_style="ATX")
+    lines = []
+    for line in markdown.splitlines():
+        line = re.sub(r"\s+", " ", line).strip()
+        if len(line) > 2:
+            lines.append(line)
+    return "\n".join(lines)
+
+
+def extract_details(soup: BeautifulSoup, site_host: str) -> Dict[str, Any]:
+    """Phone, email, principal and facilities found on one page"""
+    details: Dict[str, Any] = {}
+    for tag in soup(["script", "style", "noscript"]):
+        tag.decompose()
+    text = soup.get_text(" ", strip=True)
+
+    phones = [a["href"][4:] for a in soup.select('a[href^="tel:"]')] + PHONE_PATTERN.findall(text)
+    if phones:
+        details["phone"] = re.sub(r"[^\d+]", " ", phones[0]).strip()[:20]
+
+    emails = [a["href"][7:].split("?")[0] for a in soup.select('a[href^="mailto:"]')] + EMAIL_PATTERN.findall(text)
+    emails = [email for email in emails if not email.lower().endswith((".png", ".jpg", ".gif", ".svg"))]
+    if emails:
+        domain = site_host[4:] if site_host.startswith("www.") else site_host
+        emails.sort(key=lambda email: not email.lower().endswith(domain))
+        details["email"] = emails[0]
+
+    for pattern in PRINCIPAL_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            details["principal_name"] = match.group(1).strip()
+            break
+
+    lowered = text.lower()
+    facilities = {}
+    for group, keywords in FACILITY_KEYWORDS.items():
+        found = sorted({label for keyword, label in keywords.items() if keyword in lowered})
+        if found:
+            facilities[group] = found
+    if facilities:
+        details["facilities"] = facilities
+    return details
+
+
+def follow_links(soup: BeautifulSoup, page_url: str) -> List[str]:
+    """Same-site links whose path or text suggests contact/about/facilities content"""
+    host = urlparse(page_url).netloc
+    links = []
+    for anchor in soup.find_all("a", href=True):
+        url = urldefrag(urljoin(page_url, anchor["href"]))[0]
+        parsed = urlparse(url)
+        if parsed.scheme not in ("http", "https") or parsed.netloc != host or url in links:
+            continue
+        label = f"{parsed.path} {anchor.get_text(' ', strip=True)}".lower()
+        if any(keyword in label for keyword in FOLLOW_KEYWORDS):
+            links.append(url)
+    return links
+
+
+class HostThrottle:
+    """Serializes requests per host and spaces them by a minimum delay"""
+
+    def __init__(self, delay_seconds: float):
+        self.delay_seconds = delay_seconds
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._last_request: Dict[str, float] = {}
+
+    async def wait(self, host: str) -> None:
+        lock = self._locks.setdefault(host, asyncio.Lock())
+        await lock.acquire()
+        elapsed = time.monotonic() - self._last_request.get(host, float("-inf"))
+        if elapsed < self.delay_seconds:
+            await asyncio.sleep(self.delay_seconds - elapsed)
+
+    def release(self, host: str) -> None:
+        self._last_request[host] = time.monotonic()
+        self._locks[host].release()
+
+
+class WebsiteEnrichmentService:
+    """
+    Enriches schools from their own websites.
+    llm_extractor, if given, is called with (school, condensed markdown) for
+    schools still missing a principal or facilities after HTML extraction.
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        llm_extractor: Optional[Callable[[School, str], Awaitable[Dict[str, Any]]]] = None,
+        concurrency: Optional[int] = None,
+        per_host_delay: Optional[float] = None,
+        max_pages_per_site: Optional[int] = None
+    ):
+        self.db = db
+        self.llm_extractor = llm_extractor
+        self.max_pages_per_site = max_pages_per_site or settings.enrichment_max_pages_per_site
+        self.concurrency = concurrency or settings.enrichment_concurrency
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+        self.throttle = HostThrottle(
+            settings.enrichment_per_host_delay_seconds if per_host_delay is None else per_host_delay
+        )
+        self.stats = {"fetched": 0, "not_modified": 0, "failed": 0, "llm_calls": 0}
+        # url -> fetch of that page, shared by every school linking to it in this run
+        self._pages: Dict[str, "asyncio.Future[Optional[WebsitePage]]"] = {}
+
+    async def enrich_schools(self, schools: List[School]) -> Dict[str, Any]:
+        """Crawl each school's website and fill in missing details"""
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        async with httpx.AsyncClient(
+            timeout=20.0,
+            limits=limits,
+            follow_redirects=True,
+            headers={"User-Agent": settings.enrichment_user_agent}
+        ) as client:
+            results = await asyncio.gather(
+                *(self._crawl_site(client, school) for school in schools if school.website),
+                return_exceptions=True
+            )
+
+        enriched = []
+        for school, result in zip([school for school in schools if school.website], results):
+            if isinstance(result, Exception):
+                logger.error(f"Enrichment failed for school {school.id} ({school.website}): {result}")
+                continue
+            details, markdown = result
+            if self.llm_extractor and markdown and not (details.get("principal_name") and details.get("facilities")):
+                try:
+                    self.stats["llm_calls"] += 1
+                    llm_details = await self.llm_extractor(school, markdown)
+                    details = {**{k: v for k, v in llm_details.items() if v}, **details}
+                except Exception as e:
+                    logger.warning(f"LLM extraction failed for school {school.id}: {e}")
+            updated_fields = self.apply_details(school, details)
+            if "facilities" in updated_fields:
+                school_tag_service.refresh_school(self.db, school)
+            if updated_fields:
+                school_change_service.record(self.db, [school.id])
+                enriched.append({"school_id": school.id, "updated_fields": updated_fields})
+
+        self.db.commit()
+        return {**self.stats, "schools": len(results), "enriched": enriched}
+
+    async def _crawl_site(self, client: httpx.AsyncClient, school: School):
+        homepage = school.website if "://" in school.website else f"https://{school.website}"
+        details: Dict[str, Any] = {}
+        markdown_parts: List[str] = []
+        seen_lines = set()
+
+        queue = [homepage]
+        visited = set()
+        while queue and len(visited) < self.max_pages_per_site:
+            url = queue.pop(0)
+            if url in visited:
+                continue
+            visited.add(url)
+            page = await self._page(client, url, school.id)
+            if page is None:
+                continue
+            # Earlier (homepage) values win; facilities accumulate across pages
+            for field, value in (page.extracted or {}).items():
+                if field == "facilities":
+                    merged = details.setdefault("facilities", {})
+                    for group, items in value.items():
+                        merged[group] = sorted(set(merged.get(group, [])) | set(items))
+                else:
+                    details.setdefault(field, value)
+            for line in (page.markdown or "").splitlines():
+                if line not in seen_lines:
+                    seen_lines.add(line)
+                    markdown_parts.append(line)
+            if url == homepage:
+                queue.extend(page.links or [])
+
+        return details, "\n".join(markdown_parts)[:MAX_MARKDOWN_CHARS]
+
+    def _page(self, client: httpx.AsyncClient, url: str, school_id: Optional[int]) -> "asyncio.Future[Optional[WebsitePage]]":
+        """The page at url, fetched (and its WebsitePage row added) once per run however many schools share it"""
+        if url not in self._pages:
+            self._pages[url] = asyncio.ensure_future(self._fetch_page(client, url, school_id))
+        return self._pages[url]
+
+    async def _fetch_page(self, client: httpx.AsyncClient, url: str, school_id: Optional[int]) -> Optional[WebsitePage]:
+        """Fetch one page, conditionally if it was fetched before"""
+        page = self.db.query(WebsitePage).filter(WebsitePage.url == url).first()
+        headers = {}
+        if page and page.etag:
+            headers["If-None-Match"] = page.etag
+        if page and page.last_modified:
+            headers["If-Modified-Since"] = page.last_modified
+
+        host = urlparse(url).netloc.lower()
+        # Wait for the host before taking a global slot so slow hosts don't hold slots idle
+        await self.throttle.wait(host)
+        try:
+            async with self.semaphore:
+                response = await client.get(url, headers=headers)
+        except httpx.HTTPError as e:
+            self.stats["failed"] += 1
+            logger.warning(f"Enrichment: could not fetch {url}: {e}")
+            return page
+        finally:
+            self.throttle.release(host)
+
+        if response.status_code == 304 and page:
+            self.stats["not_modified"] += 1
+            return page
+        if response.status_code != 200 or "html" not in response.headers.get("content-type", "html"):
+            self.stats["failed"] += 1
+            logger.info(f"Enrichment: skipping {url} (status {response.status_code})")
+            return None
+
+        self.stats["fetched"] += 1
+        soup = BeautifulSoup(response.text, "html.parser")
+        links = follow_links(soup, str(response.url))
+        extracted = extract_details(soup, host)
+        markdown = condense_html(soup)
+
+        if page is None:
+            page = WebsitePage(url=url)
+            self.db.add(page)
+        page.school_id = school_id
+        page.status_code = response.status_code
+        page.etag = response.headers.get("etag")
+        page.last_modified = response.headers.get("last-modified")
+        page.markdown = markdown
+        page.extracted = extracted
+        page.links = links
+        self.db.flush()
+        return page
+
+    @staticmethod
+    def apply_details(school: School, details: Dict[str, Any]) -> List[str]:
+        """Fill empty school fields from website details; facilities are merged"""
+        updated_fields = []
+        for field in ("phone", "email", "principal_name"):
+            value = details.get(field)
+            if value and not getattr(school, field):
+                setattr(school, field, value)
+                updated_fields.append(field)
+
+        facilities = details.get("facilities")
+        if isinstance(facilities, dict) and facilities:
+            current = school.facilities if isinstance(school.facilities, dict) else {}
+            merged = dict(current)
+            for group, items in facilities.items():
+                existing = merged.get(group)
+                existing = existing if isinstance(existing, list) else ([existing] if existing else [])
+                merged[group] = existing + [item for item in items if item not in existing]
+            if merged != current:
+                school.facilities = merged
+                updated_fields.append("facilities")
+        return updated_fields
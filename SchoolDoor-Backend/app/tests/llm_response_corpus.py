@@ -0,0 +1,72 @@
+"""
+Synthetic Perplexity responses for JSON extraction tests and benchmarks.
+Each case is (content, expected_school_names).
+"""
+import json
+import random
+from typing import List, Tuple
+
+CITIES = ["Pune", "Mumbai", "Bengaluru", "Chennai", "Jaipur", "Lucknow"]
+PREFIXES = ["St. Mary's", "Delhi Public", "Kendriya Vidyalaya", "Ryan International", "Bishop's", "Vidya Niketan"]
+
+
+def make_school(index: int, city: str) -> dict:
+    """A school record shaped like the scraper prompt's example format"""
+    name = f"{PREFIXES[index % len(PREFIXES)]} School No. {index}"
+    return {
+        "name": name,
+        "address": f"{index} M.G. Road, {city} - 4110{index % 100:02d}",
+        "city": city,
+        "state": "Maharashtra",
+        "pincode": f"4110{index % 100:02d}",
+        "phone": f"+91 20 2{index:07d}",
+        "website": f"https://school{index}.example.in",
+        "board": "CBSE",
+        "grade_levels": "Nursery to 12",
+        "enrollment": 800 + index,
+        "student_teacher_ratio": "25:1",
+        "principal_name": "Dr. A. \"Anu\" Sharma",
+        "facilities": {"sports": ["Cricket {turf}", "Swimming [indoor]"], "labs": ["Physics", "Robotics"]},
+        "special_programs": "Olympiad coaching; brace } and bracket ] in text",
+    }
+
+
+def build_case(kind: str, count: int, rng: random.Random) -> Tuple[str, List[str]]:
+    city = rng.choice(CITIES)
+    schools = [make_school(rng.randint(1, 10_000_000), city) for _ in range(count)]
+    names = [school["name"] for school in schools]
+    array = json.dumps(schools, indent=2)
+
+    if kind == "clean":
+        return array, names
+    if kind == "fenced":
+        return f"```json\n{array}\n```", names
+    if kind == "prose":
+        return (
+            f"Here are the schools in {city} [1][2]:\n\n{array}\n\n"
+            f"Note: \"enrollment\" figures are approximate [3]. Let me know if you'd like more {{details}}."
+        ), names
+    if kind == "prose_brackets":
+        # An unmatched bracket in the prose before the array
+        return f"Here is the list for {city} (see note [1):\n{array}\n[2] Source: school websites.", names
+    if kind == "wrapped":
+        return json.dumps({"region": city, "schools": schools}), names
+    if kind == "trailing_commas":
+        return array.replace('"Robotics"\n', '"Robotics",\n').replace("\n  }\n", ",\n  }\n"), names
+    if kind == "truncated":
+        # Cut inside the last object, as a max_tokens cut-off would
+        cut = array.rfind('"principal_name"')
+        return array[:cut], names[:-1]
+    raise ValueError(f"Unknown case kind: {kind}")
+
+
+CASE_KINDS = ["clean", "fenced", "prose", "prose_brackets", "wrapped", "trailing_commas", "truncated"]
+
+
+def build_corpus(cases_per_kind: int = 20, schools_per_case: int = 8, seed: int = 7) -> List[Tuple[str, List[str]]]:
+    rng = random.Random(seed)
+    return [
+        build_case(kind, schools_per_case, rng)
+        for kind in CASE_KINDS
+        for _ in range(cases_per_kind)
+    ]
@@ -0,0 +1,115 @@
+import gzip
+import hashlib
+import json
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.config import settings
+from app.database import Base, get_db
+import app.models_member  # noqa: F401  (tables referenced by reviews)
+import app.models_api_key  # noqa: F401
+from app.main import app
+from app.models import School, Rating, RatingCategory
+from app.services.api_key_service import APIKeyService
+from app.services.catalog_dump_service import catalog_dump_service
+from app.services.rating_stats_service import rating_stats_service
+from app.services.school_change_service import school_change_service
+
+
+@pytest.fixture
+def dump(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "catalog_dump_dir", str(tmp_path))
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    db = factory()
+    db.add(RatingCategory(id=1, name="academics"))
+    for index in range(1, 21):
+        db.add(School(id=index, name=f"School {index}", city="Pune", board="CBSE", is_active=index != 7))
+        db.add(Rating(school_id=index, category_id=1, rating_value=1 + index % 5))
+    db.commit()
+    rating_stats_service.rebuild(db)
+    school_change_service._pruned_at = None
+    api_key = APIKeyService(db).generate_api_key("partner")
+
+    def override_get_db():
+        session = factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    try:
+        yield TestClient(app, headers={"X-API-Key": api_key}), db, tmp_path
+    finally:
+        app.dependency_overrides.clear()
+        db.close()
+
+
+def _records(path):
+    with gzip.open(path, "rb") as file:
+        return [json.loads(line) for line in file]
+
+
+def test_incremental_dump_matches_a_full_rebuild(dump):
+    client, db, directory = dump
+    first = catalog_dump_service.generate(db)
+    assert first["version"] == 1 and first["incremental_from"] is None and first["schools"] == 19
+    assert [record["id"] for record in _records(directory / first["files"][0]["name"])] == [i for i in range(1, 21) if i != 7]
+    assert catalog_dump_service.generate(db) == first
+
+    db.get(School, 3).city = "Mumbai"
+    db.get(School, 5).is_active = False
+    db.get(School, 7).is_active = True
+    db.add(School(id=21, name="School 21", city="Pune"))
+    db.add(Rating(school_id=10, category_id=1, rating_value=5))
+    school_change_service.record(db, [3, 5, 7, 21])
+    db.commit()
+    rating_stats_service.refresh_schools(db, [10])
+
+    second = catalog_dump_service.generate(db)
+    assert second["version"] == 2 and second["incremental_from"] == 1 and second["change_cursor"] > first["change_cursor"]
+    incremental = _records(directory / second["files"][0]["name"])
+    assert [record["id"] for record in incremental] == [i for i in range(1, 22) if i != 5]
+    schools = {record["id"]: record for record in incremental}
+    assert schools[3]["city"] == "Mumbai" and schools[10]["ratings_by_category"] == {"academics": 3.0}
+
+    third = catalog_dump_service.generate(db, full=True)
+    assert third["incremental_from"] is None
+    assert (directory / third["files"][0]["name"]).read_bytes() == (directory / second["files"][0]["name"]).read_bytes()
+
+
+def test_manifest_and_ranged_download(dump, monkeypatch):
+    client, db, directory = dump
+    assert client.get("/api/v1/schools/dump/manifest").status_code == 404
+    for _ in range(3):
+        catalog_dump_service.generate(db, full=True)
+    monkeypatch.setattr(settings, "catalog_dump_keep_versions", 2)
+    catalog_dump_service.generate(db, full=True)
+    assert sorted(path.name for path in directory.glob("*.gz")) == ["schools-000003.jsonl.gz", "schools-000004.jsonl.gz"]
+
+    manifest = client.get("/api/v1/schools/dump/manifest").json()
+    file = manifest["files"][0]
+    assert manifest["version"] == 4 and file["url"] == "/api/v1/schools/dump/files/schools-000004.jsonl.gz"
+
+    whole = client.get(file["url"])
+    assert whole.status_code == 200 and whole.headers["accept-ranges"] == "bytes"
+    assert len(whole.content) == file["bytes"] and hashlib.sha256(whole.content).hexdigest() == file["sha256"]
+    etag = whole.headers["etag"]
+
+    head = client.get(file["url"], headers={"Range": "bytes=0-99"})
+    rest = client.get(file["url"], headers={"Range": "bytes=100-", "If-Range": etag})
+    assert head.status_code == rest.status_code == 206
+    assert head.headers["content-range"] == f"bytes 0-99/{file['bytes']}"
+    assert head.content + rest.content == whole.content
+    assert client.get(file["url"], headers={"Range": "bytes=-10"}).content == whole.content[-10:]
+    assert client.get(file["url"], headers={"Range": f"bytes={file['bytes']}-"}).status_code == 416
+    assert client.get(file["url"], headers={"Range": "bytes=100-", "If-Range": '"stale"'}).status_code == 200
+
+    assert client.get("/api/v1/schools/dump/files/schools-000003.jsonl.gz").status_code == 200
+    assert client.get("/api/v1/schools/dump/files/schools-000001.jsonl.gz").status_code == 404
+    assert client.get("/api/v1/schools/dump/files/manifest.json").status_code == 404
+    assert client.get(file["url"], headers={"X-API-Key": "invalid"}).status_code == 401
@@ -0,0 +1,125 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.config import settings
+from app.database import Base, get_db
+import app.models_member  # noqa: F401  (tables referenced by reviews)
+from app.main import app
+from app.models import School, Review
+from app.schemas import SchoolSearch
+from app.services.catalog_snapshot_service import catalog_snapshot_service
+from app.services.leaderboard_service import leaderboard_service
+from app.services.rating_stats_service import rating_stats_service
+
+
+@pytest.fixture
+def catalog(monkeypatch):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    monkeypatch.setattr(settings, "catalog_snapshot_refresh_seconds", 0.0)
+    leaderboard_service.invalidate()
+    catalog_snapshot_service.invalidate()
+    factory = sessionmaker(bind=engine)
+    db = factory()
+    rows = [
+        # name, city, state, board, enrollment, reviews
+        ("Alpha Public School", "Pune", "Maharashtra", "CBSE", 1200, [4.5, 4.0]),
+        ("Bravo Academy", "Pune", "Maharashtra", "ICSE", 800, [3.0]),
+        ("Charlie School", "Navi Mumbai", "Maharashtra", "CBSE", None, []),
+        ("Delta Public School", "Mumbai", "Maharashtra", "IB", 2000, [4.8]),
+        ("Echo Vidyalaya", "Jaipur", "Rajasthan", "State Board", 500, [2.0, 3.0]),
+    ]
+    for name, city, state, board, enrollment, reviews in rows:
+        school = School(name=name, city=city, state=state, board=board, enrollment=enrollment)
+        db.add(school)
+        db.flush()
+        for rating in reviews:
+            db.add(Review(school_id=school.id, overall_rating=rating, content="Review", status="approved"))
+    db.add(School(name="Foxtrot Public School", city="Pune", board="CBSE", is_active=False))
+    db.commit()
+    rating_stats_service.rebuild(db)
+
+    def override_get_db():
+        session = factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    try:
+        yield factory, TestClient(app)
+    finally:
+        app.dependency_overrides.clear()
+        catalog_snapshot_service.invalidate()
+        leaderboard_service.invalidate()
+
+
+SEARCHES = [
+    {},
+    {"city": "mumbai"},
+    {"query": "public"},
+    {"query": "pune", "board": "cbse"},
+    {"min_rating": 3.0, "sort_by": "rating"},
+    {"max_rating": 3.5, "sort_by": "name"},
+    {"sort_by": "enrollment", "limit": 2, "offset": 1},
+    {"state": "maharashtra", "sort_by": "name", "limit": 2},
+]
+
+
+def listed(client, params):
+    response = client.get("/api/v1/schools/", params=params)
+    assert response.status_code == 200
+    return [(school["name"], school["average_rating"], school["total_reviews"]) for school in response.json()]
+
+
+def test_snapshot_matches_sql_path(catalog, monkeypatch):
+    _, client = catalog
+    from_sql = [listed(client, params) for params in SEARCHES]
+    monkeypatch.setattr(settings, "catalog_snapshot_enabled", True)
+    from_snapshot = [listed(client, params) for params in SEARCHES]
+
+    assert from_snapshot == from_sql
+    assert [name for name, _, _ in from_sql[1]] == ["Charlie School", "Delta Public School"]
+    assert [name for name, _, _ in from_sql[4]] == ["Delta Public School", "Alpha Public School", "Bravo Academy"]
+    assert client.get("/api/v1/schools/", params={"sort_by": "popularity"}).status_code == 400
+
+
+def test_delta_refresh_picks_up_writes(catalog):
+    factory, _ = catalog
+    db = factory()
+    assert catalog_snapshot_service.select(db, SchoolSearch(city="jaipur"))[1] == 1
+
+    echo = db.query(School).filter(School.name == "Echo Vidyalaya").one()
+    echo.city = "Udaipur"
+    db.add(School(name="Golf School", city="Jaipur", state="Rajasthan"))
+    db.add(Review(school_id=echo.id, overall_rating=5.0, content="Review", status="approved"))
+    db.commit()
+    rating_stats_service.refresh_schools(db, [echo.id])
+
+    rows, total = catalog_snapshot_service.select(db, SchoolSearch(state="rajasthan", sort_by="name"))
+    assert total == 2
+    assert rows[0] == (echo.id, 3, 10.0)
+    assert catalog_snapshot_service.select(db, SchoolSearch(city="jaipur"))[1] == 1
+
+    # A school losing its last review drops out of rating filters
+    db.query(Review).filter(Review.school_id == echo.id).update({Review.status: "rejected"})
+    db.commit()
+    rating_stats_service.refresh_schools(db, [echo.id])
+    rows, total = catalog_snapshot_service.select(db, SchoolSearch(state="rajasthan", min_rating=1.0))
+    assert total == 0
+
+
+def test_suggestions_from_snapshot(catalog, monkeypatch):
+    _, client = catalog
+    monkeypatch.setattr(settings, "catalog_snapshot_enabled", True)
+    suggestions = client.get("/api/v1/schools/search-suggestions", params={"query": "mum"}).json()
+    assert suggestions == [
+        {"type": "city", "value": "Mumbai", "count": 1},
+        {"type": "city", "value": "Navi Mumbai", "count": 1},
+    ]
+    names = client.get("/api/v1/schools/search-suggestions", params={"query": "public"}).json()
+    # The inactive Foxtrot school is not suggested
+    assert [item["value"] for item in names] == ["Alpha Public School", "Delta Public School"]
@@ -0,0 +1,99 @@
+import asyncio
+from datetime import datetime, timezone, timedelta
+from decimal import Decimal
+from typing import List
+import pytest
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.testclient import TestClient
+from fastapi.utils import create_response_field
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.database import Base, get_db
+import app.models_member  # noqa: F401  (tables referenced by reviews)
+from app.main import app
+from app.models import School, Review, Rating, RatingCategory
+from app.models_api_key import APIKey, APIKeyUsage
+from app.responses import FastJSONResponse
+from app.schemas import SchoolSummary, Review as ReviewSchema
+from app.services.admin_auth_service import get_current_admin
+from app.services.rating_stats_service import rating_stats_service
+from app.services.school_listing_service import school_listing_service
+
+CREATED = datetime(2024, 3, 5, 9, 30, 15, 250000)
+
+
+def default_body(annotation, content) -> bytes:
+    """What FastAPI renders for a route with this response_model and the stock JSONResponse"""
+    field = create_response_field(name="response", type_=annotation)
+    return JSONResponse(asyncio.run(serialize_response(field=field, response_content=content))).body
+
+
+@pytest.fixture
+def catalog():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    db = factory()
+    db.add(RatingCategory(id=1, name="académics"))
+    for index in range(12):
+        school = School(
+            name=f"विद्यालय “{index}”", city="Pune", board="CBSE", enrollment=100 * index or None,
+            student_teacher_ratio=[18, 22.5, 1 / 3][index % 3], facilities={"labs": ["Physics"]}
+        )
+        db.add(school)
+        db.flush()
+        db.add(Review(school_id=school.id, overall_rating=1 + index % 5, title="Très bien", content='Line\n"quoted"\t\\',
+                      status="approved", created_at=CREATED + timedelta(hours=index), updated_at=CREATED if index % 2 else None))
+        db.add(Rating(school_id=school.id, category_id=1, rating_value=[4, 3.5, 5][index % 3]))
+    db.add(APIKey(id=1, name="partner", key_hash="hash"))
+    for index in range(5):
+        db.add(APIKeyUsage(api_key_id=1, endpoint="/api/v1/schools/", method="GET", ip_address=None,
+                           user_agent="curl/8.0 ✓", response_status=200, created_at=CREATED + timedelta(minutes=index)))
+    db.commit()
+    rating_stats_service.rebuild(db)
+
+    def override_get_db():
+        session = factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_current_admin] = lambda: None
+    try:
+        yield TestClient(app), db
+    finally:
+        app.dependency_overrides.clear()
+        db.close()
+
+
+def test_fast_paths_write_the_same_bytes(catalog):
+    client, db = catalog
+    response = client.get("/api/v1/schools/", params={"limit": 12})
+    assert response.headers["content-type"] == "application/json"
+    ids = [school["id"] for school in response.json()]
+    assert response.content == default_body(List[SchoolSummary], school_listing_service.load(db, ids))
+
+    response = client.get("/api/v1/reviews/", params={"limit": 12})
+    reviews = db.query(Review).order_by(Review.created_at.desc()).all()
+    assert response.content == default_body(List[ReviewSchema], reviews)
+
+    response = client.get("/api/v1/api-keys/1/usage")
+    usage = db.query(APIKeyUsage).order_by(APIKeyUsage.created_at.desc()).all()
+    expected = [{"id": row.id, "endpoint": row.endpoint, "method": row.method, "ip_address": row.ip_address,
+                 "user_agent": row.user_agent, "response_status": row.response_status, "created_at": row.created_at} for row in usage]
+    assert response.content == JSONResponse(jsonable_encoder(expected)).body
+
+
+def test_response_class_matches_stock_rendering():
+    content = {
+        "text": "Ünïcödé “quotes” \n\t\\ /", "nested": [1, 2.5, 0.1, 1e-3, 123456789.125, -0.0, None, True],
+        "naive": CREATED, "aware": CREATED.replace(tzinfo=timezone(timedelta(hours=5, minutes=30))),
+        "date": CREATED.date(), "decimal": Decimal("4.25"), 7: "int key",
+        "model": SchoolSummary(id=1, name="A", is_active=True, created_at=CREATED),
+    }
+    assert FastJSONResponse(content).body == JSONResponse(jsonable_encoder(content)).body
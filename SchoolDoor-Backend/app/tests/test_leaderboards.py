@@ -0,0 +1,159 @@
+from types import SimpleNamespace
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.config import settings
+from app.database import Base, get_db
+import app.models_member  # noqa: F401  (tables referenced by reviews)
+from app.main import app
+from app.models import School, Review, LeaderboardEntry, RatingCategory, SchoolRatingStats
+from app.schemas import ReviewCreate, RatingCreate
+from app.services.admin_auth_service import get_current_admin
+from app.services.rating_service import RatingService
+from app.services.rating_stats_service import rating_stats_service
+from app.services.leaderboard_service import leaderboard_service
+
+
+@pytest.fixture
+def db(monkeypatch):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    monkeypatch.setattr(settings, "ranking_prior_weight", 5.0)
+    monkeypatch.setattr(settings, "ranking_min_reviews", 1)
+    monkeypatch.setattr(settings, "leaderboard_size", 3)
+    leaderboard_service.invalidate()
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    leaderboard_service.invalidate()
+
+
+def add_school(db, name, city="Pune", board="CBSE", reviews=()):
+    school = School(name=name, city=city, state="Maharashtra", board=board)
+    db.add(school)
+    db.flush()
+    for rating in reviews:
+        db.add(Review(school_id=school.id, overall_rating=rating, content="Review", status="approved"))
+    return school
+
+
+def board_ids(db, scope):
+    entries = db.query(LeaderboardEntry).filter(
+        LeaderboardEntry.scope == scope, LeaderboardEntry.category_id.is_(None)
+    ).order_by(LeaderboardEntry.score.desc(), LeaderboardEntry.school_id)
+    return [entry.school_id for entry in entries]
+
+
+def fallback_rankings(db, **filters):
+    leaderboard_service._build = None
+    leaderboard_service._build_checked_at = float("inf")
+    try:
+        return RatingService(db).get_school_rankings(**filters)
+    finally:
+        leaderboard_service.invalidate()
+
+
+def test_rebuild_keeps_top_k_per_scope_and_matches_rollup_query(db):
+    schools = [add_school(db, f"School {i}", city="Pune" if i % 2 else "Delhi", reviews=[1.0 + i * 0.4] * 5) for i in range(8)]
+    db.commit()
+    rating_stats_service.rebuild(db)
+
+    assert board_ids(db, "all") == [schools[7].id, schools[6].id, schools[5].id]
+    assert board_ids(db, "city:pune") == [schools[7].id, schools[5].id, schools[3].id]
+    assert board_ids(db, "board:cbse") == board_ids(db, "all")
+
+    service = RatingService(db)
+    for filters in ({}, {"city": "Pune"}, {"city": "delhi", "limit": 2, "offset": 1}):
+        assert service.get_school_rankings(**filters) == fallback_rankings(db, **filters)
+    # Pages beyond the stored top K and combined filters use the rollup query
+    assert [row["rank"] for row in service.get_school_rankings(limit=3, offset=3)] == [4, 5, 6]
+    assert len(service.get_school_rankings(city="Pune", board="CBSE")) == 4
+
+
+def test_new_reviews_promote_and_evict_incrementally(db):
+    low, mid, high, newcomer = [add_school(db, name, reviews=[rating] * 3) for name, rating in
+                                [("Low", 2.0), ("Mid", 3.0), ("High", 4.0), ("Newcomer", 1.0)]]
+    db.commit()
+    rating_stats_service.rebuild(db)
+    assert board_ids(db, "city:pune") == [high.id, mid.id, low.id]
+
+    service = RatingService(db)
+    for _ in range(10):
+        service.create_review(ReviewCreate(school_id=newcomer.id, overall_rating=5.0, content="Great school"))
+    # Pending reviews do not count until approved
+    assert newcomer.id not in board_ids(db, "city:pune")
+
+    db.query(Review).filter(Review.school_id == newcomer.id).update({"status": "approved"})
+    rating_stats_service.refresh_schools(db, [newcomer.id])
+    assert board_ids(db, "city:pune") == [newcomer.id, high.id, mid.id]
+
+
+def test_school_leaving_a_scope_is_backfilled(db):
+    low, mid, high, fourth = [add_school(db, name, reviews=[rating] * 3) for name, rating in
+                              [("Low", 2.0), ("Mid", 3.0), ("High", 4.0), ("Fourth", 1.0)]]
+    db.commit()
+    rating_stats_service.rebuild(db)
+    assert fourth.id not in board_ids(db, "city:pune")
+
+    high.city = "Mumbai"
+    leaderboard_service.update_school(db, high.id)
+    db.commit()
+
+    assert board_ids(db, "city:pune") == [mid.id, low.id, fourth.id]
+    assert board_ids(db, "city:mumbai") == [high.id]
+    assert board_ids(db, "all") == [high.id, mid.id, low.id]
+
+    mid.is_active = False
+    leaderboard_service.update_school(db, mid.id)
+    db.commit()
+    assert mid.id not in board_ids(db, "all")
+    assert [row["school_id"] for row in RatingService(db).get_school_rankings(city="pune")] == [low.id, fourth.id]
+
+
+def test_dropped_score_competes_with_schools_off_the_board(db):
+    low, mid, high, fourth = [add_school(db, name, reviews=[rating] * 3) for name, rating in
+                              [("Low", 2.0), ("Mid", 3.0), ("High", 4.0), ("Fourth", 1.5)]]
+    db.commit()
+    rating_stats_service.rebuild(db)
+
+    db.query(Review).filter(Review.school_id == high.id).update({"overall_rating": 0.5})
+    rating_stats_service.refresh_schools(db, [high.id])
+    incremental = board_ids(db, "city:pune")
+    assert incremental == [mid.id, low.id, fourth.id]
+
+    rating_stats_service.rebuild(db)
+    assert board_ids(db, "city:pune") == incremental
+
+
+def test_write_paths_refresh_the_rollup_without_autoflush(db):
+    # Sessions built like SessionLocal: pending changes reach the database only on flush
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=db.get_bind())
+    session = factory()
+    school = add_school(session, "Sunrise")
+    session.add(RatingCategory(id=1, name="academics"))
+    session.add(Review(id=1, school_id=school.id, overall_rating=5.0, content="Great school", status="pending"))
+    session.commit()
+
+    RatingService(session).create_rating(RatingCreate(school_id=school.id, category_id=1, rating_value=4.0))
+    stats = {row.category_id: row.rating_count for row in session.query(SchoolRatingStats).filter(SchoolRatingStats.school_id == school.id)}
+    assert stats == {1: 1}
+
+    def override_get_db():
+        request_session = factory()
+        try:
+            yield request_session
+        finally:
+            request_session.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_current_admin] = lambda: SimpleNamespace(id=1)
+    try:
+        assert TestClient(app).put("/api/v1/admin/reviews/1/approve").status_code == 200
+    finally:
+        app.dependency_overrides.clear()
+    session.expire_all()
+    stats = {row.category_id: row.rating_count for row in session.query(SchoolRatingStats).filter(SchoolRatingStats.school_id == school.id)}
+    assert stats == {None: 1, 1: 1}
+    session.close()
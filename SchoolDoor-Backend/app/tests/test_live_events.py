@@ -0,0 +1,141 @@
+import json
+import threading
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.config import settings
+from app.database import Base
+import app.models_member  # noqa: F401  (tables referenced by reviews)
+from app.models import ScrapingJob, School
+from app.services import region_lock_service, scraping_service as scraping_module
+from app.services.event_bus_service import EventBus, event_bus, job_topic, stream_events
+from app.services.school_dedupe_service import school_dedupe_service
+from app.services.scraping_service import SchoolScrapingService
+from app.services.admin_dashboard_service import AdminDashboardService
+
+
+def parse_sse(chunk):
+    fields = dict(line.split(": ", 1) for line in chunk.strip().splitlines() if not line.startswith(":"))
+    return fields.get("event"), json.loads(fields["data"]) if "data" in fields else None
+
+
+@pytest.mark.asyncio
+async def test_bus_fans_out_across_threads_and_drops_oldest_for_slow_subscribers():
+    bus = EventBus(queue_size=3)
+    job_stream = bus.subscribe([job_topic(1)])
+    everything = bus.subscribe([job_topic(1), "jobs"])
+
+    # Published from a worker thread, delivered on the subscriber's loop
+    thread = threading.Thread(target=bus.publish, args=([job_topic(1), "jobs"], "progress", {"n": 1}))
+    thread.start()
+    thread.join()
+    event_received = await job_stream.get(timeout=1)
+    assert event_received["data"] == {"n": 1}
+    # Subscribed to both topics, received once
+    assert (await everything.get(timeout=1))["data"] == {"n": 1}
+    assert await everything.get(timeout=0.01) is None
+
+    for n in range(2, 7):
+        bus.publish("jobs", "progress", {"n": n})
+    assert [(await everything.get(timeout=1))["data"]["n"] for _ in range(3)] == [4, 5, 6]
+    assert everything.dropped == 2
+
+    job_stream.close()
+    everything.close()
+    assert bus.subscriber_count() == 0
+
+
+@pytest.mark.asyncio
+async def test_stream_ends_on_terminal_status_and_unsubscribes():
+    bus = EventBus()
+    subscription = bus.subscribe([job_topic(7)])
+    bus.publish(job_topic(7), "progress", {"status": "running", "schools_processed": 3})
+    bus.publish(job_topic(7), "status", {"status": "completed"})
+
+    chunks = [
+        chunk async for chunk in stream_events(
+            subscription,
+            until=lambda event: event["type"] == "status" and event["data"]["status"] == "completed",
+            keepalive_seconds=0.05
+        )
+    ]
+    events = [parse_sse(chunk) for chunk in chunks if chunk.startswith("id:")]
+    assert events[0] == ("progress", {"status": "running", "schools_processed": 3, "published_at": events[0][1]["published_at"]})
+    assert events[1][0] == "status"
+    assert bus.subscriber_count() == 0
+
+
+@pytest.fixture
+def session_factory(monkeypatch):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    monkeypatch.setattr(scraping_module, "SessionLocal", factory)
+    monkeypatch.setattr(region_lock_service, "SessionLocal", factory)
+    monkeypatch.setattr(settings, "perplexity_streaming", False)
+    school_dedupe_service.invalidate()
+    yield factory, engine
+    school_dedupe_service.invalidate()
+
+
+@pytest.mark.asyncio
+async def test_progress_is_published_per_school_but_persisted_at_checkpoints(session_factory, monkeypatch):
+    factory, engine = session_factory
+    monkeypatch.setattr(settings, "scraping_checkpoint_every_schools", 5)
+    monkeypatch.setattr(settings, "scraping_checkpoint_seconds", 3600)
+    db = factory()
+    job = ScrapingJob(region="Pune")
+    db.add(job)
+    db.commit()
+
+    schools = [{"name": f"Test School Number {chr(65 + i)}{i}", "city": "Pune", "board": "CBSE"} for i in range(12)]
+
+    async def scrape(region, existing, cache_only=False, on_school=None, job_id=None):
+        return schools
+
+    service = SchoolScrapingService()
+    monkeypatch.setattr(service, "_scrape_with_perplexity", scrape)
+
+    job_updates = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def count_job_updates(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("UPDATE scraping_jobs"):
+            job_updates.append(statement)
+
+    subscription = event_bus.subscribe([job_topic(job.id)], replay_latest=False)
+    try:
+        result = await service.scrape_schools_in_region("Pune", job.id)
+        received = []
+        while (item := await subscription.get(timeout=0.01)) is not None:
+            received.append(item)
+    finally:
+        subscription.close()
+
+    assert result["schools_created"] == 12
+    progress = [item for item in received if item["type"] == "progress"]
+    assert [item["data"]["schools_processed"] for item in progress] == list(range(1, 13))
+    assert received[-1]["type"] == "status" and received[-1]["data"]["status"] == "completed"
+    # Running, searching and found stages, two checkpoints and the final result
+    assert len(job_updates) == 6
+
+    db.expire_all()
+    job = db.get(ScrapingJob, job.id)
+    assert (job.status, job.schools_found, job.schools_processed, job.schools_created) == ("completed", 12, 12, 12)
+    assert db.query(School).count() == 12
+
+
+@pytest.mark.asyncio
+async def test_new_notifications_are_pushed_to_subscribers(session_factory):
+    factory, _ = session_factory
+    subscription = event_bus.subscribe(["notifications"], replay_latest=False)
+    try:
+        notification = AdminDashboardService(factory()).create_notification("Job failed", "Pune scrape failed", "error")
+        received = await subscription.get(timeout=1)
+    finally:
+        subscription.close()
+
+    assert received["type"] == "notification"
+    assert received["data"]["id"] == notification.id
+    assert received["data"]["notification_type"] == "error"
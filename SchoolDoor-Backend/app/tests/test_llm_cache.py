@@ -0,0 +1,115 @@
+import asyncio
+from datetime import datetime, timedelta
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app import database
+from app.database import Base, get_db
+import app.models_member  # noqa: F401  (tables referenced by reviews)
+from app.main import app
+from app.models import ScrapingJob
+from app.models_scraping import LLMResponseCache
+from app.services import llm_cache_service, region_lock_service, scraping_cost_service, scraping_service
+from app.services.llm_cache_service import CacheMissError, LLMResponseCacheService
+
+PAYLOAD = {
+    "model": "sonar-pro",
+    "messages": [{"role": "user", "content": "Find schools in Pune"}],
+    "max_tokens": 4000,
+    "temperature": 0.1,
+}
+
+
+@pytest.fixture
+def session_factory(monkeypatch):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    for module in (database, llm_cache_service, region_lock_service, scraping_cost_service, scraping_service):
+        monkeypatch.setattr(module, "SessionLocal", factory)
+    return factory
+
+
+class Upstream:
+    """Fetcher counting its calls, each answered after a short delay"""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        return {"choices": [{"message": {"content": f"[] (call {self.calls})"}}]}
+
+
+def test_key_ignores_whitespace_but_not_parameters():
+    spaced = {**PAYLOAD, "messages": [{"role": "user", "content": "  Find schools\n   in Pune "}], "stream": True}
+    assert LLMResponseCacheService.make_key(spaced) == LLMResponseCacheService.make_key(PAYLOAD)
+    assert LLMResponseCacheService.make_key({**PAYLOAD, "temperature": 0.5}) != LLMResponseCacheService.make_key(PAYLOAD)
+
+
+@pytest.mark.asyncio
+async def test_hit_then_expiry(session_factory):
+    cache, upstream = LLMResponseCacheService(ttl_seconds=3600), Upstream()
+    first = await cache.fetch(PAYLOAD, upstream, region="Pune")
+    assert await cache.fetch(PAYLOAD, upstream, region="Pune") == first
+    assert upstream.calls == 1
+
+    db = session_factory()
+    db.query(LLMResponseCache).update({LLMResponseCache.expires_at: datetime.utcnow() - timedelta(seconds=1)})
+    db.commit()
+    # Expired entries are refetched, but replay still serves them
+    assert await cache.fetch(PAYLOAD, Upstream(), region="Pune", cache_only=True) == first
+    refreshed = await cache.fetch(PAYLOAD, upstream, region="Pune")
+    assert upstream.calls == 2 and refreshed != first
+    assert db.query(LLMResponseCache).count() == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_requests_share_one_call(session_factory):
+    cache, upstream = LLMResponseCacheService(), Upstream()
+    results = await asyncio.gather(*(cache.fetch(PAYLOAD, upstream, region="Pune") for _ in range(3)))
+    assert upstream.calls == 1 and results[0] == results[1] == results[2]
+
+
+@pytest.mark.asyncio
+async def test_cache_only_never_calls_the_api(session_factory):
+    cache, upstream = LLMResponseCacheService(), Upstream()
+    with pytest.raises(CacheMissError):
+        await cache.fetch(PAYLOAD, upstream, region="Pune", cache_only=True)
+    stored = await cache.fetch(PAYLOAD, upstream, region="Pune")
+    # A changed prompt for the region replays its latest stored response
+    other = {**PAYLOAD, "messages": [{"role": "user", "content": "Find schools in pune, again"}]}
+    assert await cache.fetch(other, upstream, region=" pune ", cache_only=True) == stored
+    assert upstream.calls == 1
+
+
+def test_replay_without_cached_response_fails_the_job(session_factory, monkeypatch):
+    async def no_api(*args, **kwargs):
+        raise AssertionError("replay must not call the API")
+
+    monkeypatch.setattr(scraping_service.scraping_service, "_post_completion", no_api)
+    monkeypatch.setattr(scraping_service.scraping_service, "_stream_completion", no_api)
+
+    def override_get_db():
+        session = session_factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    db = session_factory()
+    db.add(ScrapingJob(id=1, region="Pune", region_key="pune", status="completed"))
+    db.commit()
+    app.dependency_overrides[get_db] = override_get_db
+    try:
+        response = TestClient(app).post("/api/v1/scraping/jobs/1/replay")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    job = db.get(ScrapingJob, 1)
+    db.refresh(job)
+    assert job.status == "failed" and "No cached response" in job.error_message
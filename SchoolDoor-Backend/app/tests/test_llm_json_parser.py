@@ -0,0 +1,91 @@
+import json
+import random
+import time
+from app.services.llm_json_parser import JSONObjectStream, extract_json_objects
+from app.tests.llm_response_corpus import build_case, build_corpus, CASE_KINDS
+
+
+def names_of(objects):
+    return [obj.get("name") for obj in objects]
+
+
+def test_recovers_every_case_kind():
+    for content, expected in build_corpus(cases_per_kind=5):
+        assert names_of(extract_json_objects(content)) == expected
+
+
+def test_nested_objects_are_not_split_out():
+    content, expected = build_case("clean", 3, random.Random(1))
+    objects = extract_json_objects(content)
+    assert len(objects) == 3
+    assert all("sports" in obj["facilities"] for obj in objects)
+
+
+def test_arrays_of_objects_inside_a_record_stay_in_it():
+    content = '[{"name":"A","competitive_exam_results":[{"exam":"JEE","qualified":12}]},{"name":"B"}]'
+    objects = extract_json_objects(content)
+    assert names_of(objects) == ["A", "B"]
+    assert objects[0]["competitive_exam_results"] == [{"exam": "JEE", "qualified": 12}]
+    assert names_of(extract_json_objects('{"schools": [' + content[1:-1] + ']}')) == ["A", "B"]
+    # A truncated record does not give up its inner objects as records
+    assert extract_json_objects(content[:content.index("}]}")]) == []
+
+
+def test_strings_with_brackets_and_escapes():
+    content = 'Result: [{"name": "A \\"quoted\\" {school}", "note": "ends with \\\\"}, {"name": "B ]"}]'
+    assert names_of(extract_json_objects(content)) == ['A "quoted" {school}', "B ]"]
+
+
+def test_chunked_feed_matches_single_pass():
+    for kind in CASE_KINDS:
+        content, expected = build_case(kind, 6, random.Random(3))
+        stream = JSONObjectStream()
+        objects = []
+        rng = random.Random(5)
+        position = 0
+        while position < len(content):
+            step = rng.randint(1, 40)
+            objects.extend(stream.feed(content[position:position + step]))
+            position += step
+        assert names_of(objects) == expected
+
+
+def test_fuzzed_truncation_never_yields_partial_records():
+    content, names = build_case("clean", 10, random.Random(11))
+    rng = random.Random(13)
+    for _ in range(200):
+        cut = rng.randint(0, len(content))
+        recovered = names_of(extract_json_objects(content[:cut]))
+        assert recovered == names[:len(recovered)]
+        # Every object that closed before the cut is recovered
+        complete = sum(1 for end in _object_ends(content) if end <= cut)
+        assert len(recovered) == complete
+
+
+def _object_ends(content):
+    schools = json.loads(content)
+    ends, position = [], 0
+    for school in schools:
+        marker = json.dumps(school["name"])
+        position = content.index(marker, position)
+        position = content.index("\n  }", position) + 4
+        ends.append(position)
+    return ends
+
+
+def test_scan_time_is_linear():
+    small, _ = build_case("prose", 50, random.Random(17))
+    large = small * 20
+    # Pathological input for backtracking regexes: deep unclosed nesting
+    hostile = "[" + "{\"a\": [" * 2000
+
+    def best_of(content, runs=3):
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            extract_json_objects(content)
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    assert best_of(large) < best_of(small) * 20 * 4
+    assert best_of(hostile) < 0.5
@@ -0,0 +1,119 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.config import settings
+from app.database import Base, get_db
+import app.models_member  # noqa: F401  (tables referenced by reviews)
+from app.main import app
+from app.models import School, Review
+from app.services.geo_service import geo_service, haversine_km, load_pincode_centroids
+from app.services.leaderboard_service import leaderboard_service
+from app.services.rating_stats_service import rating_stats_service
+
+# Two post offices for 411001 (averaged), one each for the others
+CENTROIDS = """officename,pincode,latitude,longitude
+Pune City,411001,18.52,73.85
+Pune Camp,411001,18.50,73.87
+Kothrud,411038,18.5074,73.8077
+Hadapsar,411028,18.5089,73.9260
+Mumbai GPO,400001,18.9398,72.8355
+Nowhere,999999,NA,NA
+"""
+
+
+@pytest.fixture
+def catalog(tmp_path, monkeypatch):
+    path = tmp_path / "pincodes.csv"
+    path.write_text(CENTROIDS)
+    monkeypatch.setattr(settings, "pincode_centroids_path", str(path))
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    geo_service.invalidate()
+    leaderboard_service.invalidate()
+    factory = sessionmaker(bind=engine)
+    db = factory()
+    rows = [
+        # name, pincode, board, reviews
+        ("Central", "411001", "CBSE", [4.0]),
+        ("Kothrud", "411 038", "ICSE", [4.5]),
+        ("Hadapsar", "411028", "CBSE", [3.0]),
+        ("Fort", "400001", "CBSE", [5.0]),
+        ("Unplaced", "123456", "CBSE", []),
+    ]
+    for name, pincode, board, reviews in rows:
+        school = School(name=name, city="Pune", zip_code=pincode, board=board)
+        geo_service.locate(school)
+        db.add(school)
+        db.flush()
+        for rating in reviews:
+            db.add(Review(school_id=school.id, overall_rating=rating, content="Review", status="approved"))
+    db.commit()
+    rating_stats_service.rebuild(db)
+
+    def override_get_db():
+        session = factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    try:
+        yield factory, TestClient(app)
+    finally:
+        app.dependency_overrides.clear()
+        geo_service.invalidate()
+        leaderboard_service.invalidate()
+
+
+def test_pincode_centroids_and_distance(tmp_path):
+    path = tmp_path / "pincodes.csv"
+    path.write_text(CENTROIDS)
+    centroids = load_pincode_centroids(str(path))
+    assert centroids["411001"] == pytest.approx((18.51, 73.86))
+    assert "999999" not in centroids
+    # Pune to Mumbai GPO is about 118 km as the crow flies
+    assert haversine_km(18.51, 73.86, [18.9398], [72.8355])[0] == pytest.approx(118.0, abs=1.0)
+
+
+def test_nearby_is_distance_sorted_and_filtered(catalog):
+    _, client = catalog
+    body = client.get("/api/v1/schools/nearby", params={"latitude": 18.51, "longitude": 73.86, "radius_km": 20}).json()
+    assert [school["name"] for school in body] == ["Central", "Kothrud", "Hadapsar"]
+    assert body[0]["distance_km"] == 0.0 and body[0]["average_rating"] == 4.0
+    assert body[1]["distance_km"] < body[2]["distance_km"] < 20
+
+    cbse = client.get("/api/v1/schools/nearby", params={"pincode": "411038", "radius_km": 20, "board": "cbse"}).json()
+    assert [school["name"] for school in cbse] == ["Central", "Hadapsar"]
+    rated = client.get("/api/v1/schools/nearby", params={"pincode": "411001", "min_rating": 4.2, "radius_km": 50}).json()
+    assert [school["name"] for school in rated] == ["Kothrud"]
+    paged = client.get("/api/v1/schools/nearby", params={"pincode": "411001", "radius_km": 50, "limit": 2, "offset": 2}).json()
+    assert [school["name"] for school in paged] == ["Hadapsar"]  # Fort is past 50 km
+
+    assert client.get("/api/v1/schools/nearby", params={"pincode": "411001", "radius_km": 500}).status_code == 400
+    assert client.get("/api/v1/schools/nearby", params={"pincode": "999999"}).status_code == 404
+    assert client.get("/api/v1/schools/nearby").status_code == 400
+
+
+def test_edits_move_schools_in_the_index(catalog):
+    factory, client = catalog
+    db = factory()
+    kothrud = db.query(School).filter(School.name == "Kothrud").one()
+    near_central = {"latitude": 18.51, "longitude": 73.86, "radius_km": 5}
+
+    # A new pincode moves a centroid-located school; hand-set coordinates stick
+    client.put(f"/api/v1/schools/{kothrud.id}", json={"zip_code": "411001"})
+    assert [school["name"] for school in client.get("/api/v1/schools/nearby", params=near_central).json()] == ["Central", "Kothrud"]
+    client.put(f"/api/v1/schools/{kothrud.id}", json={"latitude": 18.9, "longitude": 72.84})
+    client.put(f"/api/v1/schools/{kothrud.id}", json={"zip_code": "411028"})
+    db.expire_all()
+    assert (kothrud.latitude, kothrud.location_source) == (18.9, "manual")
+
+    client.put(f"/api/v1/schools/{kothrud.id}", json={"latitude": 18.51, "longitude": 73.86})
+    # As the admin toggle does
+    kothrud.is_active = False
+    geo_service.update_school(kothrud)
+    db.commit()
+    assert [school["name"] for school in client.get("/api/v1/schools/nearby", params=near_central).json()] == ["Central"]
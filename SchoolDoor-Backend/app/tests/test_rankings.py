@@ -0,0 +1,93 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.config import settings
+from app.database import Base
+import app.models_member  # noqa: F401  (tables referenced by reviews)
+from app.models import School, Rating, RatingCategory, Review, SchoolRatingStats
+from app.schemas import RatingCreate
+from app.services.rating_service import RatingService
+from app.services.rating_stats_service import rating_stats_service
+from app.services.leaderboard_service import leaderboard_service
+
+
+@pytest.fixture
+def db(monkeypatch):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    monkeypatch.setattr(settings, "ranking_prior_weight", 5.0)
+    monkeypatch.setattr(settings, "ranking_min_reviews", 1)
+    leaderboard_service.invalidate()
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    leaderboard_service.invalidate()
+
+
+def add_school(db, name, city="Pune", state="Maharashtra", board="CBSE", reviews=()):
+    school = School(name=name, city=city, state=state, board=board)
+    db.add(school)
+    db.flush()
+    for rating in reviews:
+        db.add(Review(school_id=school.id, overall_rating=rating, content="Review", status="approved"))
+    return school
+
+
+def test_bayesian_score_outranks_single_perfect_review(db):
+    one_review = add_school(db, "One Review School", reviews=[5.0])
+    many_reviews = add_school(db, "Many Reviews School", reviews=[4.8] * 50 + [5.0] * 10)
+    add_school(db, "Average School", reviews=[3.0] * 20)
+    # Pending reviews never count
+    db.add(Review(school_id=one_review.id, overall_rating=5.0, content="Pending", status="pending"))
+    db.commit()
+    rating_stats_service.rebuild(db)
+
+    rankings = RatingService(db).get_school_rankings(limit=3)
+
+    assert [row["school_id"] for row in rankings] == [many_reviews.id, one_review.id, rankings[2]["school_id"]]
+    assert rankings[1]["average_rating"] == 5.0 and rankings[1]["review_count"] == 1
+    assert rankings[1]["score"] < rankings[0]["score"]
+    assert [row["rank"] for row in rankings] == [1, 2, 3]
+
+    with_threshold = RatingService(db).get_school_rankings(limit=3, min_reviews=10)
+    assert one_review.id not in [row["school_id"] for row in with_threshold]
+
+
+def test_category_ranking_uses_category_average_and_scope_filters(db):
+    academics = RatingCategory(name="academics")
+    db.add(academics)
+    db.flush()
+    strong_academics = add_school(db, "Strong Academics", reviews=[3.0] * 5)
+    popular = add_school(db, "Popular School", reviews=[5.0] * 5)
+    delhi = add_school(db, "Delhi School", city="Delhi", state="Delhi", board="ICSE", reviews=[4.0] * 5)
+    for school, value in [(strong_academics, 5.0), (popular, 2.0), (delhi, 4.0)]:
+        for _ in range(4):
+            db.add(Rating(school_id=school.id, category_id=academics.id, rating_value=value))
+    db.commit()
+    rating_stats_service.rebuild(db)
+    service = RatingService(db)
+
+    # Ordered by the category's ratings, not by overall reviews
+    by_category = service.get_school_rankings(category="academics")
+    assert [row["school_id"] for row in by_category] == [strong_academics.id, delhi.id, popular.id]
+    assert by_category[0]["review_count"] == 4
+
+    assert [row["school_id"] for row in service.get_school_rankings(category="academics", city="pune")] == [strong_academics.id, popular.id]
+    assert [row["school_id"] for row in service.get_school_rankings(board="ICSE")] == [delhi.id]
+    assert service.get_school_rankings(category="no such category") == []
+
+
+def test_write_paths_keep_rollup_current(db):
+    academics = RatingCategory(name="academics")
+    school = add_school(db, "Growing School")
+    db.add(academics)
+    db.commit()
+    service = RatingService(db)
+
+    service.create_rating(RatingCreate(school_id=school.id, category_id=academics.id, rating_value=4.0))
+    service.create_rating(RatingCreate(school_id=school.id, category_id=academics.id, rating_value=5.0))
+
+    stats = db.query(SchoolRatingStats).filter(SchoolRatingStats.school_id == school.id).one()
+    assert (stats.category_id, stats.rating_count, stats.rating_sum) == (academics.id, 2, 9.0)
+    assert service.get_school_rankings(category="academics")[0]["average_rating"] == 4.5
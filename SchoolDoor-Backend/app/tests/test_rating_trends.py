@@ -0,0 +1,110 @@
+from datetime import date, datetime, timedelta, timezone
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.database import Base, get_db
+import app.models_member  # noqa: F401  (tables referenced by reviews)
+from app.main import app
+from app.models import School, Review, SchoolRatingBucket
+from app.services.leaderboard_service import leaderboard_service
+from app.services.rating_stats_service import rating_stats_service
+from app.services.rating_trend_service import bucket_start, rating_trend_service, window_starts
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    leaderboard_service.invalidate()
+    yield sessionmaker(bind=engine)
+    leaderboard_service.invalidate()
+
+
+def months_ago(months):
+    today = datetime.now(timezone.utc).date().replace(day=1)
+    year, month = today.year, today.month - months
+    while month < 1:
+        year, month = year - 1, month + 12
+    return datetime(year, month, 1, 12, tzinfo=timezone.utc)
+
+
+def add_reviews(db, school, ratings_by_month, status="approved"):
+    for months, ratings in ratings_by_month.items():
+        for rating in ratings:
+            db.add(Review(school_id=school.id, overall_rating=rating, content="Review", status=status,
+                          created_at=months_ago(months)))
+
+
+def test_bucket_boundaries():
+    assert bucket_start(datetime(2026, 3, 31, 23, 30), "month") == date(2026, 3, 1)
+    # 2026-03-01 is a Sunday; its ISO week starts on the Monday before
+    assert bucket_start(datetime(2026, 3, 1, 8), "week") == date(2026, 2, 23)
+    # Aware timestamps are bucketed in UTC
+    assert bucket_start(datetime(2026, 4, 1, 2, tzinfo=timezone(timedelta(hours=5, minutes=30))), "month") == date(2026, 3, 1)
+    assert window_starts("month", 3, today=date(2026, 1, 15)) == [date(2025, 11, 1), date(2025, 12, 1), date(2026, 1, 1)]
+    assert window_starts("week", 2, today=date(2026, 3, 4)) == [date(2026, 2, 23), date(2026, 3, 2)]
+
+
+def test_monthly_series_follows_moderation(session_factory):
+    db = session_factory()
+    school = School(name="Trend School", city="Pune", enrollment=900)
+    db.add(school)
+    db.flush()
+    add_reviews(db, school, {5: [2.0] * 6, 1: [4.0, 5.0], 0: [4.5] * 4})
+    add_reviews(db, school, {0: [1.0]}, status="pending")
+    db.commit()
+    rating_stats_service.rebuild(db)
+
+    series = rating_trend_service.get_series(db, [school.id], "month", 6)[school.id]
+    assert [bucket["count"] for bucket in series] == [6, 0, 0, 0, 2, 4]
+    assert [bucket["rating"] for bucket in series] == [2.0, None, None, None, 4.5, 4.5]
+    assert rating_trend_service.trend_direction(series) == "improving"
+
+    # Approving the pending review refreshes the school's buckets
+    pending = db.query(Review).filter(Review.status == "pending").one()
+    pending.status = "approved"
+    rating_stats_service.refresh_schools(db, [school.id])
+    series = rating_trend_service.get_series(db, [school.id], "month", 6)[school.id]
+    assert series[-1] == {"date": series[-1]["date"], "rating": 3.8, "count": 5}
+    weekly = db.query(SchoolRatingBucket).filter(SchoolRatingBucket.period == "week").all()
+    assert sum(bucket.review_count for bucket in weekly) == 13
+
+
+def test_trend_endpoints(session_factory):
+    db = session_factory()
+    first, second = School(name="First"), School(name="Second", enrollment=400)
+    db.add_all([first, second])
+    db.flush()
+    for rating in (3.0, 4.0):
+        db.add(Review(school_id=first.id, overall_rating=rating, content="Review", status="approved",
+                      created_at=datetime.now(timezone.utc)))
+    db.commit()
+    rating_stats_service.rebuild(db)
+
+    def override_get_db():
+        session = session_factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    try:
+        client = TestClient(app)
+        single = client.get(f"/api/v1/schools/{first.id}/trends", params={"window": 3}).json()
+        assert single["rating_trend"][-1]["rating"] == 3.5
+        assert [point["count"] for point in single["review_count_trend"]] == [0, 0, 2]
+        assert single["trend"] == "insufficient_data"
+
+        batch = client.post("/api/v1/schools/trends/batch", params={"period": "week", "window": 4},
+                            json=[second.id, 999, first.id]).json()
+        assert [trends["school_id"] for trends in batch] == [second.id, first.id]
+        assert len(batch[0]["rating_trend"]) == 4 and batch[0]["enrollment_trend"][0]["enrollment"] == 400
+        assert batch[1]["review_count_trend"][-1]["count"] == 2
+
+        assert client.get(f"/api/v1/schools/{first.id}/trends", params={"period": "day"}).status_code == 400
+        assert client.get("/api/v1/schools/999/trends").status_code == 404
+    finally:
+        app.dependency_overrides.clear()
@@ -0,0 +1,73 @@
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.config import settings
+from app.database import Base
+import app.models_member  # noqa: F401  (tables referenced by reviews)
+from app.models import School, Review, ScrapingJob
+from app.models_scraping import ScrapingCall
+from app.services.refresh_scheduler_service import RefreshSchedulerService
+
+
+@pytest.fixture
+def db(monkeypatch):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    monkeypatch.setattr(settings, "refresh_stale_after_days", 30)
+    monkeypatch.setattr(settings, "refresh_api_budget_per_hour", 2)
+    now = datetime.utcnow()
+    schools = [
+        # Stale and busy
+        School(name="A1", city="Pune", last_scraped_at=now - timedelta(days=60)),
+        # Equally stale, no traffic
+        School(name="B1", city="Nagpur", last_scraped_at=now - timedelta(days=60)),
+        # Stale and sparse
+        School(name="C1", city="Nashik", last_scraped_at=now - timedelta(days=45)),
+        # Fresh
+        School(name="D1", city="Thane", last_scraped_at=now - timedelta(days=2), phone="1"),
+        # Stale but already being scraped
+        School(name="E1", city="Satara", last_scraped_at=now - timedelta(days=90)),
+        School(name="W1", city="Thane", website="https://w1.example.in", last_scraped_at=now),
+    ]
+    session.add_all(schools)
+    session.flush()
+    session.add_all([Review(school_id=schools[0].id, overall_rating=4, content="x") for _ in range(5)])
+    session.add(ScrapingJob(region="Satara", status="running"))
+    session.commit()
+    yield session
+    session.close()
+
+
+def test_plan_orders_by_staleness_traffic_and_completeness(db):
+    plan = RefreshSchedulerService(db).plan(limit=5)
+    regions = [item["target"] for item in plan["next_batch"] if item["kind"] == "region"]
+    assert regions == ["Pune", "Nagpur"]
+    # Budget of 2 calls leaves the third stale region for later
+    assert [item["target"] for item in plan["deferred_for_budget"]] == ["Nashik"]
+    # Never-crawled websites are queued for the (API-free) website crawler
+    assert [item["name"] for item in plan["next_batch"] if item["kind"] == "school"] == ["W1"]
+
+
+def test_recent_api_calls_count_against_budget(db):
+    db.add(ScrapingCall(model="sonar-pro", outcome="success", created_at=datetime.utcnow()))
+    db.add(ScrapingCall(model="sonar-pro", outcome="cache_hit", created_at=datetime.utcnow()))
+    db.commit()
+    plan = RefreshSchedulerService(db).plan(limit=5)
+    assert plan["api_budget_remaining"] == 0
+    assert [item["target"] for item in plan["next_batch"] if item["kind"] == "region"] == ["Pune"]
+
+
+def test_plan_skips_abandoned_jobs_without_failing_them(db, monkeypatch):
+    monkeypatch.setattr(settings, "scraping_region_lease_seconds", 600)
+    stale = datetime.utcnow() - timedelta(hours=1)
+    db.add(ScrapingJob(region="Nashik", region_key="nashik", status="running", created_at=stale, heartbeat_at=stale))
+    db.commit()
+    plan = RefreshSchedulerService(db).plan(limit=5)
+    # The abandoned job no longer holds Nashik; the live one still holds Satara
+    queued = [item["target"] for item in plan["next_batch"] + plan["deferred_for_budget"]]
+    assert "Nashik" in queued and "Satara" not in queued
+    # A dry run changes nothing
+    assert db.query(ScrapingJob).filter(ScrapingJob.status == "running").count() == 2
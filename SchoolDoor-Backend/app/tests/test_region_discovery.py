@@ -0,0 +1,129 @@
+import json
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app import database
+from app.database import Base, get_db
+import app.models_member  # noqa: F401  (tables referenced by reviews)
+from app.api import scraping as scraping_api
+from app.main import app
+from app.models import ScrapingJob
+from app.services.region_discovery_service import RegionDiscoveryService, SeenSchoolNames
+from app.services.scraping_cost_service import ScrapingBudgetExceeded
+
+
+class FakeScraper:
+    """Serves scripted pages of school names per area and logs every API call"""
+
+    def __init__(self, pages, sub_areas=(), budget=None):
+        self.pages = pages
+        self.sub_areas = list(sub_areas)
+        self.budget = budget
+        self.calls = []
+
+    def _spend(self, call):
+        if self.budget is not None and len(self.calls) >= self.budget:
+            raise ScrapingBudgetExceeded("Job budget used")
+        self.calls.append(call)
+
+    def _request_headers(self):
+        return {}
+
+    async def _post_completion(self, headers, data, region):
+        raise AssertionError("served by _fetch_completion")
+
+    async def _fetch_completion(self, data, fetcher, **kwargs):
+        self._spend(("sub_areas", None))
+        return {"choices": [{"message": {"content": json.dumps(self.sub_areas)}}]}
+
+    async def _scrape_with_perplexity(self, region, excluded, cache_only=False, area=None, job_id=None):
+        page = sum(1 for call in self.calls if call == ("schools", area))
+        self._spend(("schools", area))
+        pages = self.pages.get(area, [])
+        return [{"name": name} for name in (pages[page] if page < len(pages) else [])]
+
+
+def test_seen_school_names_compare_normalized_names():
+    seen = SeenSchoolNames(["St. Mary's  School"])
+    assert "st marys school" in seen and "ST. MARY'S SCHOOL" in seen
+    assert not seen.add("St Marys School")
+    assert seen.add("Delhi Public School") and not seen.add("delhi public school.")
+    assert not seen.add("") and not seen.add("...") and not seen.add(None)
+    assert len(seen) == 2
+
+
+@pytest.mark.asyncio
+async def test_paging_stops_once_an_area_returns_nothing_new():
+    scraper = FakeScraper({
+        None: [["Known School", "Alpha School"], ["Alpha School", "Beta School"], ["Beta School"], ["Never Asked"]],
+        "Baner": [["Gamma School"], []],
+    }, sub_areas=["Baner", "pune"])
+    heartbeats = []
+    schools, stats = await RegionDiscoveryService(scraper, max_pages_per_area=5, max_api_calls=20).discover(
+        "Pune", ["Known School"], on_progress=lambda: heartbeats.append(len(scraper.calls))
+    )
+
+    assert [school["name"] for school in schools] == ["Alpha School", "Beta School", "Gamma School"]
+    # The region itself is not searched twice as a sub-area
+    assert scraper.calls == [("sub_areas", None)] + [("schools", None)] * 3 + [("schools", "Baner")] * 2
+    assert stats == {"api_calls": 6, "areas_searched": 2, "new_schools": 3, "new_schools_per_call": 0.5,
+                     "budget_exhausted": False}
+    # The caller hears back after every API call
+    assert heartbeats == [1, 2, 3, 4, 5, 6]
+
+
+@pytest.mark.asyncio
+async def test_call_cap_and_cost_budget_stop_discovery_keeping_finds():
+    pages = {None: [[f"School {page}"] for page in range(10)], "Baner": [["Baner School"]]}
+
+    scraper = FakeScraper(pages, sub_areas=["Baner"])
+    schools, stats = await RegionDiscoveryService(scraper, max_pages_per_area=3, max_api_calls=3).discover("Pune", [])
+    assert len(scraper.calls) == 3 and [school["name"] for school in schools] == ["School 0", "School 1"]
+
+    scraper = FakeScraper(pages, sub_areas=["Baner"], budget=3)
+    schools, stats = await RegionDiscoveryService(scraper, max_pages_per_area=10, max_api_calls=20).discover("Pune", [])
+    assert stats["budget_exhausted"] and stats["api_calls"] == 3
+    assert [school["name"] for school in schools] == ["School 0", "School 1"]
+
+    # An explicit zero is a limit, not "use the default"
+    scraper = FakeScraper(pages)
+    schools, stats = await RegionDiscoveryService(scraper, max_pages_per_area=0, max_api_calls=0).discover("Pune", [])
+    assert scraper.calls == [] and schools == [] and stats["api_calls"] == 0
+
+
+def test_retry_and_replay_keep_the_incremental_mode(monkeypatch):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    monkeypatch.setattr(database, "SessionLocal", factory)
+    runs = []
+
+    async def scrape_schools_in_region(region, job_id, cache_only=False, incremental=False):
+        runs.append((job_id, cache_only, incremental))
+
+    monkeypatch.setattr(scraping_api.scraping_service, "scrape_schools_in_region", scrape_schools_in_region)
+
+    def override_get_db():
+        session = factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    try:
+        client = TestClient(app)
+        job_id = client.post("/api/v1/scraping/start", json={"region": "Pune", "incremental": True}).json()["id"]
+        db = factory()
+        db.query(ScrapingJob).update({ScrapingJob.status: "completed"})
+        db.commit()
+        client.post(f"/api/v1/scraping/jobs/{job_id}/retry")
+        db.query(ScrapingJob).update({ScrapingJob.status: "completed"})
+        db.commit()
+        client.post(f"/api/v1/scraping/jobs/{job_id}/replay")
+        db.close()
+    finally:
+        app.dependency_overrides.clear()
+    assert runs == [(job_id, False, True), (job_id, False, True), (job_id, True, True)]
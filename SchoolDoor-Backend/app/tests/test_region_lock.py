@@ -0,0 +1,104 @@
+from datetime import datetime, timedelta
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.database import Base, get_db
+import app.models_member  # noqa: F401  (tables referenced by reviews)
+from app.api import scraping as scraping_api
+from app.main import app
+from app.models import ScrapingJob
+from app.models_scraping import ScrapingRegionLease
+from app.services import region_lock_service
+from app.services.region_lock_service import RegionLease, RegionLockedError
+
+
+@pytest.fixture
+def session_factory(monkeypatch):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    monkeypatch.setattr(region_lock_service, "SessionLocal", factory)
+    return factory
+
+
+def test_one_lease_per_normalized_region(session_factory):
+    with RegionLease("New  Delhi", job_id=1):
+        with pytest.raises(RegionLockedError, match="job 1"):
+            RegionLease("new delhi", job_id=2).acquire()
+        # Other regions are unaffected
+        with RegionLease("Pune", job_id=3):
+            pass
+    # Released on exit
+    with RegionLease("new delhi", job_id=2):
+        pass
+
+
+def test_expired_lease_is_taken_over(session_factory):
+    db = session_factory()
+    db.add(ScrapingRegionLease(region_key="pune", job_id=1, holder="crashed:1:1",
+                               expires_at=datetime.utcnow() - timedelta(seconds=1)))
+    db.commit()
+
+    with RegionLease("Pune", job_id=2):
+        lease = db.query(ScrapingRegionLease).filter(ScrapingRegionLease.region_key == "pune").one()
+        db.refresh(lease)
+        assert lease.job_id == 2
+
+
+def test_start_coalesces_jobs_and_honours_idempotency_key(session_factory, monkeypatch):
+    started = []
+
+    async def run_scraping_job(job_id, cache_only=False, incremental=False):
+        started.append(job_id)
+
+    def override_get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    monkeypatch.setattr(scraping_api, "run_scraping_job", run_scraping_job)
+    app.dependency_overrides[get_db] = override_get_db
+    try:
+        client = TestClient(app)
+        first = client.post("/api/v1/scraping/start", json={"region": "Pune"}, headers={"Idempotency-Key": "abc"}).json()
+        # Same region, different spelling: coalesced into the pending job
+        second = client.post("/api/v1/scraping/start", json={"region": " pune "}).json()
+        assert second["id"] == first["id"]
+
+        db = session_factory()
+        db.query(ScrapingJob).update({ScrapingJob.status: "completed"})
+        db.commit()
+        # Replayed request with the same key returns the original job, even when finished
+        replayed = client.post("/api/v1/scraping/start", json={"region": "Pune"}, headers={"Idempotency-Key": "abc"}).json()
+        assert replayed["id"] == first["id"]
+        # A new request after completion starts a new job
+        third = client.post("/api/v1/scraping/start", json={"region": "Pune"}).json()
+        assert third["id"] != first["id"]
+        assert started == [first["id"], third["id"]]
+    finally:
+        app.dependency_overrides.clear()
+
+
+def test_abandoned_jobs_stop_holding_their_region(session_factory):
+    db = session_factory()
+    long_ago = datetime.utcnow() - timedelta(hours=2)
+    db.add_all([
+        ScrapingJob(id=1, region="Pune", region_key="pune", status="running", created_at=long_ago, heartbeat_at=long_ago),
+        ScrapingJob(id=2, region="Delhi", region_key="delhi", status="pending", created_at=long_ago),
+        ScrapingJob(id=3, region="Mumbai", region_key="mumbai", status="running", created_at=long_ago,
+                    heartbeat_at=datetime.utcnow()),
+    ])
+    db.commit()
+
+    # A job lost in a restart no longer blocks its region; one still checking in does
+    assert region_lock_service.find_active_job(db, "Pune") is None
+    assert region_lock_service.find_active_job(db, "Mumbai").id == 3
+    db.expire_all()
+    assert [(job.id, job.status) for job in db.query(ScrapingJob).order_by(ScrapingJob.id)] == [
+        (1, "failed"), (2, "failed"), (3, "running")
+    ]
+    assert db.get(ScrapingJob, 1).error_message.startswith("Abandoned")
@@ -0,0 +1,66 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.database import Base, get_db
+import app.models_member  # noqa: F401  (tables referenced by reviews)
+from app.main import app
+from app.models import School, Review, Rating, RatingCategory
+from app.services.rating_stats_service import rating_stats_service
+
+
+@pytest.fixture
+def catalog():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    db = factory()
+    db.add(RatingCategory(id=1, name="academics"))
+    for index in range(1, 301):
+        db.add(School(id=index, name=f"School {index}", city="Pune", board="CBSE", facilities={"sports": ["Cricket"]}))
+        db.add(Review(school_id=index, overall_rating=1 + index % 5, content="Review", status="approved"))
+        db.add(Rating(school_id=index, category_id=1, rating_value=4))
+    db.commit()
+    rating_stats_service.rebuild(db)
+    db.close()
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    def override_get_db():
+        session = factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    try:
+        yield TestClient(app), statements
+    finally:
+        app.dependency_overrides.clear()
+
+
+def test_batch_keeps_order_and_marks_missing_ids(catalog):
+    client, _ = catalog
+    items = client.get("/api/v1/schools/batch", params={"ids": "7,999,3,7"}).json()
+    assert [(item["id"], item["found"]) for item in items] == [(7, True), (999, False), (3, True), (7, True)]
+    assert items[1]["school"] is None
+    assert items[0]["school"]["name"] == "School 7" and items[0]["school"]["average_rating"] == 3.0
+    assert items[0]["school"]["ratings_by_category"] == {"academics": 4.0}
+    assert "facilities" not in items[0]["school"]
+
+    repeated = client.get("/api/v1/schools/batch?ids=7&ids=999,3&ids=7").json()
+    assert repeated == items
+
+
+def test_batch_query_count_does_not_grow_with_ids(catalog):
+    client, statements = catalog
+    statements.clear()
+    items = client.post("/api/v1/schools/batch", json=list(range(300, 0, -1))).json()
+    assert [item["id"] for item in items] == list(range(300, 0, -1)) and all(item["found"] for item in items)
+    assert len(statements) == 2
+
+    assert client.get("/api/v1/schools/batch", params={"ids": "1,x"}).status_code == 400
+    assert client.post("/api/v1/schools/batch", json=list(range(501))).status_code == 400
@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.database import Base, get_db
+import app.models_member  # noqa: F401  (tables referenced by reviews)
+from app.main import app
+from app.models import School, Review, SchoolChange
+from app.services.admin_auth_service import get_current_admin
+from app.services.school_change_service import school_change_service
+
+
+@pytest.fixture
+def feed():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    db = factory()
+    for index in range(1, 6):
+        db.add(School(id=index, name=f"School {index}", city="Pune", board="CBSE"))
+    db.commit()
+    school_change_service._pruned_at = None
+
+    def override_get_db():
+        session = factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_current_admin] = lambda: SimpleNamespace(id=1)
+    try:
+        yield TestClient(app), db
+    finally:
+        app.dependency_overrides.clear()
+        db.close()
+
+
+def test_write_paths_feed_compact_changes(feed):
+    client, db = feed
+    cursor = client.get("/api/v1/schools/changes/cursor").json()["cursor"]
+    assert cursor == 0
+
+    client.put("/api/v1/schools/1", json={"city": "Mumbai"})
+    client.put("/api/v1/schools/1", json={"enrollment": 1200})
+    client.post("/api/v1/schools/bulk-update", json={"school_ids": [2, 3], "updates": {"board": "ICSE"}})
+    client.put("/api/v1/admin/schools/3/toggle-active")
+    db.add(Review(id=1, school_id=4, overall_rating=4, content="Good", status="pending"))
+    db.commit()
+    client.put("/api/v1/admin/reviews/1/approve")
+
+    page = client.get("/api/v1/schools/changes", params={"since": cursor}).json()
+    changes = {change["school_id"]: change for change in page["changes"]}
+    assert [change["school_id"] for change in page["changes"]] == [1, 2, 3, 4]
+    assert changes[1]["action"] == "upsert" and changes[1]["school"]["city"] == "Mumbai" and changes[1]["school"]["enrollment"] == 1200
+    assert changes[2]["action"] == "upsert" and changes[2]["school"]["board"] == "ICSE"
+    assert changes[3]["action"] == "delete" and changes[3]["school"] is None
+    assert changes[4]["action"] == "ratings" and changes[4]["ratings"]["average_rating"] == 4.0 and changes[4]["school"] is None
+    assert page["next_cursor"] == 6 and not page["has_more"]
+
+    empty = client.get("/api/v1/schools/changes", params={"since": page["next_cursor"]}).json()
+    assert empty == {"changes": [], "next_cursor": 6, "has_more": False}
+
+    first = client.get("/api/v1/schools/changes", params={"since": 0, "limit": 2}).json()
+    assert [change["school_id"] for change in first["changes"]] == [1] and first["next_cursor"] == 2 and first["has_more"]
+
+
+def test_late_commits_are_not_skipped_and_old_cursors_expire(feed):
+    client, db = feed
+    school_change_service.record(db, [1, 2])
+    db.commit()
+    assert client.get("/api/v1/schools/changes").json()["next_cursor"] == 2
+
+    # A change whose transaction started (got its id) before those but committed after
+    db.add(SchoolChange(id=-1, school_id=5, kind="school"))
+    db.commit()
+    page = client.get("/api/v1/schools/changes", params={"since": 2}).json()
+    assert [(change["sequence"], change["school_id"]) for change in page["changes"]] == [(3, 5)]
+
+    db.query(SchoolChange).filter(SchoolChange.sequence < 3).update({SchoolChange.created_at: datetime.utcnow() - timedelta(days=400)})
+    db.commit()
+    school_change_service._pruned_at = None
+    school_change_service.publish(db)
+    expired = client.get("/api/v1/schools/changes", params={"since": 1})
+    assert expired.status_code == 410 and expired.json()["detail"]["cursor"] == 3
+    assert client.get("/api/v1/schools/changes", params={"since": 2}).status_code == 200
@@ -0,0 +1,107 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.config import settings
+from app.database import Base, get_db
+import app.models_member  # noqa: F401  (tables referenced by reviews)
+from app.main import app
+from app.models import School, Rating, RatingCategory, Review
+from app.services.comparison_service import SchoolComparisonService
+from app.services.leaderboard_service import leaderboard_service
+from app.services.rating_stats_service import rating_stats_service
+
+
+@pytest.fixture
+def catalog(monkeypatch):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    monkeypatch.setattr(settings, "ranking_min_reviews", 1)
+    monkeypatch.setattr(settings, "comparison_min_peers", 5)
+    leaderboard_service.invalidate()
+    factory = sessionmaker(bind=engine)
+    db = factory()
+    facilities = RatingCategory(name="facilities")
+    db.add(facilities)
+    db.flush()
+    # Ten Pune schools with facilities 1.0 .. 4.6 and reviews 3.0 .. 4.8, two Delhi schools
+    schools = []
+    for i in range(10):
+        school = School(name=f"Pune {i}", city="Pune", board="CBSE" if i % 2 else "ICSE", student_teacher_ratio=10.0 + i)
+        db.add(school)
+        db.flush()
+        db.add(Rating(school_id=school.id, category_id=facilities.id, rating_value=1.0 + i * 0.4))
+        db.add(Review(school_id=school.id, overall_rating=3.0 + i * 0.2, content="Review", status="approved"))
+        schools.append(school)
+    for i in range(2):
+        school = School(name=f"Delhi {i}", city=" delhi", board="CBSE")
+        db.add(school)
+        db.flush()
+        db.add(Review(school_id=school.id, overall_rating=4.0, content="Review", status="approved"))
+        schools.append(school)
+    db.commit()
+    rating_stats_service.rebuild(db)
+    yield factory, engine, schools
+    leaderboard_service.invalidate()
+
+
+def test_percentiles_z_scores_and_strengths(catalog):
+    factory, engine, schools = catalog
+    best, worst, delhi = schools[9], schools[0], schools[10]
+    ids = [best.id, worst.id, delhi.id]
+    queries = []
+    event.listen(engine, "before_cursor_execute", lambda *args: queries.append(args[2]))
+
+    comparison = SchoolComparisonService(factory()).compare(ids)
+
+    # Schools, categories, own stats, peer ratings and peer ratios, however many schools are compared
+    assert len(queries) == 5
+    assert [school.id for school in comparison.schools] == ids
+    assert comparison.schools[0].ratings_by_category == {"facilities": 4.6}
+
+    facilities = comparison.comparison_metrics["facilities"]
+    assert facilities["best_school_id"] == best.id
+    assert facilities["schools"][str(best.id)]["percentile"] == 95.0
+    assert facilities["schools"][str(worst.id)]["percentile"] == 5.0
+    assert facilities["schools"][str(best.id)]["z_score"] > 1.4
+    assert facilities["schools"][str(best.id)]["peer_count"] == 10
+    # Lower student-teacher ratio is better
+    ratio = comparison.comparison_metrics["student_teacher_ratio"]
+    assert ratio["best_school_id"] == worst.id
+    assert ratio["schools"][str(worst.id)]["percentile"] == 95.0
+
+    assert comparison.strengths_weaknesses[str(best.id)][:2] == [
+        "Top 5% in Pune for Overall rating", "Top 5% in Pune for Facilities"
+    ]
+    assert "Top 5% in Pune for Student-teacher ratio" in comparison.strengths_weaknesses[str(worst.id)]
+    assert "Bottom 5% in Pune for Facilities" in comparison.strengths_weaknesses[str(worst.id)]
+    # Too few Delhi peers to claim anything
+    assert comparison.comparison_metrics["overall"]["schools"][str(delhi.id)]["peer_count"] == 2
+    assert comparison.strengths_weaknesses[str(delhi.id)] == []
+
+
+def test_compare_endpoint_peer_groups(catalog):
+    factory, _, schools = catalog
+
+    def override_get_db():
+        session = factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    try:
+        client = TestClient(app)
+        response = client.post("/api/v1/schools/compare", params={"peer_group": "city_board"}, json=[schools[9].id, schools[8].id])
+        assert response.status_code == 200
+        body = response.json()
+        assert body["peer_groups"][str(schools[9].id)]["label"] == "CBSE schools in Pune"
+        assert body["comparison_metrics"]["facilities"]["schools"][str(schools[9].id)]["peer_count"] == 5
+
+        assert client.post("/api/v1/schools/compare", json=[schools[0].id]).status_code == 400
+        assert client.post("/api/v1/schools/compare", params={"peer_group": "galaxy"}, json=[1, 2]).status_code == 400
+        assert client.post("/api/v1/schools/compare", json=[998, 999]).status_code == 404
+    finally:
+        app.dependency_overrides.clear()
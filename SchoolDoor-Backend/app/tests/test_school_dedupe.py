@@ -0,0 +1,134 @@
+from types import SimpleNamespace
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.database import Base, get_db
+import app.models_member  # noqa: F401  (tables referenced by reviews)
+from app.main import app
+from app.models import School, Review, Rating, RatingCategory, SchoolRatingStats, SchoolTag, SchoolChange
+from app.models_school_request import SchoolRequest
+from app.services.admin_auth_service import get_current_admin
+from app.services.rating_stats_service import rating_stats_service
+from app.services.school_dedupe_service import SchoolDedupeIndex, school_dedupe_service
+
+
+def build_index():
+    index = SchoolDedupeIndex()
+    index.add(1, {"name": "St. Mary's School", "city": "Pune", "zip_code": "411001"})
+    index.add(2, {"name": "Delhi Public School", "city": "Pune", "phone": "+91 20 2612 3456"})
+    index.add(3, {"name": "St. Mary's School", "city": "Nagpur"})
+    index.add(4, {"name": "Vidya Valley School", "city": "Pune"})
+    return index
+
+
+def test_spelling_variants_match():
+    index = build_index()
+    matches = index.find_matches({"name": "St Marys School, Pune", "city": "Pune"})
+    assert [match["school_id"] for match in matches] == [1]
+    assert index.find_matches({"name": "DPS", "city": "Pune"})[0]["school_id"] == 2
+
+
+def test_contact_details_match_renamed_school():
+    index = build_index()
+    matches = index.find_matches({"name": "DPS Kharadi Campus", "city": "Pune", "phone": "020-26123456"})
+    assert matches[0]["school_id"] == 2
+    assert "same_phone" in matches[0]["reasons"]
+
+
+def test_different_schools_do_not_match():
+    index = build_index()
+    assert index.find_matches({"name": "Vidya Niketan", "city": "Pune"}) == []
+    assert index.find_matches({"name": "Ryan International School", "city": "Pune"}) == []
+
+
+def test_duplicate_clusters():
+    index = build_index()
+    index.add(5, {"name": "Saint Mary's School Pune", "city": "Pune"})
+    index.remove(3)
+    clusters = index.duplicate_clusters()
+    assert [[school["school_id"] for school in cluster] for cluster in clusters] == [[1, 5]]
+
+
+@pytest.fixture
+def admin_client():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    db = factory()
+    db.add(RatingCategory(id=1, name="academics"))
+    db.add_all([
+        School(id=1, name="St. Mary's School", city="Pune", board="CBSE"),
+        School(id=2, name="St Marys School Pune", city="Pune", phone="020 2612 3456", programs=["Robotics"]),
+        School(id=3, name="Vidya Valley School", city="Pune"),
+    ])
+    db.add_all([
+        Review(school_id=1, overall_rating=4, content="Good", status="approved"),
+        Review(school_id=2, overall_rating=2, content="Okay", status="approved"),
+        Review(school_id=2, overall_rating=5, content="Great", status="approved"),
+        Rating(school_id=2, category_id=1, rating_value=3),
+    ])
+    db.commit()
+    rating_stats_service.rebuild(db)
+    db.commit()
+    school_dedupe_service.invalidate()
+
+    def override_get_db():
+        session = factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_current_admin] = lambda: SimpleNamespace(id=1)
+    try:
+        yield TestClient(app), db
+    finally:
+        app.dependency_overrides.clear()
+        school_dedupe_service.invalidate()
+        db.close()
+
+
+def test_merge_moves_reviews_and_ratings_and_deactivates_duplicates(admin_client):
+    client, db = admin_client
+    result = client.post("/api/v1/admin/schools/1/merge", json={"duplicate_ids": [2, 1]}).json()
+    assert result == {"primary_id": 1, "merged_ids": [2], "reviews_moved": 2, "ratings_moved": 1,
+                      "fields_filled": result["fields_filled"]}
+    assert {"phone", "programs"} <= set(result["fields_filled"])
+
+    db.expire_all()
+    assert {review.school_id for review in db.query(Review)} == {1}
+    assert {rating.school_id for rating in db.query(Rating)} == {1}
+    stats = {(row.school_id, row.category_id): (row.rating_count, row.rating_sum) for row in db.query(SchoolRatingStats)}
+    assert stats == {(1, None): (3, 11.0), (1, 1): (1, 3.0)}
+
+    primary, duplicate = db.get(School, 1), db.get(School, 2)
+    assert primary.phone == "020 2612 3456" and primary.board == "CBSE" and primary.is_active
+    assert duplicate.is_active is False
+    assert "program:robotics" in {tag.tag for tag in db.query(SchoolTag).filter(SchoolTag.school_id == 1)}
+    assert {change.school_id for change in db.query(SchoolChange)} >= {1, 2}
+    # The duplicate no longer matches; the primary does
+    matches = school_dedupe_service.get_index(db).find_matches({"name": "St Marys School", "city": "Pune"})
+    assert [match["school_id"] for match in matches] == [1]
+
+    assert client.post("/api/v1/admin/schools/1/merge", json={"duplicate_ids": [9]}).status_code == 404
+    assert client.post("/api/v1/admin/schools/1/merge", json={"duplicate_ids": [1]}).status_code == 400
+
+
+def test_approving_a_near_duplicate_request_needs_force(admin_client):
+    client, db = admin_client
+    db.add(SchoolRequest(id=1, name="Vidya Valley School, Pune", city="Pune", status="pending"))
+    db.commit()
+
+    conflict = client.put("/api/v1/admin/school-requests/1/approve")
+    assert conflict.status_code == 409
+    assert [school["school_id"] for school in conflict.json()["detail"]["similar_schools"]] == [3]
+    db.expire_all()
+    assert db.get(SchoolRequest, 1).status == "pending"
+
+    assert client.put("/api/v1/admin/school-requests/1/approve", params={"force": True}).status_code == 200
+    db.expire_all()
+    assert db.get(SchoolRequest, 1).status == "approved"
+    assert db.query(School).filter(School.name == "Vidya Valley School, Pune").count() == 1
@@ -0,0 +1,75 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.database import Base, get_db
+import app.models_member  # noqa: F401  (tables referenced by reviews)
+from app.main import app
+from app.models import School, Review, Rating, RatingCategory
+from app.services.leaderboard_service import leaderboard_service
+from app.services.rating_stats_service import rating_stats_service
+
+HEAVY_FIELDS = {"facilities", "programs", "board_exam_results", "competitive_exam_results"}
+
+
+@pytest.fixture
+def catalog():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    leaderboard_service.invalidate()
+    factory = sessionmaker(bind=engine)
+    db = factory()
+    db.add(RatingCategory(id=1, name="academics"))
+    for index in range(30):
+        school = School(
+            name=f"School {index}", city="Pune", board="CBSE", enrollment=100 * index,
+            facilities={"sports": ["Swimming Pool"]}, programs=["Robotics"],
+            board_exam_results={"10th": {"pass_percentage": 98}}, competitive_exam_results={"JEE": {"qualified": 12}}
+        )
+        db.add(school)
+        db.flush()
+        db.add(Review(school_id=school.id, overall_rating=1 + index % 5, content="Review", status="approved"))
+        db.add(Rating(school_id=school.id, category_id=1, rating_value=4))
+    db.commit()
+    rating_stats_service.rebuild(db)
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    def override_get_db():
+        session = factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    try:
+        yield TestClient(app), statements
+    finally:
+        app.dependency_overrides.clear()
+        leaderboard_service.invalidate()
+
+
+def test_lists_are_lean_and_query_count_is_constant(catalog):
+    client, statements = catalog
+    statements.clear()
+    schools = client.get("/api/v1/schools/", params={"limit": 25}).json()
+    assert len(schools) == 25
+    # The page and its ratings by category, however many schools are on it
+    assert len(statements) == 2
+    assert not any("facilities" in statement or "exam_results" in statement for statement in statements)
+    assert not HEAVY_FIELDS & schools[0].keys()
+    assert schools[1]["average_rating"] == 2.0 and schools[1]["ratings_by_category"] == {"academics": 4.0}
+
+    top_rated = client.get("/api/v1/schools/stats/overview").json()["top_rated_schools"]
+    assert top_rated and not HEAVY_FIELDS & top_rated[0].keys()
+
+
+def test_detail_has_everything(catalog):
+    client, _ = catalog
+    school = client.get("/api/v1/schools/3").json()
+    assert school["facilities"] == {"sports": ["Swimming Pool"]} and school["programs"] == ["Robotics"]
+    assert school["board_exam_results"] == {"10th": {"pass_percentage": 98}}
+    assert school["ratings_by_category"] == {"academics": 4.0} and school["total_reviews"] == 1
@@ -0,0 +1,86 @@
+from datetime import datetime, timedelta
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.database import Base, get_db
+import app.models_member  # noqa: F401  (tables referenced by reviews)
+from app.main import app
+from app.models import School, Review, Rating, RatingCategory
+from app.services.rating_stats_service import rating_stats_service
+from app.services.rating_trend_service import rating_trend_service
+
+
+@pytest.fixture
+def school_page():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    db = factory()
+    db.add_all([RatingCategory(id=1, name="academics", weight=2.0), RatingCategory(id=2, name="safety")])
+    db.add(School(id=1, name="Sunrise School", city="Pune", enrollment=900, facilities={"sports": ["Cricket"]}, programs=["Robotics"]))
+    now = datetime.utcnow()
+    for index in range(8):
+        db.add(Review(school_id=1, overall_rating=2 + index % 4, content=f"Review {index}", created_at=now - timedelta(days=20 * index),
+                      status="rejected" if index == 5 else "approved"))
+        db.add(Rating(school_id=1, category_id=1 + index % 2, rating_value=3 + index % 3))
+    db.commit()
+    rating_stats_service.rebuild(db)
+    rating_trend_service.rebuild(db)
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    def override_get_db():
+        session = factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    try:
+        yield TestClient(app), db, statements
+    finally:
+        app.dependency_overrides.clear()
+        db.close()
+
+
+def test_page_bundles_the_school_endpoints(school_page):
+    client, _, statements = school_page
+    statements.clear()
+    page = client.get("/api/v1/schools/1/page", params={"review_limit": 5}).json()
+    bundled_statements = len(statements)
+
+    statements.clear()
+    assert page["school"] == client.get("/api/v1/schools/1").json()
+    assert page["ratings"] == client.get("/api/v1/schools/1/ratings").json()
+    assert page["trends"] == client.get("/api/v1/schools/1/trends").json()
+    reviews = client.get("/api/v1/schools/1/reviews", params={"limit": 5}).json()
+    assert bundled_statements < len(statements)
+
+    assert page["reviews"]["total_count"] == reviews["total_count"] == 7
+    assert [review["id"] for review in page["reviews"]["reviews"]] == [review["id"] for review in reviews["reviews"]]
+    assert page["school"]["facilities"] == {"sports": ["Cricket"]} and page["school"]["total_reviews"] == 8
+
+    partial = client.get("/api/v1/schools/1/page", params={"include": "reviews"}).json()
+    assert partial["ratings"] is None and partial["trends"] is None and partial["reviews"]["total_count"] == 7
+
+    assert client.get("/api/v1/schools/2/page").status_code == 404
+    assert client.get("/api/v1/schools/1/page", params={"include": "ratings,photos"}).status_code == 400
+
+
+def test_page_etag_revalidates(school_page):
+    client, db, _ = school_page
+    response = client.get("/api/v1/schools/1/page")
+    etag = response.headers["etag"]
+    assert client.get("/api/v1/schools/1/page", params={"include": "ratings"}).headers["etag"] != etag
+
+    unchanged = client.get("/api/v1/schools/1/page", headers={"If-None-Match": f'"stale", {etag}'})
+    assert unchanged.status_code == 304 and unchanged.headers["etag"] == etag and not unchanged.content
+
+    db.add(Review(school_id=1, overall_rating=5, content="New review", status="approved"))
+    db.commit()
+    changed = client.get("/api/v1/schools/1/page", headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.headers["etag"] != etag
@@ -0,0 +1,117 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.database import Base, get_db
+import app.models_member  # noqa: F401  (tables referenced by reviews)
+from app.main import app
+from app.models import School, Review
+from app.schemas import AdvancedSearch
+from app.services.leaderboard_service import leaderboard_service
+from app.services.rating_stats_service import rating_stats_service
+from app.services.school_search_service import school_search_service
+from app.services.school_tag_service import school_tag_service
+
+
+@pytest.fixture
+def catalog():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    leaderboard_service.invalidate()
+    school_search_service.invalidate()
+    factory = sessionmaker(bind=engine)
+    db = factory()
+    rows = [
+        # name, city, board, medium, enrollment, established, facilities, reviews
+        ("Alpha", "Pune", "CBSE", "English", 1200, 1990, {"sports": ["Cricket"], "infrastructure": ["Library"]}, [4.5, 4.5]),
+        ("Bravo", "pune ", "CBSE", "English", 800, 2005, {"sports": ["Football"]}, [3.5]),
+        ("Charlie", "Pune", "ICSE", "Hindi", 400, 2012, None, [2.5]),
+        ("Delta", "Mumbai", "CBSE", "English", 2000, 1985, {"labs": ["Physics"], "infrastructure": ["Library"]}, [4.0]),
+        ("Echo", "Mumbai", "IB", "English", 300, 2018, None, []),
+    ]
+    for name, city, board, medium, enrollment, established, facilities, reviews in rows:
+        school = School(name=name, city=city, state="Maharashtra", board=board, medium_of_instruction=medium,
+                        enrollment=enrollment, established_year=established, facilities=facilities)
+        db.add(school)
+        db.flush()
+        for rating in reviews:
+            db.add(Review(school_id=school.id, overall_rating=rating, content="Review", status="approved"))
+    db.add(School(name="Inactive", city="Pune", board="CBSE", is_active=False))
+    db.commit()
+    rating_stats_service.rebuild(db)
+    school_tag_service.rebuild(db)
+    yield factory, engine
+    school_tag_service.invalidate()
+    school_search_service.invalidate()
+    leaderboard_service.invalidate()
+
+
+def facet(results, field):
+    return {item.value: item.count for item in results.facets[field]}
+
+
+def test_facets_leave_out_their_own_filter(catalog):
+    factory, _ = catalog
+    results = school_search_service.search(factory(), AdvancedSearch(city="PUNE", board="cbse"))
+
+    assert [school.name for school in results.results] == ["Alpha", "Bravo"]
+    assert results.total == 2
+    assert results.results[0].average_rating == 4.5 and results.results[0].total_reviews == 2
+    # Boards available in Pune, cities available for CBSE; spelling variants merged
+    assert facet(results, "board") == {"CBSE": 2, "ICSE": 1}
+    assert facet(results, "city") == {"Pune": 2, "Mumbai": 1}
+    assert facet(results, "medium_of_instruction") == {"English": 2}
+    assert facet(results, "rating") == {"4-5": 1, "3-4": 1}
+
+
+def test_range_filters_and_sorting(catalog):
+    factory, _ = catalog
+    db = factory()
+
+    by_enrollment = school_search_service.search(db, AdvancedSearch(sort_by="enrollment", sort_order="asc", min_enrollment=350))
+    assert [school.name for school in by_enrollment.results] == ["Charlie", "Bravo", "Alpha", "Delta"]
+
+    # Unrated schools sort last whichever the direction
+    by_rating = school_search_service.search(db, AdvancedSearch(sort_by="rating", sort_order="asc"))
+    assert by_rating.results[-1].name == "Echo"
+    assert facet(by_rating, "rating") == {"4-5": 2, "3-4": 1, "2-3": 1, "unrated": 1}
+
+    library = school_search_service.search(db, AdvancedSearch(has_facilities=["library"], established_before=2000, sort_by="name"))
+    assert [school.name for school in library.results] == ["Delta", "Alpha"]
+
+    rated = school_search_service.search(db, AdvancedSearch(min_rating=3.0, query="a", limit=1))
+    assert len(rated.results) == 1 and rated.total == 3
+
+    with pytest.raises(ValueError):
+        school_search_service.validate(AdvancedSearch(sort_by="popularity"))
+
+
+def test_search_endpoint_uses_one_grouped_query_for_facets(catalog):
+    factory, engine = catalog
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    def override_get_db():
+        session = factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    try:
+        client = TestClient(app)
+        body = client.post("/api/v1/schools/search", json={"state": "maharashtra", "sort_by": "name", "sort_order": "asc"}).json()
+        assert body["total"] == 5 and body["results"][0]["name"] == "Alpha"
+        assert {item["value"] for item in body["facets"]["board"]} == {"CBSE", "ICSE", "IB"}
+        grouped = [statement for statement in statements if "GROUP BY" in statement]
+        assert len(grouped) == 1
+
+        # Facet-only changes reuse the cached grouping
+        client.post("/api/v1/schools/search", json={"state": "maharashtra", "board": "IB"})
+        assert len([statement for statement in statements if "GROUP BY" in statement]) == 1
+
+        assert client.post("/api/v1/schools/search", json={"sort_order": "sideways"}).status_code == 400
+    finally:
+        app.dependency_overrides.clear()
@@ -0,0 +1,123 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.database import Base, get_db
+import app.models_member  # noqa: F401  (tables referenced by reviews)
+from app.main import app
+from app.models import School, SchoolTag
+from app.schemas import AdvancedSearch
+from app.services import school_search_service as search_module
+from app.services.school_search_service import school_search_service
+from app.services.school_tag_service import bitmap_ids, school_tag_service, school_tags
+
+
+@pytest.fixture
+def catalog():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    school_search_service.invalidate()
+    factory = sessionmaker(bind=engine)
+    db = factory()
+    rows = [
+        ("Alpha", {"sports": ["Swimming Pool", "Cricket ground"], "infrastructure": ["Library"]}, ["Robotics"]),
+        ("Bravo", {"sports": ["Football"], "labs": ["Robotics lab"]}, None),
+        ("Charlie", {"infrastructure": ["Library", "School bus transport"]}, ["Debate"]),
+        ("Delta", None, None),
+    ]
+    for name, facilities, programs in rows:
+        db.add(School(name=name, city="Pune", facilities=facilities, programs=programs))
+    db.add(School(name="Inactive", city="Pune", facilities={"sports": ["Swimming"]}, is_active=False))
+    db.commit()
+    school_tag_service.rebuild(db)
+    yield factory
+    school_tag_service.invalidate()
+    school_search_service.invalidate()
+
+
+def names(db, bits):
+    return sorted(name for (name,) in db.query(School.name).filter(School.id.in_(bitmap_ids(bits))))
+
+
+def test_school_tags_normalize_facilities_and_programs():
+    tags = school_tags({"sports": ["Swimming Pool"], "labs": [], "Arts": "Music room"}, ["Robotics Club"])
+    assert tags == {"facility:sports", "facility:swimming", "facility:arts", "facility:music", "program:robotics-club"}
+    assert school_tags(None, None) == set()
+
+
+def test_boolean_filters_match_sql_fallback(catalog):
+    db = catalog()
+    cases = [
+        (["library"], [], []),
+        (["sports"], [], ["swimming"]),
+        ([], ["swimming", "transport"], []),
+        (["robotics"], [], []),  # the Alpha program and the Bravo lab
+        (["program:robotics"], [], []),
+        (["sports", "library"], [], []),
+        ([], [], ["sports"]),
+        (["observatory"], [], []),
+    ]
+    expected = [
+        ["Alpha", "Charlie"], ["Bravo"], ["Alpha", "Charlie"], ["Alpha", "Bravo"],
+        ["Alpha"], ["Alpha"], ["Charlie", "Delta"], [],
+    ]
+    for (all_of, any_of, none_of), names_expected in zip(cases, expected):
+        assert names(db, school_tag_service.match(db, all_of, any_of, none_of)) == names_expected
+        by_sql = db.query(School.name).filter(
+            School.is_active == True, *school_tag_service.sql_filters(all_of, any_of, none_of)
+        ).order_by(School.name)
+        assert [name for (name,) in by_sql] == names_expected
+
+
+def test_refresh_school_updates_rows_and_bits(catalog):
+    db = catalog()
+    delta = db.query(School).filter(School.name == "Delta").one()
+    delta.facilities = {"sports": ["Swimming"]}
+    school_tag_service.refresh_school(db, delta)
+    db.commit()
+    assert names(db, school_tag_service.match(db, ["swimming"])) == ["Alpha", "Delta"]
+    assert {tag for (tag,) in db.query(SchoolTag.tag).filter(SchoolTag.school_id == delta.id)} == {
+        "facility:sports", "facility:swimming"
+    }
+
+    alpha = db.query(School).filter(School.name == "Alpha").one()
+    alpha.is_active = False
+    school_tag_service.refresh_school(db, alpha)
+    db.commit()
+    assert names(db, school_tag_service.match(db, ["swimming"])) == ["Delta"]
+    # A reload from the table agrees with the incremental updates
+    school_tag_service.invalidate()
+    assert names(db, school_tag_service.match(db, ["swimming"])) == ["Delta"]
+
+
+def test_search_and_vocabulary_endpoints(catalog, monkeypatch):
+    factory = catalog
+    db = factory()
+    search = AdvancedSearch(has_facilities=["library"], exclude_facilities=["transport"], sort_by="name", sort_order="asc")
+    assert [school.name for school in school_search_service.search(db, search).results] == ["Alpha"]
+    # Large matches go to SQL as EXISTS filters instead of an id list
+    monkeypatch.setattr(search_module, "MAX_ID_FILTER", 0)
+    school_search_service.invalidate()
+    assert [school.name for school in school_search_service.search(db, search).results] == ["Alpha"]
+
+    def override_get_db():
+        session = factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    try:
+        client = TestClient(app)
+        body = client.post("/api/v1/schools/search", json={"any_facilities": ["football", "debate"], "sort_by": "name", "sort_order": "asc"}).json()
+        assert [school["name"] for school in body["results"]] == ["Bravo", "Charlie"]
+
+        vocabulary = client.get("/api/v1/schools/facilities", params={"kind": "facility"}).json()
+        assert {"tag": "facility:library", "name": "Library", "count": 2} in vocabulary
+        assert {"tag": "facility:swimming", "name": "Swimming", "count": 1} in vocabulary
+        assert all(item["tag"].startswith("facility:") for item in vocabulary)
+        assert client.get("/api/v1/schools/facilities", params={"kind": "spaceport"}).status_code == 400
+    finally:
+        app.dependency_overrides.clear()
@@ -0,0 +1,129 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.config import settings
+from app.database import Base, get_db
+import app.models_member  # noqa: F401  (tables referenced by reviews)
+from app.api import scraping as scraping_api
+from app.main import app
+from app.models import ScrapingJob
+from app.models_scraping import ScrapingCall
+from app.services import llm_cache_service, scraping_cost_service as cost_module
+from app.services.scraping_cost_service import ScrapingBudgetExceeded, estimate_cost, scraping_cost_service
+from app.services.scraping_service import SchoolScrapingService, PerplexityAPIError
+
+USAGE = {"prompt_tokens": 1000, "completion_tokens": 2000, "total_tokens": 3000}
+
+
+@pytest.fixture
+def session_factory(monkeypatch):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    monkeypatch.setattr(cost_module, "SessionLocal", factory)
+    monkeypatch.setattr(llm_cache_service, "SessionLocal", factory)
+    monkeypatch.setattr(settings, "scraping_max_cost_per_job_usd", 0.1)
+    monkeypatch.setattr(settings, "scraping_max_cost_per_day_usd", 0.0)
+    return factory
+
+
+def completion(content="[]"):
+    return {"model": "sonar-pro", "choices": [{"message": {"content": content}}], "usage": USAGE}
+
+
+def test_estimate_cost_uses_model_pricing_or_reported_cost():
+    assert estimate_cost("sonar-pro", USAGE) == pytest.approx(0.003 + 0.03 + 0.006)
+    assert estimate_cost("sonar-pro", {**USAGE, "cost": {"total_cost": 0.012}}) == 0.012
+
+
+@pytest.mark.asyncio
+async def test_calls_are_recorded_per_attempt_and_budget_stops_the_job(session_factory):
+    db = session_factory()
+    job = ScrapingJob(region="Pune")
+    db.add(job)
+    db.commit()
+    service = SchoolScrapingService()
+
+    async def failing():
+        raise PerplexityAPIError("Perplexity API rate limit exceeded.", 429)
+
+    async def succeeding():
+        return completion()
+
+    data = {"model": "sonar-pro", "messages": [{"role": "user", "content": "schools in Pune"}]}
+    with pytest.raises(PerplexityAPIError):
+        await service._fetch_completion(data, failing, region="Pune", job_id=job.id, attempt=1)
+    await service._fetch_completion(data, succeeding, region="Pune", job_id=job.id, attempt=2)
+    # Identical request is served from cache at no cost
+    await service._fetch_completion(data, succeeding, region="Pune", job_id=job.id)
+
+    calls = db.query(ScrapingCall).filter(ScrapingCall.job_id == job.id).order_by(ScrapingCall.id).all()
+    assert [(call.attempt, call.outcome) for call in calls] == [(1, "http_429"), (2, "success"), (1, "cache_hit")]
+    assert calls[1].total_tokens == 3000 and calls[1].cost_usd > 0
+    assert calls[0].cost_usd == calls[2].cost_usd == 0
+
+    # A different request would exceed the $0.10 job budget once spend reaches it
+    for _ in range(2):
+        scraping_cost_service.record_call(model="sonar-pro", outcome="success", job_id=job.id, usage=USAGE)
+    other = {"model": "sonar-pro", "messages": [{"role": "user", "content": "schools in Baner"}]}
+    with pytest.raises(ScrapingBudgetExceeded):
+        await service._fetch_completion(other, succeeding, region="Pune", job_id=job.id)
+    # Other jobs are unaffected by this job's budget
+    await service._fetch_completion(other, succeeding, region="Pune", job_id=None)
+
+
+def test_cost_overview_reports_cost_per_new_school(session_factory):
+    db = session_factory()
+    db.add_all([ScrapingJob(region="Pune", schools_created=4), ScrapingJob(region="pune", schools_created=6)])
+    db.commit()
+    for _ in range(2):
+        scraping_cost_service.record_call(model="sonar-pro", outcome="success", region="Pune", usage=USAGE)
+    scraping_cost_service.record_call(model="sonar-pro", outcome="timeout", region="Pune")
+
+    overview = scraping_cost_service.get_cost_overview(db)
+    assert overview["api_calls"] == 3
+    assert overview["calls_by_outcome"] == {"success": 2, "timeout": 1}
+    assert overview["new_schools"] == 10
+    assert overview["by_region"][0]["region"] == "pune"
+    assert overview["by_region"][0]["cost_per_new_school_usd"] == pytest.approx(2 * 0.039 / 10, abs=1e-4)
+
+
+def test_retried_job_gets_a_fresh_budget_and_cost_per_school(session_factory, monkeypatch):
+    db = session_factory()
+    job = ScrapingJob(region="Pune", status="completed", schools_created=10)
+    db.add(job)
+    db.commit()
+    for _ in range(3):
+        scraping_cost_service.record_call(model="sonar-pro", outcome="success", job_id=job.id, region="Pune", usage=USAGE)
+    with pytest.raises(ScrapingBudgetExceeded):
+        scraping_cost_service.check_budget(job.id)
+
+    async def run_scraping_job(job_id, cache_only=False, incremental=None):
+        pass
+
+    def override_get_db():
+        session = session_factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    monkeypatch.setattr(scraping_api, "run_scraping_job", run_scraping_job)
+    app.dependency_overrides[get_db] = override_get_db
+    try:
+        assert TestClient(app).post(f"/api/v1/scraping/jobs/{job.id}/retry").status_code == 200
+    finally:
+        app.dependency_overrides.clear()
+    db.refresh(job)
+    assert job.run == 2 and job.schools_created == 0
+
+    # The new run starts with the whole budget, and is costed against its own schools
+    scraping_cost_service.check_budget(job.id)
+    scraping_cost_service.record_call(model="sonar-pro", outcome="success", job_id=job.id, region="Pune", usage=USAGE)
+    job.schools_created = 2
+    db.commit()
+    overview = scraping_cost_service.get_cost_overview(db)
+    assert overview["total_cost_usd"] == pytest.approx(4 * 0.039, abs=1e-4)
+    assert overview["cost_per_new_school_usd"] == overview["by_region"][0]["cost_per_new_school_usd"] == pytest.approx(0.039 / 2, abs=1e-4)
@@ -0,0 +1,85 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from app.config import settings
+from app.services.scraping_service import SchoolScrapingService
+
+SCHOOLS = [
+    {"name": "Vidya Valley School", "city": "Pune", "address": "Sus Road, Pune", "board": "CBSE"},
+    {"name": "St. Mary's School", "city": "Pune", "address": "Camp, Pune", "board": "ICSE",
+     "facilities": {"sports": ["Hockey"]}},
+    {"name": "Elsewhere High", "city": "Nagpur", "address": "Nagpur", "board": "CBSE"},
+]
+# Pause before the final chunk so early schools must arrive while the stream is open
+FINAL_CHUNK_DELAY = 0.5
+
+
+def sse_chunks():
+    content = json.dumps(SCHOOLS)
+    pieces = [content[i:i + 17] for i in range(0, len(content), 17)]
+    for index, piece in enumerate(pieces):
+        chunk = {"id": "cmpl-1", "model": "sonar-pro", "choices": [{"index": 0, "delta": {"content": piece}}]}
+        if index == len(pieces) - 1:
+            chunk["choices"][0]["finish_reason"] = "stop"
+            chunk["usage"] = {"prompt_tokens": 120, "completion_tokens": 90, "total_tokens": 210}
+        yield chunk
+
+
+class PerplexityStandIn(BaseHTTPRequestHandler):
+    """Minimal local stand-in for the Perplexity streaming completions endpoint"""
+    requests = []
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        PerplexityStandIn.requests.append(body)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        chunks = list(sse_chunks())
+        for index, chunk in enumerate(chunks):
+            if index == len(chunks) - 1:
+                time.sleep(FINAL_CHUNK_DELAY)
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.flush()
+        self.wfile.write(b"data: [DONE]\n\n")
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stand_in_url(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), PerplexityStandIn)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    PerplexityStandIn.requests = []
+    monkeypatch.setattr(settings, "perplexity_api_url", f"http://127.0.0.1:{server.server_port}/chat/completions")
+    yield
+    server.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_schools_are_ingested_before_stream_completes(stand_in_url):
+    service = SchoolScrapingService()
+    received = []
+
+    async def on_school(school):
+        received.append((time.perf_counter(), school["name"]))
+
+    data = {"model": "sonar-pro", "messages": [{"role": "user", "content": "schools in Pune"}]}
+    started = time.perf_counter()
+    completion = await service._stream_completion({}, data, "Pune", on_school)
+    finished = time.perf_counter()
+
+    assert PerplexityStandIn.requests[0]["stream"] is True
+    # Out-of-region school is filtered by the normal cleaning step
+    assert [name for _, name in received] == ["Vidya Valley School", "St. Mary's School"]
+    assert received[0][0] - started < finished - started - FINAL_CHUNK_DELAY / 2
+    assert received[1][1] == "St. Mary's School"
+
+    # The assembled completion matches the non-streaming shape for caching and replay
+    assert json.loads(completion["choices"][0]["message"]["content"]) == SCHOOLS
+    assert completion["choices"][0]["finish_reason"] == "stop"
+    assert completion["usage"]["total_tokens"] == 210
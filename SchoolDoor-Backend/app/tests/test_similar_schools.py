@@ -0,0 +1,117 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.config import settings
+from app.database import Base, get_db
+import app.models_member  # noqa: F401  (tables referenced by reviews)
+from app.main import app
+from app.models import School, Review
+from app.services.leaderboard_service import leaderboard_service
+from app.services.rating_stats_service import rating_stats_service
+from app.services.school_tag_service import school_tag_service
+from app.services.similar_school_service import similar_school_service, grade_range
+
+PUNE = (18.52, 73.86)
+MUMBAI = (19.08, 72.88)
+DELHI = (28.61, 77.21)
+
+
+@pytest.fixture
+def catalog(monkeypatch):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    monkeypatch.setattr(settings, "similar_index_refresh_seconds", 0.0)
+    leaderboard_service.invalidate()
+    similar_school_service.invalidate()
+    school_tag_service.invalidate()
+    factory = sessionmaker(bind=engine)
+    db = factory()
+    rows = [
+        # name, board, medium, grades, enrollment, facilities, location, reviews
+        ("Alpha", "CBSE", "English", "Nursery to 12", 1500, {"sports": ["Swimming Pool"], "labs": ["Robotics Lab"], "infrastructure": ["Library"]}, PUNE, [4.5]),
+        ("Bravo", "CBSE", "English", "LKG - 12th", 1300, {"sports": ["Swimming pool"], "labs": ["Robotics"], "infrastructure": ["Library"]}, PUNE, [4.0]),
+        ("Charlie", "CBSE", "English", "1 to 10", 900, {"infrastructure": ["Library"]}, MUMBAI, [3.5]),
+        ("Delta", "IB", "English", "Pre-K to 12", 600, {"sports": ["Tennis Court"], "arts": ["Music Room"]}, DELHI, [4.8]),
+        ("Echo", "State Board", "Marathi", "1 to 7", 300, {}, PUNE, [2.5]),
+    ]
+    for name, board, medium, grades, enrollment, facilities, (latitude, longitude), reviews in rows:
+        school = School(name=name, city="City", board=board, medium_of_instruction=medium, grade_levels=grades,
+                        enrollment=enrollment, facilities=facilities, latitude=latitude, longitude=longitude)
+        db.add(school)
+        db.flush()
+        for rating in reviews:
+            db.add(Review(school_id=school.id, overall_rating=rating, content="Review", status="approved"))
+    db.add(School(name="Foxtrot", board="CBSE", medium_of_instruction="English", grade_levels="Nursery to 12",
+                  facilities={"sports": ["Swimming Pool"], "labs": ["Robotics Lab"], "infrastructure": ["Library"]}, latitude=PUNE[0], longitude=PUNE[1], is_active=False))
+    db.commit()
+    rating_stats_service.rebuild(db)
+    school_tag_service.rebuild(db)
+
+    def override_get_db():
+        session = factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    try:
+        yield factory, TestClient(app)
+    finally:
+        app.dependency_overrides.clear()
+        similar_school_service.invalidate()
+        school_tag_service.invalidate()
+        leaderboard_service.invalidate()
+
+
+def test_grade_range():
+    assert grade_range("Nursery to 12") == (-2, 12)
+    assert grade_range("LKG - 10th") == (-1, 10)
+    assert grade_range("Pre-K to 5") == (-2, 5)
+    assert grade_range("Class 1 to 8") == (1, 8)
+    assert grade_range("K-12") == (0, 12)
+    assert grade_range("") is None
+
+
+def test_similar_schools_ranked_by_cosine(catalog):
+    factory, client = catalog
+    alpha = factory().query(School).filter(School.name == "Alpha").one()
+    body = client.get(f"/api/v1/schools/{alpha.id}/similar").json()
+    names = [school["name"] for school in body]
+    # Not itself, and not the inactive look-alike
+    assert names[:2] == ["Bravo", "Charlie"] and set(names) == {"Bravo", "Charlie", "Delta", "Echo"}
+    assert 0.9 < body[0]["similarity"] <= 1.0
+    assert body[0]["similarity"] > body[1]["similarity"] > body[-1]["similarity"]
+    assert body[0]["average_rating"] == 4.0 and body[0]["total_reviews"] == 1
+
+    assert len(client.get(f"/api/v1/schools/{alpha.id}/similar", params={"limit": 1}).json()) == 1
+    assert client.get("/api/v1/schools/999/similar").status_code == 404
+
+
+def test_index_follows_writes(catalog):
+    factory, client = catalog
+    db = factory()
+    alpha = db.query(School).filter(School.name == "Alpha").one()
+    delta = db.query(School).filter(School.name == "Delta").one()
+    assert client.get(f"/api/v1/schools/{alpha.id}/similar").json()[0]["name"] == "Bravo"
+
+    # Delta becomes a copy of Alpha; Bravo loses its look
+    client.put(f"/api/v1/schools/{delta.id}", json={
+        "board": "CBSE", "grade_levels": "Nursery to 12", "enrollment": 1500,
+        "facilities": {"sports": ["Swimming Pool"], "labs": ["Robotics Lab"], "infrastructure": ["Library"]}, "latitude": PUNE[0], "longitude": PUNE[1]
+    })
+    db.add(Review(school_id=delta.id, overall_rating=4.2, content="Review", status="approved"))
+    db.commit()
+    rating_stats_service.refresh_schools(db, [delta.id])
+    body = client.get(f"/api/v1/schools/{alpha.id}/similar").json()
+    assert body[0]["name"] == "Delta" and body[0]["similarity"] > 0.99
+
+    golf = School(name="Golf", board="CBSE", medium_of_instruction="English", grade_levels="Nursery to 12", enrollment=1500,
+                  facilities={"sports": ["Swimming Pool"], "labs": ["Robotics Lab"], "infrastructure": ["Library"]}, latitude=PUNE[0], longitude=PUNE[1])
+    db.add(golf)
+    db.flush()
+    school_tag_service.refresh_school(db, golf)
+    db.commit()
+    assert "Golf" in [school["name"] for school in client.get(f"/api/v1/schools/{alpha.id}/similar", params={"limit": 3}).json()]
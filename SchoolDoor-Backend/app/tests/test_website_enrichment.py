@@ -0,0 +1,167 @@
+import hashlib
+import threading
+import time
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+import app.models_member  # noqa: F401  (mapper for Review.member)
+from app.models import School, SchoolTag, SchoolChange
+from app.models_scraping import WebsitePage
+from app.services.website_enrichment_service import WebsiteEnrichmentService
+
+FIXTURES = Path(__file__).parent / "fixtures" / "websites"
+PER_HOST_DELAY = 0.2
+
+
+class FixtureSite(BaseHTTPRequestHandler):
+    """Serves one fixture site directory with ETag validation and request logging"""
+
+    def __init__(self, *args, site, log, **kwargs):
+        self.site = site
+        self.log = log
+        super().__init__(*args, **kwargs)
+
+    def do_GET(self):
+        self.log.append((time.monotonic(), self.path, self.headers.get("If-None-Match")))
+        path = FIXTURES / self.site / ("index.html" if self.path == "/" else self.path.lstrip("/"))
+        if not path.is_file():
+            self.send_response(404)
+            self.end_headers()
+            return
+        body = path.read_bytes()
+        etag = '"%s"' % hashlib.md5(body).hexdigest()
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def sites():
+    servers, logs = {}, {}
+    for site in ("greenfield", "riverside"):
+        logs[site] = []
+        server = ThreadingHTTPServer(("127.0.0.1", 0), partial(FixtureSite, site=site, log=logs[site]))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers[site] = server
+    yield {site: f"http://127.0.0.1:{server.server_port}/" for site, server in servers.items()}, logs
+    for server in servers.values():
+        server.shutdown()
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    School.__table__.create(engine)
+    WebsitePage.__table__.create(engine)
+    SchoolTag.__table__.create(engine)
+    SchoolChange.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+def add_schools(db, urls):
+    schools = [
+        School(name="Greenfield Public School", city="Pune", website=urls["greenfield"]),
+        School(name="Riverside Convent School", city="Pune", website=urls["riverside"], phone="020 1111 2222"),
+    ]
+    db.add_all(schools)
+    db.commit()
+    return schools
+
+
+@pytest.mark.asyncio
+async def test_extracts_details_from_followed_pages(sites, db):
+    urls, logs = sites
+    greenfield, riverside = add_schools(db, urls)
+
+    result = await WebsiteEnrichmentService(db, per_host_delay=PER_HOST_DELAY).enrich_schools([greenfield, riverside])
+
+    assert result["fetched"] == 5
+    assert greenfield.phone == "+912025671234"
+    assert greenfield.email == "office@greenfield.example.in"
+    assert greenfield.principal_name == "Dr. Meera Kulkarni"
+    assert greenfield.facilities["sports"] == ["Badminton", "Basketball", "Cricket", "Swimming"]
+    assert greenfield.facilities["labs"] == ["Chemistry", "Physics", "Robotics"]
+    assert {"Library", "Auditorium"} <= set(greenfield.facilities["infrastructure"])
+    # Existing values are kept; missing ones are filled
+    assert riverside.phone == "020 1111 2222"
+    assert riverside.email == "info@riverside.example.in"
+
+    # Only relevant same-site pages were followed, one request at a time per host
+    assert sorted(path for _, path, _ in logs["greenfield"]) == ["/", "/about.html", "/contact.html", "/facilities.html"]
+    times = [at for at, _, _ in logs["greenfield"]]
+    assert all(later - earlier >= PER_HOST_DELAY * 0.9 for earlier, later in zip(times, times[1:]))
+    # Sites are crawled concurrently
+    assert logs["riverside"][0][0] < times[1]
+
+
+@pytest.mark.asyncio
+async def test_unchanged_pages_are_revalidated_not_refetched(sites, db):
+    urls, logs = sites
+    greenfield, riverside = add_schools(db, urls)
+    await WebsiteEnrichmentService(db, per_host_delay=0).enrich_schools([greenfield, riverside])
+    greenfield.principal_name = None
+    db.commit()
+
+    result = await WebsiteEnrichmentService(db, per_host_delay=0).enrich_schools([greenfield, riverside])
+
+    assert result["fetched"] == 0
+    assert result["not_modified"] == 5
+    assert all(etag for _, _, etag in logs["greenfield"][4:])
+    # Details stored with the page are reused on 304
+    assert greenfield.principal_name == "Dr. Meera Kulkarni"
+
+
+@pytest.mark.asyncio
+async def test_schools_sharing_a_website_fetch_it_once(sites, db):
+    urls, logs = sites
+    greenfield, _ = add_schools(db, urls)
+    branch = School(name="Greenfield Public School (Junior Wing)", city="Pune", website=urls["greenfield"])
+    db.add(branch)
+    db.commit()
+
+    result = await WebsiteEnrichmentService(db, per_host_delay=0).enrich_schools([greenfield, branch])
+
+    assert result["fetched"] == 4 and len(logs["greenfield"]) == 4
+    assert {item["school_id"] for item in result["enriched"]} == {greenfield.id, branch.id}
+    assert branch.principal_name == greenfield.principal_name == "Dr. Meera Kulkarni"
+    assert db.query(WebsitePage).count() == 4
+
+
+@pytest.mark.asyncio
+async def test_llm_receives_condensed_markdown_only_when_needed(sites, db):
+    urls, _ = sites
+    greenfield, riverside = add_schools(db, urls)
+    prompts = {}
+
+    async def llm_extractor(school, markdown):
+        prompts[school.name] = markdown
+        return {"principal_name": "Sr. Anita D'Souza", "email": "ignored@example.com"}
+
+    service = WebsiteEnrichmentService(db, llm_extractor=llm_extractor, per_host_delay=0)
+    await service.enrich_schools([greenfield, riverside])
+
+    # Greenfield's pages had everything; Riverside has no principal or facilities on its site
+    assert list(prompts) == ["Riverside Convent School"]
+    markdown = prompts["Riverside Convent School"]
+    html = (FIXTURES / "riverside" / "index.html").read_text()
+    assert "# Riverside Convent School" in markdown
+    assert "<" not in markdown and len(markdown) < len(html) / 2
+    assert riverside.principal_name == "Sr. Anita D'Souza"
+    # Values found on the website win over the LLM's
+    assert riverside.email == "info@riverside.example.in"
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Benchmark writing the compressed catalog dump.
+Uses the synthetic catalog of bench_school_lists and times a full dump
+against incremental versions merged from the previous dump after 0.1%,
+1% and 10% of schools changed, with the dump size next to the
+uncompressed JSON lines.
+
+Usage: python benchmarks/bench_catalog_dump.py [schools]   (default: 20000)
+"""
+import gzip
+import logging
+import random
+import sys
+import tempfile
+import time
+
+from bench_school_lists import build
+from app.config import settings
+from app.models import School
+from app.services.catalog_dump_service import catalog_dump_service
+from app.services.school_change_service import school_change_service
+
+
+def main():
+    schools = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    factory = build(schools)
+    db = factory()
+    logging.disable(logging.INFO)
+    settings.catalog_dump_dir = tempfile.mkdtemp(prefix="catalog-dump-")
+    rng = random.Random(11)
+
+    started = time.perf_counter()
+    manifest = catalog_dump_service.generate(db, full=True)
+    elapsed = (time.perf_counter() - started) * 1000
+    file = manifest["files"][0]
+    with gzip.open(f"{settings.catalog_dump_dir}/{file['name']}", "rb") as dump:
+        raw = sum(len(line) for line in dump)
+    print(f"{schools} schools: {file['bytes'] / 1e6:.1f} MB gzip, {raw / 1e6:.1f} MB JSON lines")
+    print(f"  {'full':<16} {elapsed:8.1f} ms")
+
+    for share in (0.001, 0.01, 0.1):
+        changed = rng.sample(range(1, schools + 1), max(int(schools * share), 1))
+        for school_id in changed:
+            db.get(School, school_id).enrollment = rng.randint(100, 4000)
+        school_change_service.record(db, changed)
+        db.commit()
+        started = time.perf_counter()
+        manifest = catalog_dump_service.generate(db)
+        elapsed = (time.perf_counter() - started) * 1000
+        assert manifest["incremental_from"] is not None
+        print(f"  {f'{share:.1%} changed':<16} {elapsed:8.1f} ms")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Benchmark the in-memory catalog snapshot against SQL for public school lists.
+Loads a synthetic catalog into an in-memory SQLite database and, for a few
+typical list filters, times one page of ids plus the matching total both
+with SQL (the query get_schools runs, plus a count) and with
+catalog_snapshot_service.select. Also times the full snapshot load and a
+delta refresh after 100 schools changed.
+
+Usage: python benchmarks/bench_catalog_snapshot.py [schools ...]   (default: 10000 100000 1000000)
+"""
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("PERPLEXITY_API_KEY", "benchmark")
+
+from sqlalchemy import and_, create_engine, func, insert, or_
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.config import settings
+from app.database import Base
+import app.models_member  # noqa: F401  (tables referenced by reviews)
+from app.models import School, SchoolRatingStats
+from app.schemas import SchoolSearch
+from app.services.catalog_snapshot_service import catalog_snapshot_service
+
+CITIES = ["Pune", "Mumbai", "Navi Mumbai", "Delhi", "New Delhi", "Bengaluru", "Chennai", "Hyderabad", "Kolkata", "Jaipur"]
+STATES = ["Maharashtra", "Delhi", "Karnataka", "Tamil Nadu", "Telangana", "West Bengal", "Rajasthan"]
+BOARDS = ["CBSE", "ICSE", "State Board", "IB", "IGCSE"]
+WORDS = ["Public", "International", "Vidyalaya", "Academy", "Convent", "Model", "Global", "High"]
+BATCH = 50000
+RUNS = 10
+
+SEARCHES = {
+    "first page": SchoolSearch(),
+    "city": SchoolSearch(city="mumbai"),
+    "name text": SchoolSearch(query="convent"),
+    "board + min rating, by rating": SchoolSearch(board="cbse", min_rating=4.0, sort_by="rating"),
+    "by enrollment, page 50": SchoolSearch(sort_by="enrollment", offset=1000),
+}
+
+
+def build(schools: int):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    rng = random.Random(7)
+    # Added over the past year, so a delta refresh only sees what the benchmark changes
+    first_added = datetime.utcnow() - timedelta(days=366)
+    spacing = timedelta(days=365) / schools
+    for start in range(1, schools + 1, BATCH):
+        ids = range(start, min(start + BATCH, schools + 1))
+        db.execute(insert(School), [
+            {"id": i, "name": f"{rng.choice(WORDS)} {rng.choice(WORDS)} School {i}", "city": rng.choice(CITIES),
+             "state": rng.choice(STATES), "board": rng.choice(BOARDS), "enrollment": rng.randint(100, 4000),
+             "is_active": rng.random() > 0.05, "created_at": first_added + i * spacing}
+            for i in ids
+        ])
+        stats = []
+        for i in ids:
+            if rng.random() < 0.7:
+                count = rng.randint(1, 40)
+                average = min(5.0, max(1.0, rng.gauss(3.6, 0.6)))
+                stats.append({"school_id": i, "category_id": None, "rating_count": count,
+                              "rating_sum": count * average, "score": (5 * 3.6 + count * average) / (5 + count), "updated_at": first_added + i * spacing})
+        db.execute(insert(SchoolRatingStats), stats)
+    db.commit()
+    return db
+
+
+def sql_page(db, search: SchoolSearch):
+    """The filters get_schools applies in SQL, one page of ids and the total"""
+    query = db.query(School.id).filter(School.is_active == True)
+    for name in ("city", "state", "school_type", "board", "medium_of_instruction"):
+        if getattr(search, name):
+            query = query.filter(getattr(School, name).ilike(f"%{getattr(search, name)}%"))
+    if search.query:
+        query = query.filter(or_(School.name.ilike(f"%{search.query}%"), School.city.ilike(f"%{search.query}%"),
+                                 School.state.ilike(f"%{search.query}%")))
+    if search.min_rating is not None or search.sort_by == "rating":
+        query = query.outerjoin(SchoolRatingStats, and_(SchoolRatingStats.school_id == School.id, SchoolRatingStats.category_id.is_(None)))
+        if search.min_rating is not None:
+            query = query.filter(SchoolRatingStats.rating_sum / SchoolRatingStats.rating_count >= search.min_rating)
+    if search.sort_by == "rating":
+        query = query.order_by(SchoolRatingStats.score.desc().nulls_last(), School.id)
+    elif search.sort_by == "enrollment":
+        query = query.order_by(School.enrollment.desc().nulls_last(), School.id)
+    else:
+        query = query.order_by(School.id)
+    ids = [school_id for (school_id,) in query.offset(search.offset).limit(search.limit)]
+    total = query.order_by(None).with_entities(func.count(School.id)).scalar()
+    return ids, total
+
+
+def timed(fn, runs=RUNS):
+    fn()
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def run(schools: int):
+    db = build(schools)
+    settings.catalog_snapshot_refresh_seconds = 1e9
+    started = time.perf_counter()
+    catalog_snapshot_service.load(db)
+    print(f"{schools} schools: snapshot loaded in {time.perf_counter() - started:.2f} s")
+    print(f"  {'':<32} {'sql':>11} {'snapshot':>11}")
+    for label, search in SEARCHES.items():
+        ids, total = sql_page(db, search)
+        rows, snapshot_total = catalog_snapshot_service.select(db, search)
+        assert [school_id for school_id, _, _ in rows] == ids and snapshot_total == total, label
+        runs = 3 if schools >= 1_000_000 else RUNS
+        sql_ms = timed(lambda: sql_page(db, search), runs)
+        snapshot_ms = timed(lambda: catalog_snapshot_service.select(db, search), runs)
+        print(f"  {label:<32} {sql_ms:8.2f} ms {snapshot_ms:8.2f} ms  ({total} matching)")
+
+    rng = random.Random(11)
+    for school in db.query(School).filter(School.id.in_(rng.sample(range(1, schools + 1), 100))):
+        school.city = rng.choice(CITIES)
+        school.enrollment = rng.randint(100, 4000)
+    db.commit()
+    started = time.perf_counter()
+    applied = catalog_snapshot_service.refresh(db)
+    print(f"  {'delta refresh (100 changed)':<32} {(time.perf_counter() - started) * 1000:8.2f} ms  ({applied} rows applied)")
+    catalog_snapshot_service.invalidate()
+    db.close()
+
+
+def main():
+    for schools in [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000]:
+        run(schools)
+
+
+if __name__ == "__main__":
+    main()
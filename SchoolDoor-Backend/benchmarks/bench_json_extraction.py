@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark JSON extraction from LLM responses.
+Compares the single-pass scanner with the previous four-strategy regex
+extractor on the synthetic response corpus: recovery rate and time per case.
+
+Usage: python benchmarks/bench_json_extraction.py
+"""
+import json
+import multiprocessing
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.llm_json_parser import extract_json_objects
+from app.tests.llm_response_corpus import build_case, CASE_KINDS
+
+# The legacy nested-bracket regex backtracks catastrophically on some inputs
+LEGACY_TIMEOUT_SECONDS = 10
+
+
+def legacy_extract(content):
+    """The multi-strategy extractor previously used by the scraping service"""
+    content = content.strip()
+    json_start = content.find('[')
+    json_end = content.rfind(']') + 1
+    if json_start != -1 and json_end != -1:
+        try:
+            data = json.loads(content[json_start:json_end])
+            if isinstance(data, list) and data:
+                return data
+        except json.JSONDecodeError:
+            pass
+    for match in re.findall(r'\[(?:[^\[\]]*|\[[^\[\]]*\])*\]', content, re.DOTALL):
+        try:
+            data = json.loads(match)
+            if isinstance(data, list) and data:
+                return data
+        except json.JSONDecodeError:
+            continue
+    objects = []
+    for obj_str in re.findall(r'\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}', content, re.DOTALL):
+        try:
+            obj = json.loads(obj_str)
+            if isinstance(obj, dict) and obj.get('name'):
+                objects.append(obj)
+        except json.JSONDecodeError:
+            continue
+    return objects
+
+
+def run(extractor, corpus):
+    recovered = expected_total = 0
+    start = time.perf_counter()
+    for content, expected in corpus:
+        try:
+            names = [o.get("name") for o in extractor(content) if isinstance(o, dict)]
+        except Exception:
+            names = []
+        recovered += len(set(names) & set(expected))
+        expected_total += len(expected)
+    elapsed = time.perf_counter() - start
+    return recovered / expected_total, elapsed / len(corpus)
+
+
+def _run_legacy(corpus, results):
+    results.put(run(legacy_extract, corpus))
+
+
+def run_legacy_with_timeout(corpus):
+    results = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_run_legacy, args=(corpus, results))
+    process.start()
+    process.join(LEGACY_TIMEOUT_SECONDS)
+    if process.is_alive():
+        process.terminate()
+        return None
+    return results.get()
+
+
+def main():
+    print(f"{'case':<16}{'legacy recov':>14}{'legacy ms':>12}{'scanner recov':>15}{'scanner ms':>12}")
+    for kind in CASE_KINDS:
+        rng = random.Random(1)
+        corpus = [build_case(kind, 10, rng) for _ in range(50)]
+        legacy = run_legacy_with_timeout(corpus)
+        new_rate, new_time = run(extract_json_objects, corpus)
+        if legacy is None:
+            legacy_cols = f"{'timeout':>14}{'>' + str(LEGACY_TIMEOUT_SECONDS * 1000 // len(corpus)):>12}"
+        else:
+            legacy_cols = f"{legacy[0]:>14.0%}{legacy[1] * 1000:>12.3f}"
+        print(f"{kind:<16}{legacy_cols}{new_rate:>15.0%}{new_time * 1000:>12.3f}")
+
+    print("\nScaling (prose case, scanner only):")
+    base, _ = build_case("prose", 50, random.Random(2))
+    for factor in (1, 10, 100):
+        content = base * factor
+        start = time.perf_counter()
+        extract_json_objects(content)
+        elapsed = time.perf_counter() - start
+        print(f"  {len(content):>10,} chars  {elapsed * 1000:9.2f} ms  {elapsed / len(content) * 1e9:7.1f} ns/char")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Benchmark JSON serialization of one 100-item page.
+Times turning a page of school summaries, reviews and API key usage rows
+into response bytes the way FastAPI's default path does it (validate the
+response_model, dump it to python, json.dumps; jsonable_encoder for routes
+without one) and the way app.responses does it (a pre-built TypeAdapter's
+dump_json, or orjson for plain dicts), and checks both give the same bytes.
+
+Usage: python benchmarks/bench_json_responses.py [items]   (default: 100)
+"""
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("PERPLEXITY_API_KEY", "benchmark")
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from app.responses import FastJSONResponse, model_response
+from app.schemas import SchoolSummary, Review
+
+CITIES = ["Pune", "Mumbai", "Delhi", "Bengaluru", "Chennai", "Hyderabad", "Kolkata", "Jaipur"]
+BOARDS = ["CBSE", "ICSE", "State Board", "IB", "IGCSE"]
+CATEGORIES = ["academics", "facilities", "teachers", "safety", "extracurricular"]
+RUNS = 300
+
+
+def pages(items: int):
+    rng = random.Random(7)
+    now = datetime(2024, 6, 1, 12, 0, 0)
+    schools = [SchoolSummary.model_construct(
+        id=i, name=f"School {i}", address=f"{i} Main Road", city=rng.choice(CITIES), state="State",
+        zip_code=f"{rng.randint(110001, 855117)}", phone="+91 20 5555 0000", email=f"office{i}@school.example",
+        website=f"https://school{i}.example", board=rng.choice(BOARDS), school_type="Private",
+        grade_levels="Nursery to 12", enrollment=rng.randint(100, 4000), student_teacher_ratio=round(rng.uniform(12, 40), 1),
+        medium_of_instruction="English", latitude=rng.uniform(8, 30), longitude=rng.uniform(70, 90), is_active=True,
+        created_at=now - timedelta(days=i), updated_at=now, average_rating=round(rng.uniform(1, 5), 2),
+        total_reviews=rng.randint(0, 200), ratings_by_category={name: round(rng.uniform(1, 5), 2) for name in CATEGORIES},
+    ) for i in range(items)]
+    reviews = [Review(
+        id=i, school_id=rng.randint(1, 20000), member_id=rng.randint(1, 5000), overall_rating=rng.randint(1, 5),
+        title="Good school", content="Teachers are supportive and the campus is well kept. " * 4, is_anonymous=False,
+        status="approved", is_verified=True, created_at=now - timedelta(hours=i), updated_at=None,
+    ) for i in range(items)]
+    usage = [{
+        "id": i, "endpoint": "/api/v1/schools/", "method": "GET", "ip_address": f"10.0.{i % 256}.{i // 256}",
+        "user_agent": "python-requests/2.31", "response_status": 200, "created_at": now - timedelta(seconds=i),
+    } for i in range(items)]
+    return schools, reviews, usage
+
+
+def timed(fn):
+    fn()
+    samples = []
+    for _ in range(RUNS):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), sorted(samples)[int(RUNS * 0.95) - 1]
+
+
+def default_response(field, content) -> bytes:
+    """FastAPI's serialize_response plus the stock JSONResponse; the coroutine never awaits, so step it directly"""
+    coroutine = serialize_response(field=field, response_content=content)
+    try:
+        coroutine.send(None)
+    except StopIteration as done:
+        return JSONResponse(done.value).body
+    raise RuntimeError("serialize_response awaited")
+
+
+def main():
+    items = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    schools, reviews, usage = pages(items)
+    school_field = create_response_field(name="response", type_=List[SchoolSummary])
+    review_field = create_response_field(name="response", type_=List[Review])
+    cases = {
+        "schools (SchoolSummary)": (lambda: default_response(school_field, schools),
+                                    lambda: model_response(List[SchoolSummary], schools).body),
+        "reviews (Review)": (lambda: default_response(review_field, reviews),
+                             lambda: model_response(List[Review], reviews).body),
+        "api key usage (dicts)": (lambda: JSONResponse(jsonable_encoder(usage)).body,
+                                  lambda: FastJSONResponse(usage).body),
+    }
+    print(f"{items} items per page")
+    for label, (default, fast) in cases.items():
+        assert default() == fast(), label
+        default_median, default_p95 = timed(default)
+        fast_median, fast_p95 = timed(fast)
+        print(f"  {label:<24} default {default_median:6.3f} ms median {default_p95:6.3f} ms p95   "
+              f"fast {fast_median:6.3f} ms median {fast_p95:6.3f} ms p95   ({default_median / fast_median:4.1f}x, {len(fast()) / 1024:.0f} KiB)")
+
+
+if __name__ == "__main__":
+    main()
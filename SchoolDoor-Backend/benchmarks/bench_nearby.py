@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark "schools near me".
+Loads a synthetic catalog of located schools, clustered around Indian
+cities, into an in-memory SQLite database and times GET /schools/nearby
+end to end (grid lookup, distance sort, SQL filters, page of schools,
+serialization) for a few radii and filters in the densest city.
+
+Usage: python benchmarks/bench_nearby.py [schools]
+"""
+import logging
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("PERPLEXITY_API_KEY", "benchmark")
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.database import Base, get_db
+import app.models_member  # noqa: F401  (tables referenced by reviews)
+from app.main import app
+from app.models import School, SchoolRatingStats
+from app.services.geo_service import geo_service
+
+# (name, latitude, longitude, share of schools, spread in degrees)
+CITIES = [
+    ("Delhi", 28.61, 77.21, 0.22, 0.15), ("Mumbai", 19.08, 72.88, 0.18, 0.12), ("Bengaluru", 12.97, 77.59, 0.14, 0.12),
+    ("Pune", 18.52, 73.86, 0.10, 0.10), ("Chennai", 13.08, 80.27, 0.10, 0.10), ("Hyderabad", 17.39, 78.49, 0.10, 0.12),
+    ("Kolkata", 22.57, 88.36, 0.08, 0.10), ("Jaipur", 26.91, 75.79, 0.08, 0.08),
+]
+BOARDS = ["CBSE", "ICSE", "State Board", "IB", "IGCSE"]
+BATCH = 50000
+RUNS = 50
+
+
+def build(schools: int):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    db = factory()
+    rng = random.Random(7)
+    weights = [share for _, _, _, share, _ in CITIES]
+    rows, stats = [], []
+    for school_id in range(1, schools + 1):
+        city, latitude, longitude, _, spread = rng.choices(CITIES, weights)[0]
+        rows.append({"id": school_id, "name": f"School {school_id}", "city": city, "board": rng.choice(BOARDS),
+                     "latitude": rng.gauss(latitude, spread), "longitude": rng.gauss(longitude, spread), "is_active": True})
+        if rng.random() < 0.7:
+            count = rng.randint(1, 40)
+            stats.append({"school_id": school_id, "category_id": None, "rating_count": count,
+                          "rating_sum": count * min(5.0, max(1.0, rng.gauss(3.6, 0.6)))})
+        if len(rows) >= BATCH:
+            db.execute(insert(School), rows)
+            rows = []
+    if rows:
+        db.execute(insert(School), rows)
+    db.execute(insert(SchoolRatingStats), stats)
+    db.commit()
+    return factory
+
+
+def timed(fn):
+    fn()
+    samples = []
+    for _ in range(RUNS):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), sorted(samples)[int(RUNS * 0.95) - 1]
+
+
+def main():
+    schools = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    factory = build(schools)
+    logging.disable(logging.INFO)
+
+    def override_get_db():
+        session = factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    client = TestClient(app)
+    started = time.perf_counter()
+    geo_service.load(factory())
+    print(f"{schools} schools: grid loaded in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    point = {"latitude": 28.63, "longitude": 77.22}  # Central Delhi, the densest cluster
+    cases = {
+        "2 km": {"radius_km": 2},
+        "10 km": {"radius_km": 10},
+        "25 km": {"radius_km": 25},
+        "10 km, board": {"radius_km": 10, "board": "IB"},
+        "10 km, board + min rating": {"radius_km": 10, "board": "IB", "min_rating": 4.5},
+        "10 km, page 5": {"radius_km": 10, "offset": 80},
+    }
+    for label, params in cases.items():
+        response = client.get("/api/v1/schools/nearby", params={**point, **params})
+        assert response.status_code == 200, response.text
+        ids, _ = geo_service.within(factory(), point["latitude"], point["longitude"], params["radius_km"])
+        median, p95 = timed(lambda: client.get("/api/v1/schools/nearby", params={**point, **params}))
+        print(f"  {label:<28} {median:7.2f} ms median {p95:7.2f} ms p95  ({ids.size} in radius)")
+    app.dependency_overrides.clear()
+
+
+if __name__ == "__main__":
+    main()
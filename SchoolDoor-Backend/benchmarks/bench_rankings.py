@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Benchmark school rankings.
+Loads a synthetic catalog into an in-memory SQLite database and times
+get_school_rankings for the overall, category, city and board scopes, both
+from the precomputed leaderboards and from the school_rating_stats rollup
+they fall back to. Neither depends on the number of raw ratings; the rollup
+scales with schools x categories, a leaderboard page with its size only.
+Also times one incremental leaderboard update after a school's rating changes.
+
+Usage: python benchmarks/bench_rankings.py [schools]
+"""
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("PERPLEXITY_API_KEY", "benchmark")
+
+from sqlalchemy import create_engine, insert
+from app.config import settings
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.database import Base
+import app.models_member  # noqa: F401  (tables referenced by reviews)
+from app.models import School, RatingCategory, SchoolRatingStats
+from app.services.rating_service import RatingService
+from app.services.rating_stats_service import rating_stats_service
+from app.services.leaderboard_service import leaderboard_service
+
+CITIES = ["Pune", "Mumbai", "Delhi", "Bengaluru", "Chennai", "Hyderabad", "Kolkata", "Jaipur", "Lucknow", "Indore"]
+BOARDS = ["CBSE", "ICSE", "State Board", "IB", "IGCSE"]
+CATEGORIES = ["academics", "facilities", "teachers", "safety", "sports", "fees", "transport"]
+RATINGS_PER_SCHOOL = 100  # ~10M ratings behind 100k schools
+RUNS = 20
+
+
+def build(schools: int):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    rng = random.Random(7)
+    db.execute(insert(RatingCategory), [{"id": i, "name": name} for i, name in enumerate(CATEGORIES, 1)])
+    db.execute(insert(School), [
+        {"id": i, "name": f"School {i}", "city": rng.choice(CITIES), "state": "State", "board": rng.choice(BOARDS), "is_active": True}
+        for i in range(1, schools + 1)
+    ])
+    rows = []
+    for school_id in range(1, schools + 1):
+        quality = rng.uniform(2.0, 4.8)
+        for category_id in [None] + list(range(1, len(CATEGORIES) + 1)):
+            count = rng.randint(1, RATINGS_PER_SCHOOL // 4)
+            rows.append({"school_id": school_id, "category_id": category_id, "rating_count": count,
+                         "rating_sum": count * min(5.0, max(1.0, rng.gauss(quality, 0.4)))})
+        if len(rows) >= 50000:
+            db.execute(insert(SchoolRatingStats), rows)
+            rows = []
+    if rows:
+        db.execute(insert(SchoolRatingStats), rows)
+    db.commit()
+    rating_stats_service.rescore(db)
+    return db
+
+
+def timed(fn):
+    fn()
+    samples = []
+    for _ in range(RUNS):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    schools = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    db = build(schools)
+    service = RatingService(db)
+    print(f"{schools} schools, {db.query(SchoolRatingStats).count()} rollup rows")
+    scopes = {
+        "overall": {},
+        "overall, page 10": {"offset": 90},
+        "category": {"category": "academics"},
+        "city": {"city": "Pune"},
+        "category + city + board": {"category": "academics", "city": "Pune", "board": "CBSE"},
+        "overall, min 20 reviews": {"min_reviews": 20},
+    }
+    leaderboard_size = settings.leaderboard_size
+    print(f"  {'':<28} {'leaderboard':>11} {'rollup':>11}")
+    for label, filters in scopes.items():
+        timings = []
+        for size in (leaderboard_size, 0):
+            # A size the leaderboards were not built with forces the rollup query
+            settings.leaderboard_size = size
+            leaderboard_service.invalidate()
+            timings.append(timed(lambda: service.get_school_rankings(limit=10, **filters)))
+        print(f"  {label:<28} {timings[0]:8.2f} ms {timings[1]:8.2f} ms (median of {RUNS})")
+    settings.leaderboard_size = leaderboard_size
+    leaderboard_service.invalidate()
+
+    school_ids = iter(range(1, schools + 1))
+
+    def update_one():
+        school_id = next(school_ids)
+        db.query(SchoolRatingStats).filter(SchoolRatingStats.school_id == school_id).update(
+            {SchoolRatingStats.score: 4.99}, synchronize_session=False
+        )
+        leaderboard_service.update_school(db, school_id)
+        db.commit()
+
+    print(f"  {'incremental update':<28} {timed(update_one):8.2f} ms (one school onto every board it belongs to)")
+
+if __name__ == "__main__":
+    main()
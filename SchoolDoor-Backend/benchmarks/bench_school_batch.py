@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Benchmark fetching a set of school cards.
+Uses the synthetic catalog of bench_school_lists and times getting N
+schools with ratings one /schools/{id} call at a time against a single
+GET or POST /schools/batch, counting the SQL statements each way.
+
+Usage: python benchmarks/bench_school_batch.py [schools]   (default: 20000)
+"""
+import logging
+import random
+import statistics
+import sys
+import time
+
+from bench_school_lists import build
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from app.database import get_db
+from app.main import app
+
+RUNS = 10
+
+
+def measure(fn, statements):
+    fn()
+    statements.clear()
+    fn()
+    queries = len(statements)
+    samples = []
+    for _ in range(RUNS):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), queries
+
+
+def main():
+    schools = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    factory = build(schools)
+    logging.disable(logging.INFO)
+    statements = []
+    event.listen(factory.kw["bind"], "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    def override_get_db():
+        session = factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    client = TestClient(app)
+    rng = random.Random(3)
+    print(f"{schools} schools")
+    for count in (20, 100, 500):
+        ids = rng.sample(range(1, schools + 1), count)
+        cases = {
+            "one by one": lambda: [client.get(f"/api/v1/schools/{school_id}") for school_id in ids],
+            "GET batch": lambda: client.get("/api/v1/schools/batch", params={"ids": ",".join(map(str, ids))}),
+            "POST batch": lambda: client.post("/api/v1/schools/batch", json=ids),
+        }
+        for label, fn in cases.items():
+            median, queries = measure(fn, statements)
+            print(f"  {count:>3} ids, {label:<11} {median:9.2f} ms median {queries:6} queries")
+    app.dependency_overrides.clear()
+
+
+if __name__ == "__main__":
+    main()
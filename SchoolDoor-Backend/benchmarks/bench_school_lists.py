@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Benchmark the public school list, detail and stats endpoints.
+Loads a synthetic catalog whose schools carry realistically sized
+facilities, programs and exam result JSON, with reviews and category
+ratings, into an in-memory SQLite database, then measures each endpoint
+end to end through TestClient: median and p95 latency, and the peak
+memory allocated while serving one request (tracemalloc).
+
+Usage: python benchmarks/bench_school_lists.py [schools]   (default: 20000)
+"""
+import logging
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("PERPLEXITY_API_KEY", "benchmark")
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.database import Base, get_db
+import app.models_member  # noqa: F401  (tables referenced by reviews)
+from app.main import app
+from app.models import School, Review, Rating, RatingCategory
+from app.services.rating_stats_service import rating_stats_service
+
+CITIES = ["Pune", "Mumbai", "Delhi", "Bengaluru", "Chennai", "Hyderabad", "Kolkata", "Jaipur"]
+BOARDS = ["CBSE", "ICSE", "State Board", "IB", "IGCSE"]
+CATEGORIES = ["academics", "facilities", "teachers", "safety", "extracurricular"]
+FACILITIES = {
+    "sports": ["Cricket ground", "Swimming pool", "Basketball court", "Tennis courts", "Yoga hall", "Skating rink"],
+    "labs": ["Physics lab", "Chemistry lab", "Biology lab", "Computer lab", "Robotics lab", "Atal Tinkering lab"],
+    "arts": ["Music room", "Dance studio", "Art room", "Drama theatre"],
+    "infrastructure": ["Library with 20,000 books", "Auditorium", "Smart classrooms", "GPS-enabled transport", "Infirmary", "CCTV"],
+}
+PROGRAMS = ["Robotics club", "Model United Nations", "Olympiad coaching", "Coding club", "Debate society", "Eco club",
+            "Spanish", "French", "Community service", "Astronomy club", "Chess club", "Entrepreneurship cell"]
+BATCH = 5000
+RUNS = 30
+
+ENDPOINTS = {
+    "list, 20 per page": "/api/v1/schools/?limit=20",
+    "list, 100 per page": "/api/v1/schools/?limit=100",
+    "list, city + board": "/api/v1/schools/?city=pune&board=cbse&limit=20",
+    "detail": "/api/v1/schools/{school_id}",
+    "stats overview": "/api/v1/schools/stats/overview",
+}
+
+
+def exam_results(rng):
+    return {
+        str(year): {"pass_percentage": round(rng.uniform(80, 100), 1), "distinctions": rng.randint(10, 200),
+                    "toppers": [{"name": f"Student {rng.randint(1, 999)}", "score": round(rng.uniform(90, 100), 1)} for _ in range(3)]}
+        for year in range(2019, 2025)
+    }
+
+
+def build(schools: int):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    db = factory()
+    rng = random.Random(7)
+    db.execute(insert(RatingCategory), [{"id": index, "name": name} for index, name in enumerate(CATEGORIES, start=1)])
+    review_id = 0
+    for start in range(1, schools + 1, BATCH):
+        rows, reviews, ratings = [], [], []
+        for i in range(start, min(start + BATCH, schools + 1)):
+            rows.append({
+                "id": i, "name": f"School {i}", "address": f"{i} Main Road", "city": rng.choice(CITIES), "state": "State",
+                "zip_code": f"{rng.randint(110001, 855117)}", "board": rng.choice(BOARDS), "school_type": "Private",
+                "grade_levels": "Nursery to 12", "enrollment": rng.randint(100, 4000), "student_teacher_ratio": rng.uniform(12, 40),
+                "facilities": {group: rng.sample(items, rng.randint(2, len(items))) for group, items in FACILITIES.items()},
+                "programs": rng.sample(PROGRAMS, rng.randint(3, len(PROGRAMS))),
+                "board_exam_results": {"10th": exam_results(rng), "12th": exam_results(rng)},
+                "competitive_exam_results": {"JEE": exam_results(rng), "NEET": exam_results(rng)},
+                "medium_of_instruction": "English", "is_active": True,
+            })
+            for _ in range(rng.choice([0, 0, 1, 2, 3, 5])):
+                review_id += 1
+                reviews.append({"id": review_id, "school_id": i, "overall_rating": rng.randint(1, 5), "content": "Review", "status": "approved"})
+                ratings.extend({"school_id": i, "category_id": category, "rating_value": rng.randint(1, 5)}
+                               for category in rng.sample(range(1, len(CATEGORIES) + 1), 3))
+        db.execute(insert(School), rows)
+        if reviews:
+            db.execute(insert(Review), reviews)
+            db.execute(insert(Rating), ratings)
+    db.commit()
+    rating_stats_service.rebuild(db)
+    db.close()
+    return factory
+
+
+def measure(client, url):
+    assert client.get(url).status_code == 200, url
+    samples = []
+    for _ in range(RUNS):
+        started = time.perf_counter()
+        client.get(url)
+        samples.append((time.perf_counter() - started) * 1000)
+    tracemalloc.start()
+    client.get(url)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(samples), sorted(samples)[int(RUNS * 0.95) - 1], peak / 2 ** 10
+
+
+def main():
+    schools = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    factory = build(schools)
+    logging.disable(logging.INFO)
+
+    def override_get_db():
+        session = factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    client = TestClient(app)
+    print(f"{schools} schools")
+    for label, url in ENDPOINTS.items():
+        median, p95, peak_kib = measure(client, url.format(school_id=schools // 2))
+        print(f"  {label:<22} {median:8.2f} ms median {p95:8.2f} ms p95 {peak_kib:9.0f} KiB peak")
+    app.dependency_overrides.clear()
+
+
+if __name__ == "__main__":
+    main()
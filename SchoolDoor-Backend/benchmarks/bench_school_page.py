@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Benchmark rendering one school page.
+Uses the synthetic catalog of bench_school_lists and times the four calls
+a school page made (/schools/{id}, /reviews, /ratings, /trends) against
+one /schools/{id}/page, and a revalidation with If-None-Match, counting
+the SQL statements each way.
+
+Usage: python benchmarks/bench_school_page.py [schools]   (default: 20000)
+"""
+import logging
+import random
+import statistics
+import sys
+import time
+
+from bench_school_lists import build
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from app.database import get_db
+from app.main import app
+from app.services.rating_trend_service import rating_trend_service
+
+RUNS = 30
+
+
+def main():
+    schools = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    factory = build(schools)
+    db = factory()
+    rating_trend_service.rebuild(db)
+    db.close()
+    logging.disable(logging.INFO)
+    statements = []
+    event.listen(factory.kw["bind"], "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    def override_get_db():
+        session = factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    client = TestClient(app)
+    rng = random.Random(5)
+    school_ids = rng.sample(range(1, schools + 1), RUNS)
+    etags = {school_id: client.get(f"/api/v1/schools/{school_id}/page").headers["etag"] for school_id in school_ids}
+    cases = {
+        "four calls": lambda school_id: [client.get(f"/api/v1/schools/{school_id}{path}") for path in ("", "/reviews", "/ratings", "/trends")],
+        "page bundle": lambda school_id: client.get(f"/api/v1/schools/{school_id}/page"),
+        "page, 304": lambda school_id: client.get(f"/api/v1/schools/{school_id}/page", headers={"If-None-Match": etags[school_id]}),
+    }
+    print(f"{schools} schools")
+    for label, fn in cases.items():
+        samples = []
+        statements.clear()
+        for school_id in school_ids:
+            started = time.perf_counter()
+            fn(school_id)
+            samples.append((time.perf_counter() - started) * 1000)
+        print(f"  {label:<12} {statistics.median(samples):7.2f} ms median {sorted(samples)[int(RUNS * 0.95) - 1]:7.2f} ms p95 "
+              f"{len(statements) / RUNS:5.1f} queries")
+    app.dependency_overrides.clear()
+
+
+if __name__ == "__main__":
+    main()
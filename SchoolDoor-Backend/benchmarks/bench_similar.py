@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Benchmark "similar schools".
+Loads a synthetic catalog into an in-memory SQLite database and times the
+similar-schools index: the full build (fit and encode every school), a
+top 10 query straight from similar_school_service and through
+GET /schools/{id}/similar, and a delta refresh after 100 schools changed.
+
+Usage: python benchmarks/bench_similar.py [schools ...]   (default: 10000 100000)
+"""
+import logging
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("PERPLEXITY_API_KEY", "benchmark")
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.config import settings
+from app.database import Base, get_db
+import app.models_member  # noqa: F401  (tables referenced by reviews)
+from app.main import app
+from app.models import School, SchoolRatingStats
+from app.services.school_tag_service import school_tag_service
+from app.services.similar_school_service import similar_school_service
+
+CITIES = [("Delhi", 28.61, 77.21), ("Mumbai", 19.08, 72.88), ("Bengaluru", 12.97, 77.59), ("Pune", 18.52, 73.86),
+          ("Chennai", 13.08, 80.27), ("Hyderabad", 17.39, 78.49), ("Kolkata", 22.57, 88.36), ("Jaipur", 26.91, 75.79)]
+BOARDS = ["CBSE", "ICSE", "State Board", "IB", "IGCSE"]
+MEDIUMS = ["English", "Hindi", "Marathi", "Tamil", "Kannada"]
+GRADES = ["Nursery to 12", "LKG to 10", "1 to 12", "Pre-K to 5", "6 to 12", "1 to 8"]
+FACILITIES = {
+    "sports": ["Cricket ground", "Swimming pool", "Basketball court", "Tennis", "Yoga room"],
+    "labs": ["Physics lab", "Chemistry lab", "Computer lab", "Robotics lab"],
+    "arts": ["Music room", "Dance studio", "Art room"],
+    "infrastructure": ["Library", "Auditorium", "Smart classrooms", "Transport", "Hostel"],
+}
+BATCH = 50000
+RUNS = 50
+
+
+def build(schools: int):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    db = factory()
+    rng = random.Random(7)
+    first_added = datetime.utcnow() - timedelta(days=366)
+    spacing = timedelta(days=365) / schools
+    for start in range(1, schools + 1, BATCH):
+        ids = range(start, min(start + BATCH, schools + 1))
+        rows, stats = [], []
+        for i in ids:
+            city, latitude, longitude = rng.choice(CITIES)
+            rows.append({
+                "id": i, "name": f"School {i}", "city": city, "board": rng.choice(BOARDS), "medium_of_instruction": rng.choice(MEDIUMS),
+                "grade_levels": rng.choice(GRADES), "enrollment": rng.randint(100, 4000), "student_teacher_ratio": rng.uniform(12, 40),
+                "facilities": {group: rng.sample(items, rng.randint(0, len(items))) for group, items in FACILITIES.items()},
+                "latitude": rng.gauss(latitude, 0.1), "longitude": rng.gauss(longitude, 0.1), "is_active": rng.random() > 0.05,
+                "created_at": first_added + i * spacing,
+            })
+            if rng.random() < 0.7:
+                count = rng.randint(1, 40)
+                stats.append({"school_id": i, "category_id": None, "rating_count": count,
+                              "rating_sum": count * min(5.0, max(1.0, rng.gauss(3.6, 0.6)))})
+        db.execute(insert(School), rows)
+        db.execute(insert(SchoolRatingStats), stats)
+    db.commit()
+    school_tag_service.rebuild(db)
+    return factory
+
+
+def timed(fn):
+    fn()
+    samples = []
+    for _ in range(RUNS):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), sorted(samples)[int(RUNS * 0.95) - 1]
+
+
+def run(schools: int):
+    factory = build(schools)
+    db = factory()
+    settings.similar_index_refresh_seconds = 1e9
+    started = time.perf_counter()
+    similar_school_service.load(db)
+    print(f"{schools} schools: index built in {(time.perf_counter() - started) * 1000:.0f} ms "
+          f"({similar_school_service._matrix.shape[1]} features, {similar_school_service._matrix.nbytes / 2 ** 20:.1f} MiB)")
+
+    def override_get_db():
+        session = factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    client = TestClient(app)
+    rng = random.Random(11)
+    median, p95 = timed(lambda: similar_school_service.similar(db, rng.randint(1, schools), 10))
+    print(f"  {'top 10, service':<28} {median:7.2f} ms median {p95:7.2f} ms p95")
+    median, p95 = timed(lambda: client.get(f"/api/v1/schools/{rng.randint(1, schools)}/similar"))
+    print(f"  {'top 10, endpoint':<28} {median:7.2f} ms median {p95:7.2f} ms p95")
+    app.dependency_overrides.clear()
+
+    for school in db.query(School).filter(School.id.in_(rng.sample(range(1, schools + 1), 100))):
+        school.board = rng.choice(BOARDS)
+        school.enrollment = rng.randint(100, 4000)
+        school.facilities = {"sports": rng.sample(FACILITIES["sports"], 2)}
+        school_tag_service.refresh_school(db, school)
+    db.commit()
+    started = time.perf_counter()
+    applied = similar_school_service.refresh(db)
+    print(f"  {'delta refresh (100 changed)':<28} {(time.perf_counter() - started) * 1000:7.2f} ms  ({applied} schools re-encoded)")
+    similar_school_service.invalidate()
+    db.close()
+
+
+def main():
+    logging.disable(logging.INFO)
+    for schools in [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000]:
+        run(schools)
+
+
+if __name__ == "__main__":
+    main()